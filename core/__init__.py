@@ -232,6 +232,10 @@ def create_app(test_config=None):
     # Register context processors
     _register_context_processors(app)
 
+    # Register anonymous page cache (before the maintenance hook, so cache
+    # hits skip it)
+    _register_page_cache(app)
+
     # Register maintenance mode hook
     _register_maintenance_mode(app)
 
@@ -252,9 +256,12 @@ def create_app(test_config=None):
     def index():
         return redirect(url_for('buy.buy'))
 
-    # Start background spot snapshot scheduler (skipped when TESTING=True)
+    # Start background spot snapshot scheduler and build the dropdown
+    # options off the request path (skipped when TESTING=True)
     if not (test_config and test_config.get('TESTING')):
         _start_spot_scheduler(app)
+        from routes.category_options import warm_dropdown_options
+        warm_dropdown_options()
 
     return app
 
@@ -272,6 +279,72 @@ def _start_spot_scheduler(app):
         )
 
 
+def _register_page_cache(app):
+    """
+    Serve anonymous GETs of the landing, /buy and bucket pages from the
+    process-local page cache (services/page_cache_service.py), and store the
+    responses of misses.  Logged-in visitors and requests with pending flash
+    messages bypass it.
+
+    The visitor's CSRF token is rendered into every page, so it is stored as
+    a placeholder and the requesting visitor's own token is put back on a hit.
+    """
+    from flask import g, request, session
+    from services.page_cache_service import (
+        CACHEABLE_ENDPOINTS, get_page, page_key, page_stamp, store_page,
+    )
+
+    csrf_placeholder = b'__page_cache_csrf_token__'
+    csrf_field = app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')
+    # Per-request headers, set again on every response
+    skipped_headers = frozenset(['content-length', 'set-cookie', 'x-page-cache'])
+
+    def _cacheable():
+        return (
+            request.method == 'GET'
+            and request.endpoint in CACHEABLE_ENDPOINTS
+            and 'user_id' not in session
+            and '_flashes' not in session
+        )
+
+    @app.before_request
+    def serve_cached_page():
+        if not _cacheable():
+            return None
+
+        key = page_key(request.endpoint, request.path, request.args.items(multi=True))
+        stamp = page_stamp(request.endpoint, request.view_args or {}, request.args)
+        entry = get_page(key, stamp)
+        if entry is None:
+            g.page_cache = (key, stamp)
+            return None
+
+        body = entry['body']
+        if csrf_placeholder in body:
+            from flask_wtf.csrf import generate_csrf
+            body = body.replace(csrf_placeholder, generate_csrf().encode('utf-8'))
+        response = app.response_class(body, status=entry['status'], headers=entry['headers'])
+        response.headers['X-Page-Cache'] = 'HIT'
+        return response
+
+    @app.after_request
+    def store_cached_page(response):
+        cached = g.pop('page_cache', None)
+        if (cached is None or response.status_code not in (200, 301, 302)
+                or response.direct_passthrough or '_flashes' in session):
+            return response
+
+        body = response.get_data()
+        token = g.get(csrf_field)
+        if token:
+            body = body.replace(token.encode('utf-8'), csrf_placeholder)
+        headers = [(name, value) for name, value in response.headers
+                   if name.lower() not in skipped_headers]
+        store_page(*cached, response.status_code, headers, body)
+        response.headers['X-Page-Cache'] = 'MISS'
+        return response
+
+
 def _register_maintenance_mode(app):
     """
     Register a before_request hook that blocks transactional actions when
@@ -669,6 +742,7 @@ def _register_cli_commands(app):
                 ('portfolio_snapshots', 'Portfolio snapshots'),
                 ('bucket_price_history', 'Bucket price history'),
                 ('ratings', 'Ratings'),
+                ('user_stats', 'User stats'),
                 ('messages', 'Messages/conversations'),
                 ('notifications', 'Notifications'),
                 ('order_items', 'Order items'),
@@ -704,6 +778,10 @@ def _register_cli_commands(app):
             conn.commit()
             conn.close()
 
+            # Drop the values of the deleted categories from every worker's dropdowns
+            from routes.category_options import invalidate_dropdown_cache
+            invalidate_dropdown_cache()
+
             click.echo('\n  Marketplace data cleared successfully!')
             click.echo(f'\nTotal records deleted: {sum(deleted_counts.values()):,}')
             click.echo('\n  Summary:')
@@ -830,6 +908,27 @@ def _register_cli_commands(app):
             click.echo(f'  Database error: {e}', err=True)
             return 1
 
+    @app.cli.command('rebuild-user-stats')
+    @with_appcontext
+    def rebuild_user_stats_command():
+        """
+        Recompute every user's precomputed rating and activity stats.
+        """
+        from services.user_stats_service import create_user_stats_table, rebuild_user_stats
+        try:
+            conn = get_db_connection()
+            create_user_stats_table(conn)
+            count = rebuild_user_stats(conn)
+            conn.commit()
+            conn.close()
+
+            click.echo(f'  Rebuilt user stats for {count:,} users')
+            return 0
+
+        except Exception as e:
+            click.echo(f'  Database error: {e}', err=True)
+            return 1
+
 
 def print_startup_diagnostics():
     """Print environment configuration status on startup (masked for security)"""
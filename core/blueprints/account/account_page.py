@@ -60,6 +60,28 @@ def account():
     spot_data = get_current_spot_prices()
     spot_prices = spot_data['prices']
 
+    # Bid photos: first listing photo in each bid's bucket, one query for all bids
+    bid_bucket_ids = sorted({row['bucket_id'] for row in bids_raw if row['bucket_id']})
+    bucket_photos = {}
+    if bid_bucket_ids:
+        placeholders = ','.join('?' * len(bid_bucket_ids))
+        bucket_photos = {
+            row['bucket_id']: row['file_path'] for row in conn.execute(f'''
+                SELECT c.bucket_id, lp.file_path
+                FROM listing_photos lp
+                JOIN listings l ON lp.listing_id = l.id
+                JOIN categories c ON l.category_id = c.id
+                WHERE lp.id IN (
+                    SELECT MIN(lp2.id)
+                    FROM listing_photos lp2
+                    JOIN listings l2 ON lp2.listing_id = l2.id
+                    JOIN categories c2 ON l2.category_id = c2.id
+                    WHERE c2.bucket_id IN ({placeholders})
+                    GROUP BY c2.bucket_id
+                )
+            ''', bid_bucket_ids).fetchall()
+        }
+
     # Process each bid to calculate effective prices
     bids = []
     for bid_row in bids_raw:
@@ -109,20 +131,8 @@ def account():
         bid_metal = bid.get('metal', '').lower() if bid.get('metal') else ''
         bid['current_spot_price'] = spot_prices.get(bid_metal, 0)
 
-        # Get a photo for this bid from listings in the same bucket
-        if bid.get('bucket_id'):
-            photo_row = conn.execute('''
-                SELECT lp.file_path
-                FROM listing_photos lp
-                JOIN listings l ON lp.listing_id = l.id
-                JOIN categories c ON l.category_id = c.id
-                WHERE c.bucket_id = ?
-                ORDER BY lp.id ASC
-                LIMIT 1
-            ''', (bid['bucket_id'],)).fetchone()
-            bid['photo_path'] = photo_row['file_path'] if photo_row else None
-        else:
-            bid['photo_path'] = None
+        # Photo from listings in the same bucket
+        bid['photo_path'] = bucket_photos.get(bid.get('bucket_id'))
 
         # Format bid created_at timestamp
         if bid.get('created_at'):
@@ -7,8 +7,11 @@ SECURITY: All routes verify user is participant (buyer or seller) in the order
 to prevent IDOR attacks.
 """
 
+import json
+
 from flask import session, jsonify, url_for
 from database import get_db_connection
+from services.user_stats_service import get_user_stats, repeat_pct
 from collections import defaultdict
 from datetime import datetime
 
@@ -143,20 +146,28 @@ def order_sellers(order_id):
         SELECT
           u.id                     AS seller_id,
           u.username               AS username,
-          COALESCE((SELECT AVG(r.rating)
-                    FROM ratings r
-                    WHERE r.ratee_id = u.id), 0) AS rating,
-          COALESCE((SELECT COUNT(r.id)
-                    FROM ratings r
-                    WHERE r.ratee_id = u.id), 0) AS num_reviews,
+          u.first_name             AS first_name,
+          u.last_name              AS last_name,
+          u.created_at             AS created_at,
+          COALESCE(u.is_metex_guaranteed, 0) AS is_metex_guaranteed,
+          COALESCE(us.rating_avg, 0)   AS rating,
+          COALESCE(us.rating_count, 0) AS num_reviews,
+          COALESCE(us.seller_transaction_count, 0)  AS transaction_count,
+          COALESCE(us.seller_order_count, 0)        AS order_count,
+          COALESCE(us.seller_fulfilled_count, 0)    AS fulfilled_count,
+          COALESCE(us.seller_buyer_count, 0)        AS total_buyers,
+          COALESCE(us.seller_repeat_buyer_count, 0) AS repeat_buyers,
+          us.top_product_lines     AS top_product_lines,
           SUM(oi.quantity)         AS total_quantity,
           AVG(oi.price_each)       AS avg_price,
           SUM(oi.quantity * oi.price_each) AS total_price
         FROM order_items oi
         JOIN listings l      ON oi.listing_id = l.id
         JOIN users u         ON l.seller_id = u.id
+        LEFT JOIN user_stats us ON us.user_id = u.id
         WHERE oi.order_id = ?
-        GROUP BY u.id, u.username
+        GROUP BY u.id, u.username, u.first_name, u.last_name, u.created_at, u.is_metex_guaranteed,
+                 us.user_id
         ORDER BY u.username
     """, (order_id,)).fetchall()
 
@@ -176,45 +187,38 @@ def order_sellers(order_id):
             'total_price': row['total_price'] or 0
         }
 
-        # Get user info (member since, display name)
-        user_info = conn.execute('''
-            SELECT username, first_name, last_name, created_at
-            FROM users WHERE id = ?
-        ''', (seller_id,)).fetchone()
-
-        if user_info:
-            # Display name: use first_name + last_name if available, else username
-            display_name = f"{user_info['first_name'] or ''} {user_info['last_name'] or ''}".strip()
-            if not display_name:
-                display_name = user_info['username']
-            seller_data['display_name'] = display_name
+        # Display name: use first_name + last_name if available, else username
+        display_name = f"{row['first_name'] or ''} {row['last_name'] or ''}".strip()
+        if not display_name:
+            display_name = row['username']
+        seller_data['display_name'] = display_name
 
-            # Member for (account age as human-readable duration)
-            raw_date = user_info['created_at']
-            if raw_date:
-                try:
-                    dt = datetime.fromisoformat(str(raw_date).replace('Z', ''))
-                    # Strip timezone to ensure naive comparison with datetime.now()
-                    if dt.tzinfo is not None:
-                        dt = dt.replace(tzinfo=None)
-                    now = datetime.now()
-                    total_months = (now.year - dt.year) * 12 + (now.month - dt.month)
-                    if now.day < dt.day:
-                        total_months -= 1
-                    total_months = max(total_months, 0)
-                    yrs, mos = divmod(total_months, 12)
-                    if yrs > 0 and mos > 0:
-                        seller_data['member_since'] = f"{yrs} year{'s' if yrs != 1 else ''}, {mos} month{'s' if mos != 1 else ''}"
-                    elif yrs > 0:
-                        seller_data['member_since'] = f"{yrs} year{'s' if yrs != 1 else ''}"
-                    elif mos > 0:
-                        seller_data['member_since'] = f"{mos} month{'s' if mos != 1 else ''}"
-                    else:
-                        seller_data['member_since'] = '< 1 month'
-                except (ValueError, TypeError):
-                    seller_data['member_since'] = None
-            else:
+        # Member for (account age as human-readable duration)
+        raw_date = row['created_at']
+        if raw_date:
+            try:
+                dt = datetime.fromisoformat(str(raw_date).replace('Z', ''))
+                # Strip timezone to ensure naive comparison with datetime.now()
+                if dt.tzinfo is not None:
+                    dt = dt.replace(tzinfo=None)
+                now = datetime.now()
+                total_months = (now.year - dt.year) * 12 + (now.month - dt.month)
+                if now.day < dt.day:
+                    total_months -= 1
+                total_months = max(total_months, 0)
+                yrs, mos = divmod(total_months, 12)
+                if yrs > 0 and mos > 0:
+                    seller_data['member_since'] = f"{yrs} year{'s' if yrs != 1 else ''}, {mos} month{'s' if mos != 1 else ''}"
+                elif yrs > 0:
+                    seller_data['member_since'] = f"{yrs} year{'s' if yrs != 1 else ''}"
+                elif mos > 0:
+                    seller_data['member_since'] = f"{mos} month{'s' if mos != 1 else ''}"
+                else:
+                    seller_data['member_since'] = '< 1 month'
+            except (ValueError, TypeError):
                 seller_data['member_since'] = None
+        else:
+            seller_data['member_since'] = None
 
         # Check verified seller status (rating >= 4.7 and num_reviews > 100)
         rating = seller_data.get('rating') or 0
@@ -222,56 +226,19 @@ def order_sellers(order_id):
         seller_data['is_verified'] = rating >= 4.7 and num_reviews > 100
 
         # Metex Guaranteed designation
-        mg_row = conn.execute(
-            'SELECT COALESCE(is_metex_guaranteed, 0) AS v FROM users WHERE id = ?',
-            (seller_id,)
-        ).fetchone()
-        seller_data['is_metex_guaranteed'] = bool(mg_row and mg_row['v'])
+        seller_data['is_metex_guaranteed'] = bool(row['is_metex_guaranteed'])
 
         # Transaction count: only orders confirmed as delivered
-        transaction_result = conn.execute('''
-            SELECT COUNT(DISTINCT o.id) as transaction_count
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-              AND o.status IN ('Delivered', 'Complete')
-        ''', (seller_id,)).fetchone()
-        seller_data['transaction_count'] = transaction_result['transaction_count'] if transaction_result else 0
+        seller_data['transaction_count'] = row['transaction_count']
 
         # Fulfillment percentage (non-canceled orders / total orders)
-        fulfillment_result = conn.execute('''
-            SELECT
-                COUNT(DISTINCT o.id) AS total,
-                SUM(CASE WHEN o.canceled_at IS NULL THEN 1 ELSE 0 END) AS fulfilled
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-        ''', (seller_id,)).fetchone()
-        if fulfillment_result and fulfillment_result['total']:
-            seller_data['fulfillment_pct'] = round(
-                (fulfillment_result['fulfilled'] / fulfillment_result['total']) * 100
-            )
+        if row['order_count']:
+            seller_data['fulfillment_pct'] = round((row['fulfilled_count'] / row['order_count']) * 100)
         else:
             seller_data['fulfillment_pct'] = None
 
-        # Calculate repeat buyers percentage
-        buyers_result = conn.execute('''
-            SELECT o.buyer_id, COUNT(DISTINCT o.id) as order_count
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-            GROUP BY o.buyer_id
-        ''', (seller_id,)).fetchall()
-
-        total_buyers = len(buyers_result)
-        repeat_buyers = sum(1 for b in buyers_result if b['order_count'] >= 2)
-        if total_buyers > 0:
-            seller_data['repeat_buyers_pct'] = round((repeat_buyers / total_buyers) * 100)
-        else:
-            seller_data['repeat_buyers_pct'] = 0
+        # Repeat buyers percentage
+        seller_data['repeat_buyers_pct'] = repeat_pct(row['repeat_buyers'], row['total_buyers'])
 
         # Get ships from location (state from seller's first address)
         address_result = conn.execute('''
@@ -282,18 +249,8 @@ def order_sellers(order_id):
         else:
             seller_data['ships_from'] = None
 
-        # Get top 3 product lines (specializations) from sold items
-        specializations_result = conn.execute('''
-            SELECT c.product_line, COUNT(*) as sale_count
-            FROM order_items oi
-            JOIN listings l ON oi.listing_id = l.id
-            JOIN categories c ON l.category_id = c.id
-            WHERE l.seller_id = ? AND c.product_line IS NOT NULL AND c.product_line != ''
-            GROUP BY c.product_line
-            ORDER BY sale_count DESC
-            LIMIT 3
-        ''', (seller_id,)).fetchall()
-        seller_data['specializations'] = [s['product_line'] for s in specializations_result]
+        # Top 3 product lines (specializations) from sold items
+        seller_data['specializations'] = json.loads(row['top_product_lines'] or '[]')
 
         # Calculate median response time
         response_times = conn.execute('''
@@ -690,32 +647,9 @@ def order_buyer_info(order_id):
     else:
         member_since = None
 
-    # Rating and reviews
-    rating_row = conn.execute('''
-        SELECT COALESCE(AVG(r.rating), 0) AS rating,
-               COUNT(r.id) AS num_reviews
-        FROM ratings r WHERE r.ratee_id = ?
-    ''', (buyer_id,)).fetchone()
-
-    # Completed transaction count (as buyer)
-    tx_row = conn.execute('''
-        SELECT COUNT(DISTINCT o.id) AS transaction_count
-        FROM orders o
-        WHERE o.buyer_id = ? AND o.status IN ('Delivered', 'Complete')
-    ''', (buyer_id,)).fetchone()
-
-    # Repeat sellers percentage (sellers they've bought from more than once)
-    sellers_rows = conn.execute('''
-        SELECT l.seller_id, COUNT(DISTINCT o.id) AS order_count
-        FROM orders o
-        JOIN order_items oi ON o.id = oi.order_id
-        JOIN listings l ON oi.listing_id = l.id
-        WHERE o.buyer_id = ?
-        GROUP BY l.seller_id
-    ''', (buyer_id,)).fetchall()
-    total_sellers = len(sellers_rows)
-    repeat_sellers = sum(1 for s in sellers_rows if s['order_count'] >= 2)
-    repeat_sellers_pct = round((repeat_sellers / total_sellers) * 100) if total_sellers > 0 else 0
+    # Rating, completed transactions and repeat sellers (as buyer)
+    stats = get_user_stats(conn, [buyer_id])[buyer_id]
+    repeat_sellers_pct = repeat_pct(stats['buyer_repeat_seller_count'], stats['buyer_seller_count'])
 
     # Order quantity for this specific order
     qty_row = conn.execute('''
@@ -723,7 +657,7 @@ def order_buyer_info(order_id):
         FROM order_items oi WHERE oi.order_id = ?
     ''', (order_id,)).fetchone()
 
-    is_verified = (rating_row['rating'] or 0) >= 4.7 and (rating_row['num_reviews'] or 0) > 100
+    is_verified = (stats['rating_avg'] or 0) >= 4.7 and stats['rating_count'] > 100
 
     mg_row = conn.execute(
         'SELECT COALESCE(is_metex_guaranteed, 0) AS v FROM users WHERE id = ?',
@@ -737,9 +671,9 @@ def order_buyer_info(order_id):
         'buyer_id': buyer_id,
         'username': buyer_row['username'],
         'display_name': display_name,
-        'rating': float(rating_row['rating'] or 0),
-        'num_reviews': int(rating_row['num_reviews'] or 0),
-        'transaction_count': int(tx_row['transaction_count'] or 0),
+        'rating': float(stats['rating_avg'] or 0),
+        'num_reviews': stats['rating_count'],
+        'transaction_count': stats['buyer_transaction_count'],
         'repeat_sellers_pct': repeat_sellers_pct,
         'member_since': member_since,
         'quantity': int(qty_row['quantity'] or 0) if qty_row else 0,
@@ -13,6 +13,7 @@ Routes:
 - /analytics/operational - Operational metrics
 - /analytics/largest-transactions - Largest transactions
 - /analytics/categories - Category statistics
+- /analytics/market-history - Daily bucket/spot history from the market data export
 - /analytics/drilldown/* - Drilldown endpoints
 - /api/clear-data - Clear marketplace data
 
@@ -309,6 +310,45 @@ def get_category_stats():
         }), 500
 
 
+@admin_bp.route('/analytics/market-history')
+@admin_required
+def get_market_history():
+    """
+    Get long-range daily history from the nightly market data export
+    (data/exports) instead of scanning orders
+
+    Query params:
+        - dataset: 'bucket_daily' (default) or 'spot_daily'
+        - key: bucket_id (bucket_daily) or metal (spot_daily), optional
+        - start: First date (YYYY-MM-DD), optional
+        - end: Last date (YYYY-MM-DD), optional
+    """
+    try:
+        dataset = request.args.get('dataset', 'bucket_daily')
+        key = request.args.get('key')
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+
+        data = AnalyticsService.get_market_history(dataset, start_date, end_date, key)
+
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 # KPI Drilldown Endpoints
 
 @admin_bp.route('/analytics/drilldown/volume')
@@ -495,6 +495,10 @@ def bulk_delete_buckets():
             WHERE bucket_id IN ({placeholders})
         ''', bucket_ids)
 
+        # Dissolved buckets have no document left: drops them from search
+        from services.search_index_service import reindex_buckets
+        reindex_buckets(conn, bucket_ids)
+
         conn.commit()
         return jsonify({'success': True, 'deleted': len(bucket_ids)})
 
@@ -9,11 +9,13 @@ Routes:
   POST /admin/api/system-settings/spot-interval      — update value
   GET  /admin/api/system-settings/payment-controls   — return checkout/payout flags
   POST /admin/api/system-settings/payment-controls   — update one or more flags
+  GET  /admin/api/system-settings/page-cache         — anonymous page cache hit ratio
 """
 
 import logging
 
 from flask import jsonify, request, session
+from services.page_cache_service import clear_page_cache, get_page_cache_stats
 from utils.auth_utils import admin_required
 from . import admin_bp
 
@@ -219,6 +221,8 @@ def set_maintenance_mode():
         return jsonify({"success": False, "message": "enabled is required"}), 400
     new_state = bool(data["enabled"])
     _set(new_state)
+    # The maintenance banner is rendered into cached anonymous pages
+    clear_page_cache()
     return jsonify({
         "success": True,
         "enabled": new_state,
@@ -226,6 +230,13 @@ def set_maintenance_mode():
     })
 
 
+@admin_bp.route("/api/system-settings/page-cache", methods=["GET"])
+@admin_required
+def get_page_cache():
+    """Return hit/miss counts, hit ratio and footprint of the anonymous page cache."""
+    return jsonify({"success": True, **get_page_cache_stats()})
+
+
 @admin_bp.route("/api/system-settings/default-fee", methods=["GET"])
 @admin_required
 def get_default_fee():
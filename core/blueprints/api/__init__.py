@@ -11,5 +11,8 @@ api_bp = Blueprint('api', __name__)
 # Import routes to register them with the blueprint
 from . import routes
 from . import bucket_reference
+from . import bucket_depth
+from . import bucket_browse
+from . import spot_history
 
 __all__ = ['api_bp']
@@ -0,0 +1,117 @@
+"""
+Bucket Browse Endpoint
+
+GET /api/buckets/browse?section=standard&sort=price&metal=Gold&cursor=...
+
+Cursor-paginated /buy tiles as JSON.  Takes the /buy page filters (metal,
+product_line, search, graded_only with any_grader/pcgs/ngc) and a sort key
+(price, popular, new); the buy page renders the first page and its grid
+fetches the rest from here as the visitor scrolls.
+
+Served from the in-process tile model of services/bucket_tile_service.py.
+"""
+
+from flask import request, jsonify, session, url_for
+from . import api_bp
+from services.bucket_tile_service import (
+    BROWSE_PAGE_SIZE,
+    browse_bucket_tiles,
+    listing_filter_key,
+)
+from utils.bucket_image_utils import get_bucket_cover_url
+
+_SORTS = {'price': None, 'popular': 'popular', 'new': 'new'}
+
+
+def _tile_json(tile, section):
+    """Tile fields plus the link, image and title the grid renders."""
+    title = tile.get('listing_title')
+    if not title:
+        title = ' '.join(str(part) for part in (
+            tile.get('mint'),
+            tile.get('product_line') or tile.get('coin_series') or tile.get('product_type'),
+        ) if part)
+    if section == 'standard':
+        image_url = get_bucket_cover_url(tile['bucket_id'])
+    else:
+        image_url = tile.get('tile_image_url')
+    return {
+        **tile,
+        'title': title,
+        'image_url': image_url,
+        'url': url_for('buy.view_bucket', bucket_id=tile['bucket_id']),
+    }
+
+
+@api_bp.route('/api/buckets/browse', methods=['GET'])
+def browse_buckets():
+    """
+    Browse bucket tiles one page at a time.
+
+    Query params:
+        section: standard (default), one_of_a_kind or sets
+        sort: price (default), popular or new (the /buy `filter` param is
+              accepted as well)
+        metal, product_line, search: category and free-text filters
+        graded_only, any_grader, pcgs, ngc: grading filters ('1' to set)
+        cursor: next_cursor from the previous page
+        limit: tiles per page (default 24, max 96)
+
+    Returns:
+        {
+          success: true,
+          section, sort,
+          buckets: [{bucket_id, category_id, title, url, image_url,
+                     lowest_price, total_available, ...}, ...],
+          next_cursor: string or null,   // null on the last page
+          total: int
+        }
+    """
+    try:
+        sort_name = request.args.get('sort')
+        if sort_name is None:
+            # Same fallback as /buy?filter=: anything else sorts by price
+            sort_name = request.args.get('filter') if request.args.get('filter') in _SORTS else 'price'
+        if sort_name not in _SORTS:
+            return jsonify({'success': False, 'error': f'Unknown sort: {sort_name}'}), 400
+        section = request.args.get('section', 'standard')
+
+        listing_filter = listing_filter_key(
+            request.args.get('graded_only') == '1',
+            request.args.get('any_grader') == '1',
+            request.args.get('pcgs') == '1',
+            request.args.get('ngc') == '1',
+        )
+        if listing_filter is None:
+            # Graded only, but no grader selected = no results
+            return jsonify({'success': True, 'section': section, 'sort': sort_name,
+                            'buckets': [], 'next_cursor': None, 'total': 0})
+
+        try:
+            page = browse_bucket_tiles(
+                section,
+                listing_filter,
+                user_id=session.get('user_id'),
+                metal=request.args.get('metal') or None,
+                product_line=request.args.get('product_line') or None,
+                sort=_SORTS[sort_name],
+                search=request.args.get('search', '').strip().lower(),
+                cursor=request.args.get('cursor') or None,
+                limit=request.args.get('limit', BROWSE_PAGE_SIZE, type=int),
+            )
+        except ValueError as exc:
+            return jsonify({'success': False, 'error': str(exc)}), 400
+
+        return jsonify({
+            'success': True,
+            'section': section,
+            'sort': sort_name,
+            'buckets': [_tile_json(tile, section) for tile in page['tiles']],
+            'next_cursor': page['next_cursor'],
+            'total': page['total'],
+        })
+
+    except Exception as exc:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(exc)}), 500
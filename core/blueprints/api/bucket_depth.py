@@ -0,0 +1,55 @@
+"""
+Bucket Order Book Depth Endpoint
+
+GET /api/buckets/<bucket_id>/depth?levels=20
+
+Returns aggregated L2 depth for the bucket at the current spot: ask and bid
+price levels with quantity, order count and cumulative quantity, best first.
+Logged-in users get the book without their own listings and bids, matching
+what they can actually trade against on the bucket page.
+
+Served from the in-process books of services/order_book_service.py, which are
+dropped on listing/bid events and spot ticks.
+"""
+
+from flask import request, jsonify, session
+from . import api_bp
+from services.order_book_service import (
+    DEPTH_DEFAULT_LEVELS,
+    DEPTH_MAX_LEVELS,
+    get_bucket_depth,
+)
+
+
+@api_bp.route('/api/buckets/<int:bucket_id>/depth', methods=['GET'])
+def bucket_depth(bucket_id):
+    """
+    Get order book depth for a bucket.
+
+    Query params:
+        levels: price levels per side (default 20, max 100)
+
+    Returns:
+        {
+          success: true,
+          bucket_id, best_ask, best_bid, spread,
+          total_ask_quantity, total_bid_quantity,
+          asks: [{price, quantity, orders, cumulative}, ...],   // ascending price
+          bids: [{price, quantity, orders, cumulative}, ...],   // descending price
+          as_of: ISO8601
+        }
+    """
+    try:
+        levels = request.args.get('levels', DEPTH_DEFAULT_LEVELS, type=int)
+        levels = max(1, min(levels, DEPTH_MAX_LEVELS))
+
+        depth = get_bucket_depth(bucket_id, levels=levels, exclude_user_id=session.get('user_id'))
+        if depth is None:
+            return jsonify({'success': False, 'error': 'Bucket not found'}), 404
+
+        return jsonify({'success': True, **depth})
+
+    except Exception as exc:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(exc)}), 500
@@ -9,12 +9,30 @@ chart. The series is computed from:
   - BestBid(t): max active bid at time t
   - LastClearedPrice(t): most recent executed trade at or before t
 
-See services/reference_price_service.py for the full P(t) definition.
+See services/reference_price_service.py for the full P(t) definition. The
+series is served from bucket_reference_series (get_persisted_reference_history)
+without writing to it; points after the last stored one are swept in memory.
+
+Both chart endpoints support conditional polling:
+  - ETag computed from cheap watermarks and the window end (the next whole
+    minute) before any series work; If-None-Match with the current ETag
+    answers 304 Not Modified
+  - ?since=<t> reads only points with t > since (summary still covers the
+    whole range); the client replaces its trailing "now" point with them
+
+Long ranges are downsampled server-side to target_points(days) points
+(services/chart_downsampling.py); step edges and extremes are preserved.
+?since responses are never downsampled.
 """
 
 from flask import request, jsonify
 from . import api_bp
-from services.reference_price_service import get_reference_price_history
+from services.reference_price_service import (
+    get_persisted_reference_history,
+    get_reference_watermarks,
+)
+from services.chart_downsampling import target_points
+from utils.http_cache import compute_etag, etag_matches, not_modified, with_etag
 from datetime import datetime, timedelta
 
 RANGE_TO_DAYS = {
@@ -26,6 +44,16 @@ RANGE_TO_DAYS = {
 }
 
 
+def _window_end(now):
+    """
+    The chart window ends at the next whole minute: events up to `now` are all
+    inside it, while the range start and the trailing "now" point only move
+    once a minute, so the ETag (which includes the window end) stays valid
+    between those moves.
+    """
+    return now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
 @api_bp.route('/api/buckets/<int:bucket_id>/reference_price_history', methods=['GET'])
 def bucket_reference_price_history(bucket_id):
     """
@@ -33,6 +61,9 @@ def bucket_reference_price_history(bucket_id):
 
     Query params:
         range: '1d' | '1w' | '1m' | '3m' | '1y'  (default: '1m')
+        since: ISO-8601 t of the client's last point (optional)
+
+    Returns 304 when If-None-Match matches the bucket's current watermarks.
 
     Returns:
         {
@@ -48,20 +79,37 @@ def bucket_reference_price_history(bucket_id):
           latest_spot_as_of: str | null,
           latest_bid_as_of: str | null,
           latest_clear_as_of: str | null,
-          range: str
+          range: str,
+          since: str | null
         }
     """
+    from database import get_db_connection
+
     time_range = request.args.get('range', '1m')
     days = RANGE_TO_DAYS.get(time_range, 30)
+    since = request.args.get('since')
+    now = _window_end(datetime.now())
 
     try:
-        result = get_reference_price_history(bucket_id, days)
+        conn = get_db_connection()
+        try:
+            watermarks = get_reference_watermarks(conn, bucket_id)
+        finally:
+            conn.close()
+        etag = compute_etag('reference_price_history', bucket_id, time_range, since,
+                            now.isoformat(), *watermarks)
+        if etag_matches(etag):
+            return not_modified(etag)
+
+        result = get_persisted_reference_history(
+            bucket_id, days, max_points=target_points(days), since=since, now=now,
+        )
 
         series = result['primary_series']
 
         # Build summary statistics
         if series:
-            first_price   = series[0]['price']
+            first_price   = result['first_price']
             current_price = series[-1]['price']
             change_amount = current_price - first_price
             change_pct    = ((change_amount / first_price) * 100) if first_price else 0.0
@@ -81,7 +129,7 @@ def bucket_reference_price_history(bucket_id):
                 'has_data':       False,
             }
 
-        return jsonify({
+        return with_etag(jsonify({
             'success':           True,
             'primary_series':    series,
             'summary':           summary,
@@ -89,7 +137,8 @@ def bucket_reference_price_history(bucket_id):
             'latest_bid_as_of':  result['latest_bid_as_of'],
             'latest_clear_as_of': result['latest_clear_as_of'],
             'range':             time_range,
-        })
+            'since':             since,
+        }), etag)
 
     except Exception as exc:
         import traceback
@@ -175,16 +224,18 @@ def bucket_trade_price_history(bucket_id):
     starts from a meaningful value rather than an empty gap.
 
     Response format matches reference_price_history so the chart JS is
-    drop-in compatible.
+    drop-in compatible, including the ETag/304 and ?since=<t> behaviour; the
+    ETag tracks the bucket's trades only.
     """
     from database import get_db_connection
 
     time_range = request.args.get('range', '1d')
     days = RANGE_TO_DAYS.get(time_range, 1)
+    since = request.args.get('since')
 
     # Use UTC throughout so JS timestamps (appended with 'Z') align with
     # the browser's chart window, which is also based on UTC via new Date().
-    now_utc = datetime.utcnow()
+    now_utc = _window_end(datetime.utcnow())
     range_start = now_utc - timedelta(days=days)
     # SQLite stores CURRENT_TIMESTAMP in UTC with space separator
     range_start_str = range_start.strftime('%Y-%m-%d %H:%M:%S')
@@ -193,32 +244,47 @@ def bucket_trade_price_history(bucket_id):
 
     conn = get_db_connection()
     try:
-        # All trades within the time range, oldest first
-        rows = conn.execute("""
-            SELECT o.created_at, oi.price_each
+        # Watermark: any new, or newly cancelled, trade changes it
+        watermark = conn.execute("""
+            SELECT COUNT(*) AS n, MAX(oi.id) AS max_id,
+                   SUM(CASE WHEN o.status IN (?, ?) THEN 1 ELSE 0 END) AS cancelled
             FROM order_items oi
             JOIN orders     o  ON o.id  = oi.order_id
             JOIN listings   l  ON l.id  = oi.listing_id
             JOIN categories c  ON c.id  = l.category_id
             WHERE c.bucket_id = ?
-              AND o.created_at >= ?
-              AND (o.status IS NULL OR o.status NOT IN (?, ?))
-            ORDER BY o.created_at ASC
-        """, (bucket_id, range_start_str, *_CANCELLED)).fetchall()
+        """, (*_CANCELLED, bucket_id)).fetchone()
+        etag = compute_etag('trade_price_history', bucket_id, time_range, since,
+                            now_utc.isoformat(),
+                            watermark['n'], watermark['max_id'], watermark['cancelled'])
+        if etag_matches(etag):
+            return not_modified(etag)
+
+        # Trades within the time range (after `since`, if given), oldest first
+        lower_op, lower_str = '>=', range_start_str
+        if since:
+            since_str = since.rstrip('Z').replace('T', ' ')
+            if since_str >= range_start_str:
+                lower_op, lower_str = '>', since_str
+
+        def _trades(op, bound, order, limit=''):
+            return conn.execute(f"""
+                SELECT o.created_at, oi.price_each
+                FROM order_items oi
+                JOIN orders     o  ON o.id  = oi.order_id
+                JOIN listings   l  ON l.id  = oi.listing_id
+                JOIN categories c  ON c.id  = l.category_id
+                WHERE c.bucket_id = ?
+                  AND o.created_at {op} ?
+                  AND (o.status IS NULL OR o.status NOT IN (?, ?))
+                ORDER BY o.created_at {order}
+                {limit}
+            """, (bucket_id, bound, *_CANCELLED)).fetchall()
+
+        rows = _trades(lower_op, lower_str, 'ASC')
 
         # Most recent trade BEFORE the range start — gives the "opening" price
-        opening = conn.execute("""
-            SELECT o.created_at, oi.price_each
-            FROM order_items oi
-            JOIN orders     o  ON o.id  = oi.order_id
-            JOIN listings   l  ON l.id  = oi.listing_id
-            JOIN categories c  ON c.id  = l.category_id
-            WHERE c.bucket_id = ?
-              AND o.created_at < ?
-              AND (o.status IS NULL OR o.status NOT IN (?, ?))
-            ORDER BY o.created_at DESC
-            LIMIT 1
-        """, (bucket_id, range_start_str, *_CANCELLED)).fetchone()
+        opening = next(iter(_trades('<', range_start_str, 'DESC', 'LIMIT 1')), None)
 
         def _to_utc_iso(sqlite_ts):
             """Convert SQLite UTC timestamp to JS-safe ISO 8601 with Z suffix."""
@@ -226,25 +292,37 @@ def bucket_trade_price_history(bucket_id):
                 return None
             return sqlite_ts.replace(' ', 'T') + 'Z'
 
-        series = []
+        def _point(row):
+            return {'t': _to_utc_iso(row['created_at']), 'price': round(row['price_each'], 2)}
+
+        opening_point = None
         if opening:
             # Pin the opening price at the range boundary (UTC, with Z)
-            series.append({
+            opening_point = {
                 't':     range_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
                 'price': round(opening['price_each'], 2),
-            })
-
-        for row in rows:
-            series.append({
-                't':     _to_utc_iso(row['created_at']),
-                'price': round(row['price_each'], 2),
-            })
-
-        latest_clear = series[-1]['t'] if series else None
+            }
 
-        if series:
-            first_price   = series[0]['price']
-            current_price = series[-1]['price']
+        series = [_point(row) for row in rows]
+        if lower_op == '>=':
+            if opening_point:
+                series.insert(0, opening_point)
+            first_point = series[0] if series else None
+            last_point = series[-1] if series else None
+        else:
+            # Only the points after `since`; the summary still covers the range
+            last_trade = _trades('>=', range_start_str, 'DESC', 'LIMIT 1')
+            last_point = _point(last_trade[0]) if last_trade else opening_point
+            first_point = opening_point
+            if first_point is None:
+                first_trade = _trades('>=', range_start_str, 'ASC', 'LIMIT 1')
+                first_point = _point(first_trade[0]) if first_trade else None
+
+        latest_clear = last_point['t'] if last_point else None
+
+        if last_point:
+            first_price   = first_point['price']
+            current_price = last_point['price']
             change_amount = current_price - first_price
             change_pct    = ((change_amount / first_price) * 100) if first_price else 0.0
             summary = {
@@ -263,7 +341,7 @@ def bucket_trade_price_history(bucket_id):
                 'has_data':       False,
             }
 
-        return jsonify({
+        return with_etag(jsonify({
             'success':            True,
             'primary_series':     series,
             'summary':            summary,
@@ -271,7 +349,8 @@ def bucket_trade_price_history(bucket_id):
             'latest_spot_as_of':  None,
             'latest_bid_as_of':   None,
             'range':              time_range,
-        })
+            'since':              since,
+        }), etag)
 
     except Exception as exc:
         import traceback
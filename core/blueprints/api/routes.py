@@ -9,6 +9,7 @@ from database import get_db_connection
 from utils.cart_utils import get_cart_items
 from services.spot_price_service import get_current_spot_prices, get_spot_price_age, refresh_spot_prices
 from services.pricing_service import create_price_lock, get_active_price_lock, get_effective_price
+from services.autocomplete_service import get_suggestions
 
 from . import api_bp
 
@@ -309,109 +310,19 @@ def api_get_price_lock(listing_id):
 def api_search_autocomplete():
     """
     Autocomplete search suggestions for header search bar.
-    Searches all bucket specification fields (metal, product_line, coin_series,
-    product_type, mint, year, finish, weight, purity, listing_title, name).
+    Matches all bucket specification fields (metal, product_line, coin_series,
+    product_type, mint, year, finish, weight, purity) and active listing
+    titles, one suggestion per bucket, from the in-process prefix index
+    (no DB access per keystroke).
     """
     query = request.args.get('q', '').strip()
 
     if not query or len(query) < 1:
         return jsonify({'success': True, 'suggestions': []})
 
-    conn = get_db_connection()
-
     try:
-        like = f'%{query}%'
-
-        # Search ALL bucket spec fields — same substring-includes logic as the
-        # sell page item filter inputs.
-        # listings join via category_id → categories.id (NOT bucket_id).
-        rows = conn.execute("""
-            SELECT DISTINCT
-                c.bucket_id,
-                c.id AS cat_id,
-                c.metal,
-                c.product_line,
-                c.coin_series,
-                c.product_type,
-                c.weight,
-                c.mint,
-                c.year,
-                c.finish,
-                c.purity,
-                l.listing_title,
-                l.name AS listing_name
-            FROM categories c
-            LEFT JOIN listings l
-                ON l.category_id = c.id
-                AND l.active = 1
-                AND l.quantity > 0
-            WHERE (
-                c.metal LIKE ?
-                OR c.product_line LIKE ?
-                OR c.coin_series LIKE ?
-                OR c.product_type LIKE ?
-                OR c.mint LIKE ?
-                OR c.year LIKE ?
-                OR c.finish LIKE ?
-                OR c.weight LIKE ?
-                OR c.purity LIKE ?
-                OR l.listing_title LIKE ?
-                OR l.name LIKE ?
-            )
-            ORDER BY c.mint, c.product_line, c.metal
-            LIMIT 10
-        """, (like,) * 11).fetchall()
-
-        conn.close()
-
-        suggestions = []
-        seen_buckets = set()
-
-        for row in rows:
-            bucket_id = row['bucket_id']
-            if bucket_id in seen_buckets:
-                continue
-            seen_buckets.add(bucket_id)
-
-            # Build the primary display text — match how the buy page tiles show titles:
-            # listing_title > name > mint + product_line/coin_series/product_type
-            custom_title = row['listing_title'] or row['listing_name']
-            if custom_title:
-                text = custom_title
-            else:
-                parts = []
-                if row['mint']:
-                    parts.append(row['mint'])
-                if row['product_line'] or row['coin_series']:
-                    parts.append(row['product_line'] or row['coin_series'])
-                elif row['product_type']:
-                    parts.append(row['product_type'])
-                text = ' '.join(parts) or row['metal'] or 'Item'
-
-            # Build the context/meta line shown beneath the title
-            meta_parts = []
-            if row['weight']:
-                meta_parts.append(row['weight'])
-            if row['year']:
-                meta_parts.append(row['year'])
-            if row['metal']:
-                meta_parts.append(row['metal'])
-            if row['finish']:
-                meta_parts.append(row['finish'])
-            if row['purity']:
-                meta_parts.append(row['purity'])
-
-            suggestions.append({
-                'text': text,
-                'meta': ' · '.join(meta_parts),
-                'type': 'bucket',
-                'id': bucket_id,
-            })
-
-        return jsonify({'success': True, 'suggestions': suggestions[:8]})
-
+        return jsonify({'success': True, 'suggestions': get_suggestions(query, limit=8)})
     except Exception as e:
-        conn.close()
         return jsonify({
             'success': False,
             'message': f'Search error: {str(e)}',
@@ -0,0 +1,76 @@
+"""
+Spot Price History Endpoint
+
+GET /api/spot/history?metal=gold&range=1m[&until=<ISO-8601>]
+
+Returns a compact, delta-encoded spot series (see
+services/spot_history_service.py for the encoding):
+  - range '1d' carries raw snapshots with delta-encoded timestamps
+  - longer ranges carry fixed-interval bin closes
+  - prices are integer cents deltas from p0
+
+Without `until` the window ends now: the response carries an ETag built from
+the snapshot watermark and must be revalidated.  An `until` at least
+SPOT_HISTORY_SETTLE in the past, whose window starts inside the index
+retention, selects a closed window whose points can no longer change; it is
+served with a one-year immutable Cache-Control so browsers and proxies keep
+it.  Other past windows are revalidated like the live one.
+"""
+
+from datetime import datetime
+
+from flask import request, jsonify
+from . import api_bp
+from services.spot_history_service import get_spot_history
+from utils.http_cache import compute_etag, etag_matches, not_modified, with_etag, with_max_age
+
+CLOSED_WINDOW_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@api_bp.route('/api/spot/history', methods=['GET'])
+def spot_history():
+    """
+    Get compact spot price history for one metal.
+
+    Query params:
+        metal: 'gold' | 'silver' | 'platinum' | 'palladium'
+        range: '1d' | '1w' | '1m' | '3m' | '1y'  (default: '1d')
+        until: ISO-8601 window end in the past (optional)
+
+    Returns:
+        {
+          success: true,
+          metal, range, encoding: 'delta' | 'interval', n,
+          t0: ISO8601, interval: seconds  (or dt: [seconds, ...]),
+          p0: cents, dp: [cents, ...],
+          end: ISO8601, closed: bool
+        }
+    """
+    until = request.args.get('until')
+    try:
+        until_dt = datetime.fromisoformat(until[:19]) if until else None
+    except ValueError:
+        return jsonify({'success': False, 'error': f'Invalid until: {until!r}'}), 400
+
+    try:
+        payload = get_spot_history(
+            request.args.get('metal', ''),
+            request.args.get('range', '1d'),
+            until=until_dt,
+        )
+    except ValueError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
+    except Exception as exc:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(exc)}), 500
+
+    last_id = payload.pop('last_id')
+    if payload['closed']:
+        return with_max_age(jsonify({'success': True, **payload}), CLOSED_WINDOW_MAX_AGE, immutable=True)
+
+    etag = compute_etag('spot_history', payload['metal'], payload['range'], last_id,
+                        payload['t0'], payload['n'], payload['end'])
+    if etag_matches(etag):
+        return not_modified(etag)
+    return with_etag(jsonify({'success': True, **payload}), etag)
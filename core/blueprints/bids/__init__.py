@@ -7,6 +7,7 @@ The bid_bp Blueprint is defined here and routes are registered by importing sub-
 Structure:
 - __init__.py: Blueprint definition and assembly
 - place_bid.py: Place and create bid routes
+- bulk_place.py: Bulk bid placement route and service
 - edit_bid.py: Edit bid routes
 - view_bids.py: View bids pages
 - accept_bid.py: Accept bid route
@@ -27,6 +28,7 @@ bid_bp = Blueprint('bid', __name__, url_prefix='/bids')
 # Note: auto_match must be imported first since other modules may use its functions
 from . import auto_match
 from . import place_bid
+from . import bulk_place
 from . import edit_bid
 from . import view_bids
 from . import accept_bid
@@ -39,6 +41,7 @@ from .auto_match import (
     auto_match_listing_to_bids,
     check_all_pending_matches,
 )
+from .bulk_place import place_bids_bulk
 
 # Re-export for compatibility
 __all__ = [
@@ -46,4 +49,5 @@ __all__ = [
     'auto_match_bid_to_listings',
     'auto_match_listing_to_bids',
     'check_all_pending_matches',
+    'place_bids_bulk',
 ]
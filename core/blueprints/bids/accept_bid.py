@@ -14,6 +14,8 @@ from services.notification_service import notify_bid_filled
 from services.notification_types import notify_bid_payment_failed
 from services.pricing_service import get_effective_price, get_effective_bid_price
 from services.order_service import write_order_item_snapshot
+from services.order_book_service import invalidate_bucket_depth, invalidate_category_depth
+from services.user_stats_service import refresh_order_user_stats
 from core.services.ledger.order_creation import create_order_ledger_from_cart
 
 from . import bid_bp
@@ -748,6 +750,9 @@ def accept_bid(bucket_id):
 
     conn.commit()
     conn.close()
+    invalidate_bucket_depth(bucket_id)
+    for _order in all_order_details:
+        refresh_order_user_stats(_order['order_id'])
 
     # Create ledger entries for all successfully paid bid orders.
     # Must run after conn.commit() so order/order_items rows are visible to the ledger service.
@@ -857,7 +862,7 @@ def cancel_bid(bid_id):
 
     # 2) Verify bid exists & is owned by this user
     row = cursor.execute(
-        'SELECT active, status, remaining_quantity FROM bids WHERE id = ? AND buyer_id = ?',
+        'SELECT active, status, remaining_quantity, category_id FROM bids WHERE id = ? AND buyer_id = ?',
         (bid_id, user_id)
     ).fetchone()
 
@@ -889,6 +894,7 @@ def cancel_bid(bid_id):
     )
     conn.commit()
     conn.close()
+    invalidate_category_depth(row['category_id'])
 
     # 4) Response
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -12,13 +12,14 @@ import threading
 
 import stripe
 
-from core.services.ledger.order_creation import create_order_ledger_from_cart
+from core.services.ledger.order_creation import create_order_ledgers_batch
 from services.pricing_service import (
     get_effective_price,
     get_effective_bid_price,
     can_bid_fill_listing,
 )
 from services.notification_types import notify_bid_payment_failed
+from services.user_stats_service import refresh_order_user_stats
 
 logger = logging.getLogger(__name__)
 
@@ -223,7 +224,7 @@ def _charge_bid_payment(bid_id: int, order_id: int, buyer_id: int,
         return {'success': False, 'code': 'stripe_error', 'message': str(e), 'is_card_decline': False}
 
 
-def auto_match_bid_to_listings(bid_id, cursor):
+def auto_match_bid_to_listings(bid_id, cursor, spot_prices=None, pm_types=None):
     """
     Automatically match a bid to available listings.
     Called immediately after bid creation to auto-fill if possible.
@@ -234,6 +235,9 @@ def auto_match_bid_to_listings(bid_id, cursor):
     Args:
         bid_id: The ID of the newly created bid
         cursor: Database cursor (assumes transaction is already open)
+        spot_prices: Optional pre-fetched spot map (batch callers read it once per pass)
+        pm_types: Optional dict cache of payment method id -> Stripe PM type,
+                  shared across calls so each PM is retrieved once per pass
 
     Returns:
         dict with 'filled_quantity', 'orders_created', 'message'
@@ -270,11 +274,16 @@ def auto_match_bid_to_listings(bid_id, cursor):
     # Determine PM type once (needed for fee calc + PI creation).
     bid_pm_type = 'card'
     bid_is_ach = False
-    if bid_pm_id:
+    if bid_pm_id and pm_types is not None and bid_pm_id in pm_types:
+        bid_pm_type = pm_types[bid_pm_id]
+        bid_is_ach = (bid_pm_type == 'us_bank_account')
+    elif bid_pm_id:
         try:
             _pm_obj = stripe.PaymentMethod.retrieve(bid_pm_id)
             bid_pm_type = _pm_obj.type
             bid_is_ach = (bid_pm_type == 'us_bank_account')
+            if pm_types is not None:
+                pm_types[bid_pm_id] = bid_pm_type
         except stripe.error.StripeError as e:
             logger.warning('[auto_match] Could not check PM type for %s: %s — assuming card',
                            bid_pm_id, e)
@@ -282,7 +291,8 @@ def auto_match_bid_to_listings(bid_id, cursor):
     # Fetch spot prices from spot_price_snapshots (canonical source, same as cart/checkout/
     # bucket page).  Falls back to spot_prices legacy cache if no snapshots exist.
     # Never calls an external API.
-    spot_prices = _get_spot_prices_from_cursor(cursor)
+    if spot_prices is None:
+        spot_prices = _get_spot_prices_from_cursor(cursor)
 
     # Calculate effective bid price (handles both static and premium-to-spot modes)
     # For premium-to-spot, this calculates spot + premium and enforces ceiling
@@ -298,43 +308,22 @@ def auto_match_bid_to_listings(bid_id, cursor):
     random_year = bid_dict.get('random_year', 0)
 
     if random_year:
-        # Random Year ON: match listings from any category with the same specs except year.
-        # Fetch bid's category specs to use for cross-year matching.
-        bid_cat = cursor.execute('''
-            SELECT metal, product_line, product_type, weight, purity, mint, finish
-            FROM categories WHERE id = ?
-        ''', (category_id,)).fetchone()
-
-        # Find all category IDs that share the same specs but any year.
-        # Use IS for NULL-safe equality (SQLite: NULL IS NULL = TRUE).
-        matching_cats = cursor.execute('''
-            SELECT id FROM categories
-            WHERE metal IS ?
-              AND product_line IS ?
-              AND product_type IS ?
-              AND weight IS ?
-              AND purity IS ?
-              AND mint IS ?
-              AND finish IS ?
-        ''', (
-            bid_cat['metal'], bid_cat['product_line'], bid_cat['product_type'],
-            bid_cat['weight'], bid_cat['purity'], bid_cat['mint'], bid_cat['finish']
-        )).fetchall()
-
-        cat_ids = [row['id'] for row in matching_cats] or [category_id]
-        placeholders = ','.join('?' * len(cat_ids))
-
-        listings = cursor.execute(f'''
+        # Random Year ON: match listings from any category with the same specs except year,
+        # i.e. any category sharing the bid category's spec_key (indexed equality join).
+        listings = cursor.execute('''
             SELECT l.id, l.seller_id, l.quantity, l.price_per_coin, l.grading_service,
                    l.pricing_mode, l.spot_premium, l.floor_price, l.pricing_metal,
                    c.metal, c.weight
             FROM listings l
             JOIN categories c ON l.category_id = c.id
-            WHERE l.category_id IN ({placeholders})
+            WHERE (
+                    l.category_id = ?
+                    OR c.spec_key = (SELECT spec_key FROM categories WHERE id = ?)
+                  )
               AND l.seller_id != ?
               AND l.active = 1
               AND l.quantity > 0
-        ''', cat_ids + [buyer_id]).fetchall()
+        ''', (category_id, category_id, buyer_id)).fetchall()
     else:
         # Standard exact category match (Random Year OFF or unset).
         listings = cursor.execute('''
@@ -681,8 +670,7 @@ def auto_match_listing_to_bids(listing_id, cursor):
     """
     # Load the listing with all fields including extra category specs for random_year matching.
     listing = cursor.execute('''
-        SELECT l.*, c.metal, c.weight, c.product_type, c.bucket_id,
-               c.product_line, c.purity, c.mint, c.finish
+        SELECT l.*, c.metal, c.weight, c.product_type, c.bucket_id, c.spec_key
         FROM listings l
         JOIN categories c ON l.category_id = c.id
         WHERE l.id = ?
@@ -703,16 +691,7 @@ def auto_match_listing_to_bids(listing_id, cursor):
     effective_listing_price = get_effective_price(listing_dict, spot_prices=spot_prices)
 
     # Query active bids: exact category match OR random_year=1 bids whose category
-    # shares the same specs (metal, product_line, product_type, weight, purity, mint, finish)
-    # as this listing's category, regardless of year.
-    listing_metal = listing_dict.get('metal')
-    listing_product_line = listing_dict.get('product_line')
-    listing_product_type = listing_dict.get('product_type')
-    listing_weight = listing_dict.get('weight')
-    listing_purity = listing_dict.get('purity')
-    listing_mint = listing_dict.get('mint')
-    listing_finish = listing_dict.get('finish')
-
+    # shares this listing's spec_key (same specs, any year).
     bids = cursor.execute('''
         SELECT b.*, c.metal, c.weight, c.product_type
         FROM bids b
@@ -722,23 +701,10 @@ def auto_match_listing_to_bids(listing_id, cursor):
           AND b.remaining_quantity > 0
           AND (
             b.category_id = ?
-            OR (
-              b.random_year = 1
-              AND c.metal IS ?
-              AND c.product_line IS ?
-              AND c.product_type IS ?
-              AND c.weight IS ?
-              AND c.purity IS ?
-              AND c.mint IS ?
-              AND c.finish IS ?
-            )
+            OR (b.random_year = 1 AND c.spec_key = ?)
           )
         ORDER BY b.created_at ASC
-    ''', (
-        seller_id, category_id,
-        listing_metal, listing_product_line, listing_product_type,
-        listing_weight, listing_purity, listing_mint, listing_finish
-    )).fetchall()
+    ''', (seller_id, category_id, listing_dict.get('spec_key'))).fetchall()
 
     if not bids:
         return {'filled_quantity': 0, 'orders_created': 0, 'message': 'No matching bids found', 'notifications': []}
@@ -998,6 +964,9 @@ def check_all_pending_matches(conn):
     Check all active bids against all active listings for potential matches.
     Called on page load to catch matches that became possible due to spot price changes.
 
+    Spot prices are read once per pass and each payment method's type is
+    retrieved from Stripe once per pass, however many bids share it.
+
     Args:
         conn: Database connection (will create its own cursor)
 
@@ -1025,6 +994,9 @@ def check_all_pending_matches(conn):
     if not active_bids:
         return {'total_filled': 0, 'orders_created': 0, 'bids_matched': 0, 'notifications': []}
 
+    spot_prices = _get_spot_prices_from_cursor(cursor)
+    pm_types = {}
+
     for bid_row in active_bids:
         bid_id = bid_row['id']
 
@@ -1046,7 +1018,8 @@ def check_all_pending_matches(conn):
                 continue
 
         # Try to match this bid
-        result = auto_match_bid_to_listings(bid_id, cursor)
+        result = auto_match_bid_to_listings(bid_id, cursor, spot_prices=spot_prices,
+                                            pm_types=pm_types)
 
         if result.get('payment_failure_notifs'):
             # Payment failed — bid is already marked closed; send buyer notification after commit
@@ -1076,19 +1049,19 @@ def check_all_pending_matches(conn):
     # Create ledger entries AFTER commit (ledger service opens its own connection).
     # This locks in the correct bucket fee at execution time so seller proceeds
     # remain accurate even if admin changes the bucket fee later.
-    for _ledger in all_ledger_orders:
+    # One batch: bucket fees resolved once, rows bulk-inserted, single commit.
+    if all_ledger_orders:
         try:
-            create_order_ledger_from_cart(
-                buyer_id=_ledger['buyer_id'],
-                cart_snapshot=_ledger['items'],
-                order_id=_ledger['order_id'],
-            )
+            create_order_ledgers_batch(all_ledger_orders)
         except Exception as _ledger_err:
             logger.warning(
-                "[auto_match] Ledger creation failed for order %s: %s",
-                _ledger['order_id'], _ledger_err
+                "[auto_match] Ledger creation failed for orders %s: %s",
+                [_l['order_id'] for _l in all_ledger_orders], _ledger_err
             )
 
+    for _order in all_ledger_orders:
+        refresh_order_user_stats(_order['order_id'])
+
     return {
         'total_filled': total_filled,
         'orders_created': orders_created,
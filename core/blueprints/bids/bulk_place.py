@@ -0,0 +1,349 @@
+"""
+Bulk Bid Placement
+
+Lets a buyer place many bids across buckets in one request.  The batch is
+validated together with one saved-card check, one bucket lookup and one
+self-listing check, and inserted in a single transaction.
+
+Routes:
+- POST /bids/bulk: place_bids_bulk_route - JSON bulk placement, per-bid results
+
+Per-bid semantics are unchanged from create_bid_unified: same validation,
+premium-to-spot ceilings, random_year, and no self-trades.  Like single-bid
+placement this never charges the buyer: new bids are filled by the next
+spot-driven rematch (check_all_pending_matches) or by seller acceptance.
+"""
+
+import logging
+from flask import request, session, jsonify
+from database import get_db_connection
+from services.notification_types import notify_bid_placed, notify_bid_on_bucket
+from services.pricing_service import get_effective_bid_price
+from services.order_book_service import invalidate_bucket_depth
+from utils.auth_utils import frozen_check
+
+from . import bid_bp
+from .auto_match import _get_spot_prices_from_cursor
+from .place_bid import _BID_STRIKE_THRESHOLD, _verify_saved_card
+
+_log = logging.getLogger(__name__)
+
+# Upper bound on bids per request
+MAX_BULK_BIDS = 100
+
+
+def _parse_bid_spec(spec, default_address):
+    """
+    Normalise and validate one bulk bid entry.
+
+    Uses the same rules as create_bid_unified.  Returns (fields, errors) where
+    errors is a dict of field -> message (empty when valid).
+    """
+    errors = {}
+    if not isinstance(spec, dict):
+        return None, {'bid': 'Each bid must be an object.'}
+
+    try:
+        bucket_id = int(spec.get('bucket_id'))
+    except (TypeError, ValueError):
+        return None, {'bucket_id': 'bucket_id is required.'}
+
+    pricing_mode = str(spec.get('pricing_mode') or 'static').strip()
+    if pricing_mode == 'variable':
+        pricing_mode = 'premium_to_spot'
+
+    try:
+        quantity = int(spec.get('quantity') or 0)
+        if pricing_mode == 'premium_to_spot':
+            spot_premium = float(spec.get('spot_premium') or 0)
+            ceiling_price = float(spec.get('ceiling_price') or 0)
+            pricing_metal = str(spec.get('pricing_metal') or '').strip()
+            bid_price = ceiling_price
+        else:
+            pricing_mode = 'static'
+            bid_price = float(spec.get('price') or 0)
+            spot_premium = None
+            ceiling_price = None
+            pricing_metal = None
+    except (TypeError, ValueError) as e:
+        return None, {'bid': f'Invalid bid data: {e}'}
+
+    if pricing_mode == 'premium_to_spot':
+        if ceiling_price <= 0:
+            errors['ceiling_price'] = "Max price (ceiling) must be greater than zero for premium-to-spot bids."
+        if spot_premium < 0:
+            errors['spot_premium'] = "Premium cannot be negative."
+    elif bid_price <= 0:
+        errors['price'] = "Price must be greater than zero."
+
+    if quantity <= 0:
+        errors['quantity'] = "Quantity must be greater than zero."
+
+    delivery_address = str(spec.get('delivery_address') or default_address or '').strip()
+    if not delivery_address:
+        errors['delivery_address'] = "Delivery address is required."
+
+    fields = {
+        'bucket_id': bucket_id,
+        'quantity': quantity,
+        'bid_price': bid_price,
+        'pricing_mode': pricing_mode,
+        'spot_premium': spot_premium,
+        'ceiling_price': ceiling_price,
+        'pricing_metal': pricing_metal,
+        'delivery_address': delivery_address,
+        'requires_grading': 1 if spec.get('requires_grading') in (True, 1, 'yes', 'on') else 0,
+        'random_year': 1 if spec.get('random_year') in (True, 1, 'on', '1') else 0,
+    }
+    return fields, errors
+
+
+def place_bids_bulk(conn, buyer_id, bid_specs, pm_id, delivery_address=''):
+    """
+    Validate and insert a batch of bids for one buyer.
+
+    Bucket lookups and the "only your own listings" check run as one query each
+    for the whole batch and valid bids are inserted in a single transaction.
+    Invalid entries are reported and skipped without affecting the rest of the
+    batch.
+
+    Args:
+        conn: Database connection
+        buyer_id: Bidder's user ID
+        bid_specs: List of dicts with bucket_id, quantity, pricing_mode and either
+                   price (static) or spot_premium/ceiling_price/pricing_metal
+                   (premium_to_spot), plus optional random_year, requires_grading
+                   and delivery_address
+        pm_id: Verified payment method ID stored on every bid
+        delivery_address: Default address for entries that do not carry one
+
+    Returns:
+        dict with 'results' (one entry per input, in order) and 'placed'
+    """
+    cursor = conn.cursor()
+    results = []
+    parsed = []
+    for index, spec in enumerate(bid_specs):
+        fields, errors = _parse_bid_spec(spec, delivery_address)
+        result = {'index': index, 'success': False,
+                  'bucket_id': fields['bucket_id'] if fields else None}
+        if errors:
+            result['errors'] = errors
+        else:
+            parsed.append((result, fields))
+        results.append(result)
+
+    bucket_ids = sorted({fields['bucket_id'] for _, fields in parsed})
+    categories = {}
+    own_only = set()
+    if bucket_ids:
+        placeholders = ','.join('?' * len(bucket_ids))
+        # bids.category_id is a FK to categories.id (not bucket_id)
+        for row in cursor.execute(f'''
+            SELECT c.bucket_id, c.id, c.metal, c.product_line, c.weight, c.year
+            FROM categories c
+            WHERE c.id IN (
+                SELECT MIN(id) FROM categories WHERE bucket_id IN ({placeholders}) GROUP BY bucket_id
+            )
+        ''', bucket_ids).fetchall():
+            categories[row['bucket_id']] = dict(row)
+
+        # Buckets where all active listings belong to this buyer
+        for row in cursor.execute(f'''
+            SELECT c.bucket_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN l.seller_id != ? THEN 1 ELSE 0 END) AS others
+            FROM listings l
+            JOIN categories c ON l.category_id = c.id
+            WHERE c.bucket_id IN ({placeholders}) AND l.active = 1 AND l.quantity > 0
+            GROUP BY c.bucket_id
+        ''', [buyer_id] + bucket_ids).fetchall():
+            if row['total'] > 0 and not row['others']:
+                own_only.add(row['bucket_id'])
+
+    user_info = cursor.execute(
+        'SELECT first_name, last_name FROM users WHERE id = ?', (buyer_id,)
+    ).fetchone()
+    recipient_first = (user_info['first_name'] if user_info and user_info['first_name'] else '')
+    recipient_last = (user_info['last_name'] if user_info and user_info['last_name'] else '')
+
+    placed = []
+    try:
+        for result, fields in parsed:
+            category = categories.get(fields['bucket_id'])
+            if not category:
+                result['message'] = 'Item not found.'
+                continue
+            if fields['bucket_id'] in own_only:
+                result['message'] = "You can't bid on a bucket where your listings are the only ones available."
+                continue
+
+            cursor.execute(
+                '''
+                INSERT INTO bids (
+                    category_id, buyer_id, quantity_requested, price_per_coin,
+                    remaining_quantity, active, requires_grading,
+                    delivery_address, status,
+                    pricing_mode, spot_premium, ceiling_price, pricing_metal,
+                    recipient_first_name, recipient_last_name, random_year,
+                    bid_payment_method_id, bid_payment_status
+                ) VALUES (?, ?, ?, ?, ?, 1, ?, ?, 'Open', ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
+                ''',
+                (
+                    category['id'], buyer_id, fields['quantity'], fields['bid_price'],
+                    fields['quantity'], fields['requires_grading'], fields['delivery_address'],
+                    fields['pricing_mode'], fields['spot_premium'], fields['ceiling_price'],
+                    fields['pricing_metal'], recipient_first, recipient_last,
+                    fields['random_year'], pm_id,
+                )
+            )
+            result['bid_id'] = cursor.lastrowid
+            result['success'] = True
+            result['quantity'] = fields['quantity']
+            result['pricing_mode'] = fields['pricing_mode']
+            placed.append(result)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    for bucket_id in {r['bucket_id'] for r in placed}:
+        invalidate_bucket_depth(bucket_id)
+
+    summary = {'results': results, 'placed': len(placed)}
+    if not placed:
+        return summary
+
+    spot_prices = _get_spot_prices_from_cursor(conn.cursor())
+    created = {
+        row['id']: dict(row) for row in conn.execute(f'''
+            SELECT b.*, c.metal, c.weight, c.product_type
+            FROM bids b
+            JOIN categories c ON b.category_id = c.id
+            WHERE b.id IN ({','.join('?' * len(placed))})
+        ''', [r['bid_id'] for r in placed]).fetchall()
+    }
+    for result in placed:
+        bid = created.get(result['bid_id'], {})
+        category = categories[result['bucket_id']]
+        result['effective_price'] = get_effective_bid_price(bid, spot_prices=spot_prices)
+        result['item_description'] = ' '.join(
+            str(category[k]) for k in ('metal', 'product_line', 'weight', 'year') if category[k]
+        ) or 'Item'
+
+    return summary
+
+
+@bid_bp.route('/bulk', methods=['POST'])
+@frozen_check
+def place_bids_bulk_route():
+    """
+    Place many bids in one request.
+
+    JSON body:
+    - bids: list of {bucket_id, quantity, pricing_mode, price | spot_premium +
+      ceiling_price + pricing_metal, random_year, requires_grading, delivery_address}
+    - delivery_address: default address for bids that omit one
+    - selected_payment_method_id: saved payment method for every bid (optional)
+
+    Returns JSON with one result per input bid, in order.
+    """
+    if 'user_id' not in session:
+        return jsonify(success=False, message="Authentication required"), 401
+    user_id = session['user_id']
+
+    payload = request.get_json(silent=True) or {}
+    bid_specs = payload.get('bids')
+    if not isinstance(bid_specs, list) or not bid_specs:
+        return jsonify(success=False, message="bids must be a non-empty list."), 400
+    if len(bid_specs) > MAX_BULK_BIDS:
+        return jsonify(success=False, message=f"At most {MAX_BULK_BIDS} bids per request."), 400
+
+    conn = get_db_connection()
+    try:
+        strike_row = conn.execute(
+            'SELECT COALESCE(bid_payment_strikes, 0) as strikes FROM users WHERE id = ?',
+            (user_id,)
+        ).fetchone()
+        if strike_row and strike_row['strikes'] >= _BID_STRIKE_THRESHOLD:
+            return jsonify(
+                success=False,
+                message="Your account is restricted from placing bids due to multiple payment failures. "
+                        "Please contact support to restore access.",
+                strike_blocked=True
+            ), 403
+
+        # One payment-method verification for the whole batch
+        selected_pm_id = str(payload.get('selected_payment_method_id') or '').strip()
+        pm_id_to_use, card_error = _verify_saved_card(user_id, conn, selected_pm_id)
+        if card_error:
+            return jsonify(success=False, message=card_error, requires_saved_card=True), 400
+
+        summary = place_bids_bulk(
+            conn, user_id, bid_specs, pm_id_to_use,
+            delivery_address=str(payload.get('delivery_address') or ''),
+        )
+
+        placed = [r for r in summary['results'] if r['success']]
+        bidder_info = conn.execute('SELECT username FROM users WHERE id = ?', (user_id,)).fetchone()
+        bidder_username = bidder_info['username'] if bidder_info else 'Someone'
+
+        # Sellers with active listings in the affected buckets, fetched in one query
+        sellers_by_bucket = {}
+        bucket_ids = sorted({r['bucket_id'] for r in placed})
+        if bucket_ids:
+            for row in conn.execute(f'''
+                SELECT DISTINCT c.bucket_id, l.seller_id
+                FROM listings l
+                JOIN categories c ON l.category_id = c.id
+                WHERE c.bucket_id IN ({','.join('?' * len(bucket_ids))})
+                  AND l.active = 1
+                  AND l.quantity > 0
+                  AND l.seller_id != ?
+            ''', bucket_ids + [user_id]).fetchall():
+                sellers_by_bucket.setdefault(row['bucket_id'], []).append(row['seller_id'])
+    except Exception as e:
+        _log.error('[BULK BID] Failed for user %s: %s', user_id, e)
+        return jsonify(success=False, message=f"Database error: {str(e)}"), 500
+    finally:
+        conn.close()
+
+    # Notifications (after connection closed)
+    for result in placed:
+        try:
+            notify_bid_placed(
+                bidder_id=user_id,
+                bid_id=result['bid_id'],
+                bucket_id=result['bucket_id'],
+                item_description=result['item_description'],
+                quantity=result['quantity'],
+                price_per_unit=result['effective_price']
+            )
+        except Exception as e:
+            print(f"[NOTIFICATION ERROR] Failed to send bid_placed notification: {e}")
+
+    # One notification per seller per bucket: the best bid in the batch for that bucket
+    best_by_bucket = {}
+    for result in placed:
+        best = best_by_bucket.get(result['bucket_id'])
+        if best is None or result['effective_price'] > best['effective_price']:
+            best_by_bucket[result['bucket_id']] = result
+    for bucket_id, best in best_by_bucket.items():
+        for seller_id in sellers_by_bucket.get(bucket_id, []):
+            try:
+                notify_bid_on_bucket(
+                    seller_id=seller_id,
+                    bidder_username=bidder_username,
+                    bucket_id=bucket_id,
+                    item_description=best['item_description'],
+                    bid_price=best['effective_price'],
+                    quantity=best['quantity']
+                )
+            except Exception as e:
+                print(f"[NOTIFICATION ERROR] Failed to send bid_on_bucket notification: {e}")
+
+    return jsonify(
+        success=summary['placed'] > 0,
+        placed=summary['placed'],
+        results=summary['results'],
+    )
@@ -12,6 +12,7 @@ from database import get_db_connection
 from services.notification_types import notify_bid_updated
 from services.spot_price_service import get_spot_price
 from services.pricing_service import get_effective_bid_price
+from services.order_book_service import invalidate_category_depth
 from utils.auth_utils import frozen_check
 
 from . import bid_bp
@@ -252,6 +253,8 @@ def update_bid():
 
     # Calculate effective bid price (must happen before notifications)
     bid_dict = dict(updated_bid) if updated_bid else {}
+    if updated_bid:
+        invalidate_category_depth(bid_dict['category_id'])
     effective_price = get_effective_bid_price(bid_dict) if updated_bid else bid_price
 
     # Send bid_updated notification
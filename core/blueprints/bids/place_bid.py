@@ -13,6 +13,7 @@ import stripe
 from flask import request, redirect, url_for, session, flash, jsonify
 from database import get_db_connection
 from services.notification_types import notify_bid_placed, notify_bid_on_bucket
+from services.order_book_service import invalidate_bucket_depth
 from services.pricing_service import get_effective_bid_price
 from utils.auth_utils import frozen_check
 
@@ -235,6 +236,7 @@ def place_bid(bucket_id):
     # Calling auto_match here would create orders without payment.
     conn.commit()
     conn.close()
+    invalidate_bucket_depth(bucket_id)
 
     flash("Your bid was placed successfully!", "success")
     return redirect(url_for('buy.view_bucket', bucket_id=bucket_id))
@@ -421,6 +423,7 @@ def create_bid_unified(bucket_id):
         match_result = {'filled_quantity': 0, 'orders_created': 0, 'message': '', 'notifications': [], 'ledger_orders': []}
 
         conn.commit()
+        invalidate_bucket_depth(bucket_id)
 
         # Get the created bid with all fields for effective price calculation
         created_bid = conn.execute('''
@@ -678,6 +681,7 @@ def relist_failed_bid(bid_id):
         )
         conn.commit()
         conn.close()
+        invalidate_bucket_depth(bucket_id)
         return jsonify(success=True, message='Bid relisted successfully')
 
     except Exception as e:
@@ -6,54 +6,49 @@ Contains routes for viewing bucket details and availability:
 - /bucket/<int:bucket_id>/availability_json - bucket_availability_json
 """
 
-from flask import render_template, request, redirect, url_for, session, flash
+from flask import render_template, request, redirect, url_for, session, flash, jsonify
 from database import get_db_connection
-from services.pricing_service import get_effective_price, get_effective_bid_price
+from services.pricing_service import get_effective_price
 from services.reference_price_service import get_current_spots_from_snapshots
+from services.bucket_snapshot_service import get_bucket_snapshot
 from services.ledger_constants import DEFAULT_PLATFORM_FEE_VALUE
+from utils.http_cache import compute_etag, etag_matches, not_modified, with_etag
 from . import buy_bp
 
 
 @buy_bp.route('/bucket/<int:bucket_id>')
 def view_bucket(bucket_id):
-    conn = get_db_connection()
+    # User-independent page data comes from the cached bucket snapshot
+    # (services/bucket_snapshot_service.py); only the per-user parts are
+    # filtered from it here.
+    snapshot = get_bucket_snapshot(bucket_id)
+    if snapshot is None:
+        flash("Item not found.", "error")
+        return redirect(url_for('buy.buy'))
 
     # User ID for ownership checks
     user_id = session.get('user_id')
 
-    # If user is logged in, try to get category from their own listing first
+    # If user is logged in, take the category of their own listing first
     # This ensures specs show the actual item they'll be shipping when accepting bids
+    bucket = None
     if user_id:
-        bucket = conn.execute('''
-            SELECT DISTINCT c.*
-            FROM categories c
-            JOIN listings l ON c.id = l.category_id
-            WHERE c.bucket_id = ? AND l.seller_id = ? AND l.active = 1
-            LIMIT 1
-        ''', (bucket_id, user_id)).fetchone()
-
-    # If user not logged in or has no listings, get any category in bucket
-    if not user_id or not bucket:
-        bucket = conn.execute('SELECT * FROM categories WHERE bucket_id = ? LIMIT 1', (bucket_id,)).fetchone()
+        own_category_id = next(
+            (l['category_id'] for l in snapshot['listings'] if l['seller_id'] == user_id), None
+        )
+        bucket = next((c for c in snapshot['categories'] if c['id'] == own_category_id), None)
 
+    # If user not logged in or has no listings, use any category in bucket
     if not bucket:
-        conn.close()
-        flash("Item not found.", "error")
-        return redirect(url_for('buy.buy'))
+        bucket = snapshot['categories'][0]
 
-    # Get title and description from a listing in this bucket
-    listing_info = conn.execute('''
-        SELECT name, description
-        FROM listings
-        WHERE category_id IN (SELECT id FROM categories WHERE bucket_id = ?)
-          AND active = 1
-        LIMIT 1
-    ''', (bucket_id,)).fetchone()
+    # Title and description from a listing in this bucket
+    listing_info = snapshot['listings'][0] if snapshot['listings'] else None
 
     listing_title = listing_info['name'] if listing_info and listing_info['name'] else None
     listing_description = listing_info['description'] if listing_info and listing_info['description'] else None
 
-    cols = set(bucket.keys()) if hasattr(bucket, 'keys') else set()
+    cols = set(bucket.keys())
 
     def take(*names):
         for n in names:
@@ -77,7 +72,6 @@ def view_bucket(bucket_id):
     }
     # Don't convert None to '--' here - let the frontend handle empty values
     # This allows JavaScript to properly use its own fallback values
-    # specs = {k: (('--' if (v is None or str(v).strip() == '') else v)) for k, v in specs.items()}
 
 
     images = []
@@ -94,102 +88,32 @@ def view_bucket(bucket_id):
     if random_year:
         specs['Year'] = 'Random'
 
-    # --- Random Year aggregation: find matching buckets ---
+    # --- Random Year aggregation: listings of every bucket sharing the specs ---
+    all_listings = list(snapshot['listings'])
     if random_year:
-        # Get all bucket_ids that match current bucket's specs except year
-        matching_buckets_query = '''
-            SELECT bucket_id FROM categories
-            WHERE metal = ? AND product_type = ? AND weight = ? AND purity = ?
-              AND mint = ? AND finish = ? AND grade = ? AND product_line = ?
-              AND condition_category IS NOT DISTINCT FROM ?
-              AND series_variant IS NOT DISTINCT FROM ?
-              AND is_isolated = 0
-        '''
-        matching_buckets = conn.execute(matching_buckets_query, (
-            bucket['metal'], bucket['product_type'], bucket['weight'], bucket['purity'],
-            bucket['mint'], bucket['finish'], bucket['grade'], bucket['product_line'],
-            bucket['condition_category'], bucket['series_variant']
-        )).fetchall()
-
-        bucket_ids = [row['bucket_id'] for row in matching_buckets] if matching_buckets else [bucket_id]
-        bucket_id_clause = f"c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
-    else:
-        bucket_ids = [bucket_id]
-        bucket_id_clause = "c.bucket_id = ?"
-
-    # Get ALL listings for best ask calculation (including user's own)
-    all_listings_query = f'''
-        SELECT l.*, c.metal, c.weight, c.product_type, c.year
-        FROM listings l
-        JOIN categories c ON l.category_id = c.id
-        WHERE {bucket_id_clause} AND l.active = 1
-    '''
-    all_listings_params = bucket_ids.copy()
+        for sibling_id in snapshot['sibling_bucket_ids']:
+            if sibling_id == bucket_id:
+                continue
+            sibling = get_bucket_snapshot(sibling_id)
+            if sibling is not None:
+                all_listings.extend(sibling['listings'])
 
-    # Apply packaging filters to all_listings if specified
+    # Apply packaging filters if specified
     if packaging_styles:
-        packaging_placeholders = ','.join('?' * len(packaging_styles))
-        all_listings_query += f' AND l.packaging_type IN ({packaging_placeholders})'
-        all_listings_params.extend(packaging_styles)
-
-    # Listings query (respect filters) - JOIN with categories to query by bucket_id
-    # Include pricing fields for effective price calculation
-    # Exclude user's own listings from the detailed listings display
-    listings_query = f'''
-        SELECT l.*, c.metal, c.weight, c.product_type, c.year
-        FROM listings l
-        JOIN categories c ON l.category_id = c.id
-        WHERE {bucket_id_clause} AND l.active = 1
-    '''
-    listings_params = bucket_ids.copy()
+        all_listings = [l for l in all_listings if l.get('packaging_type') in packaging_styles]
 
     # Exclude current user's own listings from detailed view if logged in
-    if user_id:
-        listings_query += ' AND l.seller_id != ?'
-        listings_params.append(user_id)
+    listings = [l for l in all_listings if l['seller_id'] != user_id] if user_id else all_listings
 
-    # Apply packaging filters to visible listings if specified
-    if packaging_styles:
-        packaging_placeholders = ','.join('?' * len(packaging_styles))
-        listings_query += f' AND l.packaging_type IN ({packaging_placeholders})'
-        listings_params.extend(packaging_styles)
-
-    # Pre-fetch spot prices from DB snapshots (no external API call).
-    # Uses the same data source as the price history chart so that Best Ask
-    # and chart always agree on the effective price.
-    spot_prices = get_current_spots_from_snapshots(conn)
-
-    # Execute listings query
-    listings_raw = conn.execute(listings_query, listings_params).fetchall()
-    # Calculate effective prices for all listings
-    listings = []
-    for listing in listings_raw:
-        listing_dict = dict(listing)
-        listing_dict['effective_price'] = get_effective_price(listing_dict, spot_prices)
-        listings.append(listing_dict)
-
-    # Calculate availability from ALL listings (including user's own) for best ask
-    all_listings_raw = conn.execute(all_listings_query, all_listings_params).fetchall()
-    all_listings = []
-    has_non_user_listings = False
-    for listing in all_listings_raw:
-        listing_dict = dict(listing)
-        listing_dict['effective_price'] = get_effective_price(listing_dict, spot_prices)
-        all_listings.append(listing_dict)
-        # Check if this is not the user's listing
-        if user_id and listing_dict['seller_id'] != user_id:
-            has_non_user_listings = True
-
-    # Calculate availability from ALL listings with effective prices
-    if all_listings:
-        lowest_price = min(l['effective_price'] for l in all_listings)
-        total_available = sum(l['quantity'] for l in all_listings)
-        # Determine if all listings are user's own
-        all_listings_are_users = not has_non_user_listings and user_id is not None
+    # Availability from ALL in-stock listings (including user's own) for best ask.
+    # Prices use the latest spot snapshot, the same source as the price history
+    # chart, so that Best Ask and chart always agree on the effective price.
+    in_stock = [l for l in all_listings if l['quantity'] > 0]
+    if in_stock:
         availability = {
-            'lowest_price': lowest_price,
-            'total_available': total_available,
-            'all_listings_are_users': all_listings_are_users
+            'lowest_price': round(float(min(l['effective_price'] for l in in_stock)), 2),
+            'total_available': sum(l['quantity'] for l in in_stock),
+            'all_listings_are_users': user_id is not None and {l['seller_id'] for l in in_stock} == {user_id}
         }
     else:
         availability = {
@@ -198,161 +122,35 @@ def view_bucket(bucket_id):
             'all_listings_are_users': False
         }
 
-    user_bids = []
-    if user_id:
-        user_bids_rows = conn.execute('''
-            SELECT b.id, b.quantity_requested, b.remaining_quantity, b.price_per_coin,
-                   b.status, b.created_at, b.active, b.requires_grading, b.preferred_grader,
-                   b.pricing_mode, b.spot_premium, b.ceiling_price, b.pricing_metal,
-                   c.metal, c.weight, c.product_type
-            FROM bids b
-            JOIN categories c ON b.category_id = c.id
-            WHERE b.buyer_id = ? AND c.bucket_id = ? AND b.active = 1
-            ORDER BY b.price_per_coin DESC
-        ''', (user_id, bucket_id)).fetchall()
-        # Calculate effective prices for user bids
-        user_bids = []
-        for bid in user_bids_rows:
-            bid_dict = dict(bid)
-            bid_dict['effective_price'] = get_effective_bid_price(bid_dict)
-            user_bids.append(bid_dict)
-
-    if user_id:
-        bids_rows = conn.execute('''
-            SELECT bids.id, bids.buyer_id, bids.category_id, bids.quantity_requested,
-                   bids.remaining_quantity, bids.price_per_coin, bids.delivery_address,
-                   bids.status, bids.created_at, bids.active, bids.requires_grading,
-                   bids.preferred_grader, bids.pricing_mode, bids.spot_premium,
-                   bids.ceiling_price, bids.pricing_metal,
-                   users.username AS buyer_name,
-                   c.metal, c.weight, c.product_type
-            FROM bids
-            JOIN users ON bids.buyer_id = users.id
-            JOIN categories c ON bids.category_id = c.id
-            WHERE c.bucket_id = ? AND bids.active = 1 AND bids.buyer_id != ?
-            ORDER BY bids.price_per_coin DESC
-        ''', (bucket_id, user_id)).fetchall()
-    else:
-        bids_rows = conn.execute('''
-            SELECT bids.id, bids.buyer_id, bids.category_id, bids.quantity_requested,
-                   bids.remaining_quantity, bids.price_per_coin, bids.delivery_address,
-                   bids.status, bids.created_at, bids.active, bids.requires_grading,
-                   bids.preferred_grader, bids.pricing_mode, bids.spot_premium,
-                   bids.ceiling_price, bids.pricing_metal,
-                   users.username AS buyer_name,
-                   c.metal, c.weight, c.product_type
-            FROM bids
-            JOIN users ON bids.buyer_id = users.id
-            JOIN categories c ON bids.category_id = c.id
-            WHERE c.bucket_id = ? AND bids.active = 1
-            ORDER BY bids.price_per_coin DESC
-        ''', (bucket_id,)).fetchall()
-
-    # Calculate effective prices for all bids
-    bids = []
-    for bid in bids_rows:
-        bid_dict = dict(bid)
-        bid_dict['effective_price'] = get_effective_bid_price(bid_dict)
-        bids.append(bid_dict)
-
-    # Get best bid - exclude current user's bids if logged in
-    if user_id:
-        best_bid_row = conn.execute('''
-            SELECT bids.id, bids.price_per_coin, bids.quantity_requested,
-                   bids.remaining_quantity, bids.delivery_address,
-                   bids.pricing_mode, bids.spot_premium, bids.ceiling_price, bids.pricing_metal,
-                   users.username AS buyer_name,
-                   c.metal, c.weight, c.product_type
-            FROM bids
-            JOIN users ON bids.buyer_id = users.id
-            JOIN categories c ON bids.category_id = c.id
-            WHERE c.bucket_id = ? AND bids.active = 1
-              AND bids.buyer_id != ?
-            ORDER BY bids.price_per_coin DESC
-            LIMIT 1
-        ''', (bucket_id, user_id)).fetchone()
-    else:
-        best_bid_row = conn.execute('''
-            SELECT bids.id, bids.price_per_coin, bids.quantity_requested,
-                   bids.remaining_quantity, bids.delivery_address,
-                   bids.pricing_mode, bids.spot_premium, bids.ceiling_price, bids.pricing_metal,
-                   users.username AS buyer_name,
-                   c.metal, c.weight, c.product_type
-            FROM bids
-            JOIN users ON bids.buyer_id = users.id
-            JOIN categories c ON bids.category_id = c.id
-            WHERE c.bucket_id = ? AND bids.active = 1
-            ORDER BY bids.price_per_coin DESC
-            LIMIT 1
-        ''', (bucket_id,)).fetchone()
-
-    if best_bid_row:
-        best_bid = dict(best_bid_row)
-        best_bid['effective_price'] = get_effective_bid_price(best_bid)
-    else:
-        best_bid = None
-
-    # Get sellers with effective prices (use multi-year bucket_ids if Random Year is ON)
-    sellers_query = f'''
-        SELECT
-          u.id                  AS seller_id,
-          u.username            AS username,
-          COALESCE(u.is_metex_guaranteed, 0) AS is_metex_guaranteed,
-          rr.rating             AS rating,
-          rr.rating_count       AS rating_count,
-          l.id                  AS listing_id,
-          l.price_per_coin,
-          l.pricing_mode,
-          l.spot_premium,
-          l.floor_price,
-          l.pricing_metal,
-          l.quantity,
-          c.metal,
-          c.weight,
-          c.product_type,
-          c.year
-        FROM listings AS l
-        JOIN categories c ON l.category_id = c.id
-        JOIN users AS u ON u.id = l.seller_id
-        LEFT JOIN (
-            SELECT ratee_id, AVG(rating) AS rating, COUNT(*) AS rating_count
-            FROM ratings GROUP BY ratee_id
-        ) AS rr ON rr.ratee_id = u.id
-        WHERE {bucket_id_clause} AND l.active = 1 AND l.quantity > 0
-    '''
-    sellers_params = bucket_ids.copy()
-
-    # Apply packaging filters to sellers if specified
-    if packaging_styles:
-        packaging_placeholders = ','.join('?' * len(packaging_styles))
-        sellers_query += f' AND l.packaging_type IN ({packaging_placeholders})'
-        sellers_params.extend(packaging_styles)
+    # Bids, best first: the user's own, and everyone else's (best bid excludes own)
+    user_bids = [b for b in snapshot['bids'] if b['buyer_id'] == user_id] if user_id else []
+    bids = [b for b in snapshot['bids'] if b['buyer_id'] != user_id] if user_id else snapshot['bids']
+    best_bid = bids[0] if bids else None
 
-    sellers_raw = conn.execute(sellers_query, sellers_params).fetchall()
-
-    # Aggregate sellers with effective prices
+    # Sellers with effective prices (multi-year listings if Random Year is ON)
     sellers_data = {}
-    for row in sellers_raw:
-        seller_id = row['seller_id']
-        listing_dict = dict(row)
-        effective_price = get_effective_price(listing_dict)
+    for listing in in_stock:
+        if listing['seller_user_id'] is None:
+            continue
+        seller_id = listing['seller_id']
+        effective_price = listing['effective_price']
 
         if seller_id not in sellers_data:
             sellers_data[seller_id] = {
                 'seller_id': seller_id,
-                'username': row['username'],
-                'is_metex_guaranteed': bool(row['is_metex_guaranteed']),
-                'rating': row['rating'],
-                'rating_count': row['rating_count'],
+                'username': listing['seller_username'],
+                'is_metex_guaranteed': bool(listing['seller_is_metex_guaranteed']),
+                'rating': listing['seller_rating'],
+                'rating_count': listing['seller_rating_count'],
                 'lowest_price': effective_price,
-                'total_qty': row['quantity']
+                'total_qty': listing['quantity']
             }
         else:
             sellers_data[seller_id]['lowest_price'] = min(
                 sellers_data[seller_id]['lowest_price'],
                 effective_price
             )
-            sellers_data[seller_id]['total_qty'] += row['quantity']
+            sellers_data[seller_id]['total_qty'] += listing['quantity']
 
     # Convert to list and sort
     sellers = list(sellers_data.values())
@@ -360,14 +158,13 @@ def view_bucket(bucket_id):
 
     user_is_logged_in = 'user_id' in session
 
-    # Get spot price for the bucket's metal (reuse pre-fetched spot_prices)
+    # Get spot price for the bucket's metal
     bucket_metal = specs.get('Metal')
     spot_price = None
     if bucket_metal and bucket_metal != '--':
-        spot_price = spot_prices.get(bucket_metal.lower())
+        spot_price = snapshot['spot_prices'].get(bucket_metal.lower())
 
-    # Get isolated/set information from listing
-    # Check if this bucket has isolated listings
+    # Isolated/set information from the bucket's listing
     is_isolated = bucket['is_isolated'] if 'is_isolated' in cols else 0
     isolated_type = None
     issue_number = None
@@ -382,96 +179,40 @@ def view_bucket(bucket_id):
     listing_edition_number = None
     listing_edition_total = None
 
-    if is_isolated:
-        # Get isolated details from any active listing in this bucket
-        # Include packaging, condition, and edition fields for display
-        listing_info = conn.execute('''
-            SELECT isolated_type, issue_number, issue_total,
-                   packaging_type, packaging_notes, condition_notes,
-                   edition_number, edition_total
-            FROM listings
-            WHERE category_id IN (
-                SELECT id FROM categories WHERE bucket_id = ?
-            )
-            AND active = 1
-            LIMIT 1
-        ''', (bucket_id,)).fetchone()
-
-        if listing_info:
-            isolated_type = listing_info['isolated_type']
-            issue_number = listing_info['issue_number']
-            issue_total = listing_info['issue_total']
-            # Extract listing-level fields
-            listing_packaging_type = listing_info['packaging_type']
-            listing_packaging_notes = listing_info['packaging_notes']
-            listing_condition_notes = listing_info['condition_notes']
-            listing_edition_number = listing_info['edition_number']
-            listing_edition_total = listing_info['edition_total']
-
-            # Get the listing ID for photo retrieval
-            listing_id_row = conn.execute('''
-                SELECT l.id
-                FROM listings l
-                JOIN categories c ON l.category_id = c.id
-                WHERE c.bucket_id = ? AND l.active = 1
-                LIMIT 1
-            ''', (bucket_id,)).fetchone()
-
-            if listing_id_row:
-                listing_id = listing_id_row['id']
-
-                # Get all listing photos for gallery
-                all_photos_raw = conn.execute('''
-                    SELECT file_path
-                    FROM listing_photos
-                    WHERE listing_id = ?
-                    ORDER BY id ASC
-                ''', (listing_id,)).fetchall()
-
-                if all_photos_raw:
-                    # First photo is cover (shown on buy page tile), rest are item detail photos
-                    cover_photo_url = f"/static/{all_photos_raw[0]['file_path']}"
-                    thumbnail_urls = [f"/static/{p['file_path']}" for p in all_photos_raw[1:]]
-
-                # For one-of-a-kind: gallery shows item photos (thumbnail_urls)
-                # Fall back to cover_photo_url if no item photos (old listings created before fix)
-                if isolated_type != 'set':
-                    images = thumbnail_urls if thumbnail_urls else ([cover_photo_url] if cover_photo_url else [])
-
-                # If this is a set, get all set items with photos
-                if isolated_type == 'set':
-                    # Get set items
-                    set_items_raw = conn.execute('''
-                        SELECT *
-                        FROM listing_set_items
-                        WHERE listing_id = ?
-                        ORDER BY position_index
-                    ''', (listing_id,)).fetchall()
-
-                    set_items = [dict(item) for item in set_items_raw]
-
-                    # Fetch multiple photos for each set item from listing_set_item_photos
-                    for item in set_items:
-                        photos_raw = conn.execute('''
-                            SELECT file_path, position_index
-                            FROM listing_set_item_photos
-                            WHERE set_item_id = ?
-                            ORDER BY position_index
-                            LIMIT 3
-                        ''', (item['id'],)).fetchall()
-                        # Convert to URLs (up to 3 photos per item)
-                        item['photo_urls'] = [f"/static/{p['file_path']}" for p in photos_raw]
-
-                        # Collect each set item's first photo for the gallery
-                        if photos_raw:
-                            first_photo_url = f"/static/{photos_raw[0]['file_path']}"
-                            if first_photo_url not in thumbnail_urls:
-                                thumbnail_urls.append(first_photo_url)
-
-                    # For set listings: gallery shows cover photo + each item's first photo
-                    images = ([cover_photo_url] if cover_photo_url else []) + thumbnail_urls
-
-    conn.close()
+    isolated = snapshot['isolated']
+    if is_isolated and isolated:
+        isolated_type = listing_info['isolated_type']
+        issue_number = listing_info['issue_number']
+        issue_total = listing_info['issue_total']
+        # Extract listing-level fields
+        listing_packaging_type = listing_info['packaging_type']
+        listing_packaging_notes = listing_info['packaging_notes']
+        listing_condition_notes = listing_info['condition_notes']
+        listing_edition_number = listing_info['edition_number']
+        listing_edition_total = listing_info['edition_total']
+
+        photo_urls = isolated['photo_urls']
+        if photo_urls:
+            # First photo is cover (shown on buy page tile), rest are item detail photos
+            cover_photo_url = photo_urls[0]
+            thumbnail_urls = photo_urls[1:]
+
+        # For one-of-a-kind: gallery shows item photos (thumbnail_urls)
+        # Fall back to cover_photo_url if no item photos (old listings created before fix)
+        if isolated_type != 'set':
+            images = thumbnail_urls if thumbnail_urls else ([cover_photo_url] if cover_photo_url else [])
+
+        # If this is a set, show all set items with photos
+        if isolated_type == 'set':
+            set_items = isolated['set_items']
+
+            # Collect each set item's first photo for the gallery
+            for item in set_items:
+                if item['photo_urls'] and item['photo_urls'][0] not in thumbnail_urls:
+                    thumbnail_urls.append(item['photo_urls'][0])
+
+            # For set listings: gallery shows cover photo + each item's first photo
+            images = ([cover_photo_url] if cover_photo_url else []) + thumbnail_urls
 
     # Compute fee indicator for this bucket
     fee_indicator = None
@@ -527,15 +268,22 @@ def view_bucket(bucket_id):
 
 @buy_bp.route('/bucket/<int:bucket_id>/availability_json')
 def bucket_availability_json(bucket_id):
+    """
+    Lowest effective ask and total quantity for a bucket.
+
+    Supports conditional GET: the ETag is built from a fingerprint of the
+    filtered listing set (plus the latest spot snapshot when any listing is
+    spot-priced) before any pricing work, and a matching If-None-Match
+    answers 304.
+    """
     conn = get_db_connection()
     user_id = session.get('user_id')
 
     # Parse packaging filters from query string
     packaging_styles = request.args.getlist('packaging_styles')
 
-    # Get listings with pricing fields
+    # Shared FROM/WHERE for the watermark and the listing fetch
     query = '''
-        SELECT l.*, c.metal, c.weight, c.product_type
         FROM listings l
         JOIN categories c ON l.category_id = c.id
         WHERE c.bucket_id = ? AND l.active = 1
@@ -553,7 +301,24 @@ def bucket_availability_json(bucket_id):
         query += ' AND l.seller_id != ?'
         params.append(user_id)
 
-    listings = conn.execute(query, params).fetchall()
+    watermark = conn.execute('''
+        SELECT COUNT(*) AS n, MAX(l.id) AS max_id,
+               SUM(l.id * (COALESCE(l.price_per_coin, 0) + COALESCE(l.spot_premium, 0)
+                           + COALESCE(l.floor_price, 0) + l.quantity)) AS checksum,
+               SUM(CASE WHEN l.pricing_mode = 'premium_to_spot' THEN 1 ELSE 0 END) AS variable
+    ''' + query, params).fetchone()
+    spot_id = None
+    if watermark['variable']:
+        spot_id = conn.execute('SELECT MAX(id) AS max_id FROM spot_price_snapshots').fetchone()['max_id']
+    etag = compute_etag('availability', bucket_id, user_id, ','.join(sorted(packaging_styles)),
+                        watermark['n'], watermark['max_id'], watermark['checksum'], spot_id)
+    if etag_matches(etag):
+        conn.close()
+        return not_modified(etag, private=True)
+
+    listings = conn.execute(
+        'SELECT l.*, c.metal, c.weight, c.product_type ' + query, params
+    ).fetchall()
 
     # Fetch spot prices from snapshots before closing conn (same source as chart).
     spot_prices = get_current_spots_from_snapshots(conn)
@@ -573,4 +338,7 @@ def bucket_availability_json(bucket_id):
         lowest_price = None
         total_available = 0
 
-    return {'lowest_price': lowest_price, 'total_available': total_available}
+    return with_etag(
+        jsonify({'lowest_price': lowest_price, 'total_available': total_available}),
+        etag, private=True
+    )
@@ -17,6 +17,8 @@ from services.notification_service import notify_listing_sold, notify_order_conf
 from services.checkout_spot_service import (
     check_spot_map_freshness, SpotExpiredError, SpotUnavailableError
 )
+from services.user_stats_service import refresh_order_user_stats
+from utils.category_manager import get_sibling_bucket_ids
 
 from . import buy_bp
 
@@ -169,21 +171,7 @@ def direct_buy_item(bucket_id):
                 return jsonify(success=False, message='Item not found.'), 404
 
             # Find all matching buckets (same specs except year)
-            matching_buckets_query = '''
-                SELECT bucket_id FROM categories
-                WHERE metal = ? AND product_type = ? AND weight = ? AND purity = ?
-                  AND mint = ? AND finish = ? AND grade = ? AND product_line = ?
-                  AND condition_category IS NOT DISTINCT FROM ?
-                  AND series_variant IS NOT DISTINCT FROM ?
-                  AND is_isolated = 0
-            '''
-            matching_buckets = conn.execute(matching_buckets_query, (
-                bucket['metal'], bucket['product_type'], bucket['weight'], bucket['purity'],
-                bucket['mint'], bucket['finish'], bucket['grade'], bucket['product_line'],
-                bucket['condition_category'], bucket['series_variant']
-            )).fetchall()
-
-            bucket_ids = [row['bucket_id'] for row in matching_buckets] if matching_buckets else [bucket_id]
+            bucket_ids = get_sibling_bucket_ids(conn, bucket)
             bucket_id_clause = f"c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
             params = bucket_ids.copy()
         else:
@@ -458,6 +446,9 @@ def direct_buy_item(bucket_id):
         conn.commit()
         conn.close()
 
+        for order in orders_created:
+            refresh_order_user_stats(order['order_id'])
+
         # Send notifications AFTER commit (avoids database locking)
         for notif_data in notifications_to_send:
             try:
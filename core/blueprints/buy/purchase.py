@@ -14,6 +14,7 @@ from flask import request, redirect, url_for, session, flash, jsonify
 from database import get_db_connection
 from services.pricing_service import get_effective_price
 from services.reference_price_service import get_current_spots_from_snapshots
+from utils.category_manager import get_sibling_bucket_ids
 from . import buy_bp
 
 # Import extracted module to register routes
@@ -46,19 +47,7 @@ def auto_fill_bucket_purchase(bucket_id):
         bucket_specs = cursor.execute('SELECT * FROM categories WHERE bucket_id = ? LIMIT 1', (bucket_id,)).fetchone()
         if bucket_specs:
             # Find all matching bucket_ids (same specs except year)
-            matching_buckets = cursor.execute('''
-                SELECT bucket_id FROM categories
-                WHERE metal = ? AND product_type = ? AND weight = ? AND purity = ?
-                  AND mint = ? AND finish = ? AND grade = ? AND product_line = ?
-                  AND condition_category IS NOT DISTINCT FROM ?
-                  AND series_variant IS NOT DISTINCT FROM ?
-                  AND is_isolated = 0
-            ''', (
-                bucket_specs['metal'], bucket_specs['product_type'], bucket_specs['weight'], bucket_specs['purity'],
-                bucket_specs['mint'], bucket_specs['finish'], bucket_specs['grade'], bucket_specs['product_line'],
-                bucket_specs['condition_category'], bucket_specs['series_variant']
-            )).fetchall()
-            bucket_ids = [row['bucket_id'] for row in matching_buckets] if matching_buckets else [bucket_id]
+            bucket_ids = get_sibling_bucket_ids(conn, bucket_specs)
         else:
             bucket_ids = [bucket_id]
         bucket_id_clause = f"c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
@@ -410,21 +399,7 @@ def preview_buy(bucket_id):
                 return jsonify(success=False, message='Item not found.'), 404
 
             # Find all matching buckets (same specs except year)
-            matching_buckets_query = '''
-                SELECT bucket_id FROM categories
-                WHERE metal = ? AND product_type = ? AND weight = ? AND purity = ?
-                  AND mint = ? AND finish = ? AND grade = ? AND product_line = ?
-                  AND condition_category IS NOT DISTINCT FROM ?
-                  AND series_variant IS NOT DISTINCT FROM ?
-                  AND is_isolated = 0
-            '''
-            matching_buckets = conn.execute(matching_buckets_query, (
-                bucket['metal'], bucket['product_type'], bucket['weight'], bucket['purity'],
-                bucket['mint'], bucket['finish'], bucket['grade'], bucket['product_line'],
-                bucket['condition_category'], bucket['series_variant']
-            )).fetchall()
-
-            bucket_ids = [row['bucket_id'] for row in matching_buckets] if matching_buckets else [bucket_id]
+            bucket_ids = get_sibling_bucket_ids(conn, bucket)
             bucket_id_clause = f"c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
             params = bucket_ids.copy()
         else:
@@ -4,9 +4,13 @@ Sellers API for Buy Blueprint
 This module contains the API endpoint for fetching sellers for a bucket.
 """
 
+import json
+
 from flask import jsonify
 from datetime import datetime
 from database import get_db_connection
+from services.order_book_service import get_bucket_seller_stats
+from services.user_stats_service import repeat_pct
 from . import buy_bp
 
 
@@ -18,59 +22,32 @@ def get_bucket_sellers(bucket_id):
     """
     conn = get_db_connection()
 
-    # Fetch spot prices once for effective-price calculation
-    from services.reference_price_service import get_current_spots_from_snapshots
-    from services.pricing_service import get_effective_price
-    spot_prices = get_current_spots_from_snapshots(conn)
-
-    # Fetch every active listing in this bucket with the columns needed
-    # for effective-price calculation, keyed by seller.
-    listings_rows = conn.execute('''
-        SELECT
-            l.seller_id,
-            l.quantity,
-            l.pricing_mode,
-            l.price_per_coin,
-            l.spot_premium,
-            l.floor_price,
-            l.pricing_metal,
-            c.metal
-        FROM listings l
-        JOIN categories c ON l.category_id = c.id
-        WHERE c.bucket_id = ? AND l.active = 1 AND l.quantity > 0
-    ''', (bucket_id,)).fetchall()
-
-    # Group listings by seller and compute effective-price aggregates
-    from collections import defaultdict
-    seller_listings = defaultdict(list)
-    for row in listings_rows:
-        seller_listings[row['seller_id']].append(dict(row))
-
-    # Build per-seller price stats using effective prices
-    seller_price_stats = {}
-    for sid, listings in seller_listings.items():
-        effective_prices = [get_effective_price(l, spot_prices) for l in listings]
-        quantities = [l['quantity'] for l in listings]
-        seller_price_stats[sid] = {
-            'lowest_price': min(effective_prices),
-            'avg_price': sum(effective_prices) / len(effective_prices),
-            'total_qty': sum(quantities),
-        }
+    # Per-seller effective-price stats (lowest, average, total quantity) come
+    # from the cached order book, priced at the latest snapshot spot
+    seller_price_stats = get_bucket_seller_stats(bucket_id)
 
-    # Get sellers with rating aggregates, ordered by effective lowest price
-    sellers_query = conn.execute('''
-        SELECT
-            u.id as seller_id,
-            u.username,
-            COALESCE(AVG(r.rating), 0) as rating,
-            COUNT(DISTINCT r.id) as num_reviews
-        FROM listings l
-        JOIN categories c ON l.category_id = c.id
-        JOIN users u ON l.seller_id = u.id
-        LEFT JOIN ratings r ON u.id = r.ratee_id
-        WHERE c.bucket_id = ? AND l.active = 1 AND l.quantity > 0
-        GROUP BY u.id, u.username
-    ''', (bucket_id,)).fetchall()
+    # Get sellers with their precomputed rating and activity stats
+    seller_ids = list(seller_price_stats)
+    sellers_query = []
+    if seller_ids:
+        sellers_query = conn.execute(f'''
+            SELECT
+                u.id as seller_id,
+                u.username,
+                u.first_name,
+                u.last_name,
+                u.created_at,
+                COALESCE(u.is_metex_guaranteed, 0) as is_metex_guaranteed,
+                COALESCE(us.rating_avg, 0) as rating,
+                COALESCE(us.rating_count, 0) as num_reviews,
+                COALESCE(us.seller_transaction_count, 0) as transaction_count,
+                COALESCE(us.seller_buyer_count, 0) as total_buyers,
+                COALESCE(us.seller_repeat_buyer_count, 0) as repeat_buyers,
+                us.top_product_lines
+            FROM users u
+            LEFT JOIN user_stats us ON us.user_id = u.id
+            WHERE u.id IN ({','.join('?' * len(seller_ids))})
+        ''', seller_ids).fetchall()
 
     # Sort by effective lowest price ascending
     sellers_query = sorted(
@@ -92,27 +69,21 @@ def get_bucket_sellers(bucket_id):
             'total_qty': stats.get('total_qty', 0),
         }
 
-        # Get user info (member since, display name)
-        user_info = conn.execute('''
-            SELECT username, first_name, last_name, created_at
-            FROM users WHERE id = ?
-        ''', (seller_id,)).fetchone()
-
-        if user_info:
-            display_name = f"{user_info['first_name'] or ''} {user_info['last_name'] or ''}".strip()
-            if not display_name:
-                display_name = user_info['username']
-            seller_data['display_name'] = display_name
-
-            raw_date = user_info['created_at']
-            if raw_date:
-                try:
-                    dt = datetime.fromisoformat(str(raw_date).replace('Z', ''))
-                    seller_data['member_since'] = dt.strftime('%b %Y')
-                except (ValueError, TypeError):
-                    seller_data['member_since'] = str(raw_date)[:4]
-            else:
-                seller_data['member_since'] = None
+        # Member since, display name
+        display_name = f"{row['first_name'] or ''} {row['last_name'] or ''}".strip()
+        if not display_name:
+            display_name = row['username']
+        seller_data['display_name'] = display_name
+
+        raw_date = row['created_at']
+        if raw_date:
+            try:
+                dt = datetime.fromisoformat(str(raw_date).replace('Z', ''))
+                seller_data['member_since'] = dt.strftime('%b %Y')
+            except (ValueError, TypeError):
+                seller_data['member_since'] = str(raw_date)[:4]
+        else:
+            seller_data['member_since'] = None
 
         # Check verified seller status (rating >= 4.7 and num_reviews > 100)
         rating = seller_data.get('rating') or 0
@@ -120,39 +91,13 @@ def get_bucket_sellers(bucket_id):
         seller_data['is_verified'] = rating >= 4.7 and num_reviews > 100
 
         # Metex Guaranteed designation (admin-controlled)
-        guaranteed_row = conn.execute(
-            'SELECT COALESCE(is_metex_guaranteed, 0) AS is_metex_guaranteed FROM users WHERE id = ?',
-            (seller_id,)
-        ).fetchone()
-        seller_data['is_metex_guaranteed'] = bool(guaranteed_row and guaranteed_row['is_metex_guaranteed'])
-
-        # Get transaction count: only orders confirmed as delivered
-        transaction_result = conn.execute('''
-            SELECT COUNT(DISTINCT o.id) as transaction_count
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-              AND o.status IN ('Delivered', 'Complete')
-        ''', (seller_id,)).fetchone()
-        seller_data['transaction_count'] = transaction_result['transaction_count'] if transaction_result else 0
-
-        # Calculate repeat buyers percentage
-        buyers_result = conn.execute('''
-            SELECT o.buyer_id, COUNT(DISTINCT o.id) as order_count
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-            GROUP BY o.buyer_id
-        ''', (seller_id,)).fetchall()
+        seller_data['is_metex_guaranteed'] = bool(row['is_metex_guaranteed'])
 
-        total_buyers = len(buyers_result)
-        repeat_buyers = sum(1 for b in buyers_result if b['order_count'] >= 2)
-        if total_buyers > 0:
-            seller_data['repeat_buyers_pct'] = round((repeat_buyers / total_buyers) * 100)
-        else:
-            seller_data['repeat_buyers_pct'] = 0
+        # Transaction count: only orders confirmed as delivered
+        seller_data['transaction_count'] = row['transaction_count']
+
+        # Repeat buyers percentage
+        seller_data['repeat_buyers_pct'] = repeat_pct(row['repeat_buyers'], row['total_buyers'])
 
         # Get ships from location
         address_result = conn.execute('''
@@ -163,18 +108,8 @@ def get_bucket_sellers(bucket_id):
         else:
             seller_data['ships_from'] = None
 
-        # Get top 3 product lines (specializations)
-        specializations_result = conn.execute('''
-            SELECT c.product_line, COUNT(*) as sale_count
-            FROM order_items oi
-            JOIN listings l ON oi.listing_id = l.id
-            JOIN categories c ON l.category_id = c.id
-            WHERE l.seller_id = ? AND c.product_line IS NOT NULL AND c.product_line != ''
-            GROUP BY c.product_line
-            ORDER BY sale_count DESC
-            LIMIT 3
-        ''', (seller_id,)).fetchall()
-        seller_data['specializations'] = [s['product_line'] for s in specializations_result]
+        # Top 3 product lines (specializations)
+        seller_data['specializations'] = json.loads(row['top_product_lines'] or '[]')
 
         # Calculate median response time
         response_times = conn.execute('''
@@ -14,6 +14,7 @@ Extracted from routes.py during refactor - NO BEHAVIOR CHANGE.
 from flask import session, jsonify
 from datetime import datetime
 from database import get_db_connection
+from services.user_stats_service import get_user_stats, repeat_pct
 from utils.cart_utils import get_cart_items
 
 from . import cart_bp
@@ -65,8 +66,10 @@ def get_cart_sellers(bucket_id):
         sellers[seller_id]['item_count'] += 1
 
     # Enrich seller data with additional details
+    user_stats = get_user_stats(conn, sellers)
     enriched_sellers = []
     for seller_id, seller_data in sellers.items():
+        stats = user_stats[seller_id]
         # Calculate avg_price for cart items from this seller
         if seller_data['item_count'] > 0:
             seller_data['avg_price'] = seller_data['price_sum'] / seller_data['item_count']
@@ -112,34 +115,12 @@ def get_cart_sellers(bucket_id):
         ).fetchone()
         seller_data['is_metex_guaranteed'] = bool(mg_row and mg_row['v'])
 
-        # Get transaction count: only orders confirmed as delivered
-        transaction_result = conn.execute('''
-            SELECT COUNT(DISTINCT o.id) as transaction_count
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-              AND o.status IN ('Delivered', 'Complete')
-        ''', (seller_id,)).fetchone()
-        seller_data['transaction_count'] = transaction_result['transaction_count'] if transaction_result else 0
-
-        # Calculate repeat buyers percentage
-        # First get all unique buyers, then count those with 2+ orders
-        buyers_result = conn.execute('''
-            SELECT o.buyer_id, COUNT(DISTINCT o.id) as order_count
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN listings l ON oi.listing_id = l.id
-            WHERE l.seller_id = ?
-            GROUP BY o.buyer_id
-        ''', (seller_id,)).fetchall()
+        # Transaction count: only orders confirmed as delivered
+        seller_data['transaction_count'] = stats['seller_transaction_count']
 
-        total_buyers = len(buyers_result)
-        repeat_buyers = sum(1 for b in buyers_result if b['order_count'] >= 2)
-        if total_buyers > 0:
-            seller_data['repeat_buyers_pct'] = round((repeat_buyers / total_buyers) * 100)
-        else:
-            seller_data['repeat_buyers_pct'] = 0
+        # Repeat buyers percentage
+        seller_data['repeat_buyers_pct'] = repeat_pct(stats['seller_repeat_buyer_count'],
+                                                      stats['seller_buyer_count'])
 
         # Get ships from location (state from seller's first address)
         address_result = conn.execute('''
@@ -150,18 +131,8 @@ def get_cart_sellers(bucket_id):
         else:
             seller_data['ships_from'] = None
 
-        # Get top 3 product lines (specializations) from sold items
-        specializations_result = conn.execute('''
-            SELECT c.product_line, COUNT(*) as sale_count
-            FROM order_items oi
-            JOIN listings l ON oi.listing_id = l.id
-            JOIN categories c ON l.category_id = c.id
-            WHERE l.seller_id = ? AND c.product_line IS NOT NULL AND c.product_line != ''
-            GROUP BY c.product_line
-            ORDER BY sale_count DESC
-            LIMIT 3
-        ''', (seller_id,)).fetchall()
-        seller_data['specializations'] = [s['product_line'] for s in specializations_result]
+        # Top 3 product lines (specializations) from sold items
+        seller_data['specializations'] = stats['top_product_lines']
 
         # Calculate median response time (time between receiving a message and responding)
         # Get all message pairs where seller received then responded
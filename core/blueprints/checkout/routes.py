@@ -22,6 +22,7 @@ from services.notification_service import notify_listing_sold, notify_order_conf
 from services.pricing_service import get_effective_price, create_price_lock
 from services.checkout_spot_service import SpotUnavailableError, SpotExpiredError
 from utils.auth_utils import frozen_check
+from utils.category_manager import get_sibling_bucket_ids
 from config import STRIPE_PUBLISHABLE_KEY
 
 from . import checkout_bp
@@ -293,21 +294,7 @@ def checkout():
                     return redirect(url_for('buy.buy'))
 
                 # Find all matching buckets (same specs except year)
-                matching_buckets_query = '''
-                    SELECT bucket_id FROM categories
-                    WHERE metal = ? AND product_type = ? AND weight = ? AND purity = ?
-                      AND mint = ? AND finish = ? AND grade = ? AND product_line = ?
-                      AND condition_category IS NOT DISTINCT FROM ?
-                      AND series_variant IS NOT DISTINCT FROM ?
-                      AND is_isolated = 0
-                '''
-                matching_buckets = conn.execute(matching_buckets_query, (
-                    bucket['metal'], bucket['product_type'], bucket['weight'], bucket['purity'],
-                    bucket['mint'], bucket['finish'], bucket['grade'], bucket['product_line'],
-                    bucket['condition_category'], bucket['series_variant']
-                )).fetchall()
-
-                bucket_ids = [row['bucket_id'] for row in matching_buckets] if matching_buckets else [bucket_id]
+                bucket_ids = get_sibling_bucket_ids(conn, bucket)
                 bucket_id_clause = f"c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
                 params = bucket_ids.copy()
             else:
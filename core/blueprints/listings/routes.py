@@ -7,11 +7,13 @@ Helper functions are in helpers.py.
 
 from flask import render_template, request, redirect, url_for, session, jsonify
 from database import get_db_connection
-from routes.category_options import get_dropdown_options
-from utils.category_manager import get_or_create_category, validate_category_specification
+from routes.category_options import get_dropdown_options, note_category_values
+from utils.category_manager import compute_spec_key, get_or_create_category, validate_category_specification
 from services.pricing_service import get_effective_price
 from services.spot_price_service import get_current_spot_prices, get_spot_price
 from services.bucket_price_history_service import update_bucket_price
+from services.reference_price_service import invalidate_reference_series
+from services.search_index_service import reindex_buckets
 import sqlite3
 
 from . import listings_bp
@@ -219,12 +221,14 @@ def edit_listing(listing_id):
                         '''UPDATE categories SET
                                metal = ?, product_line = ?, product_type = ?, weight = ?,
                                purity = ?, mint = ?, year = ?, finish = ?, grade = ?,
-                               condition_category = ?, series_variant = ?, coin_series = ?
+                               condition_category = ?, series_variant = ?, coin_series = ?,
+                               spec_key = ?
                            WHERE id = ?''',
                         (metal, product_line, product_type, weight, purity, mint, year,
                          finish, grade, condition_category, series_variant, coin_series,
-                         existing_cat_id)
+                         compute_spec_key(category_spec), existing_cat_id)
                     )
+                    note_category_values(conn, category_spec)
                     new_cat_id = existing_cat_id
                 else:
                     # Use unified category management - handles bucket_id automatically
@@ -564,6 +568,27 @@ def edit_listing(listing_id):
                                 return jsonify({'message': f'Invalid set items data: {e}'}), 400
                             return f'Invalid set items data: {e}', 400
 
+                # The stored reference series assumed the pre-edit listing;
+                # drop it for the old and new bucket so the spot tick rebuilds it
+                edited_bucket_ids = []
+                try:
+                    for row in conn.execute(
+                        'SELECT DISTINCT bucket_id FROM categories WHERE id IN (?, ?)',
+                        (listing['category_id'], new_cat_id)
+                    ).fetchall():
+                        invalidate_reference_series(conn, row['bucket_id'])
+                        edited_bucket_ids.append(row['bucket_id'])
+                    conn.commit()
+                except Exception as e:
+                    print(f"[WARNING] Failed to invalidate reference series: {e}")
+
+                # Title and specs may have moved between buckets: reindex both
+                try:
+                    reindex_buckets(conn, edited_bucket_ids)
+                    conn.commit()
+                except Exception as e:
+                    print(f"[WARNING] Failed to reindex search: {e}")
+
                 # Update bucket price history after listing change
                 try:
                     bucket_id_row = conn.execute(
@@ -7,6 +7,7 @@ Rating routes: rate order.
 from flask import request, redirect, url_for, session, flash, render_template, jsonify
 from database import get_db_connection
 from services.notification_service import notify_rating_received, notify_rating_submitted
+from services.user_stats_service import refresh_user_stats_for
 
 from . import ratings_bp
 
@@ -82,6 +83,7 @@ def rate_order(order_id):
         rater_info = conn.execute('SELECT username FROM users WHERE id = ?', (rater_id,)).fetchone()
         ratee_info = conn.execute('SELECT username FROM users WHERE id = ?', (ratee_id,)).fetchone()
         conn.close()
+        refresh_user_stats_for([ratee_id])
 
         rater_username = rater_info['username'] if rater_info else 'Someone'
         ratee_username = ratee_info['username'] if ratee_info else 'Someone'
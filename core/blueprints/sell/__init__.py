@@ -1,7 +1,7 @@
 """
 Sell Blueprint
 
-Sell routes: create listing, upload tracking, accept bids, sold orders.
+Sell routes: create listing, bulk listing import, upload tracking, accept bids, sold orders.
 """
 
 from flask import Blueprint
@@ -10,5 +10,6 @@ sell_bp = Blueprint('sell', __name__)
 
 # Import routes to register them with the blueprint
 from . import routes
+from . import bulk_import
 
 __all__ = ['sell_bp']
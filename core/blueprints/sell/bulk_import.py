@@ -0,0 +1,362 @@
+# core/blueprints/sell/bulk_import.py
+"""
+Bulk listing import for dealers.
+
+Routes:
+- POST /sell/bulk_import: bulk_import - CSV/JSON manifest plus photo archive
+
+A manifest row carries the same fields as the sell form (category specs,
+quantity, pricing mode and price fields, packaging/condition notes, title,
+description) plus a ``photos`` column naming one or more files in the zip
+archive, separated by ``;``.  As on /sell, every listing needs at least one
+photo.  Only standard (non-isolated) listings can be
+imported; one-of-a-kind and set listings still go through /sell.
+
+Compared with posting each row to /sell:
+- categories resolve against one in-memory CategorySpecIndex
+- photos are validated and re-encoded in a thread pool
+- listings and listing_photos are inserted in one transaction (saved photo
+  files are removed again if it rolls back)
+- update_bucket_price runs once per affected bucket
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request, session, jsonify
+from werkzeug.datastructures import FileStorage
+from database import get_db_connection
+from routes.category_options import get_dropdown_options
+from services.bucket_price_history_service import update_bucket_price
+from utils.auth_utils import frozen_check
+from utils.category_manager import CategorySpecIndex, validate_category_specification
+from utils.upload_security import MAX_FILE_SIZES, save_secure_upload
+from . import sell_bp
+from .listing_creation import allowed_file
+
+MAX_IMPORT_ROWS = 1000
+MAX_ARCHIVE_FILES = 3000
+PHOTO_WORKERS = 4
+
+_SPEC_FIELDS = ('metal', 'product_line', 'product_type', 'weight', 'purity',
+                'mint', 'year', 'finish', 'grade')
+_PHOTO_TYPES = ['image/png', 'image/jpeg', 'image/webp', 'image/heic']
+
+
+class ManifestError(ValueError):
+    """Manifest or archive could not be read."""
+
+
+def parse_manifest(data, filename):
+    """
+    Parse a CSV or JSON manifest into a list of row dicts.
+
+    JSON may be a list of objects or {"listings": [...]}.  Anything not ending
+    in .json is read as CSV with a header row.
+    """
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ManifestError('Manifest must be UTF-8 encoded.')
+
+    if filename.lower().endswith('.json'):
+        try:
+            payload = json.loads(text)
+        except ValueError as e:
+            raise ManifestError(f'Invalid JSON manifest: {e}')
+        rows = payload.get('listings') if isinstance(payload, dict) else payload
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ManifestError('JSON manifest must be a list of listing objects.')
+        return rows
+
+    reader = csv.DictReader(io.StringIO(text))
+    return [{(k or '').strip(): v for k, v in row.items()} for row in reader]
+
+
+def read_photo_archive(data):
+    """
+    Return {basename: bytes} for the image files in a zip archive.
+
+    Entries larger than the listing photo limit are skipped before
+    decompression, so rows naming them report the photo as missing.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ManifestError('Photo archive must be a .zip file.')
+
+    infos = [i for i in archive.infolist() if not i.is_dir()]
+    if len(infos) > MAX_ARCHIVE_FILES:
+        raise ManifestError(f'Photo archive may contain at most {MAX_ARCHIVE_FILES} files.')
+
+    photos = {}
+    for info in infos:
+        name = os.path.basename(info.filename)
+        if not name or name.startswith('.') or not allowed_file(name):
+            continue
+        if info.file_size > MAX_FILE_SIZES['listing_photo']:
+            continue
+        photos[name] = archive.read(info)
+    return photos
+
+
+def _cell(row, key):
+    value = row.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def _parse_row(row, options):
+    """
+    Validate one manifest row with the same rules as handle_sell_post.
+
+    Returns (fields, error_message).
+    """
+    category_spec = {k: _cell(row, k) for k in _SPEC_FIELDS}
+    category_spec['condition_category'] = _cell(row, 'condition_category') or None
+    category_spec['series_variant'] = _cell(row, 'series_variant') or None
+
+    is_valid, error_msg = validate_category_specification(category_spec, options)
+    if not is_valid:
+        return None, error_msg
+
+    pricing_mode = _cell(row, 'pricing_mode') or 'static'
+    try:
+        quantity = int(_cell(row, 'quantity'))
+        if pricing_mode == 'static':
+            price_per_coin = float(_cell(row, 'price_per_coin'))
+            spot_premium = None
+            floor_price = None
+            pricing_metal = None
+        elif pricing_mode == 'premium_to_spot':
+            spot_premium = float(_cell(row, 'spot_premium') or 0)
+            floor_price = float(_cell(row, 'floor_price') or 0)
+            pricing_metal = _cell(row, 'pricing_metal') or category_spec['metal']
+            price_per_coin = floor_price
+            if floor_price <= 0:
+                return None, 'Floor price must be greater than zero.'
+        else:
+            return None, 'Invalid pricing mode.'
+    except ValueError:
+        return None, 'Invalid quantity or price. Please enter valid numbers.'
+
+    if quantity <= 0:
+        return None, 'Quantity must be greater than zero.'
+    if pricing_mode == 'static' and price_per_coin <= 0:
+        return None, 'Price must be greater than zero.'
+
+    photos = [p.strip() for p in _cell(row, 'photos').split(';') if p.strip()]
+    if not photos:
+        return None, 'Please upload a photo of your item.'
+
+    return {
+        'category_spec': category_spec,
+        'quantity': quantity,
+        'price_per_coin': price_per_coin,
+        'pricing_mode': pricing_mode,
+        'spot_premium': spot_premium,
+        'floor_price': floor_price,
+        'pricing_metal': pricing_metal,
+        'name': _cell(row, 'listing_title') or None,
+        'description': _cell(row, 'listing_description') or None,
+        'packaging_type': _cell(row, 'packaging_type') or None,
+        'packaging_notes': _cell(row, 'packaging_notes') or None,
+        'cert_number': _cell(row, 'cert_number') or None,
+        'condition_notes': _cell(row, 'condition_notes') or None,
+        'photos': photos,
+    }, None
+
+
+def _save_photo(name, data):
+    result = save_secure_upload(
+        FileStorage(stream=io.BytesIO(data), filename=name),
+        upload_dir='uploads/listings',
+        allowed_types=_PHOTO_TYPES,
+        category='listing_photo'
+    )
+    if not result['success']:
+        return None, result['error'], None
+    return f"uploads/listings/{os.path.basename(result['path'])}", None, result.get('full_path')
+
+
+def save_photos(photo_blobs):
+    """
+    Validate and save archive photos in a thread pool.
+
+    Returns {name: (file_path, error, full_path)}; file_path is None when
+    rejected, full_path is the saved file on disk.
+    """
+    if not photo_blobs:
+        return {}
+    names = list(photo_blobs)
+    with ThreadPoolExecutor(max_workers=PHOTO_WORKERS) as pool:
+        saved = pool.map(lambda n: _save_photo(n, photo_blobs[n]), names)
+        return dict(zip(names, saved))
+
+
+def discard_photos(saved):
+    """Remove the files written by save_photos() (import rolled back)."""
+    for _, _, full_path in saved.values():
+        if full_path:
+            try:
+                os.remove(full_path)
+            except OSError:
+                pass
+
+
+def import_listings(conn, seller_id, rows, photo_blobs=None):
+    """
+    Create standard listings for every valid manifest row.
+
+    Invalid rows (bad specs or prices, or no usable photo) are reported and
+    skipped.  Valid rows are inserted in one transaction, then each affected
+    bucket's price is recorded once.
+
+    Args:
+        conn: Database connection
+        seller_id: Seller's user ID
+        rows: Row dicts from parse_manifest()
+        photo_blobs: {filename: bytes} from read_photo_archive(), or None
+
+    Returns:
+        dict with 'results' (one per row: row, success, listing_id/bucket_id or
+        error), 'created', 'categories_created' and 'buckets_updated'
+    """
+    options = get_dropdown_options()
+    photo_blobs = photo_blobs or {}
+
+    results = []
+    parsed = []
+    for index, row in enumerate(rows, start=1):
+        fields, error = _parse_row(row, options)
+        result = {'row': index, 'success': False}
+        if error:
+            result['error'] = error
+        else:
+            missing = [p for p in fields['photos'] if p not in photo_blobs]
+            if missing:
+                result['error'] = f"Photo not found in archive: {', '.join(missing)}"
+            else:
+                parsed.append((result, fields))
+        results.append(result)
+
+    wanted = {name for _, fields in parsed for name in fields['photos']}
+    saved = save_photos({name: photo_blobs[name] for name in wanted})
+
+    cursor = conn.cursor()
+    spec_index = CategorySpecIndex(conn)
+    photo_rows = []
+    buckets = set()
+    try:
+        for result, fields in parsed:
+            paths = [saved[name][0] for name in fields['photos'] if saved[name][0]]
+            if not paths:
+                errors = {saved[name][1] for name in fields['photos']}
+                result['error'] = f"Photo rejected: {'; '.join(sorted(e for e in errors if e))}"
+                continue
+
+            category_id, bucket_id = spec_index.resolve(fields['category_spec'])
+            cursor.execute('''
+                INSERT INTO listings (
+                    category_id, seller_id, quantity, price_per_coin,
+                    pricing_mode, spot_premium, floor_price, pricing_metal,
+                    is_isolated, isolated_type, name, description,
+                    packaging_type, packaging_notes, cert_number, condition_notes,
+                    active
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, ?, ?, ?, ?, ?, ?, 1)
+            ''', (
+                category_id, seller_id, fields['quantity'], fields['price_per_coin'],
+                fields['pricing_mode'], fields['spot_premium'], fields['floor_price'],
+                fields['pricing_metal'], fields['name'], fields['description'],
+                fields['packaging_type'], fields['packaging_notes'],
+                fields['cert_number'], fields['condition_notes'],
+            ))
+            listing_id = cursor.lastrowid
+            photo_rows.extend((listing_id, seller_id, path) for path in paths)
+            buckets.add(bucket_id)
+            result.update(success=True, listing_id=listing_id, bucket_id=bucket_id)
+
+        if photo_rows:
+            cursor.executemany('''
+                INSERT INTO listing_photos (listing_id, uploader_id, file_path)
+                VALUES (?, ?, ?)
+            ''', photo_rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        discard_photos(saved)
+        raise
+
+    # Auto-match intentionally not run, same as single listing creation.
+    # One price-history point per bucket instead of one per listing.
+    for bucket_id in sorted(buckets):
+        try:
+            update_bucket_price(bucket_id)
+        except Exception as e:
+            print(f"[WARNING] Failed to update bucket price for bucket {bucket_id}: {e}")
+
+    return {
+        'results': results,
+        'created': sum(1 for r in results if r['success']),
+        'categories_created': spec_index.created,
+        'buckets_updated': len(buckets),
+    }
+
+
+@sell_bp.route('/sell/bulk_import', methods=['POST'])
+@frozen_check
+def bulk_import():
+    """
+    Import many listings from an uploaded manifest.
+
+    Multipart form:
+    - manifest: CSV (header row) or JSON file
+    - photos: .zip archive of the photos named in the manifest
+
+    Returns JSON with one result per manifest row.
+    """
+    if 'user_id' not in session:
+        return jsonify(success=False, message='Authentication required'), 401
+    user_id = session['user_id']
+
+    conn = get_db_connection()
+    try:
+        user = conn.execute(
+            'SELECT stripe_charges_enabled, stripe_payouts_enabled FROM users WHERE id = ?',
+            (user_id,)
+        ).fetchone()
+        if not (user and user['stripe_charges_enabled'] and user['stripe_payouts_enabled']):
+            return jsonify(success=False,
+                           message='You must complete seller payment setup before listing items.',
+                           error_code='stripe_not_ready'), 403
+
+        manifest = request.files.get('manifest')
+        if not manifest or not manifest.filename:
+            return jsonify(success=False, message='Please upload a manifest file.'), 400
+
+        try:
+            rows = parse_manifest(manifest.read(), manifest.filename)
+            archive = request.files.get('photos')
+            photo_blobs = read_photo_archive(archive.read()) if archive and archive.filename else {}
+        except ManifestError as e:
+            return jsonify(success=False, message=str(e)), 400
+
+        if not rows:
+            return jsonify(success=False, message='The manifest has no listings.'), 400
+        if len(rows) > MAX_IMPORT_ROWS:
+            return jsonify(success=False,
+                           message=f'At most {MAX_IMPORT_ROWS} listings per import.'), 400
+
+        summary = import_listings(conn, user_id, rows, photo_blobs)
+    except Exception as e:
+        print(f"[ERROR] Bulk listing import failed for user {user_id}: {e}")
+        return jsonify(success=False,
+                       message=f'An error occurred while importing your listings: {e}'), 500
+    finally:
+        conn.close()
+
+    return jsonify(success=summary['created'] > 0, **summary)
@@ -7,8 +7,8 @@ Extracted from routes.py during refactor - NO BEHAVIOR CHANGE.
 
 from flask import request, session, flash, jsonify
 from database import get_db_connection
-from routes.category_options import get_dropdown_options
-from utils.category_manager import get_or_create_category, validate_category_specification
+from routes.category_options import get_dropdown_options, note_category_values
+from utils.category_manager import compute_spec_key, get_or_create_category, validate_category_specification
 from services.bucket_price_history_service import update_bucket_price
 from services.pricing_service import get_effective_price
 from werkzeug.utils import secure_filename
@@ -391,13 +391,27 @@ def handle_sell_post():
                 INSERT INTO categories (
                     metal, product_line, product_type, weight, purity,
                     mint, year, finish, grade, coin_series, bucket_id, is_isolated,
-                    condition_category, series_variant
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+                    condition_category, series_variant, spec_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
             ''', (category_metal, category_product_line, category_product_type, category_weight, category_purity,
                   category_mint, category_year, category_finish, category_grade, category_coin_series, bucket_id,
-                  condition_category, series_variant))
+                  condition_category, series_variant,
+                  compute_spec_key({
+                      'metal': category_metal, 'product_line': category_product_line,
+                      'product_type': category_product_type, 'weight': category_weight,
+                      'purity': category_purity, 'mint': category_mint,
+                      'finish': category_finish, 'grade': category_grade,
+                      'condition_category': condition_category, 'series_variant': series_variant,
+                  })))
 
             category_id = cursor.lastrowid
+            note_category_values(conn, {
+                'metal': category_metal, 'product_line': category_product_line,
+                'product_type': category_product_type, 'weight': category_weight,
+                'purity': category_purity, 'mint': category_mint, 'year': category_year,
+                'finish': category_finish, 'grade': category_grade,
+                'condition_category': condition_category, 'series_variant': series_variant,
+            })
         else:
             # NON-ISOLATED LISTING: Use unified category management (excludes isolated buckets)
             category_id = get_or_create_category(conn, category_spec)
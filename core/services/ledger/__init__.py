@@ -29,6 +29,7 @@ from .exceptions import (
 from .fee_config import (
     get_fee_config,
     get_bucket_fee_config,
+    get_bucket_fee_configs,
     update_bucket_fee,
     calculate_fee
 )
@@ -37,6 +38,7 @@ from .order_creation import (
     _log_event_internal,
     log_order_event,
     create_order_ledger_from_cart,
+    create_order_ledgers_batch,
     validate_order_invariants,
     prevent_amount_modification
 )
@@ -82,6 +84,7 @@ class LedgerService:
     # Fee configuration methods
     get_fee_config = staticmethod(get_fee_config)
     get_bucket_fee_config = staticmethod(get_bucket_fee_config)
+    get_bucket_fee_configs = staticmethod(get_bucket_fee_configs)
     update_bucket_fee = staticmethod(update_bucket_fee)
     calculate_fee = staticmethod(calculate_fee)
 
@@ -89,6 +92,7 @@ class LedgerService:
     _log_event_internal = staticmethod(_log_event_internal)
     log_order_event = staticmethod(log_order_event)
     create_order_ledger_from_cart = staticmethod(create_order_ledger_from_cart)
+    create_order_ledgers_batch = staticmethod(create_order_ledgers_batch)
     validate_order_invariants = staticmethod(validate_order_invariants)
     prevent_amount_modification = staticmethod(prevent_amount_modification)
 
@@ -130,10 +134,12 @@ __all__ = [
     # Individual functions (for direct import if needed)
     'get_fee_config',
     'get_bucket_fee_config',
+    'get_bucket_fee_configs',
     'update_bucket_fee',
     'calculate_fee',
     'log_order_event',
     'create_order_ledger_from_cart',
+    'create_order_ledgers_batch',
     'validate_order_invariants',
     'prevent_amount_modification',
     'update_order_status',
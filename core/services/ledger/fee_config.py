@@ -4,7 +4,7 @@ Ledger Fee Configuration
 Methods for getting and updating fee configuration.
 """
 
-from typing import Tuple
+from typing import Dict, Tuple
 import database
 from services.ledger_constants import (
     DEFAULT_PLATFORM_FEE_TYPE, DEFAULT_PLATFORM_FEE_VALUE, FeeType
@@ -121,6 +121,84 @@ def get_bucket_fee_config(bucket_id: int, conn=None) -> Tuple[str, float]:
             conn.close()
 
 
+def get_bucket_fee_configs(bucket_ids, conn=None) -> Dict[int, Tuple[str, float]]:
+    """
+    Resolve fee configuration for many buckets with one categories query.
+
+    Same priority and validation as get_bucket_fee_config(): bucket-level fee
+    first, then the global default.  Used by the batch ledger builder.
+
+    Args:
+        bucket_ids: Iterable of bucket IDs
+        conn: Optional existing database connection
+
+    Returns:
+        Dict of bucket_id -> (fee_type, fee_value)
+
+    Raises:
+        BucketFeeConfigError: If a bucket fee is invalid, or a bucket has no fee
+            and no global default is configured
+    """
+    bucket_ids = sorted({b for b in bucket_ids if b is not None})
+    if not bucket_ids:
+        return {}
+
+    close_conn = False
+    if conn is None:
+        conn = get_db_connection()
+        close_conn = True
+
+    try:
+        placeholders = ','.join('?' * len(bucket_ids))
+        rows = conn.execute(f'''
+            SELECT bucket_id, platform_fee_type, platform_fee_value
+            FROM categories
+            WHERE bucket_id IN ({placeholders})
+              AND platform_fee_type IS NOT NULL
+              AND platform_fee_value IS NOT NULL
+            ORDER BY id
+        ''', bucket_ids).fetchall()
+
+        configs: Dict[int, Tuple[str, float]] = {}
+        for row in rows:
+            bucket_id = row['bucket_id']
+            if bucket_id in configs:
+                continue
+            fee_type = row['platform_fee_type']
+            fee_value = row['platform_fee_value']
+            if fee_type not in ('percent', 'flat'):
+                raise BucketFeeConfigError(
+                    f"Invalid fee_type '{fee_type}' for bucket {bucket_id}. "
+                    f"Must be 'percent' or 'flat'."
+                )
+            if fee_value < 0:
+                raise BucketFeeConfigError(
+                    f"Invalid fee_value '{fee_value}' for bucket {bucket_id}. "
+                    f"Must be >= 0."
+                )
+            configs[bucket_id] = (fee_type, float(fee_value))
+
+        missing = [b for b in bucket_ids if b not in configs]
+        if missing:
+            global_fee = conn.execute('''
+                SELECT fee_type, fee_value FROM fee_config
+                WHERE config_key = 'default_platform_fee' AND active = 1
+            ''').fetchone()
+            if not global_fee:
+                raise BucketFeeConfigError(
+                    f"No fee configuration found for bucket(s) {missing} and no global "
+                    f"default configured. Please configure a fee before checkout."
+                )
+            for bucket_id in missing:
+                configs[bucket_id] = (global_fee['fee_type'], float(global_fee['fee_value']))
+
+        return configs
+
+    finally:
+        if close_conn:
+            conn.close()
+
+
 def update_bucket_fee(
     bucket_id: int,
     fee_type: str,
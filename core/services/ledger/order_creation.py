@@ -5,13 +5,16 @@ Methods for creating order ledger records and validating invariants.
 """
 
 import json
+import logging
 from typing import Dict, List, Optional, Any
 import database
 from services.ledger_constants import (
     OrderStatus, PayoutStatus, ActorType, EventType, PAYABLE_ORDER_STATUSES
 )
-from .exceptions import LedgerInvariantError
-from .fee_config import get_fee_config, get_bucket_fee_config, calculate_fee
+from .exceptions import LedgerInvariantError, BucketFeeConfigError
+from .fee_config import get_fee_config, get_bucket_fee_config, get_bucket_fee_configs, calculate_fee
+
+logger = logging.getLogger(__name__)
 
 
 def get_db_connection():
@@ -64,6 +67,95 @@ def log_order_event(
         conn.close()
 
 
+def _price_cart_items(cart_snapshot: List[Dict[str, Any]], resolve_fee):
+    """
+    Compute ledger item rows and per-seller totals for one order (no DB writes).
+
+    Shared by create_order_ledger_from_cart and create_order_ledgers_batch so both
+    produce identical amounts.  resolve_fee(item) returns (fee_type, fee_value)
+    for items without an explicit fee override.
+
+    Returns:
+        (items_to_insert, seller_totals, total_gross, total_platform_fee, total_spread)
+    """
+    # Calculate totals
+    total_gross = 0.0
+    total_platform_fee = 0.0
+    total_spread = 0.0
+    items_to_insert = []
+    seller_totals: Dict[int, Dict[str, float]] = {}  # seller_id -> {gross, fee, net, spread}
+
+    for item in cart_snapshot:
+        seller_id = item['seller_id']
+        listing_id = item['listing_id']
+        quantity = item['quantity']
+        # unit_price is the SELLER-SIDE price (merchandise value).
+        # For direct-checkout orders this equals the buyer price.
+        # For bid-fill orders with spread, this is the seller's listing price.
+        unit_price = float(item['unit_price'])
+
+        # buyer_unit_price is what the buyer actually paid per unit.
+        # When absent (normal checkout, no spread) it defaults to unit_price.
+        buyer_unit_price = float(item.get('buyer_unit_price', unit_price))
+        # Spread per unit: amount the platform retains as spread revenue (not fee).
+        spread_per_unit = round(buyer_unit_price - unit_price, 4)
+
+        # Calculate SELLER-SIDE gross for this item.
+        # Fee and seller_net are computed on the seller-side gross so the seller
+        # does not receive credit for the buyer premium above their ask.
+        item_gross = round(quantity * unit_price, 2)
+
+        # Total spread captured for this item line
+        item_spread = round(quantity * spread_per_unit, 2)
+
+        # Get fee config for this item
+        # Priority: explicit override > bucket-level > global default
+        if 'fee_type' in item and 'fee_value' in item:
+            # Explicit override provided in cart snapshot
+            fee_type = item['fee_type']
+            fee_value = float(item['fee_value'])
+        else:
+            fee_type, fee_value = resolve_fee(item)
+
+        # Calculate fee on SELLER-SIDE gross (not buyer gross)
+        fee_amount = calculate_fee(item_gross, fee_type, fee_value)
+        seller_net = round(item_gross - fee_amount, 2)
+
+        # Track totals
+        total_gross += item_gross
+        total_platform_fee += fee_amount
+        total_spread += item_spread
+
+        # Track per-seller totals
+        if seller_id not in seller_totals:
+            seller_totals[seller_id] = {'gross': 0, 'fee': 0, 'net': 0, 'spread': 0}
+        seller_totals[seller_id]['gross'] += item_gross
+        seller_totals[seller_id]['fee'] += fee_amount
+        seller_totals[seller_id]['net'] += seller_net
+        seller_totals[seller_id]['spread'] += item_spread
+
+        items_to_insert.append({
+            'seller_id': seller_id,
+            'listing_id': listing_id,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'buyer_unit_price': buyer_unit_price,
+            'spread_per_unit': spread_per_unit,
+            'gross_amount': item_gross,
+            'fee_type': fee_type,
+            'fee_value': fee_value,
+            'fee_amount': fee_amount,
+            'seller_net_amount': seller_net
+        })
+
+    # Round totals
+    total_gross = round(total_gross, 2)
+    total_platform_fee = round(total_platform_fee, 2)
+    total_spread = round(total_spread, 2)
+
+    return items_to_insert, seller_totals, total_gross, total_platform_fee, total_spread
+
+
 def create_order_ledger_from_cart(
     buyer_id: int,
     cart_snapshot: List[Dict[str, Any]],
@@ -106,100 +198,30 @@ def create_order_ledger_from_cart(
     """
     conn = get_db_connection()
     try:
-        # Calculate totals
-        total_gross = 0.0
-        total_platform_fee = 0.0
-        total_spread = 0.0
-        items_to_insert = []
-        seller_totals: Dict[int, Dict[str, float]] = {}  # seller_id -> {gross, fee, net, spread}
-
-        for item in cart_snapshot:
-            seller_id = item['seller_id']
-            listing_id = item['listing_id']
-            quantity = item['quantity']
-            # unit_price is the SELLER-SIDE price (merchandise value).
-            # For direct-checkout orders this equals the buyer price.
-            # For bid-fill orders with spread, this is the seller's listing price.
-            unit_price = float(item['unit_price'])
-
-            # buyer_unit_price is what the buyer actually paid per unit.
-            # When absent (normal checkout, no spread) it defaults to unit_price.
-            buyer_unit_price = float(item.get('buyer_unit_price', unit_price))
-            # Spread per unit: amount the platform retains as spread revenue (not fee).
-            spread_per_unit = round(buyer_unit_price - unit_price, 4)
-
-            # Calculate SELLER-SIDE gross for this item.
-            # Fee and seller_net are computed on the seller-side gross so the seller
-            # does not receive credit for the buyer premium above their ask.
-            item_gross = round(quantity * unit_price, 2)
-
-            # Total spread captured for this item line
-            item_spread = round(quantity * spread_per_unit, 2)
-
-            # Get fee config for this item
-            # Priority: explicit override > bucket-level > global default
-            if 'fee_type' in item and 'fee_value' in item:
-                # Explicit override provided in cart snapshot
-                fee_type = item['fee_type']
-                fee_value = float(item['fee_value'])
-            else:
-                # Look up fee from bucket or global default
-                bucket_id = item.get('bucket_id')
-
-                if bucket_id is None:
-                    # Try to get bucket_id from listing's category
-                    bucket_result = conn.execute('''
-                        SELECT c.bucket_id
-                        FROM listings l
-                        JOIN categories c ON l.category_id = c.id
-                        WHERE l.id = ?
-                    ''', (listing_id,)).fetchone()
-
-                    if bucket_result:
-                        bucket_id = bucket_result['bucket_id']
-
-                if bucket_id:
-                    # Get bucket-level or global default fee
-                    fee_type, fee_value = get_bucket_fee_config(bucket_id, conn)
-                else:
-                    # Fallback to global default (legacy behavior)
-                    fee_type, fee_value = get_fee_config()
-
-            # Calculate fee on SELLER-SIDE gross (not buyer gross)
-            fee_amount = calculate_fee(item_gross, fee_type, fee_value)
-            seller_net = round(item_gross - fee_amount, 2)
-
-            # Track totals
-            total_gross += item_gross
-            total_platform_fee += fee_amount
-            total_spread += item_spread
-
-            # Track per-seller totals
-            if seller_id not in seller_totals:
-                seller_totals[seller_id] = {'gross': 0, 'fee': 0, 'net': 0, 'spread': 0}
-            seller_totals[seller_id]['gross'] += item_gross
-            seller_totals[seller_id]['fee'] += fee_amount
-            seller_totals[seller_id]['net'] += seller_net
-            seller_totals[seller_id]['spread'] += item_spread
-
-            items_to_insert.append({
-                'seller_id': seller_id,
-                'listing_id': listing_id,
-                'quantity': quantity,
-                'unit_price': unit_price,
-                'buyer_unit_price': buyer_unit_price,
-                'spread_per_unit': spread_per_unit,
-                'gross_amount': item_gross,
-                'fee_type': fee_type,
-                'fee_value': fee_value,
-                'fee_amount': fee_amount,
-                'seller_net_amount': seller_net
-            })
-
-        # Round totals
-        total_gross = round(total_gross, 2)
-        total_platform_fee = round(total_platform_fee, 2)
-        total_spread = round(total_spread, 2)
+        def _resolve_fee(item):
+            # Look up fee from bucket or global default
+            bucket_id = item.get('bucket_id')
+
+            if bucket_id is None:
+                # Try to get bucket_id from listing's category
+                bucket_result = conn.execute('''
+                    SELECT c.bucket_id
+                    FROM listings l
+                    JOIN categories c ON l.category_id = c.id
+                    WHERE l.id = ?
+                ''', (item['listing_id'],)).fetchone()
+
+                if bucket_result:
+                    bucket_id = bucket_result['bucket_id']
+
+            if bucket_id:
+                # Get bucket-level or global default fee
+                return get_bucket_fee_config(bucket_id, conn)
+            # Fallback to global default (legacy behavior)
+            return get_fee_config()
+
+        (items_to_insert, seller_totals,
+         total_gross, total_platform_fee, total_spread) = _price_cart_items(cart_snapshot, _resolve_fee)
 
         # If no order_id provided, we need one from the orders table
         # In integration, this will be passed from the checkout flow
@@ -287,6 +309,257 @@ def create_order_ledger_from_cart(
         conn.close()
 
 
+def create_order_ledgers_batch(orders: List[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Create ledger records for many orders in one transaction.
+
+    Used after a multi-order auto-match run.  Produces exactly the rows that
+    calling create_order_ledger_from_cart() once per order would, but:
+    - resolves every listing's bucket and every bucket fee up front (two queries)
+    - bulk-inserts orders_ledger, order_items_ledger, order_payouts and order_events
+    - commits once
+
+    Orders that already have a ledger row are skipped (and logged).  If bucket
+    fee resolution fails for the batch, falls back to per-order creation so one
+    misconfigured bucket cannot block ledgers for every other order.  Likewise
+    an order that cannot be priced is logged and left out, and if the bulk
+    insert fails the orders are retried one savepoint each, so one bad order
+    only loses its own ledger.
+
+    Args:
+        orders: List of dicts, each containing:
+            - buyer_id: int
+            - order_id: int (required)
+            - items: cart snapshot (same shape as create_order_ledger_from_cart)
+            - payment_method (optional): str
+
+    Returns:
+        Dict of order_id -> order_ledger_id for the ledgers created
+    """
+    if not orders:
+        return {}
+    if any(o.get('order_id') is None for o in orders):
+        raise ValueError("create_order_ledgers_batch requires an order_id for every order")
+
+    conn = get_db_connection()
+    try:
+        order_ids = [o['order_id'] for o in orders]
+        placeholders = ','.join('?' * len(order_ids))
+        existing = {
+            row['order_id'] for row in conn.execute(
+                f'SELECT order_id FROM orders_ledger WHERE order_id IN ({placeholders})',
+                order_ids,
+            ).fetchall()
+        }
+        if existing:
+            logger.info("[Ledger] Orders %s already have a ledger — skipped", sorted(existing))
+        orders = [o for o in orders if o['order_id'] not in existing]
+        if not orders:
+            return {}
+
+        # Resolve bucket for every listing that needs a fee lookup (one query)
+        listing_ids = sorted({
+            item['listing_id']
+            for o in orders for item in o['items']
+            if not ('fee_type' in item and 'fee_value' in item) and item.get('bucket_id') is None
+        })
+        listing_buckets: Dict[int, Any] = {}
+        if listing_ids:
+            placeholders = ','.join('?' * len(listing_ids))
+            for row in conn.execute(f'''
+                SELECT l.id, c.bucket_id
+                FROM listings l
+                JOIN categories c ON l.category_id = c.id
+                WHERE l.id IN ({placeholders})
+            ''', listing_ids).fetchall():
+                listing_buckets[row['id']] = row['bucket_id']
+
+        def _bucket_for(item):
+            bucket_id = item.get('bucket_id')
+            return listing_buckets.get(item['listing_id']) if bucket_id is None else bucket_id
+
+        # Resolve all bucket fees (one query, plus the global default if needed)
+        try:
+            bucket_fees = get_bucket_fee_configs([
+                _bucket_for(item) for o in orders for item in o['items']
+                if not ('fee_type' in item and 'fee_value' in item)
+            ], conn)
+        except BucketFeeConfigError as e:
+            logger.warning("[Ledger] Batch fee resolution failed (%s) — creating ledgers per order", e)
+            conn.close()
+            conn = None
+            return _create_order_ledgers_individually(orders)
+
+        global_fee = []
+
+        def _resolve_fee(item):
+            bucket_id = _bucket_for(item)
+            if bucket_id:
+                return bucket_fees[bucket_id]
+            # Fallback to global default (legacy behavior) — looked up once per batch
+            if not global_fee:
+                global_fee.append(get_fee_config())
+            return global_fee[0]
+
+        priced = []
+        for o in orders:
+            try:
+                priced.append((o, *_price_cart_items(o['items'], _resolve_fee)))
+            except Exception as e:
+                logger.warning("[Ledger] Ledger creation failed for order %s: %s", o['order_id'], e)
+
+        cursor = conn.cursor()
+        cursor.execute('SAVEPOINT ledger_batch')
+        try:
+            ledger_ids = _insert_priced_ledgers(conn, priced)
+            cursor.execute('RELEASE SAVEPOINT ledger_batch')
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT ledger_batch')
+            cursor.execute('RELEASE SAVEPOINT ledger_batch')
+            logger.warning("[Ledger] Batch ledger insert failed (%s) — retrying per order", e)
+            ledger_ids = {}
+            for entry in priced:
+                order_id = entry[0]['order_id']
+                cursor.execute('SAVEPOINT ledger_order')
+                try:
+                    ledger_ids.update(_insert_priced_ledgers(conn, [entry]))
+                    cursor.execute('RELEASE SAVEPOINT ledger_order')
+                except Exception as order_error:
+                    cursor.execute('ROLLBACK TO SAVEPOINT ledger_order')
+                    cursor.execute('RELEASE SAVEPOINT ledger_order')
+                    logger.warning("[Ledger] Ledger creation failed for order %s: %s", order_id, order_error)
+
+        conn.commit()
+
+        return ledger_ids
+
+    except Exception as e:
+        if conn is not None:
+            conn.rollback()
+        raise e
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def _insert_priced_ledgers(conn, priced) -> Dict[int, int]:
+    """
+    Bulk-insert the ledger, item, payout and event rows of priced orders
+    (no commit).
+
+    Args:
+        priced: List of (order, items_to_insert, seller_totals, total_gross,
+                total_platform_fee, total_spread) from _price_cart_items
+
+    Returns:
+        Dict of order_id -> order_ledger_id
+    """
+    if not priced:
+        return {}
+    cursor = conn.cursor()
+
+    # 1. orders_ledger rows, then map order_id -> order_ledger_id (order_id is UNIQUE)
+    cursor.executemany('''
+        INSERT INTO orders_ledger (
+            order_id, buyer_id, order_status, payment_method,
+            gross_amount, platform_fee_amount, spread_capture_amount
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (o['order_id'], o['buyer_id'], OrderStatus.CHECKOUT_INITIATED.value,
+         o.get('payment_method'), gross, fee, spread)
+        for o, _, _, gross, fee, spread in priced
+    ])
+    new_ids = [o['order_id'] for o, *_ in priced]
+    placeholders = ','.join('?' * len(new_ids))
+    ledger_ids = {
+        row['order_id']: row['id'] for row in conn.execute(
+            f'SELECT id, order_id FROM orders_ledger WHERE order_id IN ({placeholders})',
+            new_ids,
+        ).fetchall()
+    }
+
+    item_rows, payout_rows, event_rows = [], [], []
+    for o, items_to_insert, seller_totals, total_gross, total_platform_fee, total_spread in priced:
+        order_id = o['order_id']
+        order_ledger_id = ledger_ids[order_id]
+
+        # 2. order_items_ledger rows
+        for item in items_to_insert:
+            item_rows.append((
+                order_ledger_id, order_id, item['seller_id'], item['listing_id'],
+                item['quantity'], item['unit_price'], item['gross_amount'],
+                item['fee_type'], item['fee_value'], item['fee_amount'],
+                item['seller_net_amount'],
+                item['buyer_unit_price'], item['spread_per_unit']
+            ))
+
+        # 3. order_payout rows (one per seller)
+        for seller_id, totals in seller_totals.items():
+            payout_rows.append((
+                order_ledger_id, order_id, seller_id,
+                PayoutStatus.PAYOUT_NOT_READY.value,
+                round(totals['gross'], 2),
+                round(totals['fee'], 2),
+                round(totals['net'], 2),
+                round(totals['spread'], 2)
+            ))
+
+        # 4. order events
+        event_rows.append((
+            order_id, EventType.ORDER_CREATED.value, ActorType.SYSTEM.value, None,
+            json.dumps({'buyer_id': o['buyer_id'], 'gross_amount': total_gross})
+        ))
+        event_rows.append((
+            order_id, EventType.LEDGER_CREATED.value, ActorType.SYSTEM.value, None,
+            json.dumps({
+                'order_ledger_id': order_ledger_id,
+                'item_count': len(items_to_insert),
+                'seller_count': len(seller_totals),
+                'total_gross': total_gross,
+                'total_platform_fee': total_platform_fee,
+                'total_spread': total_spread,
+            })
+        ))
+
+    cursor.executemany('''
+        INSERT INTO order_items_ledger (
+            order_ledger_id, order_id, seller_id, listing_id,
+            quantity, unit_price, gross_amount,
+            fee_type, fee_value, fee_amount, seller_net_amount,
+            buyer_unit_price, spread_per_unit
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', item_rows)
+    cursor.executemany('''
+        INSERT INTO order_payouts (
+            order_ledger_id, order_id, seller_id, payout_status,
+            seller_gross_amount, fee_amount, seller_net_amount,
+            spread_capture_amount
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', payout_rows)
+    cursor.executemany('''
+        INSERT INTO order_events (order_id, event_type, actor_type, actor_id, payload_json)
+        VALUES (?, ?, ?, ?, ?)
+    ''', event_rows)
+
+    return ledger_ids
+
+
+def _create_order_ledgers_individually(orders: List[Dict[str, Any]]) -> Dict[int, int]:
+    """Per-order fallback for create_order_ledgers_batch; logs and skips failures."""
+    ledger_ids = {}
+    for o in orders:
+        try:
+            ledger_ids[o['order_id']] = create_order_ledger_from_cart(
+                buyer_id=o['buyer_id'],
+                cart_snapshot=o['items'],
+                payment_method=o.get('payment_method'),
+                order_id=o['order_id'],
+            )
+        except Exception as e:
+            logger.warning("[Ledger] Ledger creation failed for order %s: %s", o['order_id'], e)
+    return ledger_ids
+
+
 def validate_order_invariants(order_ledger_id: int):
     """
     Validate ledger invariants for an order.
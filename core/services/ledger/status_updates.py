@@ -9,6 +9,7 @@ import database
 from services.ledger_constants import (
     OrderStatus, PayoutStatus, EventType, PAYABLE_ORDER_STATUSES
 )
+from services.user_stats_service import refresh_order_user_stats
 from .exceptions import LedgerInvariantError
 from .order_creation import _log_event_internal
 
@@ -73,11 +74,15 @@ def update_order_status(
         )
 
         conn.commit()
-        return True
 
     finally:
         conn.close()
 
+    if new_status_enum == OrderStatus.COMPLETED:
+        # Completed orders count toward buyer and seller transaction stats
+        refresh_order_user_stats(order['order_id'])
+    return True
+
 
 def update_payout_status(
     payout_id: int,
@@ -1000,6 +1000,123 @@ def ensure_bucket_image_tables():
         print(f'Error in ensure_bucket_image_tables: {e}')
 
 
+def ensure_category_spec_key_column():
+    """
+    Ensure categories has the spec_key column and index (migration 032), and
+    backfill it for rows created before the column existed.
+    spec_key hashes every spec except year (utils.category_manager.compute_spec_key)
+    so Random Year sibling lookups are a single indexed equality match.
+    Idempotent.
+    """
+    from utils.category_manager import compute_spec_key
+    try:
+        conn = get_db_connection()
+        existing = get_table_columns(conn, 'categories')
+        if 'spec_key' not in existing:
+            conn.execute('ALTER TABLE categories ADD COLUMN spec_key TEXT')
+            print('✅ categories.spec_key column added (migration 032)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_categories_spec_key ON categories(spec_key)')
+
+        rows = conn.execute('SELECT * FROM categories WHERE spec_key IS NULL').fetchall()
+        if rows:
+            cursor = conn.cursor()
+            cursor.executemany(
+                'UPDATE categories SET spec_key = ? WHERE id = ?',
+                [(compute_spec_key(row), row['id']) for row in rows]
+            )
+            print(f'✅ categories.spec_key backfilled for {len(rows)} rows')
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f'Error ensuring categories.spec_key column: {e}')
+
+
+def ensure_bucket_reference_series_table():
+    """
+    Ensure the bucket_reference_series table exists (migration 033).
+    Holds the persisted Reference Price series per bucket, keyed by (bucket_id, t);
+    see services.reference_price_service.extend_reference_series.
+    Idempotent.
+    """
+    try:
+        conn = get_db_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bucket_reference_series (
+                bucket_id INTEGER NOT NULL,
+                t         TEXT    NOT NULL,
+                price     REAL    NOT NULL,
+                PRIMARY KEY (bucket_id, t)
+            )
+        """)
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f'Error ensuring bucket_reference_series table: {e}')
+
+
+def ensure_bucket_search_index():
+    """
+    Ensure the bucket_search full-text index exists (migration 034) and
+    backfill it while empty.  Kept current per bucket by
+    services.search_index_service.reindex_bucket on listing events.
+    Idempotent.
+    """
+    from services.search_index_service import create_search_index, rebuild_search_index
+    try:
+        conn = get_db_connection()
+        try:
+            create_search_index(conn)
+            if conn.execute('SELECT COUNT(*) AS n FROM bucket_search').fetchone()['n'] == 0:
+                count = rebuild_search_index(conn)
+                conn.commit()
+                if count:
+                    print(f'✅ bucket_search index built for {count} buckets')
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f'Error ensuring bucket_search index: {e}')
+
+
+def ensure_user_stats_table():
+    """
+    Ensure the user_stats table exists (migration 035) and backfill it while
+    empty.  Kept current per user by services.user_stats_service on rating
+    and order events.  Idempotent.
+    """
+    from services.user_stats_service import create_user_stats_table, rebuild_user_stats
+    try:
+        conn = get_db_connection()
+        try:
+            create_user_stats_table(conn)
+            if conn.execute('SELECT COUNT(*) AS n FROM user_stats').fetchone()['n'] == 0:
+                count = rebuild_user_stats(conn)
+                if count:
+                    print(f'✅ user_stats built for {count} users')
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f'Error ensuring user_stats table: {e}')
+
+
+def ensure_bucket_events_table():
+    """
+    Ensure the bucket_events table exists (migration 036).  Carries bucket
+    cache invalidations between workers; see services.bucket_event_service.
+    Idempotent.
+    """
+    from services.bucket_event_service import create_bucket_events_table
+    try:
+        conn = get_db_connection()
+        try:
+            create_bucket_events_table(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f'Error ensuring bucket_events table: {e}')
+
+
 def init_database():
     """
     Run all database initialization checks
@@ -1034,3 +1151,8 @@ def init_database():
     ensure_buyer_card_fee_column()
     ensure_tax_columns()
     ensure_bucket_image_tables()
+    ensure_category_spec_key_column()
+    ensure_bucket_reference_series_table()
+    ensure_bucket_search_index()
+    ensure_user_stats_table()
+    ensure_bucket_events_table()
@@ -0,0 +1,18 @@
+-- Migration 032: Add spec_key to categories
+--
+-- spec_key is a SHA-1 over the normalised (trimmed, lower-cased, NULL -> '')
+-- values of every category spec except year:
+--   metal, product_line, product_type, weight, purity, mint, finish, grade,
+--   condition_category, series_variant
+--
+-- Categories sharing a spec_key are the same product in different years.
+-- Random Year bid matching and the "all years" bucket views fetch sibling
+-- categories with one indexed equality lookup instead of a ten-column match.
+--
+-- Existing rows are backfilled at startup by db_init.ensure_category_spec_key_column(),
+-- which uses utils.category_manager.compute_spec_key so the hash is computed
+-- identically for old and new rows.
+
+ALTER TABLE categories ADD COLUMN spec_key TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_categories_spec_key ON categories(spec_key);
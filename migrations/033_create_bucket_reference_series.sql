@@ -0,0 +1,20 @@
+-- Migration 033: Persisted Reference Price series per bucket
+--
+-- One row per computed Reference Price point P(t) (see
+-- services/reference_price_service.py).  The chart endpoint extends a bucket's
+-- series from its last stored point and then serves the requested range with
+-- a single primary-key range scan, instead of rebuilding up to a year of
+-- history on every poll.
+--
+-- t is the ISO-8601 event timestamp ("YYYY-MM-DDTHH:MM:SS[.ffffff]") stored as
+-- text so ordering matches the service's string comparisons on both backends.
+--
+-- Rows are deleted per bucket when a listing edit changes the listing set the
+-- stored points were computed from; the next chart read rebuilds them.
+
+CREATE TABLE IF NOT EXISTS bucket_reference_series (
+    bucket_id INTEGER NOT NULL,
+    t         TEXT    NOT NULL,
+    price     REAL    NOT NULL,
+    PRIMARY KEY (bucket_id, t)
+);
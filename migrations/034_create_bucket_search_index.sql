@@ -0,0 +1,21 @@
+-- Migration 034: Full-text search index over buckets
+--
+-- One document per bucket: the spec fields of its categories plus the titles
+-- of its active listings (see services/search_index_service.py).  Header
+-- autocomplete and /buy?search= query it instead of LIKE '%q%' scans over
+-- categories joined to listings.
+--
+-- SQLite: FTS5 with 2/3 character prefix indexes; rowid is the bucket id.
+-- Postgres (applied by db_init.ensure_bucket_search_index):
+--
+--   CREATE TABLE bucket_search (bucket_id INTEGER PRIMARY KEY, body TEXT NOT NULL,
+--                               document TSVECTOR NOT NULL);
+--   CREATE INDEX idx_bucket_search_document ON bucket_search USING GIN (document);
+--   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+--   CREATE INDEX idx_bucket_search_body_trgm ON bucket_search USING GIN (body gin_trgm_ops);
+--
+-- Documents are rebuilt per bucket on listing events and backfilled on
+-- startup while the index is empty.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS bucket_search
+USING fts5(body, tokenize = 'unicode61', prefix = '2 3');
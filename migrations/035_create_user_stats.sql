@@ -0,0 +1,27 @@
+-- Migration 035: Precomputed per-user reputation and activity stats
+--
+-- One row per user (see services/user_stats_service.py): rating average and
+-- count, seller and buyer transaction counts, seller fulfilled orders,
+-- distinct and repeat counterparties, and the seller's top product lines as a
+-- JSON list.  The seller modal, order seller/buyer panels, cart and bucket
+-- page read these rows instead of aggregating ratings and orders per request.
+--
+-- Rows are refreshed for the users involved on rating submission and on
+-- order placement, completion, cancellation and forfeiture, backfilled on startup while the table is
+-- empty, and rebuilt in full by `flask rebuild-user-stats`.
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id                   INTEGER PRIMARY KEY,
+    rating_avg                REAL,
+    rating_count              INTEGER NOT NULL DEFAULT 0,
+    seller_transaction_count  INTEGER NOT NULL DEFAULT 0,
+    seller_order_count        INTEGER NOT NULL DEFAULT 0,
+    seller_fulfilled_count    INTEGER NOT NULL DEFAULT 0,
+    seller_buyer_count        INTEGER NOT NULL DEFAULT 0,
+    seller_repeat_buyer_count INTEGER NOT NULL DEFAULT 0,
+    buyer_transaction_count   INTEGER NOT NULL DEFAULT 0,
+    buyer_seller_count        INTEGER NOT NULL DEFAULT 0,
+    buyer_repeat_seller_count INTEGER NOT NULL DEFAULT 0,
+    top_product_lines         TEXT NOT NULL DEFAULT '[]',
+    updated_at                TIMESTAMP
+);
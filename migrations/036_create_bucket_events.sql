@@ -0,0 +1,17 @@
+-- Migration 036: Cross-worker bucket change feed
+--
+-- One row per bucket change (see services/bucket_event_service.py).  Every
+-- worker caches order books, /buy tiles and rendered pages in process; writers
+-- append the buckets they changed here and the other workers poll the table
+-- every few seconds to drop just those buckets from their caches.  A NULL
+-- bucket_id means every bucket (spot ticks, site-wide changes).
+--
+-- Rows are pruned after a day on spot ticks.
+
+CREATE TABLE IF NOT EXISTS bucket_events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id  INTEGER,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_bucket_events_created ON bucket_events (created_at);
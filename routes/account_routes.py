@@ -6,6 +6,7 @@ from utils.cart_utils import build_cart_summary, validate_and_refill_cart
 from services.pricing_service import get_effective_price, get_effective_bid_price
 from services.reference_price_service import get_current_spots_from_snapshots
 from services.ledger_constants import DEFAULT_PLATFORM_FEE_VALUE
+from services.user_stats_service import get_user_stats, refresh_order_user_stats, repeat_pct
 from config import STRIPE_PUBLISHABLE_KEY
 from core.services.ledger.fee_config import calculate_fee
 from collections import defaultdict
@@ -423,6 +424,8 @@ def account():
                 (o['cancel_reason'] or '', o['id'])
             )
         conn.commit()
+        for o in stuck:
+            refresh_order_user_stats(o['id'])
         raw_pending = [o for o in raw_pending if o['cancel_status'] != 'approved']
 
     pending_orders   = attach_sellers(raw_pending)
@@ -1270,25 +1273,18 @@ def order_sellers(order_id):
           u.last_name              AS last_name,
           u.created_at             AS created_at,
           COALESCE(is_metex_guaranteed, 0) AS is_metex_guaranteed,
-          COALESCE((SELECT AVG(r.rating)
-                    FROM ratings r
-                    WHERE r.ratee_id = u.id), 0) AS rating,
-          COALESCE((SELECT COUNT(r.id)
-                    FROM ratings r
-                    WHERE r.ratee_id = u.id), 0) AS num_reviews,
+          COALESCE(us.rating_avg, 0)   AS rating,
+          COALESCE(us.rating_count, 0) AS num_reviews,
           SUM(oi.quantity)         AS total_quantity,
           AVG(oi.price_each)       AS avg_price,
-          COALESCE((SELECT COUNT(DISTINCT o2.id)
-                    FROM orders o2
-                    JOIN order_items oi2 ON o2.id = oi2.order_id
-                    JOIN listings l2     ON oi2.listing_id = l2.id
-                    WHERE l2.seller_id = u.id
-                      AND o2.status IN ('Delivered', 'Complete')), 0) AS transaction_count
+          COALESCE(us.seller_transaction_count, 0) AS transaction_count
         FROM order_items oi
         JOIN listings l      ON oi.listing_id = l.id
         JOIN users u         ON l.seller_id = u.id
+        LEFT JOIN user_stats us ON us.user_id = u.id
         WHERE oi.order_id = ?
-        GROUP BY u.id, u.username, u.first_name, u.last_name, u.created_at, u.is_metex_guaranteed
+        GROUP BY u.id, u.username, u.first_name, u.last_name, u.created_at, u.is_metex_guaranteed,
+                 us.user_id
         ORDER BY u.username
     """, (order_id,)).fetchall()
     conn.close()
@@ -1536,29 +1532,8 @@ def order_buyer_info(order_id):
         except (ValueError, TypeError):
             member_since = None
 
-    rating_row = conn.execute("""
-        SELECT COALESCE(AVG(r.rating), 0) AS rating,
-               COUNT(r.id) AS num_reviews
-        FROM ratings r WHERE r.ratee_id = ?
-    """, (buyer_id,)).fetchone()
-
-    tx_row = conn.execute("""
-        SELECT COUNT(DISTINCT o.id) AS transaction_count
-        FROM orders o
-        WHERE o.buyer_id = ? AND o.status IN ('Delivered', 'Complete')
-    """, (buyer_id,)).fetchone()
-
-    sellers_rows = conn.execute("""
-        SELECT l.seller_id, COUNT(DISTINCT o.id) AS order_count
-        FROM orders o
-        JOIN order_items oi ON o.id = oi.order_id
-        JOIN listings l ON oi.listing_id = l.id
-        WHERE o.buyer_id = ?
-        GROUP BY l.seller_id
-    """, (buyer_id,)).fetchall()
-    total_sellers = len(sellers_rows)
-    repeat_sellers = sum(1 for s in sellers_rows if s['order_count'] >= 2)
-    repeat_sellers_pct = round((repeat_sellers / total_sellers) * 100) if total_sellers > 0 else 0
+    stats = get_user_stats(conn, [buyer_id])[buyer_id]
+    repeat_sellers_pct = repeat_pct(stats['buyer_repeat_seller_count'], stats['buyer_seller_count'])
 
     qty_row = conn.execute("""
         SELECT SUM(oi.quantity) AS quantity
@@ -1567,8 +1542,8 @@ def order_buyer_info(order_id):
 
     conn.close()
 
-    rating = float(rating_row['rating'] or 0)
-    num_reviews = int(rating_row['num_reviews'] or 0)
+    rating = float(stats['rating_avg'] or 0)
+    num_reviews = stats['rating_count']
     is_verified = rating >= 4.7 and num_reviews > 100
 
     mg_conn = get_db_connection()
@@ -1585,7 +1560,7 @@ def order_buyer_info(order_id):
         'display_name': display_name,
         'rating': rating,
         'num_reviews': num_reviews,
-        'transaction_count': int(tx_row['transaction_count'] or 0),
+        'transaction_count': stats['buyer_transaction_count'],
         'repeat_sellers_pct': repeat_sellers_pct,
         'member_since': member_since,
         'quantity': int(qty_row['quantity'] or 0) if qty_row else 0,
@@ -4,6 +4,7 @@ from datetime import datetime
 import os
 import sqlite3
 from services.notification_service import notify_bid_filled, notify_listing_sold
+from services.user_stats_service import refresh_order_user_stats
 
 # Correct database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -28,6 +29,7 @@ def auto_fill_bid(bid_id):
         delivery_address = bid['delivery_address']
 
         quantity_needed = quantity_requested
+        order_ids = []
 
         # Find matching listings
         cursor.execute('''
@@ -77,6 +79,7 @@ def auto_fill_bid(bid_id):
 
             # Get the order_id that was just created
             order_id = cursor.lastrowid
+            order_ids.append(order_id)
 
             # Get category details for notification
             cursor.execute('''
@@ -142,6 +145,8 @@ def auto_fill_bid(bid_id):
         ''', (quantity_needed, active, new_status, bid_id))
 
         conn.commit()
+        for order_id in order_ids:
+            refresh_order_user_stats(order_id)
 
         if filled_quantity > 0 and quantity_needed > 0:
             return f"✅ {filled_quantity} units were filled. {quantity_needed} still outstanding."
@@ -6,9 +6,12 @@ API endpoints for bucket-specific functionality including price history
 from flask import Blueprint, jsonify, request, session
 from services.bucket_price_history_service import (
     get_bucket_price_history,
+    get_buckets_price_history,
     get_current_best_ask,
     update_bucket_price
 )
+from services.chart_downsampling import target_points
+from utils.category_manager import get_sibling_bucket_ids
 
 bucket_bp = Blueprint('bucket', __name__)
 
@@ -47,6 +50,13 @@ def get_price_history(bucket_id):
 
     days = range_map.get(time_range, 30)
 
+    # Long ranges are aggregated to the last price per hour / day in SQL
+    range_granularity = {
+        '1m': 'hour',
+        '3m': 'hour',
+        '1y': 'day'
+    }
+
     try:
         # Get bucket IDs to query based on Random Year mode
         if random_year:
@@ -59,42 +69,20 @@ def get_price_history(bucket_id):
                 return jsonify({'error': 'Bucket not found'}), 404
 
             # Find all matching buckets (same specs except year)
-            matching_buckets_query = '''
-                SELECT bucket_id FROM categories
-                WHERE metal = ? AND product_type = ? AND weight = ? AND purity = ?
-                  AND mint = ? AND finish = ? AND grade = ? AND product_line = ?
-                  AND condition_category IS NOT DISTINCT FROM ?
-                  AND series_variant IS NOT DISTINCT FROM ?
-                  AND is_isolated = 0
-            '''
-            matching_buckets = conn.execute(matching_buckets_query, (
-                bucket['metal'], bucket['product_type'], bucket['weight'], bucket['purity'],
-                bucket['mint'], bucket['finish'], bucket['grade'], bucket['product_line'],
-                bucket['condition_category'], bucket['series_variant']
-            )).fetchall()
-
-            bucket_ids = [row['bucket_id'] for row in matching_buckets] if matching_buckets else [bucket_id]
+            bucket_ids = get_sibling_bucket_ids(conn, bucket)
             conn.close()
         else:
             bucket_ids = [bucket_id]
 
-        # Snapshot the current price for each bucket before fetching history.
-        # This ensures that spot-price-driven price changes (which don't trigger
-        # a listing edit) are recorded as a new price point right now, so the
-        # graph's right-most value matches the displayed current price.
-        for bid in bucket_ids:
-            update_bucket_price(bid)
-
-        # Get historical data for all relevant buckets
-        all_history = []
-        for bid in bucket_ids:
-            history = get_bucket_price_history(bid, days)
-            all_history.extend(history)
-
-        # Sort combined history by timestamp
-        all_history.sort(key=lambda x: x['timestamp'])
-
-        history = all_history
+        # Read-only: spot-driven price points are recorded after each spot
+        # snapshot tick (record_spot_driven_prices) and listing events record
+        # their own, so the current best ask below matches the last point.
+        # One IN query over all relevant buckets, merged and bucketed in SQL
+        history = get_buckets_price_history(
+            bucket_ids, days,
+            granularity=range_granularity.get(time_range),
+            max_points=target_points(days),
+        )
 
         # Get current price for all relevant buckets (with packaging filters)
         if random_year:
@@ -109,8 +97,9 @@ def get_price_history(bucket_id):
         # If no history in requested range, check if ANY history exists at all
         # This handles the case where all listings are removed but historical data exists
         if not history:
-            # Check for any historical data (last 1 year)
-            all_history = get_bucket_price_history(bucket_id, 365)
+            # Check for any historical data (last 1 year, weekly is enough
+            # for the most recent price)
+            all_history = get_bucket_price_history(bucket_id, 365, granularity='week')
 
             if all_history:
                 # Historical data exists, but not in this time range
@@ -7,6 +7,7 @@ from flask import Blueprint, jsonify, request, session
 from database import get_db_connection, IS_POSTGRES
 from datetime import datetime, timedelta
 from services.notification_service import create_notification, notify_cancel_request_submitted
+from services.user_stats_service import refresh_order_user_stats
 
 cancellation_bp = Blueprint('cancellation', __name__)
 
@@ -522,6 +523,7 @@ def respond_to_cancellation(order_id):
                 """, (cancel_request['reason'], order_id))
                 conn.commit()
                 conn.close()
+                refresh_order_user_stats(order_id)
                 return jsonify({
                     'success': True,
                     'message': 'Order has already been canceled.',
@@ -543,6 +545,9 @@ def respond_to_cancellation(order_id):
             conn.commit()
             conn.close()
 
+            # Canceled orders no longer count as fulfilled for the sellers
+            refresh_order_user_stats(order_id)
+
             # Non-critical: update stats and send notifications (failures don't affect the cancellation)
             try:
                 stats_conn = get_db_connection()
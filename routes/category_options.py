@@ -9,16 +9,56 @@ backward compatibility.
 
 The catalogue ensures that dropdown options are always available, even when
 the database is empty (e.g., after wiping buckets in development).
+
+The options are cached per process and versioned across processes:
+  - category changes bump a shared version (system_settings
+    DROPDOWN_VERSION_KEY) through invalidate_dropdown_cache(), or
+    note_category_values() when a new category carries a value the options
+    do not list yet
+  - at most every DROPDOWN_CHECK_INTERVAL a read compares that version with
+    the one the cache was built at; a stale cache keeps being served while
+    a background thread rebuilds it, so requests never wait on the rebuild
+  - warm_dropdown_options() builds the cache at startup, so workers do not
+    all load it on their first request after a restart
 """
 
-from database import get_db_connection
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import database as _db_module
 from utils.category_catalog import get_builtin_category_specs
 
-# Cache so we don't hit the DB on every request
+logger = logging.getLogger(__name__)
+
+DROPDOWN_CHECK_INTERVAL = timedelta(seconds=5)
+DROPDOWN_VERSION_KEY = 'dropdown_options_version'
+
+# Category spec field -> dropdown options key
+_SPEC_OPTION_KEYS = (
+    ('metal', 'metals'),
+    ('product_type', 'product_types'),
+    ('weight', 'weights'),
+    ('purity', 'purities'),
+    ('mint', 'mints'),
+    ('year', 'years'),
+    ('finish', 'finishes'),
+    ('grade', 'grades'),
+    ('product_line', 'product_lines'),
+    ('condition_category', 'condition_categories'),
+    ('series_variant', 'series_variants'),
+)
+
+# Module-level state — one cache per process
+_lock = threading.Lock()           # guards the state below
+_build_lock = threading.Lock()     # one build at a time
 _dropdown_options_cache = None
+_cache_version = None              # DROPDOWN_VERSION_KEY value the cache was built at
+_checked_at = None
+_rebuild_thread = None             # running background rebuild, if any
 
 
-def _load_dropdown_options():
+def _load_dropdown_options(conn):
     """
     Load dropdown options from the canonical catalogue, with optional database union.
 
@@ -47,8 +87,6 @@ def _load_dropdown_options():
     # Get the canonical built-in specifications
     builtin_specs, builtin_years = get_builtin_category_specs()
 
-    # Connect to database for optional union of legacy values
-    conn = get_db_connection()
     opts = {}
 
     # ==================== PATTERN FOR EACH DIMENSION ====================
@@ -198,34 +236,173 @@ def _load_dropdown_options():
         variant_values.add(row["series_variant"])
     opts["series_variants"] = sorted(variant_values)
 
-    conn.close()
-
     return opts
 
 
-def get_dropdown_options():
+def _read_version(conn):
+    try:
+        row = conn.execute('SELECT value FROM system_settings WHERE key = ?',
+                           (DROPDOWN_VERSION_KEY,)).fetchone()
+        return row['value'] if row else None
+    except Exception:
+        # No system_settings table yet: run unshared (local invalidation only)
+        return None
+
+
+def _build(if_missing=False):
+    """Load the options and install them with the version they were read at."""
+    global _dropdown_options_cache, _cache_version, _checked_at
+
+    with _build_lock:
+        if if_missing and _dropdown_options_cache is not None:
+            return _dropdown_options_cache
+        conn = _db_module.get_db_connection()
+        try:
+            # Version first: a bump during the load is seen by the next check
+            version = _read_version(conn)
+            options = _load_dropdown_options(conn)
+        finally:
+            conn.close()
+        with _lock:
+            _dropdown_options_cache = options
+            _cache_version = version
+            _checked_at = datetime.now()
+        return options
+
+
+def _rebuild_in_background():
+    """Start a background rebuild unless one is already running."""
+    global _rebuild_thread
+
+    def _run():
+        global _rebuild_thread
+        try:
+            _build()
+        except Exception as e:
+            logger.warning("[dropdown_options] Rebuild failed: %s", e)
+        finally:
+            with _lock:
+                _rebuild_thread = None
+
+    with _lock:
+        if _rebuild_thread is not None:
+            return
+        _rebuild_thread = threading.Thread(target=_run, daemon=True, name="dropdown_options_rebuild")
+        _rebuild_thread.start()
+
+
+def get_dropdown_options(now=None):
     """
     Return cached dropdown options; load from catalogue/DB on first use.
 
     This function should be called by routes and templates that need dropdown options.
-    The result is cached in memory to avoid repeated database queries.
+    The result is cached in memory to avoid repeated database queries; at most
+    every DROPDOWN_CHECK_INTERVAL one query compares the shared version, and a
+    stale cache is served until the background rebuild replaces it.
 
     To refresh the cache (e.g., after adding new values to the catalogue):
     - Restart the application, OR
     - Call invalidate_dropdown_cache()
     """
-    global _dropdown_options_cache
+    global _checked_at
+
+    now = now or datetime.now()
+    with _lock:
+        options = _dropdown_options_cache
+        check_due = options is not None and (
+            _checked_at is None or now - _checked_at >= DROPDOWN_CHECK_INTERVAL)
+        if check_due:
+            _checked_at = now
+
+    if options is None:
+        return _build(if_missing=True)
+
+    if check_due:
+        try:
+            conn = _db_module.get_db_connection()
+            try:
+                version = _read_version(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("[dropdown_options] Version check failed: %s", e)
+            return options
+        if version != _cache_version:
+            _rebuild_in_background()
+
+    return options
+
+
+def warm_dropdown_options():
+    """Build the cache in the background (app startup)."""
     if _dropdown_options_cache is None:
-        _dropdown_options_cache = _load_dropdown_options()
-    return _dropdown_options_cache
+        _rebuild_in_background()
 
 
-def invalidate_dropdown_cache():
+def invalidate_dropdown_cache(conn=None):
     """
-    Clear the dropdown options cache.
+    Bump the shared version so every process rebuilds its dropdown options.
+
+    Call this function after category changes or whenever you need to force a
+    reload of dropdown options (e.g., after adding new catalogue values or
+    database migrations).  With `conn` the bump joins the caller's
+    transaction (caller commits) inside a savepoint, so a failed bump leaves
+    the transaction usable on Postgres; otherwise it commits on its own
+    connection.
+    """
+    global _checked_at
+
+    sql = '''
+        INSERT INTO system_settings (key, value, updated_at)
+        VALUES (?, '1', ?)
+        ON CONFLICT(key) DO UPDATE
+        SET value = CAST(CAST(system_settings.value AS INTEGER) + 1 AS TEXT),
+            updated_at = excluded.updated_at
+    '''
+    params = (DROPDOWN_VERSION_KEY, datetime.now().isoformat())
+    try:
+        if conn is not None:
+            conn.execute('SAVEPOINT dropdown_version')
+            try:
+                conn.execute(sql, params)
+                conn.execute('RELEASE SAVEPOINT dropdown_version')
+            except Exception:
+                conn.execute('ROLLBACK TO SAVEPOINT dropdown_version')
+                conn.execute('RELEASE SAVEPOINT dropdown_version')
+                raise
+        else:
+            own = _db_module.get_db_connection()
+            try:
+                own.execute(sql, params)
+                own.commit()
+            finally:
+                own.close()
+    except Exception as e:
+        logger.warning("[dropdown_options] Shared version bump failed: %s", e)
 
-    Call this function if you need to force a reload of dropdown options
-    (e.g., after adding new catalogue values or database migrations).
+    with _lock:
+        # This process checks on its next read
+        _checked_at = None
+
+
+def note_category_values(conn, category_spec):
+    """
+    invalidate_dropdown_cache(conn) for a new or edited category whose spec
+    carries a value the options do not list yet; specs made only of listed
+    values leave every cache untouched.
     """
-    global _dropdown_options_cache
-    _dropdown_options_cache = None
+    with _lock:
+        options = _dropdown_options_cache
+    if options is not None and all(
+        not category_spec.get(field) or str(category_spec[field]) in options[key]
+        for field, key in _SPEC_OPTION_KEYS
+    ):
+        return
+    invalidate_dropdown_cache(conn)
+
+
+def reset_dropdown_cache():
+    """Drop the cache (next read rebuilds it)."""
+    global _dropdown_options_cache, _cache_version, _checked_at
+    with _lock:
+        _dropdown_options_cache = _cache_version = _checked_at = None
@@ -2,6 +2,7 @@
 
 from flask import Blueprint, request, redirect, url_for, session, flash, render_template, jsonify
 from database import get_db_connection
+from services.user_stats_service import refresh_user_stats_for
 
 ratings_bp = Blueprint('ratings', __name__)
 
@@ -111,6 +112,7 @@ def rate_order(order_id):
         ''', (order_id, user_id, ratee_id, rating, comment))
         conn.commit()
         conn.close()
+        refresh_user_stats_for([ratee_id])
 
         if is_ajax:
             return jsonify({'success': True})
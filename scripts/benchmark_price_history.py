@@ -0,0 +1,154 @@
+"""
+Bucket Price History Benchmark
+
+Times the chart history read over a bucket with one year of minute-level best
+ask changes (525,600 rows by default) in an in-memory SQLite database:
+
+  python   — the former path: every raw row fetched per sibling bucket, then
+             last-value-per-period in Python and a merge sort of the siblings
+  sql      — get_buckets_price_history(): one IN query, bucketed in SQL
+
+Usage:
+    python scripts/benchmark_price_history.py
+    python scripts/benchmark_price_history.py --siblings 3 --repeat 5
+    python scripts/benchmark_price_history.py --minutes 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_price_history_service as bph
+from services.chart_downsampling import target_points
+
+
+class _SharedConnection:
+    """Keeps the in-memory database open across the service's close() calls."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, *args):
+        return self._conn.execute(*args)
+
+    def close(self):
+        pass
+
+
+def _build_db(minutes, siblings, seed):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE bucket_price_history (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            bucket_id      INTEGER NOT NULL,
+            best_ask_price REAL NOT NULL,
+            timestamp      TIMESTAMP NOT NULL
+        )
+    """)
+    conn.execute('CREATE INDEX idx_bph_bucket_ts ON bucket_price_history (bucket_id, timestamp)')
+
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(minutes=minutes)
+    for bucket_id in range(1, siblings + 1):
+        price = 2000.0
+        rows = []
+        for minute in range(minutes):
+            price = round(price + rng.uniform(-1.5, 1.5), 2)
+            rows.append((bucket_id, price, start + timedelta(minutes=minute)))
+        conn.executemany(
+            'INSERT INTO bucket_price_history (bucket_id, best_ask_price, timestamp) VALUES (?, ?, ?)',
+            rows)
+    conn.commit()
+    return conn
+
+
+_PY_TRUNCATE = {
+    'hour': lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+    'day':  lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0),
+    'week': lambda ts: (ts - timedelta(days=ts.weekday())).replace(
+        hour=0, minute=0, second=0, microsecond=0),
+}
+
+
+def _python_history(conn, bucket_ids, days, granularity):
+    """Python reference: raw rows per bucket, Python bucketing, Python merge."""
+    start_date = datetime.now() - timedelta(days=days)
+    merged = []
+    for bucket_id in bucket_ids:
+        raw = conn.execute("""
+            SELECT timestamp, best_ask_price
+            FROM bucket_price_history
+            WHERE bucket_id = ?
+              AND timestamp >= ?
+            ORDER BY timestamp ASC
+        """, (bucket_id, start_date)).fetchall()
+        if granularity is None:
+            merged.extend({'timestamp': r['timestamp'], 'price': r['best_ask_price']} for r in raw)
+            continue
+        periods = {}
+        for r in raw:
+            ts = datetime.fromisoformat(r['timestamp'])
+            periods[_PY_TRUNCATE[granularity](ts)] = {
+                'timestamp': ts.replace(microsecond=0).isoformat(), 'price': r['best_ask_price']}
+        merged.extend(periods.values())
+    merged.sort(key=lambda x: x['timestamp'])
+    return merged
+
+
+def _time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bucket price history reads.')
+    parser.add_argument('--minutes', type=int, default=365 * 24 * 60,
+                        help='Price changes per bucket, one per minute (default: one year)')
+    parser.add_argument('--siblings', type=int, default=1,
+                        help='Sibling buckets read together (Random Year mode)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case (best is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'Building {args.siblings} bucket(s) x {args.minutes:,} minute-level changes...')
+    conn = _build_db(args.minutes, args.siblings, args.seed)
+    bucket_ids = list(range(1, args.siblings + 1))
+    shared = _SharedConnection(conn)
+
+    cases = [('1y', 365, 'day'), ('3m', 90, 'hour'), ('1m', 30, 'hour'), ('1w', 7, None)]
+
+    print(f"\n{'range':<6}{'granularity':<13}{'python (s)':>12}{'sql (s)':>10}"
+          f"{'speedup':>9}{'points':>9}{'charted':>9}")
+    with patch.object(bph, 'get_db_connection', return_value=shared):
+        for label, days, granularity in cases:
+            py_s, py_result = _time(
+                lambda: _python_history(conn, bucket_ids, days, granularity), args.repeat)
+            sql_s, sql_result = _time(
+                lambda: bph.get_buckets_price_history(bucket_ids, days, granularity=granularity),
+                args.repeat)
+            charted = bph.get_buckets_price_history(
+                bucket_ids, days, granularity=granularity, max_points=target_points(days))
+
+            if args.siblings == 1 and py_result != sql_result:
+                print(f'  ✗ {label}: SQL and Python results differ')
+            speedup = py_s / sql_s if sql_s else float('inf')
+            print(f"{label:<6}{granularity or 'raw':<13}{py_s:>12.3f}{sql_s:>10.3f}"
+                  f"{speedup:>8.1f}x{len(sql_result):>9,}{len(charted):>9,}")
+
+
+if __name__ == '__main__':
+    main()
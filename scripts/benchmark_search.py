@@ -0,0 +1,134 @@
+"""
+Bucket Search Benchmark
+
+Times autocomplete lookups over a catalogue with 100,000 active listings by
+default (in-memory SQLite):
+
+  like   — the former path: eleven-way LIKE '%q%' OR over categories
+           LEFT JOIN listings
+  index  — search_bucket_ids() over the bucket_search FTS5 index
+
+Usage:
+    python scripts/benchmark_search.py
+    python scripts/benchmark_search.py --listings 20000 --buckets 500 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import search_index_service as sis
+
+_METALS = ['Gold', 'Silver', 'Platinum', 'Palladium']
+_LINES = ['American Eagle', 'Maple Leaf', 'Britannia', 'Krugerrand', 'Philharmonic',
+          'Panda', 'Libertad', 'Kookaburra', 'Buffalo', 'Lunar Series']
+_MINTS = ['US Mint', 'Royal Canadian Mint', 'Royal Mint', 'Perth Mint', 'Austrian Mint']
+_WEIGHTS = ['1 oz', '1/2 oz', '1/4 oz', '1/10 oz', '10 oz', '1 kilo']
+_FINISHES = ['Bullion', 'Proof', 'Reverse Proof', 'Burnished']
+_WORDS = ['pristine', 'capsule', 'original', 'mint', 'roll', 'tube', 'box', 'toned',
+          'monster', 'lot', 'sealed', 'graded', 'rare', 'collection', 'vintage']
+
+_QUERIES = ['go', 'gold', 'gold eag', 'maple 1 oz', 'silver proof 2019', 'perth kook',
+            'capsule', 'agle']
+
+
+def _build_db(listings, buckets, seed):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, bucket_id INTEGER,
+            metal TEXT, product_line TEXT, coin_series TEXT, product_type TEXT,
+            mint TEXT, year TEXT, finish TEXT, grade TEXT, weight TEXT, purity TEXT
+        );
+        CREATE TABLE listings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER,
+            listing_title TEXT, name TEXT, quantity INTEGER, active INTEGER
+        );
+        CREATE INDEX idx_listings_category ON listings (category_id);
+    """)
+
+    rng = random.Random(seed)
+    categories = []
+    for bucket_id in range(1, buckets + 1):
+        spec = (rng.choice(_METALS), rng.choice(_LINES), rng.choice(_MINTS),
+                rng.choice(_WEIGHTS), rng.choice(_FINISHES))
+        for year in rng.sample(range(1986, 2026), 2):
+            categories.append((bucket_id, spec[0], spec[1], 'Coin', spec[2], str(year),
+                               spec[4], spec[3], '.999'))
+    conn.executemany("""
+        INSERT INTO categories (bucket_id, metal, product_line, product_type, mint, year,
+                                finish, weight, purity)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, categories)
+
+    rows = []
+    for _ in range(listings):
+        title = ' '.join(rng.sample(_WORDS, 3)).title() if rng.random() < 0.3 else None
+        rows.append((rng.randint(1, len(categories)), title, rng.randint(1, 20)))
+    conn.executemany('INSERT INTO listings (category_id, listing_title, quantity, active) VALUES (?, ?, ?, 1)',
+                     rows)
+    conn.commit()
+    return conn
+
+
+def _like_search(conn, query):
+    """The former autocomplete query."""
+    like = f'%{query}%'
+    return conn.execute("""
+        SELECT DISTINCT c.bucket_id, c.id AS cat_id, c.metal, c.product_line, c.coin_series,
+               c.product_type, c.weight, c.mint, c.year, c.finish, c.purity,
+               l.listing_title, l.name AS listing_name
+        FROM categories c
+        LEFT JOIN listings l ON l.category_id = c.id AND l.active = 1 AND l.quantity > 0
+        WHERE (c.metal LIKE ? OR c.product_line LIKE ? OR c.coin_series LIKE ?
+               OR c.product_type LIKE ? OR c.mint LIKE ? OR c.year LIKE ? OR c.finish LIKE ?
+               OR c.weight LIKE ? OR c.purity LIKE ? OR l.listing_title LIKE ? OR l.name LIKE ?)
+        ORDER BY c.mint, c.product_line, c.metal
+        LIMIT 10
+    """, (like,) * 11).fetchall()
+
+
+def _time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bucket search.')
+    parser.add_argument('--listings', type=int, default=100_000, help='Active listings')
+    parser.add_argument('--buckets', type=int, default=2_000, help='Buckets (two categories each)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query (best is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'Building {args.buckets:,} buckets and {args.listings:,} listings...')
+    conn = _build_db(args.listings, args.buckets, args.seed)
+    sis.create_search_index(conn)
+    t0 = time.perf_counter()
+    count = sis.rebuild_search_index(conn)
+    conn.commit()
+    print(f'Indexed {count:,} bucket documents in {time.perf_counter() - t0:.2f}s')
+
+    print(f"\n{'query':<20}{'like (ms)':>11}{'index (ms)':>12}{'speedup':>9}{'matches':>9}")
+    for query in _QUERIES:
+        like_s, _ = _time(lambda: _like_search(conn, query), args.repeat)
+        index_s, _ = _time(lambda: sis.search_bucket_ids(query, limit=8, conn=conn), args.repeat)
+        matches = len(sis.search_bucket_ids(query, conn=conn))
+        speedup = like_s / index_s if index_s else float('inf')
+        print(f"{query:<20}{like_s * 1000:>11.2f}{index_s * 1000:>12.2f}{speedup:>8.1f}x{matches:>9,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -197,7 +197,8 @@ class SchemaManager:
             series_variant TEXT CHECK(series_variant IN ('None', 'First_Strike', 'Early_Releases', 'First_Day_of_Issue', 'Privy', 'MintDirect')),
             platform_fee_type TEXT CHECK(platform_fee_type IN ('percent', 'flat') OR platform_fee_type IS NULL),
             platform_fee_value REAL,
-            fee_updated_at TIMESTAMP
+            fee_updated_at TIMESTAMP,
+            spec_key TEXT
         )
         """
 
@@ -217,12 +218,15 @@ class SchemaManager:
         self.add_column('categories', 'platform_fee_type', "TEXT CHECK(platform_fee_type IN ('percent', 'flat') OR platform_fee_type IS NULL)")
         self.add_column('categories', 'platform_fee_value', 'REAL')
         self.add_column('categories', 'fee_updated_at', 'TIMESTAMP')
+        # Hash of every spec except year (see utils.category_manager.compute_spec_key)
+        self.add_column('categories', 'spec_key', 'TEXT')
 
         # Create indexes
         self.create_index('idx_categories_lookup', 'categories',
                          'metal, product_line, product_type, weight, purity, mint, year, finish, grade')
         self.create_index('idx_categories_isolated', 'categories', 'is_isolated')
         self.create_index('idx_categories_bucket_id', 'categories', 'bucket_id')
+        self.create_index('idx_categories_spec_key', 'categories', 'spec_key')
 
     def create_listings_table(self):
         """Create the listings table"""
@@ -1776,6 +1780,23 @@ class SchemaManager:
             self.log_skip("Table 'bucket_image_ingestion_runs' already exists")
         self.create_index('idx_biir_bucket', 'bucket_image_ingestion_runs', 'standard_bucket_id')
 
+    def create_bucket_reference_series_table(self):
+        """Create the bucket_reference_series table — persisted Reference Price points."""
+        print("\n[49/49] Creating BUCKET_REFERENCE_SERIES table...")
+        sql = """
+        CREATE TABLE IF NOT EXISTS bucket_reference_series (
+            bucket_id INTEGER NOT NULL,
+            t         TEXT    NOT NULL,
+            price     REAL    NOT NULL,
+            PRIMARY KEY (bucket_id, t)
+        )
+        """
+        if not self.table_exists('bucket_reference_series'):
+            self.cursor.execute(sql)
+            self.log_change("Created bucket_reference_series table")
+        else:
+            self.log_skip("Table 'bucket_reference_series' already exists")
+
     def run(self):
         """Run the complete schema creation/update process"""
         print("=" * 70)
@@ -1838,6 +1859,7 @@ class SchemaManager:
             self.create_standard_buckets_table()
             self.create_bucket_image_assets_table()
             self.create_bucket_image_ingestion_runs_table()
+            self.create_bucket_reference_series_table()
 
             # Add cancellation columns to orders table (idempotent — also in create_orders_table)
             self.add_column('orders', 'canceled_at', 'TIMESTAMP')
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Market Data Export (cron/manual entry point)
+
+Brings every bucket's reference series up to date, then writes daily bucket
+OHLC + volume and spot OHLC files under data/exports/ for every complete day
+not exported yet.  The logic lives in
+services/market_export_service.py; the in-process spot scheduler also runs the
+export (without extending the series) once a day.
+
+Designed to be called by cron nightly, e.g.:
+    15 0 * * * cd /path/to/metex && python scripts/export_market_data.py
+
+Usage:
+    python scripts/export_market_data.py
+    python scripts/export_market_data.py --export-dir /tmp/exports
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_export_service import EXPORT_DIR, extend_bucket_series, run_market_export
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Export daily market data files.')
+    parser.add_argument('--export-dir', default=EXPORT_DIR, help=f'Output directory (default: {EXPORT_DIR})')
+    args = parser.parse_args()
+
+    # Build and extend every bucket's reference series here rather than in
+    # the scheduler thread: a first run builds up to a year per bucket
+    extended = extend_bucket_series()
+    print(f'[export_market_data] Reference series extended for {extended} buckets.')
+
+    summary = run_market_export(export_dir=args.export_dir)
+    if summary['locked_out']:
+        print('[export_market_data] Another export is running — skipping.')
+        return
+    if summary['last_day'] is None:
+        print('[export_market_data] Nothing new to export.')
+        return
+    print(f"[export_market_data] {summary['first_day']}..{summary['last_day']}: "
+          f"{summary['bucket_rows']} bucket rows, {summary['spot_rows']} spot rows")
+    for name in summary['files']:
+        print(f'  {os.path.join(args.export_dir, name)}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,121 @@
+"""
+Matching Simulator / Replay Harness
+
+Replays a recorded or synthetic event stream through the bid/listing matching
+engine against an in-memory SQLite database (Stripe stubbed) and prints fills,
+spreads, per-event latency and query counts.  See services/matching_simulator.py
+for the event format.
+
+Usage:
+    # Replay a recorded stream (JSON {"setup": [...], "events": [...]}, JSON list, or JSONL)
+    python scripts/simulate_matching.py --events stream.jsonl
+
+    # Synthetic stream, reproducible by seed
+    python scripts/simulate_matching.py --synthetic 2000 --seed 7
+
+    # Throughput benchmark: events/sec with 10k resting bids in the book
+    python scripts/simulate_matching.py --synthetic 500 --open-bids 10000
+
+    # Record a golden run, then verify later runs against it
+    python scripts/simulate_matching.py --synthetic 2000 --golden golden.json --write-golden
+    python scripts/simulate_matching.py --synthetic 2000 --golden golden.json
+
+    # Exercise auto_match_bid_to_listings / auto_match_listing_to_bids on placement
+    python scripts/simulate_matching.py --synthetic 2000 --match-on-place
+
+Exit status is 1 when the run differs from the golden file.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.matching_simulator import (
+    diff_reports,
+    generate_synthetic_events,
+    golden_view,
+    load_events,
+    simulate,
+)
+
+
+def _print_summary(report):
+    totals = report['totals']
+    perf = report['performance']
+    print('\n=== Matching simulation ===')
+    print(f"  Events          : {totals['events']}")
+    print(f"  Fills / orders  : {totals['fills']} / {totals['orders']}")
+    print(f"  Filled quantity : {totals['filled_quantity']}")
+    print(f"  Buyer notional  : ${totals['buyer_notional']:,.2f}")
+    print(f"  Spread captured : ${totals['spread_total']:,.2f}")
+    print(f"  Payment failures: {totals['payment_failures']}")
+    print(f"  Open bids (end) : {totals['open_bids']}")
+    print('\n=== Performance ===')
+    print(f"  Throughput      : {perf['events_per_second']:,.1f} events/s "
+          f"({perf['wall_seconds']:.3f}s wall)")
+    lat = perf['latency_ms']
+    print(f"  Latency (ms)    : mean={lat['mean']} p50={lat['p50']} p95={lat['p95']} max={lat['max']}")
+    q = perf['queries']
+    print(f"  SQL statements  : total={q['total']} per_event={q['per_event_mean']} max={q['max']}")
+    print('\n  By event type:')
+    for event_type, stats in perf['by_type'].items():
+        print(f"    {event_type:<15} n={stats['count']:<6} mean={stats['mean_ms']:>9.3f}ms "
+              f"queries={stats['queries_per_event']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay events through the matching engine.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--events', help='Recorded event stream (JSON or JSONL)')
+    source.add_argument('--synthetic', type=int, metavar='N',
+                        help='Generate N synthetic events')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic stream seed')
+    parser.add_argument('--open-bids', type=int, default=0,
+                        help='Resting bids to preload before timing (synthetic only)')
+    parser.add_argument('--match-on-place', action='store_true',
+                        help='Run auto-match on bid/listing placement and edits')
+    parser.add_argument('--golden', help='Golden report to diff against (or write)')
+    parser.add_argument('--write-golden', action='store_true',
+                        help='Write this run as the golden report instead of diffing')
+    parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    args = parser.parse_args()
+
+    # auto_match logs every fill at INFO; keep benchmark output readable.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.events:
+        setup, events = load_events(args.events)
+    else:
+        setup, events = generate_synthetic_events(args.synthetic, open_bids=args.open_bids,
+                                                  seed=args.seed)
+
+    report = simulate(events, setup_events=setup, match_on_place=args.match_on_place)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_summary(report)
+
+    if args.golden:
+        if args.write_golden:
+            with open(args.golden, 'w') as f:
+                json.dump(golden_view(report), f, indent=1)
+            print(f'\nGolden report written to {args.golden}')
+        else:
+            with open(args.golden) as f:
+                golden = json.load(f)
+            diffs = diff_reports(report, golden)
+            if diffs:
+                print(f'\n✗ Run differs from golden {args.golden}:')
+                for line in diffs:
+                    print(f'  {line}')
+                sys.exit(1)
+            print(f'\n✓ Run matches golden {args.golden}')
+
+
+if __name__ == '__main__':
+    main()
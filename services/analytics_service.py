@@ -668,6 +668,27 @@ class AnalyticsService:
 
         return [dict(row) for row in results]
 
+    @staticmethod
+    def get_market_history(dataset='bucket_daily', start_date=None, end_date=None, key=None):
+        """
+        Get daily bucket or spot history from the nightly market data export
+
+        Reads data/exports (services/market_export_service.py) rather than the
+        orders table, so long ranges cost no DB work.
+
+        Args:
+            dataset: 'bucket_daily' or 'spot_daily'
+            start_date: First date (YYYY-MM-DD), optional
+            end_date: Last date (YYYY-MM-DD), optional
+            key: bucket_id or metal to filter on, optional
+
+        Returns:
+            list: Daily rows (see market_export_service.DATASETS for columns)
+        """
+        from services.market_export_service import read_export
+        return read_export(dataset, start=start_date and start_date[:10],
+                           end=end_date and end_date[:10], key=key)
+
     @staticmethod
     def get_volume_drilldown(start_date=None, end_date=None, limit=100, offset=0):
         """
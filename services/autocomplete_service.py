@@ -0,0 +1,292 @@
+"""
+Autocomplete Service
+
+Per-process prefix index behind /api/search/autocomplete, so keystrokes never
+touch the database.
+
+The corpus is the one in the bucket_search index (category spec strings and
+active listing titles, one document per bucket), tokenised into words.  The
+distinct words are kept in a sorted list next to a word -> bucket ids map; a
+term prefix is a bisect range over the list, and a multi-term query is the
+intersection of its terms' ranges.  Dirty buckets are swapped in word by
+word (insort/delete), without re-sorting the corpus.  When no bucket
+matches, a substring scan over the documents keeps the infix behaviour of
+the search index.
+
+Suggestions ({text, meta, type, id}) are precomputed per bucket.  Listing
+events reach the index through search_index_service.reindex_buckets, which
+marks the bucket dirty here; the next lookup reloads only dirty buckets.
+Changes made by other workers are picked up by a full rebuild every
+AUTOCOMPLETE_MAX_AGE.  Only the first build runs on the request path; later
+rebuilds load in a background thread while lookups keep using the current
+index, which is swapped out once the new one is ready.
+"""
+
+import logging
+
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+import database as _db_module
+from services.search_index_service import _terms
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_MAX_AGE = timedelta(minutes=5)
+
+_SPEC_FIELDS = ('metal', 'product_line', 'coin_series', 'product_type', 'mint',
+                'year', 'finish', 'grade', 'weight', 'purity')
+
+# Module-level state — one index per process
+_lock = threading.Lock()
+_buckets = {}          # bucket_id -> {'suggestion', 'words', 'body'}
+_words = []            # sorted distinct words
+_word_buckets = {}     # word -> bucket ids containing it
+_dirty = set()
+_built_at = None
+_build_lock = threading.Lock()   # one full build at a time
+_rebuild_thread = None           # running background rebuild, if any
+_rebuild_marks = None            # buckets marked dirty while a full build loads
+
+
+def _suggestion(bucket_id, category, listing):
+    # Match how the buy page tiles show titles:
+    # listing_title > name > mint + product_line/coin_series/product_type
+    custom_title = listing and (listing['listing_title'] or listing['name'])
+    if custom_title:
+        text = custom_title
+    else:
+        parts = []
+        if category['mint']:
+            parts.append(category['mint'])
+        if category['product_line'] or category['coin_series']:
+            parts.append(category['product_line'] or category['coin_series'])
+        elif category['product_type']:
+            parts.append(category['product_type'])
+        text = ' '.join(parts) or category['metal'] or 'Item'
+
+    # Context/meta line shown beneath the title
+    meta_parts = [category[f] for f in ('weight', 'year', 'metal', 'finish', 'purity') if category[f]]
+
+    return {'text': text, 'meta': ' · '.join(meta_parts), 'type': 'bucket', 'id': bucket_id}
+
+
+def _load_buckets(conn, bucket_ids=None):
+    """{bucket_id: entry} for the given (or all) buckets, in two queries."""
+    bucket_sql, params = '', ()
+    if bucket_ids is not None:
+        bucket_sql = f" AND c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
+        params = tuple(bucket_ids)
+
+    first_category = {}
+    texts = {}
+
+    def add(bucket_id, value):
+        if value is not None and str(value).strip():
+            values = texts.setdefault(bucket_id, [])
+            value = str(value).strip().lower()
+            if value not in values:
+                values.append(value)
+
+    for row in conn.execute(f'''
+        SELECT c.bucket_id, c.id, {', '.join('c.' + f for f in _SPEC_FIELDS)}
+        FROM categories c
+        WHERE c.bucket_id IS NOT NULL{bucket_sql}
+        ORDER BY c.bucket_id, c.id
+    ''', params).fetchall():
+        first_category.setdefault(row['bucket_id'], row)
+        texts.setdefault(row['bucket_id'], [])
+        for field in _SPEC_FIELDS:
+            add(row['bucket_id'], row[field])
+
+    # Title listing: first in-stock listing of the bucket's first category
+    title_listing = {}
+    for row in conn.execute(f'''
+        SELECT c.bucket_id, l.category_id, l.quantity, l.listing_title, l.name
+        FROM listings l
+        JOIN categories c ON l.category_id = c.id
+        WHERE l.active = 1 AND c.bucket_id IS NOT NULL{bucket_sql}
+        ORDER BY c.bucket_id, l.id
+    ''', params).fetchall():
+        add(row['bucket_id'], row['listing_title'])
+        add(row['bucket_id'], row['name'])
+        if (row['quantity'] or 0) > 0 and row['category_id'] == first_category[row['bucket_id']]['id']:
+            title_listing.setdefault(row['bucket_id'], row)
+
+    buckets = {}
+    for bucket_id, category in first_category.items():
+        body = ' '.join(texts[bucket_id])
+        buckets[bucket_id] = {
+            'suggestion': _suggestion(bucket_id, category, title_listing.get(bucket_id)),
+            'words': set(_terms(body)),
+            'body': body,
+        }
+    return buckets
+
+
+def _index_bucket(bucket_id, entry):
+    for word in entry['words']:
+        ids = _word_buckets.get(word)
+        if ids is None:
+            ids = _word_buckets[word] = set()
+            insort(_words, word)
+        ids.add(bucket_id)
+
+
+def _unindex_bucket(bucket_id, entry):
+    for word in entry['words']:
+        ids = _word_buckets[word]
+        ids.discard(bucket_id)
+        if not ids:
+            del _word_buckets[word]
+            del _words[bisect_left(_words, word)]
+
+
+def _build(now, if_missing=False):
+    """Load a full index outside _lock and swap it in."""
+    global _buckets, _words, _word_buckets, _built_at, _rebuild_marks
+
+    with _build_lock:
+        with _lock:
+            if if_missing and _built_at is not None:
+                return
+            _rebuild_marks = set()
+        try:
+            conn = _db_module.get_db_connection()
+            try:
+                buckets = _load_buckets(conn)
+            finally:
+                conn.close()
+        except Exception:
+            with _lock:
+                _rebuild_marks = None
+            raise
+
+        word_buckets = {}
+        for bucket_id, entry in buckets.items():
+            for word in entry['words']:
+                word_buckets.setdefault(word, set()).add(bucket_id)
+
+        with _lock:
+            _buckets, _word_buckets, _words = buckets, word_buckets, sorted(word_buckets)
+            # Marks from before the load are in the new index; later ones are not
+            _dirty.clear()
+            _dirty.update(_rebuild_marks)
+            _rebuild_marks = None
+            _built_at = now
+
+
+def _rebuild_in_background():
+    """Start a background rebuild unless one is already running."""
+    global _rebuild_thread
+
+    def _run():
+        global _rebuild_thread
+        try:
+            _build(datetime.now())
+        except Exception as e:
+            logger.warning("[autocomplete] Rebuild failed: %s", e)
+        finally:
+            with _lock:
+                _rebuild_thread = None
+
+    with _lock:
+        if _rebuild_thread is not None:
+            return
+        _rebuild_thread = threading.Thread(target=_run, daemon=True, name="autocomplete_rebuild")
+        _rebuild_thread.start()
+
+
+def _reload_dirty():
+    """Swap the dirty buckets' words in place (caller holds _lock)."""
+    if not _dirty:
+        return
+    dirty = sorted(_dirty)
+    _dirty.clear()
+    conn = _db_module.get_db_connection()
+    try:
+        fresh = _load_buckets(conn, dirty)
+    finally:
+        conn.close()
+    for bucket_id in dirty:
+        old = _buckets.pop(bucket_id, None)
+        if old is not None:
+            _unindex_bucket(bucket_id, old)
+        if bucket_id in fresh:
+            _buckets[bucket_id] = fresh[bucket_id]
+            _index_bucket(bucket_id, fresh[bucket_id])
+
+
+def _prefix_buckets(prefix):
+    lo = bisect_left(_words, prefix)
+    hi = bisect_left(_words, prefix + '\uffff', lo)
+    matched = set()
+    for word in _words[lo:hi]:
+        matched |= _word_buckets[word]
+    return matched
+
+
+def get_suggestions(query, limit=8, now=None):
+    """
+    Autocomplete suggestions, one per bucket.
+
+    Every query term must match a word prefix; buckets with more exact word
+    hits come first, then by bucket id.  Falls back to a substring match.
+
+    Returns:
+        List of {'text', 'meta', 'type', 'id'} dicts (copies)
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    now = now or datetime.now()
+    with _lock:
+        built_at = _built_at
+    if built_at is None:
+        _build(now, if_missing=True)
+    elif now - built_at > AUTOCOMPLETE_MAX_AGE:
+        _rebuild_in_background()
+
+    with _lock:
+        _reload_dirty()
+
+        matched = None
+        for term in terms:
+            hits = _prefix_buckets(term)
+            matched = hits if matched is None else matched & hits
+            if not matched:
+                break
+
+        if matched:
+            ranked = sorted(matched, key=lambda b: (
+                -sum(term in _buckets[b]['words'] for term in terms), b))
+        else:
+            needle = query.strip().lower()
+            ranked = sorted(b for b, entry in _buckets.items() if needle in entry['body'])
+
+        return [dict(_buckets[b]['suggestion']) for b in ranked[:limit]]
+
+
+def mark_autocomplete_dirty(bucket_ids):
+    """Reload these buckets on the next lookup (listing/category event)."""
+    bucket_ids = [b for b in bucket_ids if b is not None]
+    with _lock:
+        _dirty.update(bucket_ids)
+        if _rebuild_marks is not None:
+            _rebuild_marks.update(bucket_ids)
+
+
+def reset_autocomplete_index():
+    """Drop the index (next lookup rebuilds it from the tables)."""
+    global _built_at
+    thread = _rebuild_thread
+    if thread is not None:
+        thread.join(5)
+    with _lock:
+        _buckets.clear()
+        _words.clear()
+        _word_buckets.clear()
+        _dirty.clear()
+        _built_at = None
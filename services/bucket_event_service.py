@@ -0,0 +1,207 @@
+"""
+Bucket Event Service
+
+Cross-worker change feed for the per-process bucket caches (order books,
+/buy tiles and the page cache built on them).  Every process keeps those
+caches in memory and invalidates them locally when it handles a change; the
+bucket_events table (migration 036) carries the same invalidations to the
+other workers:
+
+  - writers append one row per changed bucket (record_bucket_events in the
+    caller's transaction, or publish_bucket_events on its own connection
+    after the caller committed); bucket_id NULL means every bucket (spot
+    ticks, site-wide changes)
+  - sync_bucket_events() runs at most every BUCKET_EVENT_CHECK_INTERVAL and
+    hands the buckets changed by other processes to the subscribed caches,
+    so a foreign change is seen within that interval and only the named
+    buckets are dropped
+  - rows are re-read for BUCKET_EVENT_OVERLAP after they were written, since
+    Postgres transactions can commit ids out of order; ids already applied
+    (or written by this process) are skipped
+  - rows older than BUCKET_EVENT_RETENTION are pruned on spot ticks; a
+    process that has not synced for that long drops everything instead
+
+Usage:
+    from services.bucket_event_service import subscribe, sync_bucket_events
+
+    subscribe(lambda bucket_ids, everything: ...)
+    sync_bucket_events()      # on the read path, before serving cached data
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import database as _db_module
+
+logger = logging.getLogger(__name__)
+
+BUCKET_EVENT_CHECK_INTERVAL = timedelta(seconds=2)
+BUCKET_EVENT_OVERLAP = timedelta(seconds=30)
+BUCKET_EVENT_RETENTION = timedelta(days=1)
+
+# Module-level state — one feed position per process
+_lock = threading.Lock()
+_subscribers = []
+_last_id = None        # highest bucket_events.id seen; None before the first sync
+_seen = {}             # id -> created_at of rows inside the overlap window
+_own = {}             # id -> datetime of rows written by this process (already applied locally)
+_checked_at = None
+
+
+def create_bucket_events_table(conn):
+    """Create bucket_events if missing (migration 036; caller commits)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bucket_events (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            bucket_id  INTEGER,
+            created_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bucket_events_created ON bucket_events (created_at)')
+
+
+def subscribe(callback):
+    """
+    Register a cache for foreign bucket changes.
+
+    callback(bucket_ids, everything) is called from sync_bucket_events() with
+    the set of changed bucket ids, and everything=True when all buckets
+    changed (then bucket_ids may be empty).
+    """
+    with _lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def record_bucket_events(conn, bucket_ids):
+    """Append one event per bucket (None = every bucket) in the caller's transaction."""
+    now = datetime.now()
+    ids = []
+    for bucket_id in bucket_ids:
+        cursor = conn.execute('INSERT INTO bucket_events (bucket_id, created_at) VALUES (?, ?)',
+                              (bucket_id, now.isoformat()))
+        ids.append(cursor.lastrowid)
+    with _lock:
+        _own.update((i, now) for i in ids if i is not None)
+        # A process that never syncs (the scheduler) would otherwise keep every id
+        for event_id in [i for i, at in _own.items() if now - at > BUCKET_EVENT_RETENTION]:
+            del _own[event_id]
+
+
+def publish_bucket_events(bucket_ids):
+    """record_bucket_events on its own connection, after the caller committed; never raises."""
+    bucket_ids = list(bucket_ids)
+    if not bucket_ids:
+        return
+    try:
+        conn = _db_module.get_db_connection()
+        try:
+            record_bucket_events(conn, bucket_ids)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[bucket_events] Publishing %s failed: %s", bucket_ids, e)
+
+
+def publish_category_events(category_ids):
+    """publish_bucket_events for the buckets of these categories (bid rows only know their category)."""
+    category_ids = list(category_ids)
+    if not category_ids:
+        return
+    try:
+        conn = _db_module.get_db_connection()
+        try:
+            bucket_ids = set()
+            for category_id in category_ids:
+                row = conn.execute('SELECT bucket_id FROM categories WHERE id = ?', (category_id,)).fetchone()
+                if row and row['bucket_id'] is not None:
+                    bucket_ids.add(row['bucket_id'])
+            record_bucket_events(conn, sorted(bucket_ids))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[bucket_events] Publishing categories %s failed: %s", category_ids, e)
+
+
+def prune_bucket_events(conn, now=None):
+    """Delete events older than BUCKET_EVENT_RETENTION (caller commits)."""
+    cutoff = ((now or datetime.now()) - BUCKET_EVENT_RETENTION).isoformat()
+    conn.execute('DELETE FROM bucket_events WHERE created_at < ?', (cutoff,))
+
+
+def sync_bucket_events(now=None):
+    """
+    Apply other processes' bucket events to the subscribed caches.
+
+    Runs SQL at most every BUCKET_EVENT_CHECK_INTERVAL; never raises.
+    """
+    global _last_id, _checked_at
+
+    now = now or datetime.now()
+    with _lock:
+        if _checked_at is not None and now - _checked_at < BUCKET_EVENT_CHECK_INTERVAL:
+            return
+        previous_check = _checked_at
+        _checked_at = now
+        last_id = _last_id
+
+    since = now - BUCKET_EVENT_OVERLAP
+    try:
+        conn = _db_module.get_db_connection()
+        try:
+            start_id = None
+            if last_id is None:
+                # Caches start empty: everything written so far only moves the position
+                row = conn.execute('SELECT MAX(id) AS max_id FROM bucket_events').fetchone()
+                last_id = start_id = row['max_id'] or 0
+            rows = conn.execute('''
+                SELECT id, bucket_id, created_at FROM bucket_events
+                WHERE id > ? OR created_at >= ?
+            ''', (last_id, since.isoformat())).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[bucket_events] Sync failed: %s", e)
+        return
+
+    changed = set()
+    everything = previous_check is not None and now - previous_check > BUCKET_EVENT_RETENTION
+    with _lock:
+        for row in rows:
+            event_id = row['id']
+            last_id = max(last_id, event_id)
+            if event_id in _seen:
+                continue
+            _seen[event_id] = row['created_at']
+            if start_id is not None and event_id <= start_id:
+                continue
+            if _own.pop(event_id, None) is not None:
+                continue
+            if row['bucket_id'] is None:
+                everything = True
+            else:
+                changed.add(row['bucket_id'])
+        cutoff = since.isoformat()
+        for event_id in [i for i, created_at in _seen.items() if str(created_at) < cutoff]:
+            del _seen[event_id]
+        _last_id = last_id
+        subscribers = list(_subscribers)
+
+    if changed or everything:
+        for callback in subscribers:
+            try:
+                callback(changed, everything)
+            except Exception as e:
+                logger.warning("[bucket_events] Subscriber %s failed: %s", callback, e)
+
+
+def reset_bucket_events():
+    """Forget the feed position (next sync starts from the newest event)."""
+    global _last_id, _checked_at
+    with _lock:
+        _last_id = _checked_at = None
+        _seen.clear()
+        _own.clear()
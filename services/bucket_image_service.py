@@ -34,7 +34,8 @@ import logging
 import os
 import re
 import secrets
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 log = logging.getLogger(__name__)
@@ -475,6 +476,7 @@ def create_standard_bucket(data: Dict[str, Any], conn=None) -> int:
         )
         row_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
         conn.commit()
+        invalidate_cover_cache()
         return row_id
     finally:
         if close:
@@ -504,6 +506,8 @@ def update_standard_bucket(bucket_id: int, data: Dict[str, Any], conn=None):
         values = list(updates.values()) + [bucket_id]
         conn.execute(f"UPDATE standard_buckets SET {set_clause} WHERE id = ?", values)
         conn.commit()
+        if 'category_bucket_id' in updates or 'active' in updates:
+            invalidate_cover_cache()
     finally:
         if close:
             conn.close()
@@ -822,6 +826,8 @@ def ingest_from_url(
                     images_found=1, images_ingested=ingested,
                     images_skipped_duplicate=skipped)
         conn.commit()
+        if result.get('status') == 'active':
+            invalidate_cover_cache()
         return result
 
     except Exception as exc:
@@ -867,6 +873,8 @@ def ingest_from_upload(
                     images_found=1, images_ingested=ingested,
                     images_skipped_duplicate=skipped)
         conn.commit()
+        if result.get('status') == 'active':
+            invalidate_cover_cache()
         return result
     except Exception as exc:
         try:
@@ -928,6 +936,7 @@ def activate_asset(asset_id: int, admin_user_id: Optional[int] = None) -> Dict:
             (now, admin_user_id, asset_id),
         )
         conn.commit()
+        invalidate_cover_cache()
         return _get_asset(asset_id, conn)
     finally:
         conn.close()
@@ -964,6 +973,8 @@ def reject_asset(asset_id: int, admin_user_id: Optional[int] = None) -> Dict:
             (now, admin_user_id, asset_id),
         )
         conn.commit()
+        if asset['status'] == 'active':
+            invalidate_cover_cache()
         return _get_asset(asset_id, conn)
     finally:
         conn.close()
@@ -993,6 +1004,8 @@ def delete_asset(asset_id: int) -> bool:
 
         conn.execute("DELETE FROM bucket_image_assets WHERE id = ?", (asset_id,))
         conn.commit()
+        if asset['status'] == 'active':
+            invalidate_cover_cache()
         return True
     finally:
         conn.close()
@@ -1056,6 +1069,103 @@ def get_active_image_url_by_category_bucket_id(
             conn.close()
 
 
+def get_active_image_urls_by_category_bucket_ids(
+    category_bucket_ids: Optional[List[int]] = None,
+    conn=None,
+) -> Dict[int, str]:
+    """
+    Bulk form of get_active_image_url_by_category_bucket_id: one query for
+    the given categories.bucket_id values, or for the whole catalogue when
+    category_bucket_ids is None.
+
+    Returns {category_bucket_id: web_path}; buckets without an active cover
+    are omitted.
+    """
+    if category_bucket_ids is not None and not category_bucket_ids:
+        return {}
+    close = conn is None
+    if conn is None:
+        conn = _get_conn()
+    try:
+        bucket_sql, params = '', ()
+        if category_bucket_ids is not None:
+            ids = sorted({int(b) for b in category_bucket_ids})
+            bucket_sql = f" AND sb.category_bucket_id IN ({','.join('?' * len(ids))})"
+            params = tuple(ids)
+        rows = conn.execute(
+            f"""SELECT sb.category_bucket_id, bia.web_path
+                FROM standard_buckets sb
+                LEFT JOIN bucket_image_assets bia
+                       ON bia.standard_bucket_id = sb.id AND bia.status = 'active'
+                WHERE sb.active = 1 AND sb.category_bucket_id IS NOT NULL{bucket_sql}
+                ORDER BY sb.category_bucket_id, sb.id, bia.id DESC""",
+            params,
+        ).fetchall()
+
+        # First standard bucket per category bucket, newest active asset —
+        # same pick as the single-bucket resolver
+        urls: Dict[int, str] = {}
+        seen = set()
+        for row in rows:
+            category_bucket_id = row['category_bucket_id']
+            if category_bucket_id in seen:
+                continue
+            seen.add(category_bucket_id)
+            if row['web_path']:
+                urls[category_bucket_id] = row['web_path']
+        return urls
+    finally:
+        if close:
+            conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Cover URL cache
+# ---------------------------------------------------------------------------
+# bucket_cover_url() runs once per rendered tile.  The whole catalogue is
+# resolved in one query and kept in-process; asset and standard-bucket
+# changes above invalidate it, COVER_CACHE_MAX_AGE bounds how long another
+# worker's change can go unseen.
+
+COVER_CACHE_MAX_AGE = timedelta(minutes=5)
+
+_cover_lock = threading.Lock()
+_cover_urls: Optional[Dict[int, str]] = None
+_cover_loaded_at: Optional[datetime] = None
+_cover_generation = 0
+
+
+def get_cached_cover_path(category_bucket_id: int) -> Optional[str]:
+    """
+    Cached get_active_image_url_by_category_bucket_id: web_path relative to
+    static/, or None.  Loads the whole catalogue on a miss.
+    """
+    global _cover_urls, _cover_loaded_at
+
+    now = datetime.now()
+    with _cover_lock:
+        if _cover_urls is not None and now - _cover_loaded_at < COVER_CACHE_MAX_AGE:
+            return _cover_urls.get(category_bucket_id)
+        generation = _cover_generation
+
+    urls = get_active_image_urls_by_category_bucket_ids()
+
+    with _cover_lock:
+        # An invalidation during the load means the result may be stale: serve
+        # it once but do not keep it
+        if generation == _cover_generation:
+            _cover_urls, _cover_loaded_at = urls, now
+    return urls.get(category_bucket_id)
+
+
+def invalidate_cover_cache():
+    """Drop cached cover URLs (call after an active image changes)."""
+    global _cover_urls, _cover_generation
+    with _cover_lock:
+        _cover_urls = None
+        _cover_generation += 1
+
+
 # ---------------------------------------------------------------------------
 # Bulk / convenience operations
 # ---------------------------------------------------------------------------
@@ -1107,6 +1217,7 @@ def auto_activate_best_candidate(
             (now, admin_user_id, asset_id),
         )
         conn.commit()
+        invalidate_cover_cache()
         return _get_asset(asset_id, conn)
     finally:
         conn.close()
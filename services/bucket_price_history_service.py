@@ -4,17 +4,31 @@ Tracks and manages historical best ask prices for each bucket (item type)
 
 This service:
 1. Records price changes whenever the best ask price for a bucket changes
-2. Provides historical data for charting with appropriate aggregation
+   (listing events call update_bucket_price; spot ticks call
+   record_spot_driven_prices for all spot-priced buckets in one batch)
+2. Provides historical data for charting, aggregated per hour/day/week in SQL
 3. Cleans up old data (>1 year)
 4. Does NOT backfill historical prices - only tracks forward from when listings exist
 """
 
-from database import get_db_connection
+import logging
+from database import get_db_connection, IS_POSTGRES
 from datetime import datetime, timedelta
 from services.pricing_service import get_effective_price
+from services.chart_downsampling import downsample_step_series
+from services.bucket_event_service import record_bucket_events
+from services.order_book_service import invalidate_bucket_depth
+from services.bucket_tile_service import mark_bucket_dirty
+from services.search_index_service import reindex_bucket
+from services.reference_price_service import (
+    get_current_spots_from_snapshots,
+    refresh_reference_series,
+)
 
+logger = logging.getLogger(__name__)
 
-def get_current_best_ask(bucket_id, exclude_user_id=None, packaging_styles=None):
+
+def get_current_best_ask(bucket_id, exclude_user_id=None, packaging_styles=None, conn=None):
     """
     Calculate the current best ask price for a bucket
 
@@ -25,15 +39,24 @@ def get_current_best_ask(bucket_id, exclude_user_id=None, packaging_styles=None)
     For standard pooled buckets:
     - Price = lowest effective price among all listings
 
+    Spot-priced listings are priced off the latest spot_price_snapshots rows,
+    the same spot map record_spot_driven_prices() records with.
+
     Args:
         bucket_id: The bucket ID to check
         exclude_user_id: Optional user ID to exclude from listings (for "don't show my own" logic)
         packaging_styles: Optional list of packaging types to filter by
+        conn: Optional open connection (default: a new one, closed on return)
 
     Returns:
         The calculated price, or None if no listings exist
     """
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_db_connection()
+        try:
+            return get_current_best_ask(bucket_id, exclude_user_id, packaging_styles, conn)
+        finally:
+            conn.close()
 
     # Check if this bucket is isolated
     is_isolated_check = conn.execute("""
@@ -73,14 +96,20 @@ def get_current_best_ask(bucket_id, exclude_user_id=None, packaging_styles=None)
     listings = conn.execute(query, params).fetchall()
 
     if not listings:
-        conn.close()
         return None
 
+    # One spot lookup for the whole bucket rather than one per variable listing.
+    # Same source as record_spot_driven_prices (the latest snapshots), so the
+    # current price and the recorded chart points agree.
+    spot_prices = None
+    if any(listing['pricing_mode'] == 'premium_to_spot' for listing in listings):
+        spot_prices = get_current_spots_from_snapshots(conn)
+
     # Calculate effective price for each listing and find minimum
     min_price = None
     for listing in listings:
         listing_dict = dict(listing)
-        effective_price = get_effective_price(listing_dict)
+        effective_price = get_effective_price(listing_dict, spot_prices)
 
         if min_price is None or effective_price < min_price:
             min_price = effective_price
@@ -101,11 +130,10 @@ def get_current_best_ask(bucket_id, exclude_user_id=None, packaging_styles=None)
             # Midpoint calculation: (listing_price + highest_bid) / 2
             min_price = (min_price + highest_bid) / 2
 
-    conn.close()
     return min_price
 
 
-def record_price_change(bucket_id, new_price):
+def record_price_change(bucket_id, new_price, conn=None):
     """
     Record a new price point for a bucket
 
@@ -115,6 +143,8 @@ def record_price_change(bucket_id, new_price):
     Args:
         bucket_id: The bucket ID
         new_price: The new best ask price
+        conn: Optional open connection; the caller commits (default: a new
+              connection, committed and closed here)
 
     Returns:
         True if a new record was created, False if price unchanged
@@ -122,7 +152,14 @@ def record_price_change(bucket_id, new_price):
     if new_price is None:
         return False
 
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_db_connection()
+        try:
+            recorded = record_price_change(bucket_id, new_price, conn)
+            conn.commit()
+            return recorded
+        finally:
+            conn.close()
 
     # Get the most recent price for this bucket
     last_record = conn.execute("""
@@ -138,7 +175,6 @@ def record_price_change(bucket_id, new_price):
         last_price = last_record['best_ask_price']
         # Use a small tolerance for floating point comparison
         if abs(last_price - new_price) < 0.01:
-            conn.close()
             return False
 
     # Record the new price
@@ -147,9 +183,6 @@ def record_price_change(bucket_id, new_price):
         VALUES (?, ?, ?)
     """, (bucket_id, new_price, datetime.now()))
 
-    conn.commit()
-    conn.close()
-
     return True
 
 
@@ -167,145 +200,271 @@ def update_bucket_price(bucket_id, exclude_user_id=None):
     Returns:
         The current best ask price, or None if no listings
     """
-    current_price = get_current_best_ask(bucket_id, exclude_user_id)
+    conn = get_db_connection()
+    try:
+        current_price = get_current_best_ask(bucket_id, exclude_user_id, conn=conn)
+
+        if current_price is not None:
+            record_price_change(bucket_id, current_price, conn)
+            conn.commit()
+
+        # The bucket event carries the change to the other workers' order
+        # books and /buy tiles; written on this connection, not a new one
+        try:
+            record_bucket_events(conn, [bucket_id])
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.warning("[bucket_price] Bucket event for %s failed: %s", bucket_id, e)
+    finally:
+        conn.close()
 
-    if current_price is not None:
-        record_price_change(bucket_id, current_price)
+    # Append the listing event to the persisted reference series
+    refresh_reference_series(bucket_id)
+
+    # Drop this worker's cached order book and /buy tiles so the next read sees the change
+    invalidate_bucket_depth(bucket_id, publish=False)
+    mark_bucket_dirty(bucket_id)
+
+    # Listing titles are part of the bucket's search document
+    reindex_bucket(bucket_id)
 
     return current_price
 
 
-def get_bucket_price_history(bucket_id, days=30):
+def record_spot_driven_prices():
     """
-    Get historical price data for a bucket WITHOUT aggregation
+    Record best-ask changes for every bucket holding spot-priced listings
 
-    Returns ALL price changes within the specified time range to preserve
-    the complete step-like history of how the best ask price has changed.
+    Called after each spot snapshot tick (scheduler and manual admin snapshot),
+    so chart reads never have to write.  All affected buckets are priced in
+    one batch on one connection:
+    - one spot map from the latest snapshots (never calls an external API)
+    - one query for the active listings of every bucket with a
+      premium_to_spot listing, one for isolated-bucket top bids and one for
+      the last recorded price of all those buckets
+    - changed prices inserted together in a single commit
 
-    This ensures that when viewing price history, users see every price change:
-    - If price went $140 → $139 → $138, all 3 points are returned
-    - No aggregation or bucketing by time period
-    - Chronological order from oldest to newest
-
-    Args:
-        bucket_id: The bucket ID
-        days: Number of days of history to return
+    Uses the same rules as get_current_best_ask() and record_price_change():
+    lowest effective price, isolated-bucket midpoint with the top bid, and a
+    0.01 tolerance against the last recorded price.
 
     Returns:
-        List of dicts with 'timestamp' and 'price' keys, ordered chronologically
+        Number of buckets for which a new price point was recorded
     """
     conn = get_db_connection()
+    try:
+        spot_prices = get_current_spots_from_snapshots(conn)
+
+        listings = conn.execute("""
+            SELECT
+                c.bucket_id, c.is_isolated,
+                l.price_per_coin, l.pricing_mode,
+                l.spot_premium, l.floor_price, l.pricing_metal,
+                c.metal, c.weight, c.product_type
+            FROM listings l
+            JOIN categories c ON l.category_id = c.id
+            WHERE l.active = 1
+              AND l.quantity > 0
+              AND c.bucket_id IN (
+                  SELECT c2.bucket_id
+                  FROM listings l2
+                  JOIN categories c2 ON l2.category_id = c2.id
+                  WHERE l2.active = 1
+                    AND l2.quantity > 0
+                    AND l2.pricing_mode = 'premium_to_spot'
+              )
+        """).fetchall()
+
+        if not listings:
+            return 0
+
+        best_asks = {}
+        isolated = set()
+        for listing in listings:
+            listing_dict = dict(listing)
+            bucket_id = listing_dict['bucket_id']
+            effective_price = get_effective_price(listing_dict, spot_prices)
+            if bucket_id not in best_asks or effective_price < best_asks[bucket_id]:
+                best_asks[bucket_id] = effective_price
+            if listing_dict['is_isolated']:
+                isolated.add(bucket_id)
+
+        placeholders = ','.join('?' * len(best_asks))
+        bucket_ids = list(best_asks)
+
+        # ISOLATED BUCKET MIDPOINT LOGIC (see get_current_best_ask)
+        if isolated:
+            iso_placeholders = ','.join('?' * len(isolated))
+            for row in conn.execute(f"""
+                SELECT c.bucket_id, MAX(b.price_per_coin) AS highest_bid
+                FROM bids b
+                JOIN categories c ON b.category_id = c.id
+                WHERE c.bucket_id IN ({iso_placeholders})
+                  AND b.active = 1
+                GROUP BY c.bucket_id
+            """, list(isolated)).fetchall():
+                if row['highest_bid'] is not None:
+                    best_asks[row['bucket_id']] = (best_asks[row['bucket_id']] + row['highest_bid']) / 2
+
+        last_prices = {
+            row['bucket_id']: row['best_ask_price']
+            for row in conn.execute(f"""
+                SELECT h.bucket_id, h.best_ask_price
+                FROM bucket_price_history h
+                WHERE h.bucket_id IN ({placeholders})
+                  AND h.id = (
+                      SELECT h2.id FROM bucket_price_history h2
+                      WHERE h2.bucket_id = h.bucket_id
+                      ORDER BY h2.timestamp DESC, h2.id DESC
+                      LIMIT 1
+                  )
+            """, bucket_ids).fetchall()
+        }
 
-    start_date = datetime.now() - timedelta(days=days)
-
-    # Get all price history within the range
-    raw_history = conn.execute("""
-        SELECT timestamp, best_ask_price
-        FROM bucket_price_history
-        WHERE bucket_id = ?
-          AND timestamp >= ?
-        ORDER BY timestamp ASC
-    """, (bucket_id, start_date)).fetchall()
-
-    conn.close()
+        now = datetime.now()
+        changed = [
+            (bucket_id, price, now)
+            for bucket_id, price in best_asks.items()
+            if bucket_id not in last_prices or abs(last_prices[bucket_id] - price) >= 0.01
+        ]
+        if changed:
+            conn.cursor().executemany("""
+                INSERT INTO bucket_price_history (bucket_id, best_ask_price, timestamp)
+                VALUES (?, ?, ?)
+            """, changed)
+            conn.commit()
+
+        return len(changed)
+    finally:
+        conn.close()
 
-    if not raw_history:
-        return []
 
-    # Return ALL price changes without aggregation
-    # This ensures we preserve every price point for step-like history visualization
-    # (No aggregation means if price went $140 → $139 → $138, all 3 points show)
-    history = []
-    for record in raw_history:
-        history.append({
-            'timestamp': record['timestamp'],
-            'price': record['best_ask_price']
-        })
+# Period truncation for SQL-side aggregation (last price in each period)
+HISTORY_GRANULARITIES = ('hour', 'day', 'week')
 
-    return history
 
+def _period_start_sql(granularity):
+    """
+    SQL expression truncating bucket_price_history.timestamp to the start of
+    its hour / day / week (weeks start on Monday), as an ISO-8601 T-format string.
 
-def _aggregate_by_hours(raw_history, hours=1):
+    PostgreSQL: TO_CHAR(date_trunc(...), 'YYYY-MM-DD"T"HH24:MI:SS')
+    SQLite:     strftime(...) — 'weekday 0', '-6 days' lands on the week's Monday
     """
-    Aggregate price history into hourly buckets
-    Takes the last price in each hour bucket
+    if granularity not in HISTORY_GRANULARITIES:
+        raise ValueError(f"Unknown price history granularity: {granularity!r}")
+    if IS_POSTGRES:
+        return f"TO_CHAR(date_trunc('{granularity}', timestamp), 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+    if granularity == 'hour':
+        return "strftime('%Y-%m-%dT%H:00:00', timestamp)"
+    if granularity == 'day':
+        return "strftime('%Y-%m-%dT00:00:00', timestamp)"
+    return "strftime('%Y-%m-%dT00:00:00', timestamp, 'weekday 0', '-6 days')"
+
+
+def get_buckets_price_history(bucket_ids, days=30, granularity=None, max_points=None):
     """
-    if not raw_history:
-        return []
+    Get one merged, chronological price series for one or more buckets
 
-    buckets = {}
+    All buckets are read with a single IN query (Random Year mode passes every
+    sibling bucket), so the result is already merged and sorted by the DB.
 
-    for record in raw_history:
-        timestamp = datetime.fromisoformat(record['timestamp'])
-        # Round down to the hour
-        bucket_time = timestamp.replace(minute=0, second=0, microsecond=0)
-        bucket_key = bucket_time.isoformat()
-
-        # Keep the last (most recent) price in each bucket
-        buckets[bucket_key] = {
-            'timestamp': bucket_key,
-            'price': record['best_ask_price']
-        }
-
-    # Sort by timestamp
-    result = sorted(buckets.values(), key=lambda x: x['timestamp'])
-    return result
+    With a granularity, bucketing happens in SQL: each hour / day / week
+    becomes one point carrying the last price recorded in that period (across
+    all the given buckets), stamped with the time of that change so step
+    edges stay where the price moved.  Without one, every recorded price
+    change is returned.
 
+    Args:
+        bucket_ids: Iterable of bucket IDs
+        days: Number of days of history to return
+        granularity: None, 'hour', 'day' or 'week'
+        max_points: Optional target point count, applied while streaming
+                    the rows (services/chart_downsampling.py)
 
-def _aggregate_by_days(raw_history, days=1):
-    """
-    Aggregate price history into daily buckets
-    Takes the last price in each day
+    Returns:
+        List of dicts with 'timestamp' and 'price' keys, ordered chronologically
     """
-    if not raw_history:
+    bucket_ids = list(bucket_ids)
+    if not bucket_ids:
         return []
 
-    buckets = {}
-
-    for record in raw_history:
-        timestamp = datetime.fromisoformat(record['timestamp'])
-        # Round down to the start of day
-        bucket_time = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
-        bucket_key = bucket_time.isoformat()
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    placeholders = ','.join('?' * len(bucket_ids))
+    params = (*bucket_ids, start_date)
+
+    if granularity is None:
+        query = f"""
+            SELECT timestamp, best_ask_price
+            FROM bucket_price_history
+            WHERE bucket_id IN ({placeholders})
+              AND timestamp >= ?
+            ORDER BY timestamp ASC
+        """
+    elif IS_POSTGRES:
+        # ORDER BY names resolve to output columns first, and the output
+        # column `timestamp` is the period: order by changed_at instead
+        query = f"""
+            SELECT DISTINCT ON (period)
+                   TO_CHAR(changed_at, 'YYYY-MM-DD"T"HH24:MI:SS') AS timestamp, best_ask_price
+            FROM (
+                SELECT {_period_start_sql(granularity)} AS period, best_ask_price,
+                       timestamp AS changed_at, id
+                FROM bucket_price_history
+                WHERE bucket_id IN ({placeholders})
+                  AND timestamp >= ?
+            ) periods
+            ORDER BY period ASC, changed_at DESC, id DESC
+        """
+    else:
+        # SQLite returns the bare best_ask_price from the row holding MAX(timestamp)
+        query = f"""
+            SELECT strftime('%Y-%m-%dT%H:%M:%S', MAX(timestamp)) AS timestamp, best_ask_price
+            FROM bucket_price_history
+            WHERE bucket_id IN ({placeholders})
+              AND timestamp >= ?
+            GROUP BY {_period_start_sql(granularity)}
+            ORDER BY 1 ASC
+        """
 
-        # Keep the last (most recent) price in each bucket
-        buckets[bucket_key] = {
-            'timestamp': bucket_key,
-            'price': record['best_ask_price']
-        }
-
-    # Sort by timestamp
-    result = sorted(buckets.values(), key=lambda x: x['timestamp'])
-    return result
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(query, params)
+        return [
+            {'timestamp': record['timestamp'], 'price': record['best_ask_price']}
+            for record in downsample_step_series(rows, start_date, end_date, max_points,
+                                                 t_key='timestamp', price_key='best_ask_price')
+        ]
+    finally:
+        conn.close()
 
 
-def _aggregate_by_weeks(raw_history):
+def get_bucket_price_history(bucket_id, days=30, max_points=None, granularity=None):
     """
-    Aggregate price history into weekly buckets
-    Takes the last price in each week
-    """
-    if not raw_history:
-        return []
+    Get historical price data for a single bucket
 
-    buckets = {}
+    By default returns ALL price changes within the specified time range to
+    preserve the complete step-like history of how the best ask price has changed:
+    - If price went $140 → $139 → $138, all 3 points are returned
+    - Chronological order from oldest to newest
 
-    for record in raw_history:
-        timestamp = datetime.fromisoformat(record['timestamp'])
-        # Get the start of the week (Monday)
-        days_since_monday = timestamp.weekday()
-        week_start = timestamp - timedelta(days=days_since_monday)
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        bucket_key = week_start.isoformat()
+    Pass granularity ('hour', 'day', 'week') for last-price-per-period points
+    aggregated in SQL, and/or max_points to cap the series for charting.
+    See get_buckets_price_history().
 
-        # Keep the last (most recent) price in each bucket
-        buckets[bucket_key] = {
-            'timestamp': bucket_key,
-            'price': record['best_ask_price']
-        }
+    Args:
+        bucket_id: The bucket ID
+        days: Number of days of history to return
+        max_points: Optional target point count (None = every point)
+        granularity: Optional aggregation period
 
-    # Sort by timestamp
-    result = sorted(buckets.values(), key=lambda x: x['timestamp'])
-    return result
+    Returns:
+        List of dicts with 'timestamp' and 'price' keys, ordered chronologically
+    """
+    return get_buckets_price_history([bucket_id], days, granularity=granularity,
+                                     max_points=max_points)
 
 
 def cleanup_old_price_history(days=365):
@@ -0,0 +1,179 @@
+"""
+Bucket Snapshot Service
+
+User-independent data behind the bucket page (/bucket/<id>), built with a
+handful of set-based queries and cached per bucket:
+
+  - the bucket's category rows and the buckets sharing its specs (Random Year)
+  - active listings with their effective price and seller fields (username,
+    Metex Guaranteed flag, rating from user_stats), priced once against the
+    latest spot snapshot
+  - active bids with buyer name and effective price, best first
+  - for isolated buckets, the listing's photos and set items with their photos
+
+The per-user parts (own bids, own listings left out of the listing table) are
+filtered from the snapshot per request by the view.
+
+A snapshot is reused while the bucket's order book version is unchanged
+(services/order_book_service.get_bucket_version): listing events, bid events
+and spot ticks invalidate both.  Changes that do not notify (ratings,
+checkout fills) are picked up after SNAPSHOT_MAX_AGE.
+
+Each worker keeps its own snapshots; the order book version also moves on
+events from other workers (services/bucket_event_service.py), so a change made
+on one worker drops the snapshot on all of them.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import database as _db_module
+from services.order_book_service import get_bucket_version
+from services.pricing_service import get_effective_bid_price, get_effective_price
+from services.reference_price_service import get_current_spots_from_snapshots
+from utils.category_manager import get_sibling_bucket_ids
+
+SNAPSHOT_MAX_AGE = timedelta(seconds=30)
+
+# Module-level state — one set of snapshots per process
+_lock = threading.Lock()
+_snapshots = {}     # bucket_id -> snapshot dict (see _build_snapshot)
+
+
+def _build_snapshot(conn, bucket_id, now):
+    categories = [dict(row) for row in conn.execute(
+        'SELECT * FROM categories WHERE bucket_id = ? ORDER BY id', (bucket_id,)
+    ).fetchall()]
+    if not categories:
+        return None
+
+    spot_prices = get_current_spots_from_snapshots(conn)
+
+    listings = []
+    for row in conn.execute('''
+        SELECT l.*, c.metal, c.weight, c.product_type, c.year,
+               u.id AS seller_user_id,
+               u.username AS seller_username,
+               COALESCE(u.is_metex_guaranteed, 0) AS seller_is_metex_guaranteed,
+               us.rating_avg AS seller_rating,
+               COALESCE(us.rating_count, 0) AS seller_rating_count
+        FROM listings l
+        JOIN categories c ON l.category_id = c.id
+        LEFT JOIN users u ON u.id = l.seller_id
+        LEFT JOIN user_stats us ON us.user_id = l.seller_id
+        WHERE c.bucket_id = ? AND l.active = 1
+        ORDER BY l.id
+    ''', (bucket_id,)).fetchall():
+        listing = dict(row)
+        listing['effective_price'] = get_effective_price(listing, spot_prices)
+        listings.append(listing)
+
+    bids = []
+    for row in conn.execute('''
+        SELECT bids.id, bids.buyer_id, bids.category_id, bids.quantity_requested,
+               bids.remaining_quantity, bids.price_per_coin, bids.delivery_address,
+               bids.status, bids.created_at, bids.active, bids.requires_grading,
+               bids.preferred_grader, bids.pricing_mode, bids.spot_premium,
+               bids.ceiling_price, bids.pricing_metal,
+               users.username AS buyer_name,
+               c.metal, c.weight, c.product_type
+        FROM bids
+        JOIN users ON bids.buyer_id = users.id
+        JOIN categories c ON bids.category_id = c.id
+        WHERE c.bucket_id = ? AND bids.active = 1
+        ORDER BY bids.price_per_coin DESC, bids.id
+    ''', (bucket_id,)).fetchall():
+        bid = dict(row)
+        bid['effective_price'] = get_effective_bid_price(bid, spot_prices)
+        bids.append(bid)
+
+    isolated = None
+    if any(category.get('is_isolated') for category in categories) and listings:
+        isolated = _load_isolated(conn, listings[0])
+
+    return {
+        'bucket_id': bucket_id,
+        'categories': categories,
+        'sibling_bucket_ids': get_sibling_bucket_ids(conn, categories[0]),
+        'spot_prices': spot_prices,
+        'listings': listings,
+        'bids': bids,
+        'isolated': isolated,
+        'built_at': now,
+    }
+
+
+def _load_isolated(conn, listing):
+    """Photos and set items of the listing an isolated bucket is shown from."""
+    photo_urls = [f"/static/{row['file_path']}" for row in conn.execute(
+        'SELECT file_path FROM listing_photos WHERE listing_id = ? ORDER BY id ASC',
+        (listing['id'],)
+    ).fetchall()]
+
+    set_items = []
+    if listing.get('isolated_type') == 'set':
+        set_items = [dict(row) for row in conn.execute('''
+            SELECT *
+            FROM listing_set_items
+            WHERE listing_id = ?
+            ORDER BY position_index
+        ''', (listing['id'],)).fetchall()]
+
+        # Photos for every set item of the listing in one query
+        item_photos = {}
+        for row in conn.execute('''
+            SELECT sip.set_item_id, sip.file_path
+            FROM listing_set_item_photos sip
+            JOIN listing_set_items si ON sip.set_item_id = si.id
+            WHERE si.listing_id = ?
+            ORDER BY sip.set_item_id, sip.position_index
+        ''', (listing['id'],)).fetchall():
+            item_photos.setdefault(row['set_item_id'], []).append(f"/static/{row['file_path']}")
+        for item in set_items:
+            # Up to 3 photos per item
+            item['photo_urls'] = item_photos.get(item['id'], [])[:3]
+
+    return {
+        'listing_id': listing['id'],
+        'photo_urls': photo_urls,
+        'set_items': set_items,
+    }
+
+
+def get_bucket_snapshot(bucket_id, now=None):
+    """
+    Cached user-independent bucket page data.
+
+    Returns:
+        {'bucket_id', 'categories', 'sibling_bucket_ids', 'spot_prices',
+         'listings', 'bids', 'isolated', 'built_at'}, or None if the bucket
+        has no categories.  Shared between requests: callers must not mutate.
+    """
+    now = now or datetime.now()
+    stamp = get_bucket_version(bucket_id)
+    with _lock:
+        snapshot = _snapshots.get(bucket_id)
+        if (snapshot is not None and snapshot['stamp'] == stamp
+                and now - snapshot['built_at'] <= SNAPSHOT_MAX_AGE):
+            return snapshot
+
+    conn = _db_module.get_db_connection()
+    try:
+        snapshot = _build_snapshot(conn, bucket_id, now)
+    finally:
+        conn.close()
+    if snapshot is None:
+        return None
+    snapshot['stamp'] = stamp
+
+    with _lock:
+        # Only cache if no event invalidated the bucket while it was being built
+        if stamp == get_bucket_version(bucket_id):
+            _snapshots[bucket_id] = snapshot
+    return snapshot
+
+
+def reset_bucket_snapshots():
+    """Drop every cached snapshot."""
+    with _lock:
+        _snapshots.clear()
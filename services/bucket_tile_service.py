@@ -0,0 +1,580 @@
+"""
+Bucket Tile Service
+
+Precomputed "bucket tile" model behind the /buy page.  For every bucket it
+holds the category rows (standard and isolated), the active listings with
+their pricing fields, the newest active listing id, the tile photo and the
+order count; the spot-dependent lowest price and availability are aggregated
+once per listing filter (all / graded / graded by grader) and reused until
+the bucket or the spot price changes.
+
+The model lives in process and is kept current incrementally:
+  - listing events mark their bucket dirty (update_bucket_price calls
+    mark_bucket_dirty); only dirty buckets are reloaded on the next read
+  - at most every TILE_CHECK_INTERVAL a single query reads two
+    watermarks: new order_items rows update popularity and reload the
+    affected buckets (quantities changed), and a new spot snapshot reprices
+    the buckets holding spot-priced listings
+  - listing events on other workers arrive through bucket_event_service
+    (update_bucket_price records them) and mark just their buckets dirty;
+    "every bucket" events are ignored here, since the spot watermark
+    already covers spot ticks
+  - the whole model is rebuilt after TILE_MAX_AGE as a safety net (admin
+    category edits and other changes that do not notify)
+
+In steady state an anonymous /buy view therefore runs no SQL at all between
+checks; per-user fields (own listings) are layered on per request.
+
+Each section's sort order (per listing filter, sort and category filter) is
+kept next to the aggregates and dropped with them, so repeated reads do not
+re-sort the catalogue.  browse_bucket_tiles() pages one section for
+/api/buckets/browse and the infinite-scrolling /buy grid by seeking into that
+order: its cursor is the sort key of the last tile served (keyset, not
+offset), so tiles added or repriced between requests do not shift the
+following pages, and only the tiles of the page are built.
+"""
+
+import base64
+import json
+import logging
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import database as _db_module
+from services.bucket_event_service import subscribe, sync_bucket_events
+from services.pricing_service import get_effective_price
+from services.reference_price_service import get_current_spots_from_snapshots
+from services.search_index_service import search_bucket_ids
+
+logger = logging.getLogger(__name__)
+
+TILE_CHECK_INTERVAL = timedelta(seconds=5)
+TILE_MAX_AGE = timedelta(minutes=10)
+
+BROWSE_PAGE_SIZE = 24
+BROWSE_MAX_PAGE_SIZE = 96
+BROWSE_SECTIONS = ('standard', 'one_of_a_kind', 'sets')
+
+_CATEGORY_COLUMNS = '''
+    categories.id AS category_id,
+    categories.bucket_id,
+    categories.metal,
+    categories.product_type,
+    categories.weight,
+    categories.mint,
+    categories.year,
+    categories.finish,
+    categories.grade,
+    categories.coin_series,
+    categories.product_line,
+'''
+
+# Module-level state — one model per process
+_lock = threading.Lock()
+_buckets = {}              # bucket_id -> bucket dict (see _load_buckets)
+_aggregates = {}           # listing filter key -> {bucket_id: aggregate}
+_orders = {}               # (filter, sort, section, metal, product_line) -> (sort keys, entries)
+_popularity = {}           # bucket_id -> order_items count
+_spot_prices = {}          # metal -> latest snapshot price
+_dirty = set()             # bucket ids to reload on the next read
+_last_order_item_id = 0    # order_items.id watermark
+_last_spot_id = 0          # spot_price_snapshots.id watermark
+_built_at = None
+_checked_at = None
+
+
+def listing_filter_key(graded_only=False, any_grader=False, pcgs=False, ngc=False):
+    """
+    Cache key for the listing subset the buy page prices from.
+
+    Returns:
+        'all', 'graded', 'graded:<services>' — or None when graded_only is set
+        without any grader selected (no listing can match)
+    """
+    if not graded_only:
+        return 'all'
+    if any_grader:
+        return 'graded'
+    services = [name for name, selected in (('NGC', ngc), ('PCGS', pcgs)) if selected]
+    return 'graded:' + ','.join(services) if services else None
+
+
+def _listing_matches(listing, filter_key):
+    if filter_key == 'all':
+        return True
+    if listing['graded'] != 1:
+        return False
+    if filter_key == 'graded':
+        return True
+    return listing['grading_service'] in filter_key.split(':', 1)[1].split(',')
+
+
+def _load_buckets(conn, bucket_ids=None):
+    """Category rows, active listings and tile photo per bucket (all or `bucket_ids`)."""
+    bucket_sql, params = '', []
+    if bucket_ids is not None:
+        bucket_sql = f" AND categories.bucket_id IN ({','.join('?' * len(bucket_ids))})"
+        params = list(bucket_ids)
+
+    buckets = {}
+
+    def bucket(bucket_id):
+        return buckets.setdefault(bucket_id, {
+            'standard': [], 'isolated': [], 'listings': [],
+            'newest_id': 0, 'tile_image_url': None, 'has_spot_listings': False,
+        })
+
+    for row in conn.execute(f'''
+        SELECT DISTINCT {_CATEGORY_COLUMNS}
+            categories.platform_fee_type,
+            categories.platform_fee_value
+        FROM categories
+        WHERE categories.bucket_id IS NOT NULL
+          AND categories.is_isolated = 0{bucket_sql}
+        ORDER BY category_id
+    ''', params).fetchall():
+        bucket(row['bucket_id'])['standard'].append(dict(row))
+
+    for row in conn.execute(f'''
+        SELECT DISTINCT {_CATEGORY_COLUMNS}
+            categories.is_isolated,
+            categories.platform_fee_type,
+            categories.platform_fee_value,
+            listings.isolated_type,
+            listings.issue_number,
+            listings.issue_total,
+            listings.name AS listing_title
+        FROM categories
+        LEFT JOIN listings ON categories.id = listings.category_id AND listings.active = 1
+        WHERE categories.bucket_id IS NOT NULL
+          AND categories.is_isolated = 1{bucket_sql}
+        ORDER BY category_id
+    ''', params).fetchall():
+        bucket(row['bucket_id'])['isolated'].append(dict(row))
+
+    for row in conn.execute(f'''
+        SELECT
+            l.id, l.category_id, l.quantity, l.price_per_coin, l.seller_id,
+            l.pricing_mode, l.spot_premium, l.floor_price, l.pricing_metal,
+            l.graded, l.grading_service,
+            categories.metal, categories.weight, categories.product_type, categories.bucket_id
+        FROM listings l
+        JOIN categories ON l.category_id = categories.id
+        WHERE l.active = 1 AND categories.bucket_id IS NOT NULL{bucket_sql}
+        ORDER BY l.id
+    ''', params).fetchall():
+        entry = bucket(row['bucket_id'])
+        entry['newest_id'] = max(entry['newest_id'], row['id'])
+        if row['quantity'] > 0:
+            entry['listings'].append(dict(row))
+            if row['pricing_mode'] == 'premium_to_spot':
+                entry['has_spot_listings'] = True
+
+    # First photo of any active listing, per bucket, in one statement
+    for row in conn.execute(f'''
+        SELECT categories.bucket_id, lp.file_path
+        FROM listing_photos lp
+        JOIN listings l ON lp.listing_id = l.id
+        JOIN categories ON l.category_id = categories.id
+        WHERE lp.id IN (
+            SELECT MIN(lp2.id)
+            FROM listing_photos lp2
+            JOIN listings l2 ON lp2.listing_id = l2.id
+            JOIN categories ON l2.category_id = categories.id
+            WHERE l2.active = 1 AND categories.bucket_id IS NOT NULL{bucket_sql}
+            GROUP BY categories.bucket_id
+        )
+    ''', params).fetchall():
+        bucket(row['bucket_id'])['tile_image_url'] = f"/static/{row['file_path']}"
+
+    return buckets
+
+
+def _read_watermarks(conn):
+    return dict(conn.execute('''
+        SELECT
+            (SELECT MAX(id) FROM order_items) AS max_order_item_id,
+            (SELECT MAX(id) FROM spot_price_snapshots) AS max_spot_id
+    ''').fetchone())
+
+
+def _full_build(conn, now):
+    global _buckets, _popularity, _spot_prices, _last_order_item_id, _last_spot_id
+    global _built_at, _checked_at
+
+    marks = _read_watermarks(conn)
+    _buckets = _load_buckets(conn)
+    _popularity = {
+        row['bucket_id']: row['order_count'] for row in conn.execute('''
+            SELECT c.bucket_id, COUNT(oi.id) AS order_count
+            FROM order_items oi
+            JOIN listings l ON oi.listing_id = l.id
+            JOIN categories c ON l.category_id = c.id
+            WHERE c.bucket_id IS NOT NULL AND oi.id <= ?
+            GROUP BY c.bucket_id
+        ''', (marks['max_order_item_id'] or 0,)).fetchall()
+    }
+    _spot_prices = get_current_spots_from_snapshots(conn)
+    _aggregates.clear()
+    _orders.clear()
+    _dirty.clear()
+    _last_order_item_id = marks['max_order_item_id'] or 0
+    _last_spot_id = marks['max_spot_id'] or 0
+    _built_at = _checked_at = now
+
+
+def _apply_new_orders(conn):
+    """Fold order_items rows above the watermark into popularity; mark their buckets dirty."""
+    global _last_order_item_id
+
+    for row in conn.execute('''
+        SELECT c.bucket_id, COUNT(oi.id) AS order_count, MAX(oi.id) AS max_id
+        FROM order_items oi
+        JOIN listings l ON oi.listing_id = l.id
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id IS NOT NULL AND oi.id > ?
+        GROUP BY c.bucket_id
+    ''', (_last_order_item_id,)).fetchall():
+        _popularity[row['bucket_id']] = _popularity.get(row['bucket_id'], 0) + row['order_count']
+        _dirty.add(row['bucket_id'])
+    _orders.clear()
+
+
+def _drop_aggregates(bucket_ids):
+    _orders.clear()
+    for aggregates in _aggregates.values():
+        for bucket_id in bucket_ids:
+            aggregates.pop(bucket_id, None)
+
+
+def _ensure_current(now):
+    """Bring the model up to date; runs SQL only on build, check or dirty buckets."""
+    global _last_order_item_id, _last_spot_id, _spot_prices, _checked_at
+
+    if _built_at is None or now - _built_at > TILE_MAX_AGE:
+        conn = _db_module.get_db_connection()
+        try:
+            _full_build(conn, now)
+        finally:
+            conn.close()
+        return
+
+    check_due = now - _checked_at >= TILE_CHECK_INTERVAL
+    if not check_due and not _dirty:
+        return
+
+    conn = _db_module.get_db_connection()
+    try:
+        if check_due:
+            marks = _read_watermarks(conn)
+            if (marks['max_order_item_id'] or 0) > _last_order_item_id:
+                _apply_new_orders(conn)
+                _last_order_item_id = marks['max_order_item_id']
+            if (marks['max_spot_id'] or 0) > _last_spot_id:
+                _spot_prices = get_current_spots_from_snapshots(conn)
+                _last_spot_id = marks['max_spot_id']
+                _drop_aggregates([b for b, entry in _buckets.items() if entry['has_spot_listings']])
+            _checked_at = now
+
+        if _dirty:
+            dirty = sorted(_dirty)
+            _dirty.clear()
+            fresh = _load_buckets(conn, dirty)
+            for bucket_id in dirty:
+                if bucket_id in fresh:
+                    _buckets[bucket_id] = fresh[bucket_id]
+                else:
+                    _buckets.pop(bucket_id, None)
+            _drop_aggregates(dirty)
+    finally:
+        conn.close()
+
+
+def _aggregate(entry, filter_key):
+    """Lowest effective price and availability of a bucket's listings under a filter."""
+    agg = None
+    for listing in entry['listings']:
+        if not _listing_matches(listing, filter_key):
+            continue
+        price = get_effective_price(listing, _spot_prices)
+        if agg is None:
+            agg = {'lowest_price': price, 'lowest_listing': listing, 'total_available': 0,
+                   'listing_count': 0, 'seller_qty': {}}
+        elif price < agg['lowest_price']:
+            agg['lowest_price'] = price
+            agg['lowest_listing'] = listing
+        agg['total_available'] += listing['quantity']
+        agg['listing_count'] += 1
+        agg['seller_qty'][listing['seller_id']] = agg['seller_qty'].get(listing['seller_id'], 0) + listing['quantity']
+    if agg is not None:
+        listing = agg.pop('lowest_listing')
+        agg['lowest_price'] = round(agg['lowest_price'], 2)
+        agg['pricing_mode'] = listing.get('pricing_mode', 'static')
+        agg['metal'] = (listing.get('pricing_metal') or listing.get('metal') or '').lower()
+    return agg
+
+
+def _tile(category, agg, user_id):
+    tile = dict(category)
+    if agg is None:
+        tile.update(lowest_price=None, total_available=0, listing_count=0,
+                    all_listings_are_users=False, total_non_user_available=0,
+                    is_variable_pricing=False)
+        return tile
+
+    own_qty = agg['seller_qty'].get(user_id, 0) if user_id else 0
+    tile.update(
+        lowest_price=agg['lowest_price'],
+        total_available=agg['total_available'],
+        listing_count=agg['listing_count'],
+        all_listings_are_users=bool(user_id) and set(agg['seller_qty']) == {user_id},
+        total_non_user_available=agg['total_available'] - own_qty,
+        is_variable_pricing=agg['pricing_mode'] == 'premium_to_spot',
+    )
+    if tile['is_variable_pricing']:
+        tile['spot_price'] = _spot_prices.get(agg['metal'])
+        tile['spot_metal'] = agg['metal']
+    return tile
+
+
+def _matches_category(category, metal, product_line):
+    if metal and category['metal'] != metal:
+        return False
+    if product_line and product_line not in (category['product_line'], category['coin_series']):
+        return False
+    return True
+
+
+def _matches_search(tile, search):
+    fields = ('metal', 'product_line', 'coin_series', 'product_type', 'mint',
+              'year', 'finish', 'grade', 'listing_title', 'weight')
+    return any(search in str(tile.get(f) or '').lower() for f in fields)
+
+
+def _price_key(tile):
+    return (tile['lowest_price'] is None, tile['lowest_price'] if tile['lowest_price'] is not None else 0)
+
+
+def _sort_key(tile, sort):
+    """Total order of a section; the category id breaks ties."""
+    if sort == 'popular':
+        return (-tile['popularity'],) + _price_key(tile) + (tile['category_id'],)
+    if sort == 'new':
+        return (-tile['newest_id'], tile['category_id'])
+    return _price_key(tile) + (tile['category_id'],)
+
+
+def get_buy_page_buckets(filter_key='all', user_id=None, metal=None, product_line=None,
+                         sort=None, search='', sections=BROWSE_SECTIONS):
+    """
+    Every bucket tile of the given /buy sections.
+
+    Args:
+        filter_key: listing_filter_key() of the grading filters
+        user_id: Viewer, for the own-listing fields (None for anonymous)
+        metal / product_line: Category filters
+        sort: 'popular', 'new' or None (price)
+        search: Lower-cased free-text filter, matched through the
+                bucket_search index
+        sections: Sections to build (the page itself renders the standard
+                  section a page at a time with browse_bucket_tiles())
+
+    Returns:
+        {'standard': [...], 'one_of_a_kind': [...], 'sets': [...]} tile dicts
+        (the requested sections) with the same fields the page computed per
+        request before
+    """
+    wanted = sections
+    sections = {}
+    sync_bucket_events()
+    with _lock:
+        _ensure_current(datetime.now())
+        for section in wanted:
+            _keys, entries = _section_order(filter_key, sort, section, metal, product_line)
+            sections[section] = [_section_tile(entry, filter_key, user_id, section, sort)
+                                 for entry in entries]
+
+    if search:
+        keep = _search_filter(search)
+        sections = {section: [t for t in tiles if keep(t)] for section, tiles in sections.items()}
+
+    return sections
+
+
+def _section_order(filter_key, sort, section, metal, product_line):
+    """
+    (sort keys, entries) of one section in sort order; entries are
+    (bucket_id, category) pairs.  Cached until the model changes (caller
+    holds _lock).
+    """
+    cache_key = (filter_key, _sort_name(sort), section, metal or None, product_line or None)
+    order = _orders.get(cache_key)
+    if order is not None:
+        return order
+
+    aggregates = _aggregates.setdefault(filter_key, {})
+    keyed = []
+    for bucket_id, entry in _buckets.items():
+        if bucket_id not in aggregates:
+            aggregates[bucket_id] = _aggregate(entry, filter_key)
+        agg = aggregates[bucket_id]
+
+        for category in entry['standard' if section == 'standard' else 'isolated']:
+            if not _matches_category(category, metal, product_line):
+                continue
+            if section != 'standard':
+                # Isolated buckets with nothing for sale are not shown
+                if agg is None or agg['total_available'] == 0:
+                    continue
+                if (category.get('isolated_type') == 'set') != (section == 'sets'):
+                    continue
+            probe = {
+                'lowest_price': agg['lowest_price'] if agg else None,
+                'popularity': _popularity.get(bucket_id, 0),
+                'newest_id': entry['newest_id'],
+                'category_id': category['category_id'],
+            }
+            keyed.append((_sort_key(probe, sort), bucket_id, category))
+
+    keyed.sort(key=lambda k: k[0])
+    order = ([k[0] for k in keyed], [(k[1], k[2]) for k in keyed])
+    _orders[cache_key] = order
+    return order
+
+
+def _section_tile(entry, filter_key, user_id, section, sort):
+    """Tile dict of one (bucket_id, category) order entry (caller holds _lock)."""
+    bucket_id, category = entry
+    bucket = _buckets[bucket_id]
+    tile = _tile(category, _aggregates[filter_key][bucket_id], user_id)
+    if section != 'standard':
+        tile['tile_image_url'] = bucket['tile_image_url']
+    if sort == 'popular':
+        tile['popularity'] = _popularity.get(bucket_id, 0)
+    elif sort == 'new':
+        tile['newest_id'] = bucket['newest_id']
+    return tile
+
+
+def _search_filter(search):
+    """Predicate on tiles (or category rows) matching the free-text search."""
+    try:
+        matched = set(search_bucket_ids(search))
+
+        def keep(tile):
+            return tile['bucket_id'] in matched
+    except Exception as e:
+        logger.warning("[bucket_tiles] Search index unavailable, filtering tiles: %s", e)
+
+        def keep(tile):
+            return _matches_search(tile, search)
+    return keep
+
+
+# Shape of a sort key, for validating decoded cursors
+_CURSOR_PROBE = {'lowest_price': 0, 'popularity': 0, 'newest_id': 0, 'category_id': 0}
+
+
+def _sort_name(sort):
+    return sort if sort in ('popular', 'new') else 'price'
+
+
+def _encode_cursor(sort, key):
+    raw = json.dumps([_sort_name(sort), list(key)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, sort):
+    """Sort key encoded in `cursor`; ValueError when malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if cursor_sort != _sort_name(sort) or not isinstance(key, list):
+        raise ValueError('Cursor does not match the sort order')
+    if len(key) != len(_sort_key(_CURSOR_PROBE, sort)) or \
+            not all(isinstance(v, (bool, int, float)) for v in key):
+        raise ValueError('Invalid cursor')
+    return tuple(key)
+
+
+def browse_bucket_tiles(section='standard', filter_key='all', user_id=None, metal=None,
+                        product_line=None, sort=None, search='', cursor=None,
+                        limit=BROWSE_PAGE_SIZE):
+    """
+    One page of a /buy section, seeking into the cached section order.
+
+    Args:
+        section: 'standard', 'one_of_a_kind' or 'sets'
+        filter_key / user_id / metal / product_line / sort / search:
+            As for get_buy_page_buckets()
+        cursor: next_cursor of the previous page (None for the first page)
+        limit: Page size, capped at BROWSE_MAX_PAGE_SIZE
+
+    Returns:
+        {'tiles': [...], 'next_cursor': str or None, 'total': int}: the
+        page of the section of get_buy_page_buckets() after the cursor
+
+    Raises:
+        ValueError: Unknown section or invalid cursor
+    """
+    if section not in BROWSE_SECTIONS:
+        raise ValueError(f'Unknown section: {section}')
+    limit = max(1, min(int(limit), BROWSE_MAX_PAGE_SIZE))
+    after = _decode_cursor(cursor, sort) if cursor else None
+    keep = _search_filter(search) if search else None
+
+    sync_bucket_events()
+    with _lock:
+        _ensure_current(datetime.now())
+        keys, entries = _section_order(filter_key, sort, section, metal, product_line)
+        start = bisect_right(keys, after) if after is not None else 0
+
+        if keep is None:
+            total = len(entries)
+            page = list(range(start, min(start + limit, total)))
+            has_more = start + limit < total
+        else:
+            # Search pages count the matches, but still build only their own tiles
+            matches = [i for i, (_bucket_id, category) in enumerate(entries) if keep(category)]
+            total = len(matches)
+            first = bisect_right(matches, start - 1)
+            page = matches[first:first + limit]
+            has_more = first + limit < total
+
+        tiles = [_section_tile(entries[i], filter_key, user_id, section, sort) for i in page]
+        next_cursor = _encode_cursor(sort, keys[page[-1]]) if has_more else None
+    return {'tiles': tiles, 'next_cursor': next_cursor, 'total': total}
+
+
+def mark_bucket_dirty(bucket_id):
+    """
+    Reload a bucket's tiles on the next read (listing event).  Local to this
+    worker: the caller records the bucket event that reaches the others.
+    """
+    with _lock:
+        _dirty.add(bucket_id)
+
+
+def _apply_bucket_events(bucket_ids, everything):
+    """bucket_event_service subscriber: reload buckets changed by other workers."""
+    with _lock:
+        _dirty.update(bucket_ids)
+
+
+subscribe(_apply_bucket_events)
+
+
+def reset_bucket_tiles():
+    """Drop the model (next read rebuilds it from scratch)."""
+    global _built_at, _checked_at, _last_order_item_id, _last_spot_id
+    with _lock:
+        _buckets.clear()
+        _aggregates.clear()
+        _popularity.clear()
+        _spot_prices.clear()
+        _dirty.clear()
+        _built_at = _checked_at = None
+        _last_order_item_id = _last_spot_id = 0
@@ -0,0 +1,156 @@
+"""
+Chart Downsampling
+
+Reduces long price series to a range-appropriate number of points before they
+are serialised for the bucket page charts.
+
+Every chart series here is a step function (the price holds until the next
+event), so the reduction is min/max-per-bin rather than triangle-area LTTB,
+which would smooth away step edges:
+
+  - the range [start, end] is split into equal time bins; a bin with at most
+    _POINTS_PER_BIN points is passed through unchanged
+  - a busier bin keeps every step, i.e. every point whose price differs from
+    its predecessor, and drops the repeats between them, as long as it holds
+    at most _POINTS_PER_BIN steps
+  - a bin with more steps than that keeps its first point, last point,
+    minimum, maximum and the point with the largest step from its
+    predecessor, in time order
+
+The first and last points of the series are always kept, and a sparse
+series comes back unchanged.  Only bins with more than _POINTS_PER_BIN price
+changes lose steps (their price range and biggest jump are still kept):
+keeping every change would put no bound on the output, since each stored
+bucket price row is a change.  Bins are
+range / (max_points / _POINTS_PER_BIN) wide, a few pixels at the target
+point counts, so those dropped steps are below what the chart can show.
+
+The pass is a generator over the input: it holds at most one bin's
+candidates, so callers can feed it a DB cursor.
+
+Usage:
+    from services.chart_downsampling import downsample_step_series, target_points
+
+    points = downsample_step_series(rows, start, end, target_points(days))
+"""
+
+from datetime import datetime
+
+# Target point count per chart range (days -> points).  Short ranges are
+# normally below target and come back unchanged.
+CHART_TARGET_POINTS = {
+    1:   500,
+    7:   700,
+    30:  800,
+    90:  1000,
+    365: 1200,
+}
+
+_POINTS_PER_BIN = 5
+
+
+def target_points(days):
+    """Target point count for a chart covering `days` days."""
+    for span in sorted(CHART_TARGET_POINTS):
+        if days <= span:
+            return CHART_TARGET_POINTS[span]
+    return CHART_TARGET_POINTS[max(CHART_TARGET_POINTS)]
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.fromisoformat(str(value).rstrip('Z')).replace(tzinfo=None)
+
+
+def downsample_step_series(points, start, end, max_points, t_key='t', price_key='price'):
+    """
+    Yield a reduced copy of a chronological step series.
+
+    Args:
+        points:     iterable of mappings with t_key / price_key, oldest first
+                    (dicts or DB rows); yielded items are the input objects
+        start, end: datetimes bounding the chart range (bins are fixed by these)
+        max_points: target point count; None yields every point unchanged
+        t_key:      timestamp key (datetime or ISO-8601 string values)
+        price_key:  price key
+    """
+    if not max_points:
+        yield from points
+        return
+
+    n_bins = max(1, max_points // _POINTS_PER_BIN)
+    span = max((end - start).total_seconds(), 1.0)
+
+    current_bin = None
+    members = []          # (seq, point, price, jump) while the bin is small
+    steps = None          # (seq, point) of the bin's steps once it overflows, while they fit
+    picks = None          # role -> (seq, point, value) once the bin has too many steps
+    prev_price = None
+    last = None           # (seq, point) of the latest point
+
+    def flush():
+        if picks is None:
+            return [(m[0], m[1]) for m in members]
+        if steps is not None:
+            return steps
+        chosen = {seq: p for seq, p, _ in picks.values()}
+        return [(seq, chosen[seq]) for seq in sorted(chosen)]
+
+    emitted = None
+    for seq, point in enumerate(points):
+        price = point[price_key]
+        jump = abs(price - prev_price) if prev_price is not None else float('inf')
+        prev_price = price
+        last = (seq, point)
+
+        offset = (_as_datetime(point[t_key]) - start).total_seconds()
+        idx = min(max(int(offset / span * n_bins), 0), n_bins - 1)
+
+        if idx != current_bin:
+            for emitted, kept in flush():
+                yield kept
+            current_bin, members, steps, picks = idx, [], None, None
+
+        if picks is None:
+            members.append((seq, point, price, jump))
+            if len(members) <= _POINTS_PER_BIN:
+                continue
+            picks, steps = {}, []
+            for member in members:
+                steps = _fold(picks, steps, *member)
+            members = []
+        else:
+            steps = _fold(picks, steps, seq, point, price, jump)
+
+    if steps and steps[-1][0] != last[0] and len(steps) == _POINTS_PER_BIN:
+        # No room left for the series' last point: keep the extremes instead
+        steps = None
+    for emitted, kept in flush():
+        yield kept
+    # A trailing repeat still carries the price up to the end of the series
+    if last is not None and last[0] != emitted:
+        yield last[1]
+
+
+def _fold(picks, steps, seq, point, price, jump):
+    """Add one point of an overflowing bin; returns the step list, or None once it overflows."""
+    _pick(picks, seq, point, price, jump)
+    if steps is not None and jump:
+        steps.append((seq, point))
+        if len(steps) > _POINTS_PER_BIN:
+            return None
+    return steps
+
+
+def _pick(picks, seq, point, price, jump):
+    """Fold one point into a bin's first/last/min/max/largest-step candidates."""
+    if 'first' not in picks:
+        picks['first'] = (seq, point, price)
+    picks['last'] = (seq, point, price)
+    if 'lo' not in picks or price < picks['lo'][2]:
+        picks['lo'] = (seq, point, price)
+    if 'hi' not in picks or price > picks['hi'][2]:
+        picks['hi'] = (seq, point, price)
+    if 'jump' not in picks or jump > picks['jump'][2]:
+        picks['jump'] = (seq, point, jump)
@@ -44,6 +44,42 @@ def _trigger_bid_rematch(metal: str) -> None:
         logger.warning("[manual_spot] Bid rematch failed for %s: %s", metal, e)
 
 
+def _trigger_bucket_price_record() -> None:
+    """Record best-ask points driven by the manual spot price for all spot-priced buckets."""
+    try:
+        from services.bucket_price_history_service import record_spot_driven_prices
+        record_spot_driven_prices()
+    except Exception as e:
+        logger.warning("[manual_spot] Bucket price recording failed: %s", e)
+
+
+def _trigger_ticker_refresh() -> None:
+    """Rebuild the cached buy page ticker against the new spot prices."""
+    try:
+        from services.ticker_service import refresh_ticker
+        refresh_ticker()
+    except Exception as e:
+        logger.warning("[manual_spot] Ticker refresh failed: %s", e)
+
+
+def _trigger_depth_refresh() -> None:
+    """Drop the cached order books so depth is repriced at the new spot."""
+    try:
+        from services.order_book_service import clear_depth_cache
+        clear_depth_cache()
+    except Exception as e:
+        logger.warning("[manual_spot] Order book cache clear failed: %s", e)
+
+
+def _trigger_reference_series_refresh() -> None:
+    """Append the manual snapshot to every persisted bucket reference series."""
+    try:
+        from services.reference_price_service import refresh_all_reference_series
+        refresh_all_reference_series()
+    except Exception as e:
+        logger.warning("[manual_spot] Reference series refresh failed: %s", e)
+
+
 # ─── Service function ─────────────────────────────────────────────────────────
 
 def insert_manual_spot_snapshot(conn, metal: str, price_usd: float) -> dict:
@@ -107,6 +143,10 @@ def insert_manual_spot_snapshot(conn, metal: str, price_usd: float) -> dict:
     # After committing the new snapshot, re-evaluate open bids that may now
     # be marketable at the updated spot price.
     _trigger_bid_rematch(metal)
+    _trigger_bucket_price_record()
+    _trigger_reference_series_refresh()
+    _trigger_ticker_refresh()
+    _trigger_depth_refresh()
 
     return {
         "id":        cur.lastrowid,
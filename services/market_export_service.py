@@ -0,0 +1,498 @@
+"""
+Market Data Export Service
+
+Writes daily market history files for analysts, so long-range questions are
+answered from files instead of ad-hoc queries against the production DB.
+
+Datasets (one row per day and key, complete days only):
+  bucket_daily — date, bucket_id, open, high, low, close  (Reference Price
+                 P(t) from bucket_reference_series; open carries the price in
+                 effect at midnight), volume, trades, notional  (order_items
+                 on non-cancelled orders)
+  spot_daily   — date, metal, open, high, low, close, samples
+                 (spot_price_snapshots)
+
+Files under EXPORT_DIR (data/exports/ by default, MARKET_EXPORT_DIR overrides):
+  <dataset>.csv.gz                  append-only; each run adds a gzip member
+  <dataset>.<first>_<last>.npz      columnar NumPy arrays for the same rows,
+                                    one file per run (only if numpy is installed)
+  manifest.json                     last exported day (the next run starts after
+                                    it) and the committed size of each CSV
+
+Entry points:
+  run_market_export()  — export every complete day after the manifest watermark
+  export_if_due()      — scheduler hook (spot_scheduler), never raises
+  extend_bucket_series() — bring every stored reference series up to date
+                         (the cron script runs it before exporting)
+  read_export()        — read rows back (admin analytics long-range charts)
+  scripts/export_market_data.py — cron / manual run
+
+Days are the calendar dates of the stored timestamps.
+
+One export runs at a time across workers and the cron script (flock on
+<export_dir>/.lock).  Every file is written to a temp file and renamed into
+place, and the manifest is saved after the data files.  A run interrupted between the two leaves CSV
+bytes past the manifest's committed size; the next run drops them before
+appending, so no day is exported twice.
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+import database as _db_module
+from services.analytics_service import _period_expr
+from services.reference_price_service import _ts_cmp, _ts_str, extend_reference_series
+
+try:
+    import numpy as np
+except ImportError:  # optional: CSV.gz is always written
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.environ.get('MARKET_EXPORT_DIR', os.path.join('data', 'exports'))
+EXPORT_BACKFILL_DAYS = 365   # first run covers at most this many days
+EXPORT_CHUNK_DAYS = 31       # days exported (and committed to the manifest) per pass
+
+BUCKET_DAILY_COLUMNS = ('date', 'bucket_id', 'open', 'high', 'low', 'close',
+                        'volume', 'trades', 'notional')
+SPOT_DAILY_COLUMNS = ('date', 'metal', 'open', 'high', 'low', 'close', 'samples')
+
+DATASETS = {
+    'bucket_daily': BUCKET_DAILY_COLUMNS,
+    'spot_daily':   SPOT_DAILY_COLUMNS,
+}
+
+_INT_COLUMNS = {'bucket_id', 'volume', 'trades', 'samples'}
+_TEXT_COLUMNS = {'date', 'metal'}
+
+_CANCELLED = ('Cancelled', 'Canceled')
+
+_lock = threading.Lock()   # with the flock on <export_dir>/.lock, see _try_acquire_export_lock
+
+
+# ─── Manifest ────────────────────────────────────────────────────────────────
+
+def _manifest_path(export_dir):
+    return os.path.join(export_dir, 'manifest.json')
+
+
+def load_manifest(export_dir=None):
+    """Manifest dict ({} before the first export)."""
+    path = _manifest_path(export_dir or EXPORT_DIR)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(export_dir, manifest):
+    path = _manifest_path(export_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _try_acquire_export_lock(export_dir):
+    """
+    Take the export lock: the process lock plus a non-blocking flock on
+    <export_dir>/.lock, so only one worker (or the cron script) writes the
+    temp files and the manifest at a time.
+
+    Returns the open lock file, or None when another thread or process holds it.
+    """
+    if not _lock.acquire(blocking=False):
+        return None
+    lock_file = None
+    try:
+        lock_file = open(os.path.join(export_dir, '.lock'), 'a')
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock_file
+    except BlockingIOError:
+        lock_file.close()
+        _lock.release()
+        return None
+    except Exception:
+        if lock_file is not None:
+            lock_file.close()
+        _lock.release()
+        raise
+
+
+def _release_export_lock(lock_file):
+    """Release the export lock (closing the file drops the flock)."""
+    lock_file.close()
+    _lock.release()
+
+
+# ─── Daily aggregation ───────────────────────────────────────────────────────
+
+def _days(start_day, end_day):
+    day = start_day
+    while day < end_day:
+        yield day
+        day += timedelta(days=1)
+
+
+def extend_bucket_series(now=None):
+    """
+    Bring every bucket's stored reference series up to date, building the
+    buckets that have none (up to REFERENCE_SERIES_DAYS each).
+
+    Run by scripts/export_market_data.py before exporting; the scheduler's
+    export relies on the series hooks and the spot-tick backfill instead.
+
+    Returns:
+        int number of buckets that gained or changed points
+    """
+    now = now or datetime.now()
+    conn = _db_module.get_db_connection()
+    extended = 0
+    try:
+        bucket_ids = {r['bucket_id'] for r in conn.execute(
+            'SELECT DISTINCT bucket_id FROM bucket_reference_series'
+        ).fetchall()}
+        bucket_ids.update(r['bucket_id'] for r in conn.execute("""
+            SELECT DISTINCT c.bucket_id
+            FROM listings l
+            JOIN categories c ON l.category_id = c.id
+            WHERE l.active = 1 AND l.quantity > 0 AND c.bucket_id IS NOT NULL
+        """).fetchall())
+        for bucket_id in sorted(bucket_ids):
+            try:
+                if extend_reference_series(conn, bucket_id, now=now):
+                    extended += 1
+            except Exception as e:
+                logger.warning("[market_export] Reference series extend failed for bucket %s: %s",
+                               bucket_id, e)
+    finally:
+        conn.close()
+    return extended
+
+
+def _bucket_ohlc(conn, start_day, end_day):
+    """{(date_iso, bucket_id): (open, high, low, close)} from the reference series."""
+    start_iso, end_iso = start_day.isoformat(), end_day.isoformat()
+
+    carry = {r['bucket_id']: r['price'] for r in conn.execute("""
+        SELECT r.bucket_id, r.price
+        FROM bucket_reference_series r
+        JOIN (
+            SELECT bucket_id, MAX(t) AS t
+            FROM bucket_reference_series
+            WHERE t < ?
+            GROUP BY bucket_id
+        ) last ON last.bucket_id = r.bucket_id AND last.t = r.t
+    """, (start_iso,)).fetchall()}
+
+    rows = conn.execute("""
+        SELECT bucket_id, t, price
+        FROM bucket_reference_series
+        WHERE t >= ? AND t < ?
+        ORDER BY bucket_id, t
+    """, (start_iso, end_iso)).fetchall()
+    by_bucket = {bucket_id: list(points) for bucket_id, points in groupby(rows, key=lambda r: r['bucket_id'])}
+
+    ohlc = {}
+    for bucket_id in set(carry) | set(by_bucket):
+        price = carry.get(bucket_id)
+        points = by_bucket.get(bucket_id, [])
+        i = 0
+        for day in _days(start_day, end_day):
+            day_iso = day.isoformat()
+            day_prices = []
+            while i < len(points) and points[i]['t'][:10] == day_iso:
+                day_prices.append(points[i]['price'])
+                i += 1
+            if price is None and not day_prices:
+                continue
+            opening = price if price is not None else day_prices[0]
+            prices = [opening] + day_prices
+            ohlc[(day_iso, bucket_id)] = (opening, max(prices), min(prices), prices[-1])
+            price = prices[-1]
+    return ohlc
+
+
+def _bucket_volume(conn, start_day, end_day):
+    """{(date_iso, bucket_id): (volume, trades, notional)} from order_items."""
+    day = _period_expr('%Y-%m-%d', 'o.created_at')
+    rows = conn.execute(f"""
+        SELECT {day} AS day, c.bucket_id,
+               SUM(oi.quantity) AS volume,
+               COUNT(oi.id) AS trades,
+               SUM(oi.quantity * oi.price_each) AS notional
+        FROM order_items oi
+        JOIN orders     o ON o.id = oi.order_id
+        JOIN listings   l ON l.id = oi.listing_id
+        JOIN categories c ON c.id = l.category_id
+        WHERE c.bucket_id IS NOT NULL
+          AND o.created_at >= ? AND o.created_at < ?
+          AND (o.status IS NULL OR o.status NOT IN (?, ?))
+        GROUP BY 1, c.bucket_id
+    """, (start_day.isoformat(), end_day.isoformat(), *_CANCELLED)).fetchall()
+    return {(r['day'], r['bucket_id']): (r['volume'] or 0, r['trades'], r['notional'] or 0.0)
+            for r in rows}
+
+
+def build_bucket_daily(conn, start_day, end_day):
+    """bucket_daily rows for [start_day, end_day), sorted by date then bucket."""
+    ohlc = _bucket_ohlc(conn, start_day, end_day)
+    volume = _bucket_volume(conn, start_day, end_day)
+    rows = []
+    for key in sorted(set(ohlc) | set(volume)):
+        o, h, l, c = ohlc.get(key, (None, None, None, None))
+        vol, trades, notional = volume.get(key, (0, 0, 0.0))
+        rows.append((key[0], key[1], o, h, l, c, vol, trades, round(notional, 2)))
+    return rows
+
+
+def build_spot_daily(conn, start_day, end_day):
+    """spot_daily rows for [start_day, end_day), sorted by date then metal."""
+    rows = conn.execute(f"""
+        SELECT metal, {_ts_str('as_of')} AS t, price_usd
+        FROM spot_price_snapshots
+        WHERE {_ts_cmp('as_of')} >= ? AND {_ts_cmp('as_of')} < ?
+        ORDER BY metal, {_ts_cmp('as_of')}, id
+    """, (start_day.isoformat(), end_day.isoformat())).fetchall()
+
+    out = []
+    for (metal, day_iso), samples in groupby(rows, key=lambda r: (r['metal'], r['t'][:10])):
+        prices = [r['price_usd'] for r in samples]
+        out.append((day_iso, metal, prices[0], max(prices), min(prices), prices[-1], len(prices)))
+    out.sort(key=lambda r: (r[0], r[1]))
+    return out
+
+
+# ─── File output ─────────────────────────────────────────────────────────────
+
+def _append_csv_gz(path, columns, rows, committed_size):
+    """
+    Append rows as a new gzip member and return the new file size.
+
+    The first committed_size bytes of the existing file are copied to a temp
+    file (dropping anything an interrupted run wrote past the manifest), the
+    member is appended there and the temp file replaces the CSV.  The header
+    is written once, with the file.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if not committed_size:
+        writer.writerow(columns)
+    writer.writerows(['' if v is None else v for v in row] for row in rows)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as out:
+        if committed_size:
+            with open(path, 'rb') as src:
+                remaining = committed_size
+                while remaining:
+                    chunk = src.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    remaining -= len(chunk)
+        with gzip.GzipFile(fileobj=out, mode='wb') as f:
+            f.write(buf.getvalue().encode('utf-8'))
+        out.flush()
+        os.fsync(out.fileno())
+        size = out.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def _committed_sizes(export_dir, manifest):
+    """
+    {csv name: bytes covered by the manifest}.
+
+    Nothing is committed before the first saved manifest; manifests written
+    before sizes were recorded trust the files as they are.
+    """
+    if 'sizes' in manifest:
+        return manifest['sizes']
+    sizes = {}
+    if manifest.get('last_day'):
+        for dataset in DATASETS:
+            path = os.path.join(export_dir, f'{dataset}.csv.gz')
+            if os.path.exists(path):
+                sizes[f'{dataset}.csv.gz'] = os.path.getsize(path)
+    return sizes
+
+
+def _write_npz(path, columns, rows):
+    arrays = {}
+    for idx, col in enumerate(columns):
+        values = [row[idx] for row in rows]
+        if col in _TEXT_COLUMNS:
+            arrays[col] = np.array(values, dtype=str)
+        elif col in _INT_COLUMNS:
+            arrays[col] = np.array(values, dtype=np.int64)
+        else:
+            arrays[col] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _write_dataset(export_dir, manifest, dataset, rows, start_day, last_day):
+    """Write one pass of rows; records the new CSV size in manifest['sizes'] (caller saves)."""
+    columns = DATASETS[dataset]
+    written = [f'{dataset}.csv.gz']
+    sizes = manifest['sizes']
+    sizes[written[0]] = _append_csv_gz(os.path.join(export_dir, written[0]), columns, rows,
+                                       sizes.get(written[0], 0))
+    if np is not None:
+        name = f'{dataset}.{start_day.isoformat()}_{last_day.isoformat()}.npz'
+        _write_npz(os.path.join(export_dir, name), columns, rows)
+        written.append(name)
+    return written
+
+
+# ─── Entry points ────────────────────────────────────────────────────────────
+
+def run_market_export(export_dir=None, today=None):
+    """
+    Export every complete day after the manifest's last_day, up to yesterday.
+
+    Days are processed in EXPORT_CHUNK_DAYS passes; the manifest is advanced
+    after each pass, so an interrupted run resumes where it stopped.  The
+    manifest is read under the export lock; a run that finds the lock held
+    by another thread or process returns at once.
+
+    Args:
+        export_dir: output directory (default EXPORT_DIR)
+        today:      date treated as today (default date.today())
+
+    Returns:
+        dict {first_day, last_day, bucket_rows, spot_rows, files, locked_out} —
+        first/last are None when there was nothing new to export
+    """
+    export_dir = export_dir or EXPORT_DIR
+    today = today or date.today()
+    summary = {'first_day': None, 'last_day': None, 'bucket_rows': 0, 'spot_rows': 0, 'files': [],
+               'locked_out': False}
+
+    os.makedirs(export_dir, exist_ok=True)
+    lock_file = _try_acquire_export_lock(export_dir)
+    if lock_file is None:
+        logger.info("[market_export] Another export holds the lock — skipping.")
+        summary['locked_out'] = True
+        return summary
+
+    try:
+        manifest = load_manifest(export_dir)
+        manifest['sizes'] = _committed_sizes(export_dir, manifest)
+        if manifest.get('last_day'):
+            start_day = date.fromisoformat(manifest['last_day']) + timedelta(days=1)
+        else:
+            start_day = today - timedelta(days=EXPORT_BACKFILL_DAYS)
+        if start_day >= today:
+            return summary
+
+        conn = _db_module.get_db_connection()
+        try:
+            chunk_start = start_day
+            while chunk_start < today:
+                chunk_end = min(chunk_start + timedelta(days=EXPORT_CHUNK_DAYS), today)
+                last_day = chunk_end - timedelta(days=1)
+
+                bucket_rows = build_bucket_daily(conn, chunk_start, chunk_end)
+                spot_rows = build_spot_daily(conn, chunk_start, chunk_end)
+                files = set(summary['files'])
+                if bucket_rows:
+                    files.update(_write_dataset(export_dir, manifest, 'bucket_daily', bucket_rows, chunk_start, last_day))
+                if spot_rows:
+                    files.update(_write_dataset(export_dir, manifest, 'spot_daily', spot_rows, chunk_start, last_day))
+
+                manifest.update({
+                    'last_day': last_day.isoformat(),
+                    'updated_at': datetime.now().isoformat(),
+                    'columns': {name: list(cols) for name, cols in DATASETS.items()},
+                })
+                _save_manifest(export_dir, manifest)
+
+                summary['first_day'] = summary['first_day'] or chunk_start.isoformat()
+                summary['last_day'] = last_day.isoformat()
+                summary['bucket_rows'] += len(bucket_rows)
+                summary['spot_rows'] += len(spot_rows)
+                summary['files'] = sorted(files)
+                chunk_start = chunk_end
+        finally:
+            conn.close()
+    finally:
+        _release_export_lock(lock_file)
+
+    logger.info("[market_export] Exported %s..%s: %d bucket rows, %d spot rows",
+                summary['first_day'], summary['last_day'], summary['bucket_rows'], summary['spot_rows'])
+    return summary
+
+
+def export_if_due():
+    """Scheduler hook: run the export once yesterday is complete and not yet exported."""
+    try:
+        last_day = load_manifest().get('last_day')
+        if last_day and date.fromisoformat(last_day) >= date.today() - timedelta(days=1):
+            return None
+        return run_market_export()
+    except Exception as e:
+        logger.warning("[market_export] Export failed: %s", e)
+        return None
+
+
+def read_export(dataset, start=None, end=None, key=None, export_dir=None):
+    """
+    Read exported rows back as dicts.
+
+    Args:
+        dataset: 'bucket_daily' or 'spot_daily'
+        start:   first date to include ('YYYY-MM-DD', optional)
+        end:     last date to include ('YYYY-MM-DD', optional)
+        key:     bucket_id (bucket_daily) or metal (spot_daily) to keep (optional)
+
+    Returns:
+        list of dicts ordered by date, with numeric columns converted
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset!r}")
+    path = os.path.join(export_dir or EXPORT_DIR, f'{dataset}.csv.gz')
+    if not os.path.exists(path):
+        return []
+
+    key_col = DATASETS[dataset][1]
+    if key is not None:
+        key = str(key)
+
+    rows = []
+    with gzip.open(path, 'rt', newline='') as f:
+        for record in csv.DictReader(f):
+            if start and record['date'] < start:
+                continue
+            if end and record['date'] > end:
+                continue
+            if key is not None and record[key_col] != key:
+                continue
+            for col, value in record.items():
+                if col in _TEXT_COLUMNS:
+                    continue
+                if value == '':
+                    record[col] = None
+                elif col in _INT_COLUMNS:
+                    record[col] = int(value)
+                else:
+                    record[col] = float(value)
+            rows.append(record)
+    return rows
@@ -0,0 +1,684 @@
+"""
+Matching Simulator
+
+Deterministic replay harness for the bid/listing matching engine
+(core/blueprints/bids/auto_match.py and the spread-model helpers in
+services/pricing_service.py).
+
+A stream of events is replayed against a private in-memory SQLite database:
+
+    {"type": "category",       "id": 1, "metal": "Gold", "weight": "1 oz", ...}
+    {"type": "spot",           "metal": "gold", "price": 2000.0}
+    {"type": "listing",        "id": 10, "seller_id": 2, "category_id": 1, "quantity": 5,
+                               "price_per_coin": 2100.0}
+    {"type": "bid",            "id": 20, "buyer_id": 3, "category_id": 1, "quantity": 2,
+                               "price_per_coin": 2150.0}
+    {"type": "edit_listing",   "id": 10, "price_per_coin": 2050.0}
+    {"type": "edit_bid",       "id": 20, "ceiling_price": 2200.0}
+    {"type": "cancel_listing", "id": 10}
+    {"type": "cancel_bid",     "id": 20}
+    {"type": "rematch"}
+
+Spot ticks insert a spot_price_snapshots row and then run
+check_all_pending_matches() — the same path as run_bid_rematch_after_spot_update().
+Bid/listing placement only inserts rows (production has auto-match on placement
+disabled); pass match_on_place=True to exercise auto_match_bid_to_listings /
+auto_match_listing_to_bids directly.
+
+Stripe is stubbed for the duration of a run: PaymentMethod.retrieve reports a
+card, PaymentIntent.create succeeds unless the payment method id contains
+"decline", and Stripe Tax applies FALLBACK_TAX_RATE when a ZIP is present.
+Post-commit ledger creation and failure notifications are recorded, and user
+stats refreshes skipped, instead of opening connections to the real database.
+
+The report contains fills, spread totals, the final book, per-event latency and
+SQL statement counts.  diff_reports() compares the deterministic parts of two
+reports so a recorded "golden" run can be used as a regression baseline.
+"""
+
+import json
+import random
+import sqlite3
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import stripe
+
+from core.blueprints.bids import auto_match
+from utils.category_manager import compute_spec_key
+
+
+SIM_START = datetime(2025, 1, 1, 12, 0, 0)
+SIM_DELIVERY_ADDRESS = '1 Test St • Austin, TX 78701'
+
+_SCHEMA = """
+CREATE TABLE users (
+    id                  INTEGER PRIMARY KEY,
+    username            TEXT,
+    stripe_customer_id  TEXT,
+    bid_payment_strikes INTEGER DEFAULT 0
+);
+
+CREATE TABLE categories (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id      INTEGER,
+    metal          TEXT,
+    product_line   TEXT,
+    product_type   TEXT,
+    weight         TEXT,
+    purity         TEXT,
+    mint           TEXT,
+    year           TEXT,
+    finish         TEXT,
+    grade          TEXT,
+    condition_category TEXT,
+    series_variant TEXT,
+    coin_series    TEXT,
+    is_isolated    INTEGER DEFAULT 0,
+    spec_key       TEXT
+);
+
+CREATE TABLE listings (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    seller_id       INTEGER NOT NULL,
+    category_id     INTEGER NOT NULL,
+    quantity        INTEGER DEFAULT 1,
+    price_per_coin  REAL    DEFAULT 0,
+    active          INTEGER DEFAULT 1,
+    pricing_mode    TEXT    DEFAULT 'static',
+    spot_premium    REAL,
+    floor_price     REAL,
+    pricing_metal   TEXT,
+    grading_service TEXT,
+    created_at      TEXT
+);
+
+CREATE TABLE bids (
+    id                          INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id                 INTEGER NOT NULL,
+    buyer_id                    INTEGER NOT NULL,
+    quantity_requested          INTEGER NOT NULL,
+    price_per_coin              REAL    NOT NULL DEFAULT 0,
+    remaining_quantity          INTEGER NOT NULL,
+    active                      INTEGER DEFAULT 1,
+    delivery_address            TEXT,
+    status                      TEXT    DEFAULT 'Open',
+    pricing_mode                TEXT    DEFAULT 'static',
+    spot_premium                REAL,
+    ceiling_price               REAL,
+    pricing_metal               TEXT,
+    recipient_first_name        TEXT    DEFAULT 'Sim',
+    recipient_last_name         TEXT    DEFAULT 'Buyer',
+    random_year                 INTEGER DEFAULT 0,
+    created_at                  TEXT,
+    bid_payment_method_id       TEXT,
+    bid_payment_status          TEXT    DEFAULT 'pending',
+    bid_payment_intent_id       TEXT,
+    bid_payment_failure_code    TEXT,
+    bid_payment_failure_message TEXT,
+    bid_payment_attempted_at    TEXT
+);
+
+CREATE TABLE orders (
+    id                       INTEGER PRIMARY KEY AUTOINCREMENT,
+    buyer_id                 INTEGER,
+    total_price              REAL,
+    buyer_card_fee           REAL NOT NULL DEFAULT 0.0,
+    tax_amount               REAL NOT NULL DEFAULT 0.0,
+    tax_rate                 REAL NOT NULL DEFAULT 0.0,
+    shipping_address         TEXT,
+    status                   TEXT,
+    created_at               TEXT,
+    recipient_first_name     TEXT,
+    recipient_last_name      TEXT,
+    source_bid_id            INTEGER,
+    payment_status           TEXT DEFAULT 'unpaid',
+    stripe_payment_intent_id TEXT,
+    paid_at                  TEXT,
+    payment_method_type      TEXT
+);
+
+CREATE TABLE order_items (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id          INTEGER,
+    listing_id        INTEGER,
+    quantity          INTEGER,
+    price_each        REAL,
+    seller_price_each REAL
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT NOT NULL,
+    price_usd REAL NOT NULL,
+    as_of     TEXT NOT NULL,
+    source    TEXT DEFAULT 'simulator'
+);
+
+CREATE INDEX idx_sim_categories_spec_key ON categories(spec_key);
+CREATE INDEX idx_sim_listings_category ON listings(category_id, active);
+CREATE INDEX idx_sim_bids_active ON bids(active, status, created_at);
+"""
+
+_CATEGORY_FIELDS = (
+    'bucket_id', 'metal', 'product_line', 'product_type', 'weight', 'purity',
+    'mint', 'year', 'finish', 'grade', 'condition_category', 'series_variant',
+    'coin_series', 'is_isolated',
+)
+_LISTING_FIELDS = (
+    'quantity', 'price_per_coin', 'pricing_mode', 'spot_premium',
+    'floor_price', 'pricing_metal', 'grading_service',
+)
+_BID_FIELDS = (
+    'price_per_coin', 'pricing_mode', 'spot_premium', 'ceiling_price',
+    'pricing_metal', 'random_year', 'delivery_address', 'bid_payment_method_id',
+)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class _StripeStub:
+    """Deterministic stand-ins for the Stripe calls made by auto_match."""
+
+    def __init__(self):
+        self.payment_intents = 0
+
+    def retrieve_payment_method(self, pm_id, *args, **kwargs):
+        return SimpleNamespace(id=pm_id, type='card')
+
+    def create_payment_intent(self, **kwargs):
+        if 'decline' in (kwargs.get('payment_method') or ''):
+            raise stripe.error.CardError('Your card was declined.', None, 'card_declined')
+        self.payment_intents += 1
+        return SimpleNamespace(id=f'pi_sim_{self.payment_intents}', status='succeeded')
+
+    def create_tax_calculation(self, **kwargs):
+        amount = sum(item['amount'] for item in kwargs.get('line_items', []))
+        return SimpleNamespace(
+            id='taxcalc_sim',
+            tax_amount_exclusive=round(amount * auto_match.FALLBACK_TAX_RATE),
+        )
+
+
+class MatchingSimulator:
+    """
+    Replays an event stream through the matching engine against an in-memory DB.
+
+    Usage:
+        sim = MatchingSimulator()
+        sim.load(setup_events)          # untimed (e.g. a deep book of open bids)
+        report = sim.run(events)        # timed; returns the report dict
+    """
+
+    def __init__(self, match_on_place=False):
+        self.match_on_place = match_on_place
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        self.conn.set_trace_callback(self._on_statement)
+
+        self._counting = False
+        self._statements = 0
+        self._clock = SIM_START
+        self._last_order_item_id = 0
+        self._stripe = _StripeStub()
+
+        self.fills = []
+        self.ledger_orders = []
+        self.payment_failures = []
+
+    # ── instrumentation ───────────────────────────────────────────────────────
+
+    def _on_statement(self, _sql):
+        if self._counting:
+            self._statements += 1
+
+    def _patches(self):
+        stack = ExitStack()
+        stack.enter_context(patch.object(
+            stripe.PaymentMethod, 'retrieve', self._stripe.retrieve_payment_method))
+        stack.enter_context(patch.object(
+            stripe.PaymentIntent, 'create', self._stripe.create_payment_intent))
+        stack.enter_context(patch.object(
+            stripe.tax.Calculation, 'create', self._stripe.create_tax_calculation))
+        stack.enter_context(patch.object(
+            auto_match, 'create_order_ledgers_batch', self._record_ledgers))
+        stack.enter_context(patch.object(
+            auto_match, 'notify_bid_payment_failed', self._record_payment_failure))
+        stack.enter_context(patch.object(
+            auto_match, 'refresh_order_user_stats', lambda order_id: None))
+        return stack
+
+    def _record_ledgers(self, orders):
+        self.ledger_orders.extend(o['order_id'] for o in orders)
+        return {o['order_id']: o['order_id'] for o in orders}
+
+    def _record_payment_failure(self, buyer_id, bid_id, failure_message):
+        self.payment_failures.append({'bid_id': bid_id, 'message': failure_message})
+
+    def _tick(self, event):
+        if event.get('t'):
+            self._clock = datetime.fromisoformat(event['t'])
+        else:
+            self._clock += timedelta(seconds=1)
+        return self._clock.isoformat(sep=' ')
+
+    # ── event handlers ────────────────────────────────────────────────────────
+
+    def _settle(self, result):
+        """Commit a direct auto_match call, then run its post-commit work like the callers do."""
+        self.conn.commit()
+        for notif in result.get('payment_failure_notifs', []):
+            auto_match.notify_bid_payment_failed(notif['buyer_id'], notif['bid_id'], notif['failure_message'])
+        if result.get('ledger_orders'):
+            auto_match.create_order_ledgers_batch(result['ledger_orders'])
+        for order in result.get('ledger_orders', []):
+            auto_match.refresh_order_user_stats(order['order_id'])
+
+    def _ensure_user(self, user_id):
+        self.conn.execute(
+            'INSERT OR IGNORE INTO users (id, username, stripe_customer_id) VALUES (?, ?, ?)',
+            (user_id, f'sim{user_id}', f'cus_sim_{user_id}'),
+        )
+
+    def _apply_category(self, event, now):
+        fields = {k: event[k] for k in _CATEGORY_FIELDS if k in event}
+        fields.setdefault('bucket_id', event.get('id'))
+        fields['spec_key'] = compute_spec_key(fields)
+        cols = ['id'] + list(fields)
+        self.conn.execute(
+            f"INSERT INTO categories ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            [event.get('id')] + list(fields.values()),
+        )
+        self.conn.commit()
+
+    def _apply_spot(self, event, now):
+        self.conn.execute(
+            'INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES (?, ?, ?)',
+            (event['metal'].lower(), float(event['price']), now),
+        )
+        self.conn.commit()
+        auto_match.check_all_pending_matches(self.conn)
+
+    def _apply_rematch(self, event, now):
+        auto_match.check_all_pending_matches(self.conn)
+
+    def _apply_listing(self, event, now):
+        self._ensure_user(event['seller_id'])
+        fields = {k: event[k] for k in _LISTING_FIELDS if k in event}
+        cols = ['id', 'seller_id', 'category_id', 'active', 'created_at'] + list(fields)
+        cur = self.conn.execute(
+            f"INSERT INTO listings ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            [event.get('id'), event['seller_id'], event['category_id'], 1, now] + list(fields.values()),
+        )
+        if self.match_on_place:
+            self._settle(auto_match.auto_match_listing_to_bids(cur.lastrowid, self.conn.cursor()))
+        else:
+            self.conn.commit()
+
+    def _apply_bid(self, event, now):
+        self._ensure_user(event['buyer_id'])
+        fields = {k: event[k] for k in _BID_FIELDS if k in event}
+        fields.setdefault('delivery_address', SIM_DELIVERY_ADDRESS)
+        fields.setdefault('bid_payment_method_id', 'pm_sim_card')
+        qty = int(event['quantity'])
+        cols = ['id', 'buyer_id', 'category_id', 'quantity_requested',
+                'remaining_quantity', 'active', 'status', 'created_at'] + list(fields)
+        cur = self.conn.execute(
+            f"INSERT INTO bids ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            [event.get('id'), event['buyer_id'], event['category_id'], qty, qty, 1, 'Open', now]
+            + list(fields.values()),
+        )
+        if self.match_on_place:
+            self._settle(auto_match.auto_match_bid_to_listings(cur.lastrowid, self.conn.cursor()))
+        else:
+            self.conn.commit()
+
+    def _apply_edit(self, table, allowed, event):
+        fields = {k: event[k] for k in allowed if k in event}
+        if table == 'bids' and 'quantity' in event:
+            fields['remaining_quantity'] = int(event['quantity'])
+        if not fields:
+            return
+        assignments = ', '.join(f'{k} = ?' for k in fields)
+        self.conn.execute(
+            f'UPDATE {table} SET {assignments} WHERE id = ? AND active = 1',
+            list(fields.values()) + [event['id']],
+        )
+
+    def _is_active(self, table, row_id):
+        row = self.conn.execute(f'SELECT active FROM {table} WHERE id = ?', (row_id,)).fetchone()
+        return bool(row and row['active'])
+
+    def _apply_edit_listing(self, event, now):
+        self._apply_edit('listings', _LISTING_FIELDS, event)
+        if self.match_on_place and self._is_active('listings', event['id']):
+            self._settle(auto_match.auto_match_listing_to_bids(event['id'], self.conn.cursor()))
+        else:
+            self.conn.commit()
+
+    def _apply_edit_bid(self, event, now):
+        self._apply_edit('bids', _BID_FIELDS, event)
+        if self.match_on_place and self._is_active('bids', event['id']):
+            self._settle(auto_match.auto_match_bid_to_listings(event['id'], self.conn.cursor()))
+        else:
+            self.conn.commit()
+
+    def _apply_cancel_listing(self, event, now):
+        self.conn.execute('UPDATE listings SET active = 0 WHERE id = ?', (event['id'],))
+        self.conn.commit()
+
+    def _apply_cancel_bid(self, event, now):
+        self.conn.execute(
+            "UPDATE bids SET active = 0, status = 'Cancelled' WHERE id = ?", (event['id'],)
+        )
+        self.conn.commit()
+
+    def apply(self, event):
+        """Apply a single event.  Raises ValueError for unknown event types."""
+        handler = getattr(self, f"_apply_{event.get('type')}", None)
+        if handler is None:
+            raise ValueError(f"Unknown simulator event type: {event.get('type')!r}")
+        handler(event, self._tick(event))
+
+    # ── bookkeeping ───────────────────────────────────────────────────────────
+
+    def _collect_fills(self, event_index):
+        rows = self.conn.execute('''
+            SELECT oi.id, oi.order_id, o.source_bid_id, o.buyer_id, l.seller_id,
+                   oi.listing_id, oi.quantity, oi.price_each, oi.seller_price_each
+            FROM order_items oi
+            JOIN orders o   ON oi.order_id = o.id
+            JOIN listings l ON oi.listing_id = l.id
+            WHERE oi.id > ?
+            ORDER BY oi.id
+        ''', (self._last_order_item_id,)).fetchall()
+        for row in rows:
+            self._last_order_item_id = row['id']
+            self.fills.append({
+                'event': event_index,
+                'order_id': row['order_id'],
+                'bid_id': row['source_bid_id'],
+                'listing_id': row['listing_id'],
+                'buyer_id': row['buyer_id'],
+                'seller_id': row['seller_id'],
+                'quantity': row['quantity'],
+                'buyer_price': round(row['price_each'], 2),
+                'seller_price': round(row['seller_price_each'], 2),
+                'spread': round(row['price_each'] - row['seller_price_each'], 2),
+            })
+
+    def book(self):
+        """Final state of every bid and listing (used for golden comparisons)."""
+        bids = self.conn.execute(
+            'SELECT id, remaining_quantity, active, status, bid_payment_status FROM bids ORDER BY id'
+        ).fetchall()
+        listings = self.conn.execute(
+            'SELECT id, quantity, active FROM listings ORDER BY id'
+        ).fetchall()
+        return {
+            'bids': {str(r['id']): [r['remaining_quantity'], r['active'], r['status'],
+                                    r['bid_payment_status']] for r in bids},
+            'listings': {str(r['id']): [r['quantity'], r['active']] for r in listings},
+        }
+
+    # ── public API ────────────────────────────────────────────────────────────
+
+    def load(self, events):
+        """Apply events without timing or fill collection (book setup)."""
+        with self._patches():
+            for event in events:
+                self.apply(event)
+            self._collect_fills(-1)
+
+    def run(self, events):
+        """Replay events, timing each one.  Returns the report dict."""
+        latencies = []
+        statements = []
+        by_type = {}
+        with self._patches():
+            started = time.perf_counter()
+            for index, event in enumerate(events):
+                self._statements = 0
+                self._counting = True
+                t0 = time.perf_counter()
+                self.apply(event)
+                elapsed = time.perf_counter() - t0
+                self._counting = False
+
+                latencies.append(elapsed)
+                statements.append(self._statements)
+                stats = by_type.setdefault(event['type'], {'count': 0, 'seconds': 0.0, 'queries': 0})
+                stats['count'] += 1
+                stats['seconds'] += elapsed
+                stats['queries'] += self._statements
+                self._collect_fills(index)
+            wall = time.perf_counter() - started
+
+        return self.report(latencies, statements, by_type, wall)
+
+    def report(self, latencies, statements, by_type, wall):
+        ordered = sorted(latencies)
+        filled = sum(f['quantity'] for f in self.fills)
+        open_bids = self.conn.execute(
+            'SELECT COUNT(*) FROM bids WHERE active = 1 AND remaining_quantity > 0'
+        ).fetchone()[0]
+        return {
+            'fills': self.fills,
+            'book': self.book(),
+            'totals': {
+                'events': len(latencies),
+                'fills': len(self.fills),
+                'orders': len({f['order_id'] for f in self.fills}),
+                'filled_quantity': filled,
+                'buyer_notional': round(sum(f['quantity'] * f['buyer_price'] for f in self.fills), 2),
+                'spread_total': round(sum(f['quantity'] * f['spread'] for f in self.fills), 2),
+                'payment_failures': len(self.payment_failures),
+                'ledger_orders': len(self.ledger_orders),
+                'open_bids': open_bids,
+            },
+            'performance': {
+                'wall_seconds': round(wall, 6),
+                'events_per_second': round(len(latencies) / wall, 1) if wall > 0 else 0.0,
+                'latency_ms': {
+                    'mean': round(1000 * sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                    'p50': round(1000 * _percentile(ordered, 50), 3),
+                    'p95': round(1000 * _percentile(ordered, 95), 3),
+                    'max': round(1000 * ordered[-1], 3) if ordered else 0.0,
+                },
+                'queries': {
+                    'total': sum(statements),
+                    'per_event_mean': round(sum(statements) / len(statements), 2) if statements else 0.0,
+                    'max': max(statements) if statements else 0,
+                },
+                'by_type': {
+                    t: {
+                        'count': s['count'],
+                        'mean_ms': round(1000 * s['seconds'] / s['count'], 3),
+                        'queries_per_event': round(s['queries'] / s['count'], 2),
+                    }
+                    for t, s in sorted(by_type.items())
+                },
+            },
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def simulate(events, setup_events=None, match_on_place=False):
+    """Convenience wrapper: fresh simulator, optional setup, timed run, report."""
+    sim = MatchingSimulator(match_on_place=match_on_place)
+    try:
+        if setup_events:
+            sim.load(setup_events)
+        return sim.run(events)
+    finally:
+        sim.close()
+
+
+def golden_view(report):
+    """The deterministic subset of a report (no timings)."""
+    return {
+        'fills': report['fills'],
+        'book': report['book'],
+        'totals': report['totals'],
+    }
+
+
+def diff_reports(report, golden, limit=20):
+    """
+    Compare the deterministic parts of a report against a golden report.
+
+    Returns a list of human-readable difference strings (empty when identical).
+    """
+    current = golden_view(report)
+    expected = golden_view(golden)
+    diffs = []
+
+    for key in sorted(set(current['totals']) | set(expected['totals'])):
+        a, b = current['totals'].get(key), expected['totals'].get(key)
+        if a != b:
+            diffs.append(f'totals.{key}: {a!r} != golden {b!r}')
+
+    fills_a, fills_b = current['fills'], expected['fills']
+    for i in range(max(len(fills_a), len(fills_b))):
+        a = fills_a[i] if i < len(fills_a) else None
+        b = fills_b[i] if i < len(fills_b) else None
+        if a != b:
+            diffs.append(f'fills[{i}]: {a!r} != golden {b!r}')
+
+    for side in ('bids', 'listings'):
+        rows_a, rows_b = current['book'][side], expected['book'][side]
+        for key in sorted(set(rows_a) | set(rows_b), key=int):
+            if rows_a.get(key) != rows_b.get(key):
+                diffs.append(f'book.{side}[{key}]: {rows_a.get(key)!r} != golden {rows_b.get(key)!r}')
+
+    if len(diffs) > limit:
+        diffs = diffs[:limit] + [f'... {len(diffs) - limit} more difference(s)']
+    return diffs
+
+
+# ── Event streams ────────────────────────────────────────────────────────────
+
+def load_events(path):
+    """
+    Read an event stream from disk.
+
+    Accepts a JSON object {"setup": [...], "events": [...]}, a JSON list of
+    events, or JSON Lines (one event per line).  Returns (setup, events).
+    """
+    with open(path) as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [], [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, list):
+        return [], data
+    return data.get('setup', []), data.get('events', [])
+
+
+def generate_synthetic_events(n_events=1000, open_bids=0, seed=0):
+    """
+    Build a reproducible synthetic stream.
+
+    Setup creates gold and silver categories (two years each, so random-year
+    bids have siblings), initial spot prices and `open_bids` resting bids priced
+    well below the market so they stay open.  The timed events mix listings,
+    bids, edits, cancels and spot ticks around the market price.
+
+    Returns (setup_events, events).
+    """
+    rng = random.Random(seed)
+    spot = {'gold': 2000.0, 'silver': 25.0}
+    categories = [
+        {'type': 'category', 'id': 1, 'bucket_id': 1, 'metal': 'Gold', 'product_line': 'American Eagle',
+         'product_type': 'Coin', 'weight': '1 oz', 'purity': '.9167', 'mint': 'US Mint', 'year': '2024'},
+        {'type': 'category', 'id': 2, 'bucket_id': 2, 'metal': 'Gold', 'product_line': 'American Eagle',
+         'product_type': 'Coin', 'weight': '1 oz', 'purity': '.9167', 'mint': 'US Mint', 'year': '2023'},
+        {'type': 'category', 'id': 3, 'bucket_id': 3, 'metal': 'Silver', 'product_line': 'Maple Leaf',
+         'product_type': 'Coin', 'weight': '1 oz', 'purity': '.9999', 'mint': 'Royal Canadian Mint',
+         'year': '2024'},
+        {'type': 'category', 'id': 4, 'bucket_id': 4, 'metal': 'Silver', 'product_line': 'Maple Leaf',
+         'product_type': 'Coin', 'weight': '1 oz', 'purity': '.9999', 'mint': 'Royal Canadian Mint',
+         'year': '2023'},
+    ]
+    metal_of = {1: 'gold', 2: 'gold', 3: 'silver', 4: 'silver'}
+
+    setup = list(categories)
+    setup += [{'type': 'spot', 'metal': m, 'price': p} for m, p in spot.items()]
+    next_bid_id = 1
+    for _ in range(open_bids):
+        cat = rng.randint(1, 4)
+        setup.append({
+            'type': 'bid', 'id': next_bid_id, 'buyer_id': rng.randint(1, 200),
+            'category_id': cat, 'quantity': rng.randint(1, 10),
+            'price_per_coin': round(spot[metal_of[cat]] * rng.uniform(0.4, 0.6), 2),
+        })
+        next_bid_id += 1
+
+    events = []
+    listing_ids, bid_ids = [], []
+    metal_of_order = {}     # ('listing' | 'bid', id) -> metal, for edits
+    next_listing_id = 1
+    for _ in range(n_events):
+        roll = rng.random()
+        cat = rng.randint(1, 4)
+        metal = metal_of[cat]
+        if roll < 0.30:
+            event = {'type': 'listing', 'id': next_listing_id, 'seller_id': rng.randint(1, 50),
+                     'category_id': cat, 'quantity': rng.randint(1, 20)}
+            if rng.random() < 0.5:
+                event.update(pricing_mode='premium_to_spot', pricing_metal=metal,
+                             spot_premium=round(spot[metal] * rng.uniform(0.01, 0.06), 2),
+                             floor_price=round(spot[metal] * 0.9, 2), price_per_coin=0)
+            else:
+                event['price_per_coin'] = round(spot[metal] * rng.uniform(1.0, 1.08), 2)
+            listing_ids.append(next_listing_id)
+            metal_of_order['listing', next_listing_id] = metal
+            next_listing_id += 1
+        elif roll < 0.60:
+            event = {'type': 'bid', 'id': next_bid_id, 'buyer_id': rng.randint(1, 50),
+                     'category_id': cat, 'quantity': rng.randint(1, 10),
+                     'random_year': 1 if rng.random() < 0.25 else 0}
+            if rng.random() < 0.5:
+                event.update(pricing_mode='premium_to_spot', pricing_metal=metal,
+                             spot_premium=round(spot[metal] * rng.uniform(0.0, 0.05), 2),
+                             ceiling_price=round(spot[metal] * 1.1, 2), price_per_coin=0)
+            else:
+                event['price_per_coin'] = round(spot[metal] * rng.uniform(0.95, 1.05), 2)
+            if rng.random() < 0.02:
+                event['bid_payment_method_id'] = 'pm_sim_decline'
+            bid_ids.append(next_bid_id)
+            metal_of_order['bid', next_bid_id] = metal
+            next_bid_id += 1
+        elif roll < 0.68 and listing_ids:
+            listing_id = rng.choice(listing_ids)
+            edited_metal = metal_of_order['listing', listing_id]
+            event = {'type': 'edit_listing', 'id': listing_id,
+                     'price_per_coin': round(spot[edited_metal] * rng.uniform(0.98, 1.05), 2)}
+        elif roll < 0.76 and bid_ids:
+            bid_id = rng.choice(bid_ids)
+            edited_metal = metal_of_order['bid', bid_id]
+            event = {'type': 'edit_bid', 'id': bid_id,
+                     'price_per_coin': round(spot[edited_metal] * rng.uniform(0.97, 1.04), 2)}
+        elif roll < 0.84 and (listing_ids or bid_ids):
+            if listing_ids and (not bid_ids or rng.random() < 0.5):
+                event = {'type': 'cancel_listing', 'id': listing_ids.pop(rng.randrange(len(listing_ids)))}
+            else:
+                event = {'type': 'cancel_bid', 'id': bid_ids.pop(rng.randrange(len(bid_ids)))}
+        else:
+            spot[metal] = round(spot[metal] * (1 + rng.gauss(0, 0.004)), 2)
+            event = {'type': 'spot', 'metal': metal, 'price': spot[metal]}
+        events.append(event)
+
+    return setup, events
@@ -0,0 +1,277 @@
+"""
+Order Book Depth Service
+
+Aggregated L2 depth for a bucket: active listings (asks) and active bids
+grouped into price levels with per-level and cumulative quantity, priced at
+the current spot (latest spot_price_snapshots rows, the same source as the
+bucket page Best Ask and chart).
+
+Books are built lazily per bucket and cached in process:
+  - listing events drop the bucket's book (update_bucket_price calls
+    invalidate_bucket_depth); bid placement, edit, cancel, relist and
+    acceptance do the same from the bids blueprint
+  - spot snapshot ticks clear every book (clear_depth_cache), since
+    spot-priced orders move with the new spot
+  - a book older than DEPTH_MAX_AGE is rebuilt on read, so changes that do
+    not notify (checkout fills, expirations) are picked up within a minute
+  - every worker keeps its own books: the invalidations above are also
+    published to bucket_event_service, and reads sync the other workers'
+    events first, so a change made on one worker drops the book everywhere
+    within BUCKET_EVENT_CHECK_INTERVAL
+
+Besides the levels, each book keeps the individual order entries (price,
+quantity, owner) so "without my own orders" views and per-seller ask stats
+are served from memory instead of per-request aggregate queries.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import database as _db_module
+from services.bucket_event_service import (
+    publish_bucket_events,
+    publish_category_events,
+    subscribe,
+    sync_bucket_events,
+)
+from services.pricing_service import get_effective_bid_price, get_effective_price
+from services.reference_price_service import get_current_spots_from_snapshots
+
+DEPTH_MAX_AGE = timedelta(seconds=60)
+DEPTH_DEFAULT_LEVELS = 20
+DEPTH_MAX_LEVELS = 100
+
+# Module-level state — one set of books per process
+_lock = threading.Lock()
+_books = {}       # bucket_id -> _Book
+_versions = {}    # bucket_id -> invalidation counter (guards against stale stores)
+_epoch = 0        # bumped by clear_depth_cache() and invalidate_category_depth()
+_generation = 0   # bumped by every invalidation (caches spanning all buckets)
+
+
+class _Book:
+    """Priced orders of one bucket, best first on each side."""
+
+    def __init__(self, bucket_id, category_ids, asks, bids, built_at):
+        self.bucket_id = bucket_id
+        self.category_ids = category_ids
+        self.asks = asks          # [(price, quantity, seller_id)], ascending price
+        self.bids = bids          # [(price, quantity, buyer_id)], descending price
+        self.built_at = built_at
+        self.ask_levels = _levels(asks)
+        self.bid_levels = _levels(bids)
+
+
+def _levels(entries):
+    """Group sorted (price, quantity, owner) entries into cumulative price levels."""
+    levels = []
+    cumulative = 0
+    for price, quantity, _owner in entries:
+        cumulative += quantity
+        if levels and levels[-1]['price'] == price:
+            level = levels[-1]
+            level['quantity'] += quantity
+            level['orders'] += 1
+            level['cumulative'] = cumulative
+        else:
+            levels.append({'price': price, 'quantity': quantity, 'orders': 1, 'cumulative': cumulative})
+    return levels
+
+
+def _build_book(conn, bucket_id, now):
+    category_ids = {row['id'] for row in conn.execute(
+        'SELECT id FROM categories WHERE bucket_id = ?', (bucket_id,)
+    ).fetchall()}
+    spot_prices = get_current_spots_from_snapshots(conn)
+
+    asks = []
+    for row in conn.execute('''
+        SELECT l.id, l.seller_id, l.quantity, l.price_per_coin, l.pricing_mode,
+               l.spot_premium, l.floor_price, l.pricing_metal,
+               c.metal, c.weight, c.product_type
+        FROM listings l
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id = ? AND l.active = 1 AND l.quantity > 0
+    ''', (bucket_id,)).fetchall():
+        listing = dict(row)
+        price = get_effective_price(listing, spot_prices)
+        if price is not None:
+            asks.append((round(float(price), 2), listing['quantity'], listing['seller_id']))
+
+    bids = []
+    for row in conn.execute('''
+        SELECT b.id, b.buyer_id, b.price_per_coin, b.pricing_mode, b.spot_premium,
+               b.ceiling_price, b.pricing_metal,
+               COALESCE(b.remaining_quantity, b.quantity_requested) AS quantity,
+               c.metal, c.weight, c.product_type
+        FROM bids b
+        JOIN categories c ON b.category_id = c.id
+        WHERE c.bucket_id = ? AND b.active = 1
+          AND COALESCE(b.remaining_quantity, b.quantity_requested) > 0
+    ''', (bucket_id,)).fetchall():
+        bid = dict(row)
+        price = get_effective_bid_price(bid, spot_prices)
+        if price:
+            bids.append((round(float(price), 2), bid['quantity'], bid['buyer_id']))
+
+    asks.sort(key=lambda e: e[0])
+    bids.sort(key=lambda e: -e[0])
+    return _Book(bucket_id, category_ids, asks, bids, now)
+
+
+def _get_book(bucket_id):
+    sync_bucket_events()
+    now = datetime.now()
+    with _lock:
+        book = _books.get(bucket_id)
+        if book is not None and now - book.built_at <= DEPTH_MAX_AGE:
+            return book
+        stamp = (_epoch, _versions.get(bucket_id, 0))
+
+    conn = _db_module.get_db_connection()
+    try:
+        book = _build_book(conn, bucket_id, now)
+    finally:
+        conn.close()
+
+    with _lock:
+        # Only cache if no event invalidated the bucket while it was being built
+        if stamp == (_epoch, _versions.get(bucket_id, 0)):
+            _books[bucket_id] = book
+    return book
+
+
+def get_bucket_depth(bucket_id, levels=DEPTH_DEFAULT_LEVELS, exclude_user_id=None):
+    """
+    Aggregated depth for a bucket.
+
+    Args:
+        bucket_id: Bucket to describe
+        levels: Maximum number of price levels per side
+        exclude_user_id: Leave out this user's own listings and bids
+
+    Returns:
+        {bucket_id, best_ask, best_bid, spread, total_ask_quantity,
+         total_bid_quantity, asks: [{price, quantity, orders, cumulative}],
+         bids: [...], as_of}, or None if the bucket does not exist
+    """
+    book = _get_book(bucket_id)
+    if not book.category_ids:
+        return None
+    if exclude_user_id is None:
+        ask_levels, bid_levels = book.ask_levels, book.bid_levels
+    else:
+        ask_levels = _levels(e for e in book.asks if e[2] != exclude_user_id)
+        bid_levels = _levels(e for e in book.bids if e[2] != exclude_user_id)
+
+    best_ask = ask_levels[0]['price'] if ask_levels else None
+    best_bid = bid_levels[0]['price'] if bid_levels else None
+    return {
+        'bucket_id': bucket_id,
+        'best_ask': best_ask,
+        'best_bid': best_bid,
+        'spread': round(best_ask - best_bid, 2) if best_ask is not None and best_bid is not None else None,
+        'total_ask_quantity': ask_levels[-1]['cumulative'] if ask_levels else 0,
+        'total_bid_quantity': bid_levels[-1]['cumulative'] if bid_levels else 0,
+        'asks': [dict(level) for level in ask_levels[:levels]],
+        'bids': [dict(level) for level in bid_levels[:levels]],
+        'as_of': book.built_at.isoformat(),
+    }
+
+
+def get_bucket_seller_stats(bucket_id):
+    """
+    Per-seller ask stats from the cached book.
+
+    Returns:
+        {seller_id: {lowest_price, avg_price, total_qty}}, sellers in ascending
+        lowest_price order
+    """
+    book = _get_book(bucket_id)
+    stats = {}
+    prices = {}
+    for price, quantity, seller_id in book.asks:
+        entry = stats.setdefault(seller_id, {'lowest_price': price, 'avg_price': None, 'total_qty': 0})
+        entry['total_qty'] += quantity
+        prices.setdefault(seller_id, []).append(price)
+    for seller_id, seller_prices in prices.items():
+        stats[seller_id]['avg_price'] = sum(seller_prices) / len(seller_prices)
+    return stats
+
+
+def get_bucket_version(bucket_id):
+    """
+    Invalidation stamp of a bucket: changes on every event that drops its
+    book, for caches derived from the same orders.
+    """
+    sync_bucket_events()
+    with _lock:
+        return (_epoch, _versions.get(bucket_id, 0))
+
+
+def get_depth_generation():
+    """
+    Invalidation stamp across all buckets: changes on every listing, bid or
+    spot event, for caches derived from more than one bucket.
+    """
+    sync_bucket_events()
+    with _lock:
+        return _generation
+
+
+def _drop_buckets(bucket_ids):
+    global _generation
+    with _lock:
+        for bucket_id in bucket_ids:
+            _books.pop(bucket_id, None)
+            _versions[bucket_id] = _versions.get(bucket_id, 0) + 1
+        _generation += 1
+
+
+def _drop_all():
+    global _epoch, _generation
+    with _lock:
+        _books.clear()
+        _epoch += 1
+        _generation += 1
+
+
+def _apply_bucket_events(bucket_ids, everything):
+    """bucket_event_service subscriber: drop books changed by other workers."""
+    if everything:
+        _drop_all()
+    else:
+        _drop_buckets(bucket_ids)
+
+
+subscribe(_apply_bucket_events)
+
+
+def invalidate_bucket_depth(bucket_id, publish=True):
+    """
+    Drop the cached book of a bucket after a listing or bid change.
+
+    publish=False when the caller records the bucket event itself (in its
+    own transaction).
+    """
+    _drop_buckets([bucket_id])
+    if publish:
+        publish_bucket_events([bucket_id])
+
+
+def invalidate_category_depth(category_id):
+    """Drop any cached book containing this category (bid rows only know their category)."""
+    global _epoch, _generation
+    with _lock:
+        for bucket_id in [b for b, book in _books.items() if category_id in book.category_ids]:
+            del _books[bucket_id]
+        # The bucket is unknown here, so also discard books still being built
+        _epoch += 1
+        _generation += 1
+    publish_category_events([category_id])
+
+
+def clear_depth_cache():
+    """Drop every cached book (spot snapshot ticks reprice spot-priced orders)."""
+    _drop_all()
+    publish_bucket_events([None])
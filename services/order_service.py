@@ -2,6 +2,7 @@ import json
 from datetime import datetime
 
 import database as _db_module
+from services.user_stats_service import refresh_order_user_stats
 
 
 def _get_conn():
@@ -218,4 +219,5 @@ def create_order(buyer_id, cart_items, shipping_address, recipient_first='', rec
     conn.commit()
     conn.close()
 
+    refresh_order_user_stats(order_id)
     return order_id
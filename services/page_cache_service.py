@@ -0,0 +1,171 @@
+"""
+Page Cache Service
+
+Rendered responses of the anonymous browse pages (landing, /buy, bucket
+pages), cached in process so a logged-out visit skips the context
+processors, the admin and maintenance lookups and the page build.
+
+Entries are keyed by endpoint, path and normalised query args (sorted, blank
+values dropped) and carry an invalidation stamp from the order book
+(services/order_book_service.py):
+
+  - bucket pages: get_bucket_version(bucket_id), so the listing, bid and
+    spot events that drop the bucket's book and snapshot drop its page too;
+    Random Year pages also carry the versions of the sibling buckets whose
+    listings they show
+  - /buy and the landing page: get_depth_generation(), which moves on any
+    of those events
+
+An entry whose stamp moved, or that is older than PAGE_CACHE_MAX_AGE
+(changes that do not notify: checkout fills, ratings), is rebuilt on the
+next request.  Memory is bounded by PAGE_CACHE_MAX_BYTES of response bodies
+with least-recently-used eviction.
+
+Hit and miss counters feed get_page_cache_stats() (admin system settings).
+
+Each worker keeps its own entries; the order book stamps also move on events
+from other workers (services/bucket_event_service.py), so a change made on one
+worker drops the affected pages on all of them.  clear_page_cache() publishes
+an every-bucket event for the same reason, which moves every stamp on every
+worker.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from services.bucket_event_service import publish_bucket_events
+from services.bucket_snapshot_service import get_bucket_snapshot
+from services.order_book_service import get_bucket_version, get_depth_generation
+
+PAGE_CACHE_MAX_AGE = timedelta(seconds=30)
+PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+PAGE_CACHE_MAX_ENTRY_BYTES = 1024 * 1024
+
+# Endpoints served from the cache for anonymous GET requests
+CACHEABLE_ENDPOINTS = frozenset(['index', 'buy.buy', 'buy.view_bucket'])
+
+# Module-level state — one cache per process
+_lock = threading.Lock()
+_entries = OrderedDict()    # key -> entry dict, least recently used first
+_bytes = 0
+_hits = 0
+_misses = 0
+_evictions = 0
+
+
+def page_key(endpoint, path, args):
+    """
+    Cache key for a request: endpoint, path and query args with blank values
+    dropped, in a stable order.
+
+    Args:
+        args: iterable of (name, value) pairs (e.g. request.args.items(multi=True))
+    """
+    query = tuple(sorted((name, value.strip()) for name, value in args if value.strip()))
+    return (endpoint, path, query)
+
+
+def page_stamp(endpoint, view_args, args=None):
+    """Invalidation stamp of an endpoint's pages (see module docstring)."""
+    if endpoint == 'buy.view_bucket':
+        bucket_id = view_args.get('bucket_id')
+        stamp = get_bucket_version(bucket_id)
+        if args is None or args.get('random_year') != '1':
+            return stamp
+        snapshot = get_bucket_snapshot(bucket_id)
+        siblings = snapshot['sibling_bucket_ids'] if snapshot is not None else []
+        return (stamp, tuple(get_bucket_version(sibling_id)
+                             for sibling_id in siblings if sibling_id != bucket_id))
+    return get_depth_generation()
+
+
+def get_page(key, stamp, now=None):
+    """
+    Cached response for `key`, or None on a miss.
+
+    Returns:
+        {'status', 'headers', 'body'}.  Shared between requests: callers
+        must not mutate.
+    """
+    global _hits, _misses
+    now = now or datetime.now()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry['stamp'] != stamp or now - entry['stored_at'] > PAGE_CACHE_MAX_AGE:
+            _misses += 1
+            return None
+        _entries.move_to_end(key)
+        _hits += 1
+        return entry
+
+
+def store_page(key, stamp, status, headers, body, now=None):
+    """
+    Cache a rendered response under `key`, evicting least recently used
+    entries to stay within PAGE_CACHE_MAX_BYTES.  Oversized bodies are not
+    cached.
+    """
+    global _bytes, _evictions
+    if len(body) > PAGE_CACHE_MAX_ENTRY_BYTES:
+        return
+    entry = {
+        'stamp': stamp,
+        'stored_at': now or datetime.now(),
+        'status': status,
+        'headers': headers,
+        'body': body,
+    }
+    with _lock:
+        previous = _entries.pop(key, None)
+        if previous is not None:
+            _bytes -= len(previous['body'])
+        _entries[key] = entry
+        _bytes += len(body)
+        while _bytes > PAGE_CACHE_MAX_BYTES:
+            _, evicted = _entries.popitem(last=False)
+            _bytes -= len(evicted['body'])
+            _evictions += 1
+
+
+def get_page_cache_stats():
+    """Hit ratio and footprint of the cache since startup (or the last reset)."""
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            'hits': _hits,
+            'misses': _misses,
+            'hit_ratio': round(_hits / lookups, 4) if lookups else None,
+            'entries': len(_entries),
+            'bytes': _bytes,
+            'max_bytes': PAGE_CACHE_MAX_BYTES,
+            'evictions': _evictions,
+        }
+
+
+def _drop_entries():
+    global _bytes
+    with _lock:
+        _entries.clear()
+        _bytes = 0
+
+
+def clear_page_cache():
+    """
+    Drop every cached page on every worker (settings rendered into every
+    page changed).
+
+    The other workers' entries are dropped through their stamps: the
+    every-bucket event moves get_bucket_version and get_depth_generation
+    there within BUCKET_EVENT_CHECK_INTERVAL.
+    """
+    _drop_entries()
+    publish_bucket_events([None])
+
+
+def reset_page_cache():
+    """Drop this process's cached pages and zero the counters."""
+    global _hits, _misses, _evictions
+    _drop_entries()
+    with _lock:
+        _hits = _misses = _evictions = 0
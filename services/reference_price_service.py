@@ -21,13 +21,26 @@ Approximations (documented):
   as having been active since their creation date.
 
 The chart endpoint calls get_reference_price_history() and never touches the
-external spot API directly.
+external spot API directly.  The series is built in one forward sweep over the
+event timestamps (see _sweep_reference_series); the get_*_at_time helpers give
+the same answer for a single timestamp.
+
+get_persisted_reference_history() serves the same series from the
+bucket_reference_series table, sweeping only the points after the last stored
+one instead of rebuilding the whole range on every request.  The table is
+written by the event and spot-tick hooks and built by a spot-tick backfill.
 """
 
+import logging
+
 import database as _db_module
 from database import IS_POSTGRES
 from datetime import datetime, timedelta
+from itertools import chain
 from services.pricing_service import get_effective_price, get_effective_bid_price
+from services.chart_downsampling import downsample_step_series
+
+logger = logging.getLogger(__name__)
 
 
 def _get_conn():
@@ -271,34 +284,183 @@ def compute_reference_price(best_ask, best_bid, last_cleared):
 
 
 # ---------------------------------------------------------------------------
-# Main time-series builder
+# Sweep-line series builder
 # ---------------------------------------------------------------------------
 
-def get_reference_price_history(bucket_id, days=30):
+def _pricing_metal(row):
+    """Metal a variable-spot listing or bid is priced against (lower-case)."""
+    return (row.get('pricing_metal') or row.get('metal', 'gold')).lower()
+
+
+def _not_after(value, t_str):
     """
-    Build and return the Reference Price time series for a bucket.
+    `value <= t_str` with the semantics the per-timestamp queries use.
+
+    SQLite hands back timestamps as text and compares them as strings;
+    PostgreSQL hands back datetimes and compares chronologically.
+    """
+    if isinstance(value, datetime):
+        return value <= datetime.fromisoformat(t_str)
+    return value <= t_str
 
-    Returns a dict with:
-      primary_series      — [{'t': ISO-8601 str, 'price': float}] chronological
-      latest_spot_as_of   — ISO-8601 str or None (most recent spot snapshot used)
-      latest_bid_as_of    — ISO-8601 str or None (most recent bid event)
-      latest_clear_as_of  — ISO-8601 str or None (most recent trade)
+
+def _sweep_reference_series(conn, bucket_id, listings, sorted_times):
+    """
+    Compute P(t) at every timestamp in `sorted_times` in one forward pass.
+
+    Produces exactly what calling get_best_ask_at_time, get_best_bid_at_time
+    and get_last_cleared_price_at_time at each timestamp would, but loads the
+    spot series, active bids and trades once and keeps running state:
+
+    - spot per metal advances as snapshots pass; variable-spot asks and bids
+      for a metal are re-priced only when its spot changes
+    - bids join the book when their created_at passes (running max for static
+      bids, per-metal max for variable bids)
+    - last cleared price advances as trades pass
+
+    Ties on a timestamp resolve to the lowest row id, matching the scan order
+    of the single-timestamp queries.
 
     Args:
-        bucket_id: bucket ID
-        days:      number of days of history to return (e.g. 30 for 1m)
+        conn:         open DB connection
+        bucket_id:    bucket ID
+        listings:     list of active listing dicts for the bucket
+        sorted_times: ascending ISO-8601 timestamps
+
+    Returns:
+        [{'t': ISO-8601 str, 'price': float}] for timestamps with a price
     """
-    conn = _get_conn()
+    if not sorted_times:
+        return []
+    t_first, t_last = sorted_times[0], sorted_times[-1]
+
+    bids = [
+        dict(row) for row in conn.execute(
+            """
+            SELECT b.id, b.created_at, b.price_per_coin, b.pricing_mode,
+                   b.spot_premium, b.ceiling_price, b.pricing_metal,
+                   c.metal, c.weight
+            FROM bids b
+            JOIN categories c ON b.category_id = c.id
+            WHERE c.bucket_id = ?
+              AND b.active = 1
+              AND b.created_at IS NOT NULL
+            """,
+            (bucket_id,)
+        ).fetchall()
+    ]
+    bids.sort(key=lambda b: (b['created_at'], b['id']))
+
+    static_asks = [l for l in listings if l.get('pricing_mode', 'static') != 'premium_to_spot']
+    variable_asks = {}
+    for listing in listings:
+        if listing.get('pricing_mode', 'static') == 'premium_to_spot':
+            variable_asks.setdefault(_pricing_metal(listing), []).append(listing)
+
+    metals = set(variable_asks)
+    metals.update(_pricing_metal(b) for b in bids if b.get('pricing_mode') == 'premium_to_spot')
+
+    # Spot: value at the first timestamp, then every later snapshot in range
+    spot = {}
+    spot_events = []
+    for metal in metals:
+        spot[metal] = get_spot_at_time(conn, metal, t_first)
+        rows = conn.execute(
+            f"""
+            SELECT id, {_ts_cmp('as_of')} AS as_of_key, price_usd
+            FROM spot_price_snapshots
+            WHERE metal = ? AND {_ts_cmp('as_of')} > ? AND {_ts_cmp('as_of')} <= ?
+            """,
+            (metal, t_first, t_last)
+        ).fetchall()
+        spot_events.extend((r['as_of_key'], -r['id'], metal, r['price_usd']) for r in rows)
+    spot_events.sort()
+
+    # Trades: last clear at the first timestamp, then every later trade in range
+    last_cleared = get_last_cleared_price_at_time(conn, bucket_id, t_first)
+    trade_rows = conn.execute(
+        """
+        SELECT oi.id, oi.price_each, o.created_at
+        FROM order_items oi
+        JOIN orders o     ON oi.order_id  = o.id
+        JOIN listings l   ON oi.listing_id = l.id
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id = ?
+          AND o.created_at > ?
+          AND o.created_at <= ?
+        """,
+        (bucket_id, t_first, t_last)
+    ).fetchall()
+    trades = sorted((r['created_at'], -r['id'], float(r['price_each'])) for r in trade_rows)
+
+    def ask_for(listing, metal):
+        s = spot.get(metal)
+        if s is None:
+            return listing.get('floor_price') or listing.get('price_per_coin')
+        return get_effective_price(listing, spot_prices={metal: s})
+
+    def bid_for(bid, metal):
+        s = spot.get(metal)
+        return get_effective_bid_price(bid, spot_prices={metal: s} if s is not None else None)
+
+    def best(values, pick):
+        values = [v for v in values if v is not None]
+        return pick(values) if values else None
+
+    static_ask = best((get_effective_price(l) for l in static_asks), min)
+    variable_ask = {}
+    static_bid = None
+    variable_bids = {}
+    variable_bid = {}
+
+    dirty = set(variable_asks)
+    spot_i = bid_i = trade_i = 0
+    series = []
 
-    now   = datetime.now()
-    start = now - timedelta(days=days)
-    start_iso = start.isoformat()
-    now_iso   = now.isoformat()
+    for t_str in sorted_times:
+        while spot_i < len(spot_events) and _not_after(spot_events[spot_i][0], t_str):
+            _, _, metal, price = spot_events[spot_i]
+            if price != spot[metal]:
+                spot[metal] = price
+                dirty.add(metal)
+            spot_i += 1
+
+        while bid_i < len(bids) and _not_after(bids[bid_i]['created_at'], t_str):
+            bid = bids[bid_i]
+            if bid.get('pricing_mode') == 'premium_to_spot':
+                metal = _pricing_metal(bid)
+                variable_bids.setdefault(metal, []).append(bid)
+                dirty.add(metal)
+            else:
+                static_bid = best((static_bid, get_effective_bid_price(bid)), max)
+            bid_i += 1
 
-    # ------------------------------------------------------------------
-    # 1. Load currently-active listings for the bucket
-    # ------------------------------------------------------------------
-    listings = conn.execute(
+        while trade_i < len(trades) and _not_after(trades[trade_i][0], t_str):
+            last_cleared = trades[trade_i][2]
+            trade_i += 1
+
+        for metal in dirty:
+            variable_ask[metal] = best((ask_for(l, metal) for l in variable_asks.get(metal, ())), min)
+            variable_bid[metal] = best((bid_for(b, metal) for b in variable_bids.get(metal, ())), max)
+        dirty.clear()
+
+        best_ask = best([static_ask, *variable_ask.values()], min)
+        best_bid = best([static_bid, *variable_bid.values()], max)
+
+        ref = compute_reference_price(best_ask, best_bid, last_cleared)
+        if ref is not None:
+            series.append({'t': t_str, 'price': round(ref, 4)})
+
+    return series
+
+
+# ---------------------------------------------------------------------------
+# Main time-series builder
+# ---------------------------------------------------------------------------
+
+def _load_active_listings(conn, bucket_id):
+    """Currently-active listings for a bucket, as dicts with pricing fields."""
+    return [dict(l) for l in conn.execute(
         """
         SELECT l.price_per_coin, l.pricing_mode,
                l.spot_premium, l.floor_price, l.pricing_metal,
@@ -310,16 +472,19 @@ def get_reference_price_history(bucket_id, days=30):
           AND l.quantity > 0
         """,
         (bucket_id,)
-    ).fetchall()
+    ).fetchall()]
 
-    has_variable = any(
-        dict(l).get('pricing_mode') == 'premium_to_spot'
-        for l in listings
-    )
 
-    # ------------------------------------------------------------------
-    # 2. Collect event timestamps that define state changes
-    # ------------------------------------------------------------------
+def _collect_event_times(conn, bucket_id, listings, since_iso):
+    """
+    Collect the timestamps at or after `since_iso` at which P(t) can change.
+
+    Returns:
+        (event_times set, {'latest_spot_as_of', 'latest_bid_as_of',
+        'latest_clear_as_of'})
+    """
+    has_variable = any(l.get('pricing_mode') == 'premium_to_spot' for l in listings)
+
     event_times = set()
 
     # a) Spot price snapshots (only for variable-spot buckets — they change BestAsk)
@@ -328,14 +493,12 @@ def get_reference_price_history(bucket_id, days=30):
         # Determine which metals are needed
         metals = set()
         for l in listings:
-            ld = dict(l)
-            if ld.get('pricing_mode') == 'premium_to_spot':
-                m = (ld.get('pricing_metal') or ld.get('metal', 'gold')).lower()
-                metals.add(m)
+            if l.get('pricing_mode') == 'premium_to_spot':
+                metals.add(_pricing_metal(l))
 
         for metal in metals:
             # Use REPLACE so rows stored with a space separator ("YYYY-MM-DD HH:MM:SS")
-            # are compared correctly against the T-format start_iso parameter.
+            # are compared correctly against the T-format since_iso parameter.
             rows = conn.execute(
                 f"""
                 SELECT {_ts_str('as_of')} AS as_of_norm
@@ -343,7 +506,7 @@ def get_reference_price_history(bucket_id, days=30):
                 WHERE metal = ? AND {_ts_cmp('as_of')} >= ?
                 ORDER BY {_ts_cmp('as_of')} ASC
                 """,
-                (metal, start_iso)
+                (metal, since_iso)
             ).fetchall()
             for row in rows:
                 event_times.add(row['as_of_norm'])
@@ -372,7 +535,7 @@ def get_reference_price_history(bucket_id, days=30):
         WHERE c.bucket_id = ? AND {_ts_cmp('b.created_at')} >= ?
         ORDER BY ts ASC
         """,
-        (bucket_id, start_iso)
+        (bucket_id, since_iso)
     ).fetchall()
     for row in bid_rows:
         event_times.add(row['ts'])
@@ -391,7 +554,7 @@ def get_reference_price_history(bucket_id, days=30):
         GROUP BY o.id
         ORDER BY ts ASC
         """,
-        (bucket_id, start_iso)
+        (bucket_id, since_iso)
     ).fetchall()
     for row in trade_rows:
         event_times.add(row['ts'])
@@ -405,43 +568,449 @@ def get_reference_price_history(bucket_id, days=30):
         WHERE bucket_id = ? AND {_ts_cmp('timestamp')} >= ?
         ORDER BY ts ASC
         """,
-        (bucket_id, start_iso)
+        (bucket_id, since_iso)
     ).fetchall()
     for row in ph_rows:
         event_times.add(row['ts'])
 
-    # e) Always include "now" so the series extends to the present
+    return event_times, {
+        'latest_spot_as_of':  latest_spot_as_of,
+        'latest_bid_as_of':   latest_bid_as_of,
+        'latest_clear_as_of': latest_clear_as_of,
+    }
+
+
+def get_reference_price_history(bucket_id, days=30):
+    """
+    Build and return the Reference Price time series for a bucket.
+
+    Returns a dict with:
+      primary_series      — [{'t': ISO-8601 str, 'price': float}] chronological
+      latest_spot_as_of   — ISO-8601 str or None (most recent spot snapshot used)
+      latest_bid_as_of    — ISO-8601 str or None (most recent bid event)
+      latest_clear_as_of  — ISO-8601 str or None (most recent trade)
+
+    Args:
+        bucket_id: bucket ID
+        days:      number of days of history to return (e.g. 30 for 1m)
+    """
+    conn = _get_conn()
+
+    now   = datetime.now()
+    start = now - timedelta(days=days)
+    start_iso = start.isoformat()
+    now_iso   = now.isoformat()
+
+    listings = _load_active_listings(conn, bucket_id)
+    event_times, latest = _collect_event_times(conn, bucket_id, listings, start_iso)
+
+    # Always include "now" so the series extends to the present
     event_times.add(now_iso)
 
-    # ------------------------------------------------------------------
-    # 3. If no events at all, seed a synthetic start point
-    # ------------------------------------------------------------------
+    # If no events at all, seed a synthetic start point
     if len(event_times) <= 1:
-        # Only "now" — compute once and return a single point
         event_times.add(start_iso)
 
-    sorted_times = sorted(event_times)
+    series = _sweep_reference_series(conn, bucket_id, listings, sorted(event_times))
 
-    # ------------------------------------------------------------------
-    # 4. Build series: compute P(t) at each event timestamp
-    # ------------------------------------------------------------------
-    listings_list = [dict(l) for l in listings]
+    conn.close()
 
-    series = []
-    for t_str in sorted_times:
-        best_ask    = get_best_ask_at_time(conn, bucket_id, listings_list, t_str)
-        best_bid    = get_best_bid_at_time(conn, bucket_id, t_str)
-        last_cleared = get_last_cleared_price_at_time(conn, bucket_id, t_str)
+    return {'primary_series': series, **latest}
 
-        ref = compute_reference_price(best_ask, best_bid, last_cleared)
-        if ref is not None:
-            series.append({'t': t_str, 'price': round(ref, 4)})
 
-    conn.close()
+# ---------------------------------------------------------------------------
+# Persisted series (bucket_reference_series)
+# ---------------------------------------------------------------------------
+#
+# Points are stored per (bucket_id, t) as they are computed and are not
+# rebuilt afterwards, so each stored point reflects the listings that were
+# active when it was appended.  Every extension recomputes from
+# _EXTEND_OVERLAP before the last stored point so events stamped slightly in
+# the past (clock skew, slow writers) are still picked up.  A listing edit
+# changes the listing set the stored points assumed, so the edit route
+# invalidates the bucket and the next spot tick rebuilds it.  Chart reads
+# never write: they sweep the points after the last stored one in memory.
+
+REFERENCE_SERIES_DAYS = 365
+REFERENCE_BACKFILL_BATCH = 20
+_EXTEND_OVERLAP = timedelta(hours=1)
+
+
+def _latest_event_times(conn, bucket_id, listings, since_iso):
+    """Polling metadata matching what _collect_event_times reports for `since_iso`."""
+    latest = {'latest_spot_as_of': None, 'latest_bid_as_of': None, 'latest_clear_as_of': None}
+
+    metals = sorted({_pricing_metal(l) for l in listings if l.get('pricing_mode') == 'premium_to_spot'})
+    if metals:
+        row = conn.execute(
+            f"""
+            SELECT {_ts_str('MAX(as_of)')} AS latest FROM spot_price_snapshots
+            WHERE metal IN ({','.join('?' * len(metals))})
+            """,
+            metals
+        ).fetchone()
+        latest['latest_spot_as_of'] = row['latest'] if row else None
 
-    return {
-        'primary_series':    series,
-        'latest_spot_as_of': latest_spot_as_of,
-        'latest_bid_as_of':  latest_bid_as_of,
-        'latest_clear_as_of': latest_clear_as_of,
-    }
+    row = conn.execute(
+        f"""
+        SELECT MAX({_ts_str('b.created_at')}) AS latest FROM bids b
+        JOIN categories c ON b.category_id = c.id
+        WHERE c.bucket_id = ? AND {_ts_cmp('b.created_at')} >= ?
+        """,
+        (bucket_id, since_iso)
+    ).fetchone()
+    latest['latest_bid_as_of'] = row['latest'] if row else None
+
+    row = conn.execute(
+        f"""
+        SELECT MAX({_ts_str('o.created_at')}) AS latest FROM order_items oi
+        JOIN orders o     ON oi.order_id  = o.id
+        JOIN listings l   ON oi.listing_id = l.id
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id = ? AND {_ts_cmp('o.created_at')} >= ?
+        """,
+        (bucket_id, since_iso)
+    ).fetchone()
+    latest['latest_clear_as_of'] = row['latest'] if row else None
+
+    return latest
+
+
+def get_reference_watermarks(conn, bucket_id):
+    """
+    Cheap change markers for everything P(t) depends on — no pricing work.
+
+    Any event that can change the bucket's series changes at least one value:
+    a listing or bid being created, edited, filled or cancelled (row counts,
+    max ids and id-weighted price checksums), a trade, a bucket price-history
+    event, or a spot snapshot for a metal a variable listing or bid uses.
+
+    Args:
+        conn:      open DB connection
+        bucket_id: bucket ID
+
+    Returns:
+        tuple of scalars, suitable for utils.http_cache.compute_etag()
+    """
+    listings = conn.execute(
+        """
+        SELECT COUNT(*) AS n, MAX(l.id) AS max_id,
+               SUM(l.id * (COALESCE(l.price_per_coin, 0) + COALESCE(l.spot_premium, 0)
+                           + COALESCE(l.floor_price, 0) + l.quantity)) AS checksum
+        FROM listings l
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id = ? AND l.active = 1 AND l.quantity > 0
+        """,
+        (bucket_id,)
+    ).fetchone()
+
+    bids = conn.execute(
+        """
+        SELECT COUNT(*) AS n, MAX(b.id) AS max_id,
+               SUM(b.id * (COALESCE(b.price_per_coin, 0) + COALESCE(b.spot_premium, 0)
+                           + COALESCE(b.ceiling_price, 0))) AS checksum
+        FROM bids b
+        JOIN categories c ON b.category_id = c.id
+        WHERE c.bucket_id = ? AND b.active = 1
+        """,
+        (bucket_id,)
+    ).fetchone()
+
+    trades = conn.execute(
+        """
+        SELECT COUNT(*) AS n, MAX(oi.id) AS max_id
+        FROM order_items oi
+        JOIN listings l   ON oi.listing_id = l.id
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id = ?
+        """,
+        (bucket_id,)
+    ).fetchone()
+
+    events = conn.execute(
+        'SELECT MAX(id) AS max_id FROM bucket_price_history WHERE bucket_id = ?',
+        (bucket_id,)
+    ).fetchone()
+
+    spot = conn.execute(
+        f"""
+        SELECT {_ts_str('MAX(as_of)')} AS latest FROM spot_price_snapshots
+        WHERE metal IN (
+            SELECT LOWER(COALESCE(l.pricing_metal, c.metal))
+            FROM listings l JOIN categories c ON l.category_id = c.id
+            WHERE c.bucket_id = ? AND l.active = 1 AND l.pricing_mode = 'premium_to_spot'
+            UNION
+            SELECT LOWER(COALESCE(b.pricing_metal, c.metal))
+            FROM bids b JOIN categories c ON b.category_id = c.id
+            WHERE c.bucket_id = ? AND b.active = 1 AND b.pricing_mode = 'premium_to_spot'
+        )
+        """,
+        (bucket_id, bucket_id)
+    ).fetchone()
+
+    return (
+        listings['n'], listings['max_id'], listings['checksum'],
+        bids['n'], bids['max_id'], bids['checksum'],
+        trades['n'], trades['max_id'],
+        events['max_id'],
+        spot['latest'],
+    )
+
+
+def extend_reference_series(conn, bucket_id, now=None, build=True, listings=None):
+    """
+    Bring a bucket's stored reference series up to `now`.
+
+    With no stored points the last REFERENCE_SERIES_DAYS are built in one
+    sweep (skipped when build=False, so event hooks never pay for a cold
+    build).  Otherwise points are recomputed from _EXTEND_OVERLAP before the
+    last stored point; rows are only rewritten when the result differs.
+
+    Args:
+        conn:      open DB connection
+        bucket_id: bucket ID
+        now:       datetime to extend to (default: datetime.now())
+        build:     build the full window when nothing is stored yet
+        listings:  active listings from _load_active_listings(), if already loaded
+
+    Returns:
+        int number of points written
+    """
+    now = now or datetime.now()
+    now_iso = now.isoformat()
+
+    row = conn.execute(
+        'SELECT MAX(t) AS last_t FROM bucket_reference_series WHERE bucket_id = ?',
+        (bucket_id,)
+    ).fetchone()
+    last_t = row['last_t'] if row else None
+
+    if last_t is None:
+        if not build:
+            return 0
+        since_iso = (now - timedelta(days=REFERENCE_SERIES_DAYS)).isoformat()
+    else:
+        since_iso = (datetime.fromisoformat(last_t) - _EXTEND_OVERLAP).isoformat()
+
+    if listings is None:
+        listings = _load_active_listings(conn, bucket_id)
+    event_times, _ = _collect_event_times(conn, bucket_id, listings, since_iso)
+    sorted_times = sorted(t for t in event_times if t <= now_iso)
+    if last_t is None and not sorted_times:
+        sorted_times = [since_iso]
+
+    points = _sweep_reference_series(conn, bucket_id, listings, sorted_times)
+
+    stored = conn.execute(
+        'SELECT t, price FROM bucket_reference_series WHERE bucket_id = ? AND t >= ? ORDER BY t',
+        (bucket_id, since_iso)
+    ).fetchall()
+    if [(r['t'], r['price']) for r in stored] == [(p['t'], p['price']) for p in points]:
+        return 0
+
+    cursor = conn.cursor()
+    cursor.execute(
+        'DELETE FROM bucket_reference_series WHERE bucket_id = ? AND t >= ?',
+        (bucket_id, since_iso)
+    )
+    cursor.executemany(
+        'INSERT INTO bucket_reference_series (bucket_id, t, price) VALUES (?, ?, ?)',
+        [(bucket_id, p['t'], p['price']) for p in points]
+    )
+    conn.commit()
+    return len(points)
+
+
+def invalidate_reference_series(conn, bucket_id):
+    """Drop a bucket's stored series; the caller commits."""
+    conn.execute('DELETE FROM bucket_reference_series WHERE bucket_id = ?', (bucket_id,))
+
+
+def refresh_reference_series(bucket_id):
+    """
+    Event hook: append new points to a bucket's stored series, if it has one.
+
+    Never raises — price history must not break the listing/trade flow.
+    """
+    conn = _get_conn()
+    try:
+        extend_reference_series(conn, bucket_id, build=False)
+    except Exception as e:
+        logger.warning("[reference_series] Extend failed for bucket %s: %s", bucket_id, e)
+    finally:
+        conn.close()
+
+
+def refresh_all_reference_series():
+    """
+    Spot-tick hook: extend every bucket that has a stored series.
+
+    Returns:
+        int number of buckets that gained or changed points
+    """
+    conn = _get_conn()
+    refreshed = 0
+    try:
+        bucket_ids = [r['bucket_id'] for r in conn.execute(
+            'SELECT DISTINCT bucket_id FROM bucket_reference_series'
+        ).fetchall()]
+        now = datetime.now()
+        for bucket_id in bucket_ids:
+            if extend_reference_series(conn, bucket_id, now=now, build=False):
+                refreshed += 1
+    except Exception as e:
+        logger.warning("[reference_series] Spot-tick extend failed: %s", e)
+    finally:
+        conn.close()
+    return refreshed
+
+
+def backfill_reference_series(limit=REFERENCE_BACKFILL_BATCH):
+    """
+    Build the stored series for up to `limit` buckets that have none yet.
+
+    Run from the spot tick, after refresh_all_reference_series(), so cold
+    buckets are built in the background rather than by a chart request.
+    Only buckets with an active listing or bid are considered.  Never raises.
+
+    Returns:
+        int number of buckets built
+    """
+    conn = _get_conn()
+    built = 0
+    try:
+        bucket_ids = [r['bucket_id'] for r in conn.execute(
+            """
+            SELECT DISTINCT c.bucket_id FROM categories c
+            WHERE c.bucket_id IS NOT NULL
+              AND (EXISTS (SELECT 1 FROM listings l WHERE l.category_id = c.id
+                           AND l.active = 1 AND l.quantity > 0)
+                   OR EXISTS (SELECT 1 FROM bids b WHERE b.category_id = c.id AND b.active = 1))
+              AND NOT EXISTS (SELECT 1 FROM bucket_reference_series s WHERE s.bucket_id = c.bucket_id)
+            ORDER BY c.bucket_id
+            LIMIT ?
+            """,
+            (limit,)
+        ).fetchall()]
+        now = datetime.now()
+        for bucket_id in bucket_ids:
+            if extend_reference_series(conn, bucket_id, now=now):
+                built += 1
+    except Exception as e:
+        logger.warning("[reference_series] Backfill failed: %s", e)
+    finally:
+        conn.close()
+    return built
+
+
+def get_persisted_reference_history(bucket_id, days=30, max_points=None, since=None, now=None):
+    """
+    Reference Price series for a bucket, read from bucket_reference_series.
+
+    Read-only: stored points come from one indexed range read, and the points
+    from _EXTEND_OVERLAP before the last stored one (what
+    extend_reference_series would recompute) are swept in memory.  A bucket
+    with no stored series is swept in memory over the whole range until
+    backfill_reference_series() builds it.  Same return shape as
+    get_reference_price_history(), plus first_price (the range's opening
+    price); the series ends with a point at `now` carrying the latest price,
+    since P(t) only moves at events.
+
+    Args:
+        bucket_id:  bucket ID
+        days:       number of days of history to return (at most REFERENCE_SERIES_DAYS)
+        max_points: downsample the points to about this many while streaming
+                    them (see services/chart_downsampling.py); None returns
+                    every point
+        since:      ISO-8601 t; return only the points after it, read from the
+                    stored rows directly and never downsampled
+        now:        datetime ending the range (default: datetime.now())
+    """
+    conn = _get_conn()
+    try:
+        now = now or datetime.now()
+        start = now - timedelta(days=min(days, REFERENCE_SERIES_DAYS))
+        start_iso = start.isoformat()
+        now_iso = now.isoformat()
+        if since and since >= start_iso:
+            after_op, before_op, lower_iso = '>', '<=', since
+        else:
+            after_op, before_op, lower_iso = '>=', '<', start_iso
+            since = None
+
+        listings = _load_active_listings(conn, bucket_id)
+
+        row = conn.execute(
+            'SELECT MAX(t) AS last_t FROM bucket_reference_series WHERE bucket_id = ?',
+            (bucket_id,)
+        ).fetchone()
+        last_t = row['last_t'] if row else None
+        tail_iso = start_iso
+        if last_t is not None:
+            tail_iso = max(tail_iso, (datetime.fromisoformat(last_t) - _EXTEND_OVERLAP).isoformat())
+
+        event_times, _ = _collect_event_times(conn, bucket_id, listings, tail_iso)
+        tail_times = sorted(t for t in event_times if t <= now_iso)
+        if tail_iso == start_iso and not tail_times:
+            tail_times = [start_iso]
+        tail = _sweep_reference_series(conn, bucket_id, listings, tail_times)
+
+        def _stored_edge(where, order, params):
+            row = conn.execute(
+                f"""
+                SELECT price FROM bucket_reference_series
+                WHERE bucket_id = ? AND {where}
+                ORDER BY t {order}
+                LIMIT 1
+                """,
+                (bucket_id, *params)
+            ).fetchone()
+            return row['price'] if row else None
+
+        if since is None:
+            first_price = None
+        else:
+            first_price = _stored_edge('t >= ? AND t < ?', 'ASC', (start_iso, tail_iso))
+            if first_price is None and tail:
+                first_price = tail[0]['price']
+            if first_price is None:
+                first_price = _stored_edge('t < ?', 'DESC', (start_iso,))
+
+        stored = conn.execute(
+            f"""
+            SELECT t, price FROM bucket_reference_series
+            WHERE bucket_id = ? AND t {after_op} ? AND t < ?
+            ORDER BY t
+            """,
+            (bucket_id, lower_iso, tail_iso)
+        )
+        def _after(t):
+            return t > lower_iso if since else t >= lower_iso
+
+        later = (p for p in tail if _after(p['t']))
+        series = [
+            {'t': r['t'], 'price': r['price']}
+            for r in downsample_step_series(chain(stored, later), start, now,
+                                            max_points if since is None else None)
+        ]
+
+        if not series:
+            # Nothing moved since the lower bound: carry the last earlier value
+            earlier = [p for p in tail if not _after(p['t'])]
+            if earlier:
+                prev_price = earlier[-1]['price']
+            else:
+                prev_price = _stored_edge(f't {before_op} ? AND t < ?', 'DESC', (lower_iso, tail_iso))
+            if prev_price is not None:
+                series.append({'t': now_iso if since else start_iso, 'price': prev_price})
+
+        if series and series[-1]['t'] < now_iso:
+            series.append({'t': now_iso, 'price': series[-1]['price']})
+        if first_price is None and since is None and series:
+            first_price = series[0]['price']
+
+        latest = _latest_event_times(conn, bucket_id, listings, start_iso)
+    finally:
+        conn.close()
+
+    return {'primary_series': series, 'first_price': first_price, **latest}
@@ -0,0 +1,214 @@
+"""
+Search Index Service
+
+Full-text index over bucket specs and active listing titles, used by the
+header autocomplete and /buy?search=.  One document per bucket:
+
+  SQLite   - FTS5 table bucket_search(body), rowid = bucket_id, with 2 and 3
+             character prefix indexes; ranked by bm25
+  Postgres - bucket_search(bucket_id, body, document tsvector) with a GIN
+             index on document (prefix tsquery, ts_rank) and a pg_trgm GIN
+             index on body for the substring fallback
+
+Every query term matches as a word prefix ("gold eag" finds "Gold American
+Eagle").  When that finds nothing, a substring match over the same documents
+keeps the old LIKE behaviour for infixes ("agle").
+
+Documents are rebuilt per bucket on listing events (update_bucket_price) and
+in full by db_init when the index is empty.
+"""
+
+import logging
+import re
+
+import database as _db_module
+
+logger = logging.getLogger(__name__)
+
+# Category spec fields indexed for every category in the bucket
+_SPEC_FIELDS = ('metal', 'product_line', 'coin_series', 'product_type', 'mint',
+                'year', 'finish', 'grade', 'weight', 'purity')
+
+_TERM_RE = re.compile(r'[^\W_]+')
+
+
+def create_search_index(conn):
+    """Create the bucket_search index for the current backend (idempotent, commits)."""
+    if _db_module.IS_POSTGRES:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS bucket_search (
+                bucket_id INTEGER PRIMARY KEY,
+                body      TEXT NOT NULL,
+                document  TSVECTOR NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_bucket_search_document '
+                     'ON bucket_search USING GIN (document)')
+        conn.commit()
+        try:
+            conn.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_bucket_search_body_trgm '
+                         'ON bucket_search USING GIN (body gin_trgm_ops)')
+        except Exception as e:
+            # Without pg_trgm the substring fallback still works, as a scan
+            conn.rollback()
+            logger.warning("[search_index] pg_trgm unavailable: %s", e)
+    else:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS bucket_search
+            USING fts5(body, tokenize = 'unicode61', prefix = '2 3')
+        ''')
+    conn.commit()
+
+
+def _bucket_documents(conn, bucket_ids=None):
+    """{bucket_id: lower-cased document text} for the given (or all) buckets."""
+    bucket_sql, params = '', ()
+    if bucket_ids is not None:
+        bucket_sql = f" AND c.bucket_id IN ({','.join('?' * len(bucket_ids))})"
+        params = tuple(bucket_ids)
+
+    terms = {}
+
+    def add(bucket_id, value):
+        if value is not None and str(value).strip():
+            words = terms.setdefault(bucket_id, [])
+            value = str(value).strip().lower()
+            if value not in words:
+                words.append(value)
+
+    for row in conn.execute(f'''
+        SELECT c.bucket_id, {', '.join('c.' + f for f in _SPEC_FIELDS)}
+        FROM categories c
+        WHERE c.bucket_id IS NOT NULL{bucket_sql}
+        ORDER BY c.bucket_id, c.id
+    ''', params).fetchall():
+        terms.setdefault(row['bucket_id'], [])
+        for field in _SPEC_FIELDS:
+            add(row['bucket_id'], row[field])
+
+    for row in conn.execute(f'''
+        SELECT c.bucket_id, l.listing_title, l.name
+        FROM listings l
+        JOIN categories c ON l.category_id = c.id
+        WHERE l.active = 1 AND c.bucket_id IS NOT NULL{bucket_sql}
+        ORDER BY c.bucket_id, l.id
+    ''', params).fetchall():
+        add(row['bucket_id'], row['listing_title'])
+        add(row['bucket_id'], row['name'])
+
+    return {bucket_id: ' '.join(words) for bucket_id, words in terms.items()}
+
+
+def _write_documents(conn, documents):
+    cursor = conn.cursor()
+    if _db_module.IS_POSTGRES:
+        cursor.executemany(
+            'INSERT INTO bucket_search (bucket_id, body, document) '
+            "VALUES (?, ?, to_tsvector('simple', ?))",
+            [(bucket_id, body, body) for bucket_id, body in documents.items()])
+    else:
+        cursor.executemany('INSERT INTO bucket_search (rowid, body) VALUES (?, ?)',
+                         list(documents.items()))
+
+
+def reindex_buckets(conn, bucket_ids):
+    """
+    Rebuild the documents of the given buckets (caller commits) and mark them
+    dirty in the in-process autocomplete index.
+    """
+    from services.autocomplete_service import mark_autocomplete_dirty
+
+    bucket_ids = sorted({b for b in bucket_ids if b is not None})
+    if not bucket_ids:
+        return
+    mark_autocomplete_dirty(bucket_ids)
+    key = 'bucket_id' if _db_module.IS_POSTGRES else 'rowid'
+    conn.execute(f"DELETE FROM bucket_search WHERE {key} IN ({','.join('?' * len(bucket_ids))})",
+                 bucket_ids)
+    _write_documents(conn, _bucket_documents(conn, bucket_ids))
+
+
+def reindex_bucket(bucket_id):
+    """Rebuild one bucket's document on its own connection; never raises."""
+    try:
+        conn = _db_module.get_db_connection()
+        try:
+            reindex_buckets(conn, [bucket_id])
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[search_index] Reindex of bucket %s failed: %s", bucket_id, e)
+
+
+def rebuild_search_index(conn):
+    """Replace every document (caller commits).  Returns the document count."""
+    conn.execute('DELETE FROM bucket_search')
+    documents = _bucket_documents(conn)
+    _write_documents(conn, documents)
+    return len(documents)
+
+
+def _terms(query):
+    return _TERM_RE.findall((query or '').lower())
+
+
+def search_bucket_ids(query, limit=None, conn=None):
+    """
+    Bucket ids matching a free-text query, best match first.
+
+    Args:
+        query: User input; every term must match a word prefix
+        limit: Maximum number of ids (None for all matches)
+        conn: Optional open connection
+
+    Returns:
+        List of bucket ids (empty for a query without terms)
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    close = conn is None
+    if conn is None:
+        conn = _db_module.get_db_connection()
+    try:
+        limit_sql = ' LIMIT ?' if limit is not None else ''
+        limit_params = (limit,) if limit is not None else ()
+
+        if _db_module.IS_POSTGRES:
+            tsquery = ' & '.join(f'{t}:*' for t in terms)
+            rows = conn.execute(f'''
+                SELECT bucket_id
+                FROM bucket_search
+                WHERE document @@ to_tsquery('simple', ?)
+                ORDER BY ts_rank(document, to_tsquery('simple', ?)) DESC, bucket_id
+                {limit_sql}
+            ''', (tsquery, tsquery) + limit_params).fetchall()
+        else:
+            match = ' '.join(f'"{t}"*' for t in terms)
+            rows = conn.execute(f'''
+                SELECT rowid AS bucket_id
+                FROM bucket_search
+                WHERE bucket_search MATCH ?
+                ORDER BY bm25(bucket_search), rowid
+                {limit_sql}
+            ''', (match,) + limit_params).fetchall()
+
+        if not rows:
+            # Substring fallback (trigram-indexed on Postgres)
+            like = '%' + query.strip().lower() + '%'
+            key = 'bucket_id' if _db_module.IS_POSTGRES else 'rowid'
+            rows = conn.execute(f'''
+                SELECT {key} AS bucket_id
+                FROM bucket_search
+                WHERE body LIKE ?
+                ORDER BY {key}
+                {limit_sql}
+            ''', (like,) + limit_params).fetchall()
+
+        return [row['bucket_id'] for row in rows]
+    finally:
+        if close:
+            conn.close()
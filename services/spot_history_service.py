@@ -0,0 +1,233 @@
+"""
+Spot Price History Service
+
+Compact spot price series for charts and widgets, served from an in-process
+index of spot_price_snapshots.
+
+The index keeps the last SPOT_INDEX_RETENTION of snapshots per metal and is
+extended incrementally (only rows above the last seen snapshot id are read),
+so a request costs one cheap query plus in-memory work.  Live payloads are
+cached per (metal, range) until a new snapshot arrives or a new bin opens.
+
+Payload encoding (prices are integer cents):
+  - 'delta'    (1d, raw snapshots): t0 + dt[] second offsets between points
+  - 'interval' (1w and longer): t0 + fixed `interval` seconds; each point is
+    the closing price of its bin, carried forward over bins without snapshots
+  - p0 is the first price, dp[] the cent deltas to each following point
+
+    t[i] = t0 + interval * i            (or t0 + sum(dt[:i]))
+    price[i] = (p0 + sum(dp[:i])) / 100
+
+Timestamps are naive ISO-8601 like spot_price_snapshots.as_of.  Each worker
+keeps its own index, extended from the shared snapshot table on every
+request, so workers agree without any cross-worker invalidation.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+import database as _db_module
+from services.reference_price_service import _TRACKED_METALS, _ts_cmp, _ts_str
+
+# range -> (window length, bin seconds or None for raw snapshots)
+SPOT_HISTORY_RANGES = {
+    '1d': (timedelta(days=1), None),
+    '1w': (timedelta(days=7), 15 * 60),
+    '1m': (timedelta(days=30), 60 * 60),
+    '3m': (timedelta(days=90), 3 * 60 * 60),
+    '1y': (timedelta(days=365), 12 * 60 * 60),
+}
+SPOT_INDEX_RETENTION = timedelta(days=366)
+# Snapshots can still land (backfills, late scheduler ticks) this long after
+# their as_of, so windows ending later than now - SPOT_HISTORY_SETTLE stay open
+SPOT_HISTORY_SETTLE = timedelta(hours=1)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Module-level state — one index per process
+_lock = threading.Lock()
+_times = {}       # metal -> sorted list of seconds since _EPOCH
+_prices = {}      # metal -> prices (USD) parallel to _times
+_last_id = 0      # spot_price_snapshots.id watermark of the index
+_payloads = {}    # (metal, range) -> ((last_id, current bin), live payload)
+
+
+def _seconds(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value[:19])
+    return int((value - _EPOCH).total_seconds())
+
+
+def _iso(seconds):
+    return (_EPOCH + timedelta(seconds=seconds)).isoformat()
+
+
+def _read_new_rows(conn, after_id, now):
+    """Snapshot rows above the index watermark, inside the retention window."""
+    cutoff = now - SPOT_INDEX_RETENTION
+    return conn.execute(f"""
+        SELECT id, LOWER(metal) AS metal, {_ts_str('as_of')} AS t, price_usd
+        FROM spot_price_snapshots
+        WHERE id > ? AND {_ts_cmp('as_of')} >= ?
+        ORDER BY id ASC
+    """, (after_id, cutoff.isoformat())).fetchall()
+
+
+def _update_index(rows, now):
+    """Fold rows from _read_new_rows() into the index (caller holds _lock)."""
+    global _last_id
+
+    cutoff = now - SPOT_INDEX_RETENTION
+    # Another request may have folded some of them while these were read
+    rows = [row for row in rows if row['id'] > _last_id]
+    for row in rows:
+        _last_id = max(_last_id, row['id'])
+        if row['price_usd'] is None:
+            continue
+        times = _times.setdefault(row['metal'], [])
+        prices = _prices.setdefault(row['metal'], [])
+        t = _seconds(row['t'])
+        if not times or t >= times[-1]:
+            times.append(t)
+            prices.append(float(row['price_usd']))
+        else:
+            # Out-of-order insert (backfill): keep both lists aligned
+            idx = bisect_right(times, t)
+            insort(times, t)
+            prices.insert(idx, float(row['price_usd']))
+
+    if rows:
+        # Drop points that fell out of the retention window
+        cutoff_s = _seconds(cutoff)
+        for metal, times in _times.items():
+            stale = bisect_left(times, cutoff_s)
+            if stale:
+                del times[:stale]
+                del _prices[metal][:stale]
+
+
+def _price_at(metal, t):
+    """Last indexed price at or before t, or None."""
+    times = _times.get(metal, [])
+    idx = bisect_right(times, t)
+    return _prices[metal][idx - 1] if idx else None
+
+
+def _encode(metal, range_key, start, end, interval, closed):
+    times = _times.get(metal, [])
+    prices = _prices.get(metal, [])
+
+    if interval is None:
+        lo, hi = bisect_right(times, start), bisect_right(times, end)
+        points_t = times[lo:hi]
+        points_p = prices[lo:hi]
+        seed = _price_at(metal, start)
+        if seed is not None:
+            points_t = [start] + points_t
+            points_p = [seed] + points_p
+    else:
+        points_t, points_p = [], []
+        bin_start = start - start % interval
+        while bin_start < end:
+            close = _price_at(metal, min(bin_start + interval, end) - 1)
+            if close is not None:
+                points_t.append(bin_start)
+                points_p.append(close)
+            bin_start += interval
+
+    cents = [int(round(p * 100)) for p in points_p]
+    payload = {
+        'metal': metal,
+        'range': range_key,
+        'encoding': 'delta' if interval is None else 'interval',
+        'n': len(cents),
+        't0': _iso(points_t[0]) if points_t else None,
+        'p0': cents[0] if cents else None,
+        'dp': [b - a for a, b in zip(cents, cents[1:])],
+        'end': _iso(end),
+        'closed': closed,
+    }
+    if interval is None:
+        payload['dt'] = [b - a for a, b in zip(points_t, points_t[1:])]
+    else:
+        payload['interval'] = interval
+    return payload
+
+
+def get_spot_history(metal, range_key='1d', until=None, now=None):
+    """
+    Compact spot price series for one metal.
+
+    Args:
+        metal: One of the tracked metals (case-insensitive)
+        range_key: Key of SPOT_HISTORY_RANGES
+        until: Optional window end (datetime), snapped down to a bin
+               boundary for interval ranges.  The window is closed (its
+               points can no longer change) when it ends at least
+               SPOT_HISTORY_SETTLE ago and starts inside the index
+               retention; otherwise it is served like the live window.
+        now: Current time (tests)
+
+    Returns:
+        Encoded payload dict (see module docstring) plus 'last_id', the
+        snapshot watermark it was built from
+
+    Raises:
+        ValueError: unknown metal or range
+    """
+    metal = (metal or '').lower()
+    if metal not in _TRACKED_METALS:
+        raise ValueError(f"Unknown metal: {metal!r}")
+    if range_key not in SPOT_HISTORY_RANGES:
+        raise ValueError(f"Unknown spot history range: {range_key!r}")
+    window, interval = SPOT_HISTORY_RANGES[range_key]
+
+    now = now or datetime.now()
+    now_s = _seconds(now)
+    end = now_s
+    closed = False
+    if until is not None:
+        until_s = _seconds(until)
+        if interval is not None:
+            until_s -= until_s % interval
+        end = min(until_s, now_s)
+    start = end - int(window.total_seconds())
+    closed = (end <= _seconds(now - SPOT_HISTORY_SETTLE)
+              and start >= _seconds(now - SPOT_INDEX_RETENTION))
+
+    with _lock:
+        after_id = _last_id
+    conn = _db_module.get_db_connection()
+    try:
+        rows = _read_new_rows(conn, after_id, now)
+    finally:
+        conn.close()
+
+    with _lock:
+        _update_index(rows, now)
+
+        if end != now_s:
+            # Past windows are not reused by the process: closed ones are kept
+            # by HTTP caches, unsettled ones revalidate against the watermark
+            return dict(_encode(metal, range_key, start, end, interval, closed), last_id=_last_id)
+
+        # Reuse until a new snapshot arrives or a new bin (a new minute for raw) opens
+        stamp = (_last_id, now_s // (interval or 60))
+        cached = _payloads.get((metal, range_key))
+        if cached is not None and cached[0] == stamp:
+            return dict(cached[1], last_id=_last_id)
+
+        payload = _encode(metal, range_key, start, end, interval, closed)
+        _payloads[(metal, range_key)] = (stamp, payload)
+        return dict(payload, last_id=_last_id)
+
+
+def reset_spot_index():
+    """Drop the index and cached payloads (next call reloads from the table)."""
+    global _last_id
+    with _lock:
+        _times.clear()
+        _prices.clear()
+        _payloads.clear()
+        _last_id = 0
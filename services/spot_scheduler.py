@@ -37,8 +37,10 @@ def _tick(app_ctx=None):
     if app_ctx is not None:
         with app_ctx:
             _do_snapshot()
+            _do_market_export()
     else:
         _do_snapshot()
+        _do_market_export()
 
     # Reschedule with the latest interval from DB
     _schedule_next(app_ctx)
@@ -58,6 +60,15 @@ def _do_snapshot():
         logger.error("[spot_scheduler] Unexpected error during snapshot: %s", exc)
 
 
+def _do_market_export():
+    """Nightly market data export; a no-op until yesterday needs exporting."""
+    try:
+        from services.market_export_service import export_if_due
+        export_if_due()
+    except Exception as exc:
+        logger.error("[spot_scheduler] Unexpected error during market export: %s", exc)
+
+
 def _schedule_next(app_ctx=None):
     """Schedule the next tick using the current interval from system settings."""
     global _timer
@@ -221,6 +221,61 @@ def _trigger_bid_rematch_sync(metals):
         logger.warning("[spot_snapshot] Bid rematch failed: %s", e)
 
 
+def _trigger_bucket_price_record():
+    """Record best-ask points driven by the new spot prices for all spot-priced buckets."""
+    try:
+        from services.bucket_price_history_service import record_spot_driven_prices
+        record_spot_driven_prices()
+    except Exception as e:
+        logger.warning("[spot_snapshot] Bucket price recording failed: %s", e)
+
+
+def _trigger_ticker_refresh():
+    """Rebuild the cached buy page ticker against the new spot prices."""
+    try:
+        from services.ticker_service import refresh_ticker
+        refresh_ticker()
+    except Exception as e:
+        logger.warning("[spot_snapshot] Ticker refresh failed: %s", e)
+
+
+def _trigger_depth_refresh():
+    """Drop the cached order books so depth is repriced at the new spot."""
+    try:
+        from services.order_book_service import clear_depth_cache
+        clear_depth_cache()
+    except Exception as e:
+        logger.warning("[spot_snapshot] Order book cache clear failed: %s", e)
+
+
+def _trigger_bucket_event_prune():
+    """Delete cross-worker bucket events older than their retention."""
+    try:
+        from services.bucket_event_service import prune_bucket_events
+        conn = _get_conn()
+        try:
+            prune_bucket_events(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[spot_snapshot] Bucket event prune failed: %s", e)
+
+
+def _trigger_reference_series_refresh():
+    """Append the new snapshots to every persisted bucket reference series,
+    then build a batch of buckets that have none yet."""
+    try:
+        from services.reference_price_service import (
+            backfill_reference_series,
+            refresh_all_reference_series,
+        )
+        refresh_all_reference_series()
+        backfill_reference_series()
+    except Exception as e:
+        logger.warning("[spot_snapshot] Reference series refresh failed: %s", e)
+
+
 def run_snapshot(use_lock=True, verbose=False, force=False):
     """
     Fetch current spot prices and write new rows to spot_price_snapshots.
@@ -325,6 +380,11 @@ def run_snapshot(use_lock=True, verbose=False, force=False):
         # be marketable at the updated spot price.
         if inserted > 0:
             _trigger_bid_rematch_sync(spot_prices.keys())
+            _trigger_bucket_price_record()
+            _trigger_reference_series_refresh()
+            _trigger_ticker_refresh()
+            _trigger_depth_refresh()
+            _trigger_bucket_event_prune()
 
         if verbose:
             print(f"[spot_snapshot] Done — {inserted} inserted, {skipped} skipped.")
@@ -0,0 +1,244 @@
+"""
+Buy Page Ticker Service
+
+Builds the /buy ticker: the most popular buckets (by order count) that still
+have active listings, with the current best ask and the % change against the
+best ask 24h ago.
+
+The ticker is the same for every visitor, so it is built once and cached in
+process:
+  - refresh_ticker() runs after each spot snapshot tick (scheduler and manual
+    admin snapshot); get_ticker() only rebuilds when the cache is empty or
+    older than TICKER_MAX_AGE (e.g. no scheduler running locally)
+  - popularity is maintained incrementally: each refresh only aggregates
+    order_items rows above the last seen id
+  - all ticker buckets are priced now and 24h ago in one pass, with spot
+    prices looked up in an in-memory copy of the snapshot history instead of
+    one get_spot_at_time() query per variable listing
+
+Prices follow the bucket page rules: current best ask uses the latest
+snapshot spot (get_effective_price), the 24h-ago price follows
+reference_price_service.get_best_ask_at_time().
+
+The cache is per process: refresh_ticker() only rebuilds the worker that ran
+the spot tick, so other workers serve their own copy until it is older than
+TICKER_MAX_AGE.  The ticker is a popularity summary, so up to TICKER_MAX_AGE
+of staleness is accepted there.
+"""
+
+import logging
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import database as _db_module
+from services.pricing_service import get_effective_price
+from services.reference_price_service import _ts_cmp, _ts_str
+
+logger = logging.getLogger(__name__)
+
+TICKER_SIZE = 10
+TICKER_MAX_AGE = timedelta(minutes=15)
+TICKER_CHANGE_WINDOW = timedelta(hours=24)
+
+# Module-level state — one ticker per process
+_lock = threading.Lock()
+_ticker = None            # list of ticker items, or None before the first build
+_built_at = None          # datetime of the last build
+_order_counts = {}        # bucket_id -> order_items count
+_last_order_item_id = 0   # order_items.id watermark for _order_counts
+
+
+def _update_popularity(conn):
+    """Fold order_items rows added since the last refresh into _order_counts."""
+    global _last_order_item_id
+
+    rows = conn.execute("""
+        SELECT c.bucket_id, COUNT(oi.id) AS order_count, MAX(oi.id) AS max_id
+        FROM order_items oi
+        JOIN listings l ON oi.listing_id = l.id
+        JOIN categories c ON l.category_id = c.id
+        WHERE c.bucket_id IS NOT NULL
+          AND oi.id > ?
+        GROUP BY c.bucket_id
+    """, (_last_order_item_id,)).fetchall()
+
+    for row in rows:
+        _order_counts[row['bucket_id']] = _order_counts.get(row['bucket_id'], 0) + row['order_count']
+        _last_order_item_id = max(_last_order_item_id, row['max_id'])
+
+
+def _top_buckets(conn):
+    """Most ordered buckets that currently have active listings, best first."""
+    if not _order_counts:
+        return []
+    listed = {
+        row['bucket_id'] for row in conn.execute("""
+            SELECT DISTINCT c.bucket_id
+            FROM listings l
+            JOIN categories c ON l.category_id = c.id
+            WHERE l.active = 1 AND l.quantity > 0
+        """).fetchall()
+    }
+    ranked = sorted(
+        (bucket_id for bucket_id in _order_counts if bucket_id in listed),
+        key=lambda bucket_id: (-_order_counts[bucket_id], bucket_id),
+    )
+    return ranked[:TICKER_SIZE]
+
+
+class _SpotHistory:
+    """Snapshot prices per metal from `since` onwards, for at-or-before lookups."""
+
+    def __init__(self, conn, metals, since_iso):
+        self._times = {}
+        self._prices = {}
+        for metal in metals:
+            # Seed with the last snapshot at or before the window start
+            seed = conn.execute(f"""
+                SELECT {_ts_str('as_of')} AS t, price_usd FROM spot_price_snapshots
+                WHERE metal = ? AND {_ts_cmp('as_of')} <= ?
+                ORDER BY {_ts_cmp('as_of')} DESC
+                LIMIT 1
+            """, (metal, since_iso)).fetchone()
+            self._times[metal] = [seed['t']] if seed else []
+            self._prices[metal] = [seed['price_usd']] if seed else []
+
+        if metals:
+            placeholders = ','.join('?' * len(metals))
+            for row in conn.execute(f"""
+                SELECT metal, {_ts_str('as_of')} AS t, price_usd FROM spot_price_snapshots
+                WHERE metal IN ({placeholders}) AND {_ts_cmp('as_of')} > ?
+                ORDER BY {_ts_cmp('as_of')} ASC, id ASC
+            """, (*metals, since_iso)).fetchall():
+                self._times[row['metal']].append(row['t'])
+                self._prices[row['metal']].append(row['price_usd'])
+
+    def at(self, metal, as_of_iso):
+        """Most recent snapshot price for `metal` at or before `as_of_iso`, or None."""
+        times = self._times.get(metal)
+        if not times:
+            return None
+        idx = bisect_right(times, as_of_iso)
+        return self._prices[metal][idx - 1] if idx else None
+
+
+def _listing_metal(listing):
+    return (listing.get('pricing_metal') or listing.get('metal') or 'gold').lower()
+
+
+def _build_ticker(conn, now):
+    _update_popularity(conn)
+    bucket_ids = _top_buckets(conn)
+    if not bucket_ids:
+        return []
+
+    placeholders = ','.join('?' * len(bucket_ids))
+    listings = [dict(row) for row in conn.execute(f"""
+        SELECT
+            l.id, l.name AS listing_title, l.price_per_coin, l.pricing_mode,
+            l.spot_premium, l.floor_price, l.pricing_metal,
+            c.bucket_id, c.metal, c.weight, c.product_type,
+            c.mint, c.product_line, c.coin_series
+        FROM listings l
+        JOIN categories c ON l.category_id = c.id
+        WHERE l.active = 1 AND l.quantity > 0
+          AND c.bucket_id IN ({placeholders})
+        ORDER BY l.id
+    """, bucket_ids).fetchall()]
+
+    now_iso = now.isoformat()
+    day_ago_iso = (now - TICKER_CHANGE_WINDOW).isoformat()
+    metals = sorted({_listing_metal(l) for l in listings if l.get('pricing_mode') == 'premium_to_spot'})
+    spots = _SpotHistory(conn, metals, day_ago_iso)
+    spots_now = {m: p for m in metals if (p := spots.at(m, now_iso)) is not None}
+
+    by_bucket = {}
+    for listing in listings:
+        entry = by_bucket.setdefault(listing['bucket_id'], {'listing': listing, 'now': None, 'past': None})
+
+        current = get_effective_price(listing, spots_now)
+        if listing.get('pricing_mode') == 'premium_to_spot':
+            metal = _listing_metal(listing)
+            spot = spots.at(metal, day_ago_iso)
+            if spot is not None:
+                past = get_effective_price(listing, spot_prices={metal: spot})
+            else:
+                # Same fallback as get_best_ask_at_time()
+                past = listing.get('floor_price') or listing.get('price_per_coin')
+        else:
+            past = get_effective_price(listing)
+
+        if current is not None and (entry['now'] is None or current < entry['now']):
+            entry['now'] = current
+        if past is not None and (entry['past'] is None or past < entry['past']):
+            entry['past'] = past
+
+    items = []
+    for bucket_id in bucket_ids:
+        entry = by_bucket.get(bucket_id)
+        if entry is None or entry['now'] is None:
+            continue
+        listing = entry['listing']
+        name = (listing.get('listing_title') or
+                '{} {}'.format(
+                    listing.get('mint') or '',
+                    listing.get('product_line') or listing.get('coin_series') or listing.get('product_type') or ''
+                ).strip())
+        current_price = round(float(entry['now']), 2)
+        past_price = entry['past']
+        if past_price and past_price > 0:
+            change_pct = round((current_price - past_price) / past_price * 100, 2)
+        else:
+            change_pct = None
+        items.append({
+            'bucket_id': bucket_id,
+            'name': name,
+            'metal': (listing.get('metal') or '').lower(),
+            'price': current_price,
+            'change_pct': change_pct,
+        })
+    return items
+
+
+def refresh_ticker(now=None):
+    """
+    Rebuild the cached ticker.  Called after each spot snapshot tick.
+
+    Returns:
+        list of {bucket_id, name, metal, price, change_pct}
+    """
+    global _ticker, _built_at
+
+    now = now or datetime.now()
+    with _lock:
+        conn = _db_module.get_db_connection()
+        try:
+            _ticker = _build_ticker(conn, now)
+            _built_at = now
+        finally:
+            conn.close()
+        return list(_ticker)
+
+
+def get_ticker():
+    """Cached ticker items for the buy page; never raises."""
+    try:
+        with _lock:
+            ticker, built_at = _ticker, _built_at
+        if ticker is None or built_at is None or datetime.now() - built_at > TICKER_MAX_AGE:
+            return refresh_ticker()
+        return list(ticker)
+    except Exception as e:
+        logger.warning("[ticker] Ticker build failed: %s", e)
+        return []
+
+
+def reset_ticker():
+    """Drop the cache and popularity counts (next get_ticker() rebuilds from scratch)."""
+    global _ticker, _built_at, _last_order_item_id
+    with _lock:
+        _ticker = None
+        _built_at = None
+        _order_counts.clear()
+        _last_order_item_id = 0
@@ -13,6 +13,8 @@ Forfeiture logic:
 
 from datetime import datetime
 
+from services.user_stats_service import refresh_order_user_stats
+
 
 def _parse_dt(s):
     """Parse a DB datetime string into a naive UTC datetime."""
@@ -96,6 +98,7 @@ def check_and_forfeit_expired_orders(conn, seller_id=None):
         conn.commit()
         for order_id in forfeited_ids:
             _apply_forfeiture_consequences(conn, order_id)
+            refresh_order_user_stats(order_id)
 
     return forfeited_ids
 
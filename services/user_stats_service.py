@@ -0,0 +1,230 @@
+"""
+User Stats Service
+
+Precomputed reputation and activity per user, one user_stats row each:
+
+  rating_avg / rating_count          ratings received
+  seller_transaction_count           delivered/complete orders containing
+                                     the user's listings
+  seller_order_count /               all such orders, and those neither
+  seller_fulfilled_count             canceled nor forfeited
+  seller_buyer_count /               distinct buyers, and buyers with two or
+  seller_repeat_buyer_count          more orders from the user
+  buyer_transaction_count            delivered/complete orders placed
+  buyer_seller_count /               distinct sellers bought from, and sellers
+  buyer_repeat_seller_count          bought from more than once
+  top_product_lines                  JSON list of the TOP_PRODUCT_LINES
+                                     product lines sold most often
+
+The seller modal, order seller/buyer panels, cart and bucket page read these
+rows instead of aggregating ratings and orders per request.
+
+Rows are refreshed for the users involved when a rating is submitted
+(refresh_user_stats) and when an order is placed, completed, canceled or
+forfeited (refresh_order_user_stats); rebuild_user_stats recomputes every row
+(`flask rebuild-user-stats`, and db_init while the table is empty).
+"""
+
+import json
+import logging
+from datetime import datetime
+
+import database as _db_module
+
+logger = logging.getLogger(__name__)
+
+TOP_PRODUCT_LINES = 3
+
+# orders.status values that count as a completed transaction
+COMPLETED_ORDER_STATUSES = ('Delivered', 'Complete')
+
+_COUNT_FIELDS = ('rating_count', 'seller_transaction_count', 'seller_order_count',
+                 'seller_fulfilled_count', 'seller_buyer_count', 'seller_repeat_buyer_count', 'buyer_transaction_count',
+                 'buyer_seller_count', 'buyer_repeat_seller_count')
+
+
+def create_user_stats_table(conn):
+    """Create user_stats if missing (migration 035; caller commits)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id                   INTEGER PRIMARY KEY,
+            rating_avg                REAL,
+            rating_count              INTEGER NOT NULL DEFAULT 0,
+            seller_transaction_count  INTEGER NOT NULL DEFAULT 0,
+            seller_order_count        INTEGER NOT NULL DEFAULT 0,
+            seller_fulfilled_count    INTEGER NOT NULL DEFAULT 0,
+            seller_buyer_count        INTEGER NOT NULL DEFAULT 0,
+            seller_repeat_buyer_count INTEGER NOT NULL DEFAULT 0,
+            buyer_transaction_count   INTEGER NOT NULL DEFAULT 0,
+            buyer_seller_count        INTEGER NOT NULL DEFAULT 0,
+            buyer_repeat_seller_count INTEGER NOT NULL DEFAULT 0,
+            top_product_lines         TEXT NOT NULL DEFAULT '[]',
+            updated_at                TIMESTAMP
+        )
+    ''')
+
+
+def _empty_stats():
+    stats = {field: 0 for field in _COUNT_FIELDS}
+    stats.update(rating_avg=None, top_product_lines=[])
+    return stats
+
+
+def _compute_stats(conn, user_ids):
+    """{user_id: stats} for the given users, in four grouped queries."""
+    placeholders = ','.join('?' * len(user_ids))
+    ids = list(user_ids)
+    stats = {user_id: _empty_stats() for user_id in user_ids}
+    completed = ','.join('?' * len(COMPLETED_ORDER_STATUSES))
+
+    for row in conn.execute(f'''
+        SELECT ratee_id, AVG(rating) AS rating_avg, COUNT(*) AS rating_count
+        FROM ratings
+        WHERE ratee_id IN ({placeholders})
+        GROUP BY ratee_id
+    ''', ids).fetchall():
+        stats[row['ratee_id']].update(rating_avg=row['rating_avg'], rating_count=row['rating_count'])
+
+    for row in conn.execute(f'''
+        SELECT buyer_id, COUNT(*) AS n
+        FROM orders
+        WHERE buyer_id IN ({placeholders}) AND status IN ({completed})
+        GROUP BY buyer_id
+    ''', ids + list(COMPLETED_ORDER_STATUSES)).fetchall():
+        stats[row['buyer_id']]['buyer_transaction_count'] = row['n']
+
+    # One row per (seller, buyer) pair; an order has a single buyer, so
+    # summing a seller's pairs counts each of its orders once
+    for row in conn.execute(f'''
+        SELECT l.seller_id, o.buyer_id,
+               COUNT(DISTINCT o.id) AS orders,
+               COUNT(DISTINCT CASE WHEN o.status IN ({completed}) THEN o.id END) AS completed,
+               COUNT(DISTINCT CASE WHEN o.canceled_at IS NULL AND o.status != 'Forfeited'
+                                   THEN o.id END) AS fulfilled
+        FROM orders o
+        JOIN order_items oi ON o.id = oi.order_id
+        JOIN listings l ON oi.listing_id = l.id
+        WHERE l.seller_id IN ({placeholders}) OR o.buyer_id IN ({placeholders})
+        GROUP BY l.seller_id, o.buyer_id
+    ''', list(COMPLETED_ORDER_STATUSES) + ids + ids).fetchall():
+        seller = stats.get(row['seller_id'])
+        if seller is not None:
+            seller['seller_transaction_count'] += row['completed']
+            seller['seller_order_count'] += row['orders']
+            seller['seller_fulfilled_count'] += row['fulfilled']
+            seller['seller_buyer_count'] += 1
+            seller['seller_repeat_buyer_count'] += row['orders'] >= 2
+        buyer = stats.get(row['buyer_id'])
+        if buyer is not None:
+            buyer['buyer_seller_count'] += 1
+            buyer['buyer_repeat_seller_count'] += row['orders'] >= 2
+
+    for row in conn.execute(f'''
+        SELECT l.seller_id, c.product_line, COUNT(*) AS sale_count
+        FROM order_items oi
+        JOIN listings l ON oi.listing_id = l.id
+        JOIN categories c ON l.category_id = c.id
+        WHERE l.seller_id IN ({placeholders})
+          AND c.product_line IS NOT NULL AND c.product_line != ''
+        GROUP BY l.seller_id, c.product_line
+        ORDER BY l.seller_id, sale_count DESC, c.product_line
+    ''', ids).fetchall():
+        lines = stats[row['seller_id']]['top_product_lines']
+        if len(lines) < TOP_PRODUCT_LINES:
+            lines.append(row['product_line'])
+
+    return stats
+
+
+def _write_stats(conn, stats):
+    now = datetime.now().isoformat()
+    conn.cursor().executemany(f'''
+        INSERT INTO user_stats (user_id, rating_avg, {', '.join(_COUNT_FIELDS)},
+                                top_product_lines, updated_at)
+        VALUES (?, ?, {', '.join('?' * len(_COUNT_FIELDS))}, ?, ?)
+    ''', [
+        (user_id, entry['rating_avg'], *(entry[f] for f in _COUNT_FIELDS),
+         json.dumps(entry['top_product_lines']), now)
+        for user_id, entry in stats.items()
+    ])
+
+
+def refresh_user_stats(conn, user_ids):
+    """Recompute the rows of the given users (caller commits)."""
+    user_ids = sorted({u for u in user_ids if u is not None})
+    if not user_ids:
+        return
+    stats = _compute_stats(conn, user_ids)
+    conn.execute(f"DELETE FROM user_stats WHERE user_id IN ({','.join('?' * len(user_ids))})", user_ids)
+    _write_stats(conn, stats)
+
+
+def refresh_order_user_stats(order_id):
+    """Refresh the buyer and sellers of an order on their own connection; never raises."""
+    try:
+        conn = _db_module.get_db_connection()
+        try:
+            rows = conn.execute('''
+                SELECT o.buyer_id, l.seller_id
+                FROM orders o
+                LEFT JOIN order_items oi ON oi.order_id = o.id
+                LEFT JOIN listings l ON oi.listing_id = l.id
+                WHERE o.id = ?
+            ''', (order_id,)).fetchall()
+            user_ids = {row['buyer_id'] for row in rows} | {row['seller_id'] for row in rows}
+            refresh_user_stats(conn, user_ids)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[user_stats] Refresh for order %s failed: %s", order_id, e)
+
+
+def refresh_user_stats_for(user_ids):
+    """refresh_user_stats on its own connection; never raises."""
+    try:
+        conn = _db_module.get_db_connection()
+        try:
+            refresh_user_stats(conn, user_ids)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("[user_stats] Refresh for users %s failed: %s", list(user_ids), e)
+
+
+def rebuild_user_stats(conn):
+    """Recompute every user's row (caller commits).  Returns the row count."""
+    user_ids = [row['id'] for row in conn.execute('SELECT id FROM users ORDER BY id').fetchall()]
+    conn.execute('DELETE FROM user_stats')
+    # Chunked to stay under the bound-parameter limit
+    for start in range(0, len(user_ids), 500):
+        _write_stats(conn, _compute_stats(conn, user_ids[start:start + 500]))
+    return len(user_ids)
+
+
+def get_user_stats(conn, user_ids):
+    """
+    Stats rows of the given users.
+
+    Returns:
+        {user_id: {rating_avg, rating_count, ..., top_product_lines: [...]}};
+        users without a row get zero counts and rating_avg None
+    """
+    user_ids = sorted({u for u in user_ids if u is not None})
+    stats = {user_id: _empty_stats() for user_id in user_ids}
+    if not user_ids:
+        return stats
+    for row in conn.execute(
+        f"SELECT * FROM user_stats WHERE user_id IN ({','.join('?' * len(user_ids))})", user_ids
+    ).fetchall():
+        entry = stats[row['user_id']]
+        entry.update({field: row[field] for field in _COUNT_FIELDS})
+        entry['rating_avg'] = row['rating_avg']
+        entry['top_product_lines'] = json.loads(row['top_product_lines'] or '[]')
+    return stats
+
+
+def repeat_pct(repeat_count, total_count):
+    """Whole-number percentage of repeat counterparties (0 without any)."""
+    return round(repeat_count / total_count * 100) if total_count else 0
@@ -20,6 +20,7 @@ let lastChartWasMobile = null;
 // Polling state
 let _chartPollTimer = null;
 let _lastTimestamps = { spot: null, bid: null, clear: null };
+let _chartEtag = null;  // ETag of the last poll response, sent as If-None-Match
 
 const isMobileChart = () => window.innerWidth <= 768;
 
@@ -64,32 +65,50 @@ function initBucketPriceChart(bucketId) {
 }
 
 /**
- * Start background polling — re-renders chart only when timestamps change.
+ * Start background polling — asks only for points after the last one shown
+ * (?since=) with the last ETag, and re-renders only when timestamps change.
  */
 function startChartPolling(bucketId) {
     if (_chartPollTimer) return; // Already running
 
     _chartPollTimer = setInterval(function() {
-        const url = `/api/buckets/${bucketId}/trade_price_history?range=${currentBucketTimeRange}`;
-        fetch(url)
-            .then(r => r.json())
+        const series = (bucketChartData && bucketChartData.primary_series) || [];
+        const lastT = series.length ? series[series.length - 1].t : null;
+        let url = `/api/buckets/${bucketId}/trade_price_history?range=${encodeURIComponent(currentBucketTimeRange)}`;
+        if (lastT) url += `&since=${encodeURIComponent(lastT)}`;
+        const headers = _chartEtag ? { 'If-None-Match': _chartEtag } : {};
+
+        fetch(url, { headers })
+            .then(r => {
+                if (r.status === 304) return null; // Nothing changed since the last poll
+                if (!r.ok) return null;
+                _chartEtag = r.headers.get('ETag');
+                return r.json();
+            })
             .then(data => {
-                if (!data.success) return;
+                if (!data || !data.success) return;
 
                 const spotChanged  = data.latest_spot_as_of  !== _lastTimestamps.spot;
                 const bidChanged   = data.latest_bid_as_of   !== _lastTimestamps.bid;
                 const clearChanged = data.latest_clear_as_of !== _lastTimestamps.clear;
 
                 if (spotChanged || bidChanged || clearChanged) {
+                    if (!data.primary_series.length) {
+                        // Changed without newer points (e.g. a cancelled trade): reload
+                        loadBucketPriceHistory(bucketId, currentBucketTimeRange);
+                        return;
+                    }
                     console.log('[BucketChart] Poll: data changed — re-rendering');
                     _lastTimestamps = {
                         spot:  data.latest_spot_as_of,
                         bid:   data.latest_bid_as_of,
                         clear: data.latest_clear_as_of,
                     };
-                    bucketChartData = data;
+                    // Keep the points up to `since` and append the newer ones
+                    const merged = series.filter(p => !lastT || p.t <= lastT).concat(data.primary_series);
+                    bucketChartData = Object.assign({}, data, { primary_series: merged });
                     updateBucketPriceSummary(data.summary);
-                    renderBucketPriceChart(data.primary_series, currentBucketTimeRange);
+                    renderBucketPriceChart(merged, currentBucketTimeRange);
                 }
             })
             .catch(() => {}); // Silently ignore network errors during polling
@@ -136,6 +155,7 @@ function loadBucketPriceHistory(bucketId, range) {
 
             if (data.success) {
                 bucketChartData = data;
+                _chartEtag = null;  // The next poll asks with ?since=
 
                 // Store timestamps for change-detection polling
                 _lastTimestamps = {
@@ -0,0 +1,120 @@
+/* buy_browse.js — /buy page: infinite scroll for the standard markets grid */
+(function () {
+  'use strict';
+
+  var PAGE_SIZE = 24;
+
+  /* Same output as the Jinja `commas` filter */
+  function commas(n) {
+    var rounded = Math.round(n * 100) / 100;
+    return rounded.toLocaleString('en-US', {
+      minimumFractionDigits: rounded % 1 === 0 ? 0 : 2,
+      maximumFractionDigits: 2
+    });
+  }
+
+  function el(tag, className, text) {
+    var node = document.createElement(tag);
+    if (className) node.className = className;
+    if (text !== undefined) node.textContent = text;
+    return node;
+  }
+
+  /* Mirrors the standard tile markup in templates/buy.html */
+  function renderTile(bucket, loggedIn) {
+    var tile = el('a', 'product-tile');
+    tile.href = bucket.url;
+
+    var imageBox = el('div', 'image-box');
+    if (bucket.image_url) {
+      var img = document.createElement('img');
+      img.src = bucket.image_url;
+      img.alt = bucket.metal + ' ' + (bucket.product_type || '');
+      img.loading = 'lazy';
+      img.style.cssText = 'width:100%;height:100%;object-fit:cover;border-radius:20px;';
+      imageBox.appendChild(img);
+    } else {
+      imageBox.appendChild(el('span', null, 'Item image'));
+    }
+    tile.appendChild(imageBox);
+
+    var text = el('div', 'product-text');
+    text.appendChild(el('p', 'product-title', bucket.title));
+    text.appendChild(el('p', 'product-subtext',
+      bucket.weight + ', ' + bucket.metal + ' ' + (bucket.year || '')));
+
+    if (bucket.lowest_price !== null) {
+      text.appendChild(el('p', 'price', '$' + commas(bucket.lowest_price)));
+      if (bucket.all_listings_are_users && loggedIn) {
+        var own = el('p', 'price no-listings', 'Only your own listings');
+        own.style.cssText = 'font-size: 11px; margin-top: 4px; color: #f59e0b;';
+        text.appendChild(own);
+      }
+    } else {
+      text.appendChild(el('p', 'price no-listings',
+        loggedIn ? 'No listings from other sellers' : 'No listings available'));
+    }
+    tile.appendChild(text);
+    return tile;
+  }
+
+  function init() {
+    var grid = document.getElementById('lp-standard-grid');
+    var more = document.getElementById('lp-standard-more');
+    if (!grid || !more || !grid.dataset.nextCursor) return;
+
+    var cursor = grid.dataset.nextCursor;
+    var loggedIn = grid.dataset.loggedIn === '1';
+    var loading = false;
+
+    function done(observer) {
+      observer.disconnect();
+      more.remove();
+    }
+
+    function loadPage(observer) {
+      if (loading || !cursor) return;
+      loading = true;
+
+      /* Same filters and sort as the page itself */
+      var params = new URLSearchParams(window.location.search);
+      params.set('section', 'standard');
+      params.set('cursor', cursor);
+      params.set('limit', PAGE_SIZE);
+
+      fetch('/api/buckets/browse?' + params.toString())
+        .then(function (r) { return r.json(); })
+        .then(function (data) {
+          if (!data.success) throw new Error(data.error || 'browse failed');
+          data.buckets.forEach(function (bucket) {
+            grid.appendChild(renderTile(bucket, loggedIn));
+          });
+          cursor = data.next_cursor;
+          loading = false;
+          if (!cursor) {
+            done(observer);
+          } else if (more.getBoundingClientRect().top < window.innerHeight + 600) {
+            /* Still in view: the observer will not fire again on its own */
+            loadPage(observer);
+          }
+        })
+        .catch(function () {
+          loading = false;
+          more.textContent = 'Could not load more markets.';
+          observer.disconnect();
+        });
+    }
+
+    var observer = new IntersectionObserver(function (entries) {
+      if (entries.some(function (e) { return e.isIntersecting; })) loadPage(observer);
+    }, { rootMargin: '600px 0px' });
+    observer.observe(more);
+  }
+
+  /* ── Boot ────────────────────────────────────────────── */
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init);
+  } else {
+    init();
+  }
+})();
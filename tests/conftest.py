@@ -21,6 +21,28 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('FLASK_TESTING', '1')
 
 
+@pytest.fixture(autouse=True)
+def _reset_process_caches():
+    """The /buy tile model, cover cache, autocomplete index, bucket page
+    snapshots, anonymous page cache, dropdown options and bucket event feed
+    position are process-wide; start every test empty."""
+    from services.autocomplete_service import reset_autocomplete_index
+    from services.bucket_event_service import reset_bucket_events
+    from services.bucket_image_service import invalidate_cover_cache
+    from services.bucket_snapshot_service import reset_bucket_snapshots
+    from services.bucket_tile_service import reset_bucket_tiles
+    from services.page_cache_service import reset_page_cache
+    from routes.category_options import reset_dropdown_cache
+    reset_bucket_tiles()
+    invalidate_cover_cache()
+    reset_autocomplete_index()
+    reset_bucket_snapshots()
+    reset_page_cache()
+    reset_dropdown_cache()
+    reset_bucket_events()
+    yield
+
+
 @pytest.fixture
 def app():
     """Create and configure a test application instance."""
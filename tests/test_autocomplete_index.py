@@ -0,0 +1,186 @@
+"""
+Autocomplete prefix index tests.
+
+AC1: One suggestion per bucket in the {text, meta, type, id} shape; terms
+     match word prefixes, exact words rank first, infix fallback; lookups
+     after the build run no SQL.
+AC2: Listing events reload only the dirty bucket and swap its words in place.
+AC3: /api/search/autocomplete answers from the index.
+AC4: An aged index is served while a background thread rebuilds it; buckets
+     marked dirty during the rebuild are reloaded after the swap.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import autocomplete_service as acs
+from services.search_index_service import create_search_index, reindex_bucket
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_line TEXT,
+    coin_series  TEXT,
+    product_type TEXT,
+    mint         TEXT,
+    year         TEXT,
+    finish       TEXT,
+    grade        TEXT,
+    weight       TEXT,
+    purity       TEXT
+);
+
+CREATE TABLE listings (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id   INTEGER,
+    listing_title TEXT,
+    name          TEXT,
+    quantity      INTEGER DEFAULT 1,
+    active        INTEGER DEFAULT 1
+);
+"""
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'autocomplete.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO categories (id, bucket_id, metal, product_line, product_type, mint, year, "
+                     "weight, purity) VALUES (?, ?, ?, ?, 'Coin', ?, ?, ?, ?)", [
+        (1, 10, 'Gold', 'American Eagle', 'US Mint', '2024', '1 oz', '.9167'),
+        (2, 10, 'Gold', 'American Eagle', 'US Mint', '2023', '1 oz', '.9167'),
+        (3, 20, 'Silver', 'Maple Leaf', 'Royal Canadian Mint', '2024', '1 oz', '.9999'),
+        (4, 30, 'Gold', 'Maple Leaf', 'Royal Canadian Mint', '2024', '1/10 oz', None),
+    ])
+    conn.executemany("INSERT INTO listings (category_id, listing_title, name, quantity, active) "
+                     "VALUES (?, ?, ?, ?, ?)", [
+        (2, 'Eagle in capsule', None, 3, 1),     # not the first category: no title
+        (3, None, 'Maple stack', 0, 1),          # sold out: searchable, not the title
+        (3, 'Monster box', None, 5, 1),
+    ])
+    create_search_index(conn)
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_ac1_suggestions(db):
+    import database
+
+    assert acs.get_suggestions('eag') == [
+        {'text': 'US Mint American Eagle', 'meta': '1 oz · 2024 · Gold · .9167', 'type': 'bucket', 'id': 10},
+    ]
+    assert acs.get_suggestions('maple')[0] == {
+        'text': 'Monster box', 'meta': '1 oz · 2024 · Silver · .9999', 'type': 'bucket', 'id': 20,
+    }
+
+    with patch.object(database, 'get_db_connection', side_effect=AssertionError('SQL per keystroke')):
+        assert [s['id'] for s in acs.get_suggestions('g')] == [10, 30]
+        assert [s['id'] for s in acs.get_suggestions('gold maple')] == [30]
+        assert [s['id'] for s in acs.get_suggestions('1 oz')] == [10, 20, 30]
+        assert [s['id'] for s in acs.get_suggestions('mint 2024 silv')] == [20]
+        assert [s['id'] for s in acs.get_suggestions('capsule')] == [10]
+        assert [s['id'] for s in acs.get_suggestions('stack')] == [20]
+        assert [s['id'] for s in acs.get_suggestions('agle')] == [10]           # infix fallback
+        assert [s['id'] for s in acs.get_suggestions('leaf', limit=1)] == [20]
+        assert acs.get_suggestions('platinum') == [] and acs.get_suggestions(' ') == []
+
+    # Exact word hits rank ahead of prefix-only hits
+    conn = db()
+    conn.execute("INSERT INTO categories (bucket_id, metal, product_line) VALUES (5, 'Gold', 'Goldback')")
+    conn.commit()
+    conn.close()
+    acs.reset_autocomplete_index()
+    assert [s['id'] for s in acs.get_suggestions('gold')] == [5, 10, 30]
+    assert [s['id'] for s in acs.get_suggestions('goldb')] == [5]
+
+
+def test_ac2_incremental_refresh(db):
+    acs.get_suggestions('gold')
+
+    conn = db()
+    conn.execute("INSERT INTO listings (category_id, listing_title) VALUES (4, 'Fractional maple')")
+    conn.execute("UPDATE categories SET product_line = 'Britannia', mint = 'Royal Mint' WHERE id = 3")
+    conn.commit()
+    conn.close()
+    assert acs.get_suggestions('fractional') == []
+
+    reindex_bucket(30)
+    reindex_bucket(20)
+    real_load = acs._load_buckets
+    with patch.object(acs, '_load_buckets', side_effect=real_load) as load:
+        assert acs.get_suggestions('fractional')[0]['text'] == 'Fractional maple'
+    assert load.call_args[0][1] == [20, 30]
+
+    assert [s['id'] for s in acs.get_suggestions('canadian')] == [30]
+    assert [s['id'] for s in acs.get_suggestions('brit')] == [20]
+    assert acs._words == sorted(acs._word_buckets)
+
+
+def test_ac3_endpoint(db):
+    from app import app as flask_app
+
+    flask_app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'SECRET_KEY': 'test-autocomplete'})
+    client = flask_app.test_client()
+
+    body = client.get('/api/search/autocomplete?q=Royal%20can').get_json()
+    assert body['success'] is True
+    assert [s['id'] for s in body['suggestions']] == [20, 30]
+    assert client.get('/api/search/autocomplete?q=').get_json() == {'success': True, 'suggestions': []}
+
+
+def test_ac4_background_rebuild(db):
+    built_at = datetime.now()
+    acs.get_suggestions('gold', now=built_at)
+
+    conn = db()
+    conn.execute("INSERT INTO categories (bucket_id, metal, product_line) VALUES (5, 'Gold', 'Goldback')")
+    conn.commit()
+    conn.close()
+
+    loading, release = threading.Event(), threading.Event()
+    real_load = acs._load_buckets
+
+    def slow_full_load(conn, bucket_ids=None):
+        if bucket_ids is None:
+            loading.set()
+            release.wait(5)
+        return real_load(conn, bucket_ids)
+
+    with patch.object(acs, '_load_buckets', side_effect=slow_full_load):
+        late = built_at + acs.AUTOCOMPLETE_MAX_AGE + timedelta(seconds=1)
+        assert acs.get_suggestions('goldb', now=late) == []       # stale index, no wait
+        thread = acs._rebuild_thread
+        assert thread is not None and loading.wait(5)
+        acs.mark_autocomplete_dirty([10])                          # event during the load
+        release.set()
+        thread.join(5)
+
+    assert acs._dirty == {10} and acs._built_at > built_at
+    assert [s['id'] for s in acs.get_suggestions('goldb')] == [5]
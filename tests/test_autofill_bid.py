@@ -21,6 +21,7 @@ from core.blueprints.bids.auto_match import (
     auto_match_bid_to_listings,
     auto_match_listing_to_bids,
 )
+from utils.category_manager import compute_spec_key
 
 
 # ── Minimal in-memory schema ────────────────────────────────────────────────
@@ -42,7 +43,8 @@ CREATE TABLE categories (
     mint        TEXT,
     finish      TEXT,
     bucket_id   INTEGER DEFAULT 1,
-    name        TEXT
+    name        TEXT,
+    spec_key    TEXT
 );
 
 CREATE TABLE listings (
@@ -138,10 +140,13 @@ def make_db(spot=100.0):
 def add_category(conn, metal="Gold", product_line="American Eagle",
                  product_type="Coin", weight="1 oz", year="2023",
                  purity=".9999", mint="US Mint", finish="Bullion"):
+    spec = dict(metal=metal, product_line=product_line, product_type=product_type,
+                weight=weight, purity=purity, mint=mint, finish=finish)
     cur = conn.execute(
         "INSERT INTO categories (metal, product_line, product_type, weight, year,"
-        " purity, mint, finish) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (metal, product_line, product_type, weight, year, purity, mint, finish),
+        " purity, mint, finish, spec_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (metal, product_line, product_type, weight, year, purity, mint, finish,
+         compute_spec_key(spec)),
     )
     conn.commit()
     return cur.lastrowid
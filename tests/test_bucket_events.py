@@ -0,0 +1,105 @@
+"""
+Bucket event feed tests.
+
+BE1: The first sync only records the feed position; later syncs hand other
+     workers' buckets to subscribers, including rows that commit late with a
+     lower id, and skip this process's own and already applied events.
+BE2: A process that has not synced for longer than the retention drops
+     everything; pruning removes events past the retention.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_event_service as bes
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'events.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    bes.create_bucket_events_table(conn)
+    conn.execute("CREATE TABLE categories (id INTEGER PRIMARY KEY, bucket_id INTEGER)")
+    conn.execute("INSERT INTO categories VALUES (5, 50)")
+    conn.commit()
+    conn.close()
+
+    received = []
+    callback = lambda bucket_ids, everything: received.append((set(bucket_ids), everything))
+    bes.subscribe(callback)
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn, received
+    bes._subscribers.remove(callback)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _insert(conn, bucket_id, created_at, event_id=None):
+    conn.execute('INSERT INTO bucket_events (id, bucket_id, created_at) VALUES (?, ?, ?)',
+                 (event_id, bucket_id, created_at.isoformat()))
+    conn.commit()
+
+
+def test_be1_sync_applies_foreign_events(db):
+    get_conn, received = db
+    conn = get_conn()
+    t0 = datetime.now()
+    _insert(conn, 1, t0, event_id=10)
+
+    bes.sync_bucket_events(now=t0)
+    assert received == []                          # history before start-up is not replayed
+
+    bes.publish_bucket_events([2])                 # this worker
+    bes.publish_category_events([5])
+    _insert(conn, 3, t0, event_id=20)              # another worker
+    bes.sync_bucket_events(now=t0 + timedelta(seconds=1))
+    assert received == []                          # within the check interval
+
+    t1 = t0 + bes.BUCKET_EVENT_CHECK_INTERVAL
+    bes.sync_bucket_events(now=t1)
+    assert received == [({3}, False)]
+
+    # A transaction that took id 15 commits after id 20 was seen
+    _insert(conn, 4, t1, event_id=15)
+    _insert(conn, None, t1, event_id=21)
+    bes.sync_bucket_events(now=t1 + bes.BUCKET_EVENT_CHECK_INTERVAL)
+    assert received[1] == ({4}, True)
+
+    bes.sync_bucket_events(now=t1 + 2 * bes.BUCKET_EVENT_CHECK_INTERVAL)
+    assert len(received) == 2
+    conn.close()
+
+
+def test_be2_retention(db):
+    get_conn, received = db
+    conn = get_conn()
+    t0 = datetime.now()
+    bes.sync_bucket_events(now=t0)
+
+    late = t0 + bes.BUCKET_EVENT_RETENTION + timedelta(minutes=1)
+    bes.sync_bucket_events(now=late)
+    assert received == [(set(), True)]
+
+    _insert(conn, 1, t0 - bes.BUCKET_EVENT_RETENTION - timedelta(minutes=1))
+    _insert(conn, 2, t0)
+    bes.prune_bucket_events(conn, now=t0)
+    conn.commit()
+    assert [r['bucket_id'] for r in conn.execute('SELECT bucket_id FROM bucket_events')] == [2]
+    conn.close()
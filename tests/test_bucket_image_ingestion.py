@@ -8,7 +8,7 @@ Tests are organized into:
   BIS-3  ingest_from_upload — full ingestion flow (real PIL, temp filesystem)
   BIS-4  deduplication (same checksum → duplicate=True)
   BIS-5  asset lifecycle (approve / activate / reject)
-  BIS-6  active image resolution (get_active_image_url*)
+  BIS-6  active image resolution (get_active_image_url*, bulk + cached cover)
   BIS-7  auto-activation rules (internal_upload gets auto-activated if none exists)
 """
 
@@ -38,6 +38,9 @@ from services.bucket_image_service import (
     delete_asset,
     get_active_image_url,
     get_active_image_url_by_category_bucket_id,
+    get_active_image_urls_by_category_bucket_ids,
+    get_cached_cover_path,
+    invalidate_cover_cache,
     _ingest_bytes,
     _validate_image_bytes,
     _sha256,
@@ -574,6 +577,63 @@ class TestActiveImageResolution(unittest.TestCase):
         self.assertIsNone(url)
         conn.close()
 
+    def _catalogue(self, conn):
+        """Buckets 42 (active cover), 43 (inactive standard bucket), 44 (pending only)."""
+        from PIL import Image
+        info = {'source_name': 'T', 'source_type': 'approved_db', 'raw_source_title': ''}
+        assets = {}
+        for shade, (cb, slug, active) in enumerate(((42, 'a', True), (43, 'b', False), (44, 'c', True))):
+            bid = create_standard_bucket(_sample_bucket_data(slug=slug, category_bucket_id=cb,
+                                                             active=active), conn=conn)
+            buf = io.BytesIO()
+            Image.new('RGB', (2, 2), color=(shade, shade, shade)).save(buf, format='PNG')
+            assets[cb] = _ingest_bytes(buf.getvalue(), bid, info, None, None, conn)['asset_id']
+        conn.execute("UPDATE bucket_image_assets SET status='active' WHERE id IN (?, ?)",
+                     (assets[42], assets[43]))
+        conn.commit()
+        return assets
+
+    def test_bulk_resolution_matches_single(self):
+        conn = _make_conn()
+        self._catalogue(conn)
+
+        urls = get_active_image_urls_by_category_bucket_ids(conn=conn)
+        self.assertEqual(set(urls), {42})
+        self.assertEqual(urls, get_active_image_urls_by_category_bucket_ids([42, 43, 44, 99], conn=conn))
+        self.assertEqual(urls[42], get_active_image_url_by_category_bucket_id(42, conn=conn))
+        self.assertEqual(get_active_image_urls_by_category_bucket_ids([], conn=conn), {})
+        conn.close()
+
+    def test_cover_cache_loads_once_and_invalidates(self):
+        conn = _make_conn()
+        assets = self._catalogue(conn)
+
+        class _NoClose:
+            def __init__(self, c): self._c = c
+            def __getattr__(self, n): return getattr(self._c, n)
+            def close(self): pass
+
+        invalidate_cover_cache()
+        with patch('services.bucket_image_service._get_conn', return_value=_NoClose(conn)) as get_conn:
+            paths = [get_cached_cover_path(cb) for cb in (42, 43, 44, 42, 99)]
+            self.assertEqual(get_conn.call_count, 1)
+            self.assertIsNotNone(paths[0])
+            self.assertEqual(paths[1:], [None, None, paths[0], None])
+
+            activate_asset(assets[44])
+            self.assertIsNotNone(get_cached_cover_path(44))
+            reject_asset(assets[44])
+            self.assertIsNone(get_cached_cover_path(44))
+            delete_asset(assets[42])
+            self.assertIsNone(get_cached_cover_path(42))
+
+            # Lookups between changes stay in the cache
+            calls = get_conn.call_count
+            get_cached_cover_path(42)
+            self.assertEqual(get_conn.call_count, calls)
+        invalidate_cover_cache()
+        conn.close()
+
 
 # ===========================================================================
 # BIS-7: Auto-activation rules
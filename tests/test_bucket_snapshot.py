@@ -0,0 +1,251 @@
+"""
+Bucket page snapshot tests.
+
+SN1: The snapshot holds priced listings with seller fields, bids best first,
+     sibling buckets and set photos; it is reused until the bucket's order
+     book version changes or it ages out.
+SN2: /bucket/<id> layers the per-user parts on the snapshot: own listings
+     left out of the table, own bids split from the rest, packaging and
+     Random Year filters.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_snapshot_service as bss
+from services.order_book_service import invalidate_bucket_depth
+
+
+SCHEMA = """
+CREATE TABLE users (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    username            TEXT,
+    is_metex_guaranteed INTEGER DEFAULT 0
+);
+
+CREATE TABLE user_stats (
+    user_id      INTEGER PRIMARY KEY,
+    rating_avg   REAL,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE categories (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id          INTEGER,
+    metal              TEXT,
+    product_type       TEXT,
+    weight             TEXT,
+    year               TEXT,
+    spec_key           TEXT,
+    is_isolated        INTEGER DEFAULT 0,
+    platform_fee_type  TEXT,
+    platform_fee_value REAL
+);
+
+CREATE TABLE listings (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id     INTEGER,
+    seller_id       INTEGER,
+    name            TEXT,
+    description     TEXT,
+    quantity        INTEGER DEFAULT 1,
+    price_per_coin  REAL,
+    active          INTEGER DEFAULT 1,
+    pricing_mode    TEXT DEFAULT 'static',
+    spot_premium    REAL,
+    floor_price     REAL,
+    pricing_metal   TEXT,
+    packaging_type  TEXT,
+    packaging_notes TEXT,
+    condition_notes TEXT,
+    edition_number  INTEGER,
+    edition_total   INTEGER,
+    isolated_type   TEXT,
+    issue_number    INTEGER,
+    issue_total     INTEGER
+);
+
+CREATE TABLE bids (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id        INTEGER,
+    buyer_id           INTEGER,
+    quantity_requested INTEGER DEFAULT 1,
+    remaining_quantity INTEGER DEFAULT 1,
+    price_per_coin     REAL,
+    delivery_address   TEXT,
+    status             TEXT DEFAULT 'Open',
+    created_at         TIMESTAMP,
+    active             INTEGER DEFAULT 1,
+    requires_grading   INTEGER DEFAULT 0,
+    preferred_grader   TEXT,
+    pricing_mode       TEXT DEFAULT 'static',
+    spot_premium       REAL,
+    ceiling_price      REAL,
+    pricing_metal      TEXT
+);
+
+CREATE TABLE listing_photos (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing_id INTEGER,
+    file_path  TEXT
+);
+
+CREATE TABLE listing_set_items (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing_id     INTEGER,
+    position_index INTEGER,
+    item_title     TEXT
+);
+
+CREATE TABLE listing_set_item_photos (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    set_item_id    INTEGER,
+    file_path      TEXT,
+    position_index INTEGER
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'snapshot.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO users (id, username, is_metex_guaranteed) "
+                 "VALUES (1, 'alice', 1), (2, 'bob', 0), (3, 'carol', 0)")
+    conn.execute("INSERT INTO user_stats (user_id, rating_avg, rating_count) VALUES (1, 4.5, 2)")
+    conn.executemany("INSERT INTO categories (id, bucket_id, metal, product_type, weight, year, spec_key, is_isolated) "
+                     "VALUES (?, ?, ?, 'Coin', '1 oz', ?, ?, ?)", [
+        (1, 10, 'Gold', '2024', 'eagle', 0),
+        (2, 11, 'Gold', '2023', 'eagle', 0),
+        (3, 20, 'Silver', '2024', 'proof-set', 1),
+    ])
+    conn.executemany("INSERT INTO listings (id, category_id, seller_id, name, description, quantity, price_per_coin, "
+                     "pricing_mode, spot_premium, floor_price, pricing_metal, packaging_type, isolated_type) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (1, 1, 1, 'Eagle', 'Brilliant', 2, 2100, 'static', None, None, None, 'Tube', None),
+        (2, 1, 2, None, None, 1, 0, 'premium_to_spot', 50, 1500, 'gold', 'Capsule', None),
+        (3, 2, 3, None, None, 4, 1990, 'static', None, None, None, 'Tube', None),
+        (4, 3, 2, 'Proof set', None, 1, 900, 'static', None, None, None, None, 'set'),
+    ])
+    conn.executemany("INSERT INTO bids (id, category_id, buyer_id, price_per_coin) VALUES (?, 1, ?, ?)",
+                     [(1, 2, 1900), (2, 1, 1950), (3, 3, 1850)])
+    conn.executemany("INSERT INTO listing_photos (listing_id, file_path) VALUES (4, ?)",
+                     [('uploads/cover.jpg',), ('uploads/extra.jpg',)])
+    conn.executemany("INSERT INTO listing_set_items (id, listing_id, position_index, item_title) VALUES (?, 4, ?, ?)",
+                     [(1, 0, 'First'), (2, 1, 'Second')])
+    conn.executemany("INSERT INTO listing_set_item_photos (set_item_id, file_path, position_index) VALUES (?, ?, ?)",
+                     [(1, 'uploads/a.jpg', 0), (1, 'uploads/b.jpg', 1), (2, 'uploads/c.jpg', 0)])
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', 2000, ?)",
+                 (datetime.now().isoformat(),))
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _ids(rows):
+    return [r['id'] for r in rows]
+
+
+def test_sn1_snapshot(db):
+    import database
+
+    snap = bss.get_bucket_snapshot(10)
+    assert _ids(snap['listings']) == [1, 2]
+    assert [l['effective_price'] for l in snap['listings']] == [2100, 2050]
+    alice = snap['listings'][0]
+    assert (alice['seller_username'], alice['seller_is_metex_guaranteed'],
+            alice['seller_rating'], alice['seller_rating_count']) == ('alice', 1, 4.5, 2)
+    assert _ids(snap['bids']) == [2, 1, 3] and snap['bids'][0]['buyer_name'] == 'alice'
+    assert sorted(snap['sibling_bucket_ids']) == [10, 11]
+    assert snap['isolated'] is None and snap['spot_prices']['gold'] == 2000
+    assert bss.get_bucket_snapshot(999) is None
+
+    with patch.object(database, 'get_db_connection', side_effect=AssertionError('SQL on a cached bucket')):
+        assert bss.get_bucket_snapshot(10) is snap
+
+    invalidate_bucket_depth(10)
+    rebuilt = bss.get_bucket_snapshot(10)
+    assert rebuilt is not snap
+    assert bss.get_bucket_snapshot(10, now=rebuilt['built_at'] + bss.SNAPSHOT_MAX_AGE
+                                   + timedelta(seconds=1)) is not rebuilt
+
+    isolated = bss.get_bucket_snapshot(20)['isolated']
+    assert isolated['photo_urls'] == ['/static/uploads/cover.jpg', '/static/uploads/extra.jpg']
+    assert [item['photo_urls'] for item in isolated['set_items']] == [
+        ['/static/uploads/a.jpg', '/static/uploads/b.jpg'], ['/static/uploads/c.jpg']]
+
+
+def test_sn2_view_layers_user_parts(db):
+    from app import app as flask_app
+    import core.blueprints.buy.bucket_view as bucket_view
+
+    flask_app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'SECRET_KEY': 'test-bucket-snapshot'})
+    client = flask_app.test_client()
+    pages = []
+
+    def render(template, **context):
+        pages.append(context)
+        return ''
+
+    with patch.object(bucket_view, 'render_template', side_effect=render):
+        client.get('/bucket/10')
+        page = pages[-1]
+        assert _ids(page['listings']) == [1, 2] and page['listing_title'] == 'Eagle'
+        assert page['availability'] == {'lowest_price': 2050.0, 'total_available': 3,
+                                        'all_listings_are_users': False}
+        assert page['user_bids'] == [] and _ids(page['bids']) == [2, 1, 3] and page['best_bid']['id'] == 2
+        assert [s['username'] for s in page['sellers']] == ['alice', 'bob']
+        assert page['sellers'][0]['is_metex_guaranteed'] is True
+        assert page['spot_price'] == 2000
+
+        client.get('/bucket/10?packaging_styles=Tube')
+        assert _ids(pages[-1]['listings']) == [1] and pages[-1]['availability']['lowest_price'] == 2100.0
+
+        client.get('/bucket/10?random_year=1')
+        page = pages[-1]
+        assert _ids(page['listings']) == [1, 2, 3] and page['specs']['Year'] == 'Random'
+        assert (page['availability']['lowest_price'], page['availability']['total_available']) == (1990.0, 7)
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+        client.get('/bucket/10')
+        page = pages[-1]
+        assert _ids(page['listings']) == [2] and page['availability']['total_available'] == 3
+        assert _ids(page['user_bids']) == [2] and _ids(page['bids']) == [1, 3] and page['best_bid']['id'] == 1
+
+        client.get('/bucket/20')
+        page = pages[-1]
+        assert page['isolated_type'] == 'set' and len(page['set_items']) == 2
+        assert page['images'] == ['/static/uploads/cover.jpg', '/static/uploads/extra.jpg',
+                                  '/static/uploads/a.jpg', '/static/uploads/c.jpg']
+
+    assert client.get('/bucket/999').status_code == 302
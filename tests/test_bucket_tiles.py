@@ -0,0 +1,372 @@
+"""
+/buy bucket tile model tests.
+
+BT1: Tiles carry the per-request fields the buy page used to compute:
+     spot-priced lowest ask, availability, own-listing flags, grading
+     filters, isolated/set split, sorts, category and indexed text search.
+BT2: Steady state runs no SQL; listing events reload only their bucket, new
+     orders and spot snapshots are picked up by the watermark check.
+BT3: Bucket events recorded by another worker reload only their buckets;
+     update_bucket_price records its event on the connection it prices on.
+BT4: Keyset pages walk a section in sort order without gaps or repeats, and
+     survive tiles inserted ahead of the cursor.
+BT5: /api/buckets/browse pages tiles with filters; bad cursors are a 400.
+BT6: Browse pages reuse the cached section order and build only their own
+     tiles; a listing event drops the order.
+BT7: GET /buy builds only the first page of standard tiles (plus the
+     isolated sections) and takes the hero tiles from that page.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_tile_service as bts
+from services.search_index_service import create_search_index, rebuild_search_index
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id          INTEGER,
+    metal              TEXT,
+    product_type       TEXT,
+    weight             TEXT,
+    mint               TEXT,
+    year               TEXT,
+    finish             TEXT,
+    grade              TEXT,
+    purity             TEXT,
+    coin_series        TEXT,
+    product_line       TEXT,
+    is_isolated        INTEGER DEFAULT 0,
+    platform_fee_type  TEXT,
+    platform_fee_value REAL
+);
+
+CREATE TABLE listings (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id     INTEGER,
+    seller_id       INTEGER,
+    name            TEXT,
+    listing_title   TEXT,
+    quantity        INTEGER DEFAULT 1,
+    price_per_coin  REAL,
+    active          INTEGER DEFAULT 1,
+    pricing_mode    TEXT DEFAULT 'static',
+    spot_premium    REAL,
+    floor_price     REAL,
+    pricing_metal   TEXT,
+    graded          INTEGER DEFAULT 0,
+    grading_service TEXT,
+    isolated_type   TEXT,
+    issue_number    INTEGER,
+    issue_total     INTEGER
+);
+
+CREATE TABLE listing_photos (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing_id INTEGER,
+    file_path  TEXT
+);
+
+CREATE TABLE order_items (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id   INTEGER,
+    listing_id INTEGER,
+    quantity   INTEGER,
+    price_each REAL
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+
+CREATE TABLE bucket_events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id  INTEGER,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE bucket_price_history (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id      INTEGER,
+    best_ask_price REAL,
+    timestamp      TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'tiles.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO categories (id, bucket_id, metal, product_type, weight, product_line, is_isolated) "
+                     "VALUES (?, ?, ?, 'Coin', '1 oz', ?, ?)", [
+        (1, 1, 'Gold', 'American Eagle', 0),
+        (2, 2, 'Silver', 'Maple Leaf', 0),
+        (3, 3, 'Gold', 'Buffalo', 0),
+        (4, 4, 'Gold', None, 1),
+        (5, 5, 'Silver', None, 1),
+        (6, 6, 'Silver', None, 1),
+    ])
+    conn.executemany("INSERT INTO listings (id, category_id, seller_id, name, quantity, price_per_coin, pricing_mode, "
+                     "spot_premium, floor_price, pricing_metal, graded, grading_service, isolated_type) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (1, 1, 1, None, 2, 2100, 'static', None, None, None, 1, 'PCGS', None),
+        (2, 1, 2, None, 1, 0, 'premium_to_spot', 60, 1500, 'gold', 0, None, None),
+        (3, 2, 1, None, 5, 30, 'static', None, None, None, 0, None, None),
+        (4, 4, 2, 'Rare coin', 1, 5000, 'static', None, None, None, 0, None, 'one_of_a_kind'),
+        (5, 5, 2, 'Empty set', 0, 700, 'static', None, None, None, 0, None, 'set'),
+        (6, 6, 2, 'Proof set', 1, 900, 'static', None, None, None, 0, None, 'set'),
+    ])
+    conn.executemany("INSERT INTO listing_photos (listing_id, file_path) VALUES (?, ?)",
+                     [(4, 'uploads/rare_front.jpg'), (4, 'uploads/rare_back.jpg'), (6, 'uploads/set.jpg')])
+    conn.executemany("INSERT INTO order_items (order_id, listing_id, quantity, price_each) VALUES (1, ?, 1, 1)",
+                     [(3,), (3,), (3,), (1,)])
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', 2000, ?)",
+                 (datetime.now().isoformat(),))
+    create_search_index(conn)
+    rebuild_search_index(conn)
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    bts.reset_bucket_tiles()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _ids(tiles):
+    return [t['bucket_id'] for t in tiles]
+
+
+def test_bt1_tiles(db):
+    tiles = bts.get_buy_page_buckets()
+    assert _ids(tiles['standard']) == [2, 1, 3]
+    gold = tiles['standard'][1]
+    assert (gold['lowest_price'], gold['total_available'], gold['listing_count']) == (2060.0, 3, 2)
+    assert gold['is_variable_pricing'] and (gold['spot_metal'], gold['spot_price']) == ('gold', 2000)
+    assert not gold['all_listings_are_users'] and gold['total_non_user_available'] == 3
+    assert tiles['standard'][2]['lowest_price'] is None and tiles['standard'][2]['total_available'] == 0
+    assert _ids(tiles['one_of_a_kind']) == [4] and _ids(tiles['sets']) == [6]
+    assert tiles['one_of_a_kind'][0]['tile_image_url'] == '/static/uploads/rare_front.jpg'
+    assert tiles['one_of_a_kind'][0]['listing_title'] == 'Rare coin'
+
+    mine = {t['bucket_id']: t for t in bts.get_buy_page_buckets(user_id=1)['standard']}
+    assert mine[2]['all_listings_are_users'] and mine[2]['total_non_user_available'] == 0
+    assert not mine[1]['all_listings_are_users'] and mine[1]['total_non_user_available'] == 1
+
+    pcgs = {t['bucket_id']: t for t in bts.get_buy_page_buckets(bts.listing_filter_key(True, pcgs=True))['standard']}
+    assert (pcgs[1]['lowest_price'], pcgs[1]['total_available'], pcgs[1]['is_variable_pricing']) == (2100.0, 2, False)
+    assert pcgs[2]['lowest_price'] is None
+    assert bts.listing_filter_key(True) is None
+    assert bts.listing_filter_key(True, ngc=True, pcgs=True) == 'graded:NGC,PCGS'
+
+    assert _ids(bts.get_buy_page_buckets(sort='popular')['standard']) == [2, 1, 3]
+    assert _ids(bts.get_buy_page_buckets(sort='new')['standard']) == [2, 1, 3]
+    assert _ids(bts.get_buy_page_buckets(metal='Gold')['standard']) == [1, 3]
+    assert _ids(bts.get_buy_page_buckets(product_line='Buffalo')['standard']) == [3]
+    with patch.object(bts, '_matches_search', side_effect=AssertionError('search index not used')):
+        assert _ids(bts.get_buy_page_buckets(search='maple')['standard']) == [2]
+        assert _ids(bts.get_buy_page_buckets(search='rare')['one_of_a_kind']) == [4]
+
+
+def test_bt2_incremental_updates(db):
+    import database
+
+    bts.get_buy_page_buckets()
+    with patch.object(database, 'get_db_connection', side_effect=AssertionError('SQL in steady state')):
+        for _ in range(3):
+            assert _ids(bts.get_buy_page_buckets()['standard']) == [2, 1, 3]
+
+    conn = db()
+    conn.execute("UPDATE listings SET price_per_coin = 3000 WHERE id = 3")
+    conn.commit()
+    conn.close()
+    bts.mark_bucket_dirty(2)
+
+    real_load = bts._load_buckets
+    with patch.object(bts, '_load_buckets', side_effect=real_load) as load, \
+         patch.object(bts, '_full_build') as full:
+        tiles = bts.get_buy_page_buckets()
+    assert load.call_args[0][1] == [2]
+    full.assert_not_called()
+    assert _ids(tiles['standard']) == [1, 2, 3] and tiles['standard'][1]['lowest_price'] == 3000.0
+
+    conn = db()
+    conn.execute("INSERT INTO order_items (order_id, listing_id, quantity, price_each) VALUES (2, 1, 1, 2100)")
+    conn.execute("UPDATE listings SET quantity = 1, price_per_coin = 2200 WHERE id = 1")
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', 2100, ?)",
+                 (datetime.now().isoformat(),))
+    conn.commit()
+    conn.close()
+    bts._checked_at -= bts.TILE_CHECK_INTERVAL
+
+    with patch.object(bts, '_full_build') as full:
+        tiles = bts.get_buy_page_buckets(sort='popular')
+    full.assert_not_called()
+    gold = {t['bucket_id']: t for t in tiles['standard']}[1]
+    assert gold['popularity'] == 2
+    assert (gold['lowest_price'], gold['total_available'], gold['spot_price']) == (2160.0, 2, 2100)
+
+
+def test_bt3_other_worker_events(db):
+    from services import bucket_event_service as bes
+    from services import bucket_price_history_service as bph
+
+    bts.get_buy_page_buckets()
+    real_load = bts._load_buckets
+    with patch.object(bes, 'BUCKET_EVENT_CHECK_INTERVAL', timedelta(0)), \
+         patch.object(bts, '_load_buckets', side_effect=real_load) as load, \
+         patch.object(bts, '_full_build') as full:
+        conn = db()   # another worker records a listing event and a spot tick
+        conn.execute("UPDATE listings SET active = 0 WHERE id = 6")
+        conn.execute("INSERT INTO bucket_events (bucket_id, created_at) VALUES (6, ?)",
+                     (datetime.now().isoformat(),))
+        conn.execute("INSERT INTO bucket_events (bucket_id, created_at) VALUES (NULL, ?)",
+                     (datetime.now().isoformat(),))
+        conn.commit()
+        conn.close()
+        tiles = bts.get_buy_page_buckets()
+        full.assert_not_called()
+        assert load.call_args[0][1] == [6] and tiles['sets'] == []
+
+        # Our own listing event reloads the bucket here and is not applied twice
+        with patch.object(bph, 'refresh_reference_series'), patch.object(bph, 'reindex_bucket'), \
+             patch.object(bph, 'get_db_connection', side_effect=db) as connect:
+            bph.update_bucket_price(2)
+        assert connect.call_count == 1
+        load.reset_mock()
+        bts.get_buy_page_buckets()
+        bts.get_buy_page_buckets()
+        assert [c[0][1] for c in load.call_args_list] == [[2]]
+
+    conn = db()
+    assert [r['bucket_id'] for r in conn.execute('SELECT bucket_id FROM bucket_events ORDER BY id')] == [6, None, 2]
+    assert conn.execute('SELECT COUNT(*) AS n FROM bucket_price_history').fetchone()['n'] == 1
+    conn.close()
+
+
+def _walk(sort, limit, **filters):
+    ids, cursor = [], None
+    while True:
+        page = bts.browse_bucket_tiles(sort=sort, cursor=cursor, limit=limit, **filters)
+        ids += _ids(page['tiles'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids, page['total']
+
+
+def test_bt4_keyset_pages(db):
+    for sort in (None, 'popular', 'new'):
+        expected = _ids(bts.get_buy_page_buckets(sort=sort)['standard'])
+        assert _walk(sort, 1) == (expected, 3)
+        assert _walk(sort, 2) == (expected, 3)
+    assert _walk(None, 1, metal='Gold') == ([1, 3], 2)
+    assert _walk(None, 5, section='sets') == ([6], 1)
+
+    first = bts.browse_bucket_tiles(limit=1)
+    assert _ids(first['tiles']) == [2]
+
+    # A cheaper tile appearing before the cursor does not shift the next page
+    conn = db()
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight, is_isolated) "
+                 "VALUES (7, 7, 'Silver', 'Bar', '1 oz', 0)")
+    conn.execute("INSERT INTO listings (category_id, seller_id, quantity, price_per_coin, pricing_mode, graded) "
+                 "VALUES (7, 2, 1, 20, 'static', 0)")
+    conn.commit()
+    conn.close()
+    bts.mark_bucket_dirty(7)
+    assert _ids(bts.browse_bucket_tiles(cursor=first['next_cursor'], limit=5)['tiles']) == [1, 3]
+
+    with pytest.raises(ValueError):
+        bts.browse_bucket_tiles(sort='new', cursor=first['next_cursor'])
+    with pytest.raises(ValueError):
+        bts.browse_bucket_tiles(cursor='not-a-cursor')
+    with pytest.raises(ValueError):
+        bts.browse_bucket_tiles(section='everything')
+
+
+def test_bt5_browse_endpoint(db):
+    from app import app as flask_app
+
+    flask_app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'SECRET_KEY': 'test-browse'})
+    client = flask_app.test_client()
+
+    body = client.get('/api/buckets/browse?limit=2').get_json()
+    assert body['success'] and body['total'] == 3 and body['sort'] == 'price'
+    assert _ids(body['buckets']) == [2, 1]
+    assert body['buckets'][0]['url'] == '/bucket/2' and body['buckets'][0]['title'] == 'Maple Leaf'
+    body = client.get('/api/buckets/browse?limit=2&cursor=' + body['next_cursor']).get_json()
+    assert _ids(body['buckets']) == [3] and body['next_cursor'] is None
+
+    body = client.get('/api/buckets/browse?graded_only=1&pcgs=1&sort=popular').get_json()
+    assert [(t['bucket_id'], t['lowest_price']) for t in body['buckets']] == [(2, None), (1, 2100.0), (3, None)]
+    assert client.get('/api/buckets/browse?graded_only=1').get_json()['buckets'] == []
+    assert _ids(client.get('/api/buckets/browse?section=one_of_a_kind').get_json()['buckets']) == [4]
+
+    assert client.get('/api/buckets/browse?sort=cheapest').status_code == 400
+    assert client.get('/api/buckets/browse?cursor=zzz').status_code == 400
+
+
+def test_bt6_browse_reuses_section_order(db):
+    expected = _ids(bts.get_buy_page_buckets(search='maple')['standard'])
+    assert _walk(None, 1, search='maple') == (expected, len(expected))
+
+    real_tile = bts._tile
+    with patch.object(bts, '_sort_key', side_effect=bts._sort_key) as sort_key, \
+         patch.object(bts, '_tile', side_effect=real_tile) as tile:
+        first = bts.browse_bucket_tiles(limit=1)
+        bts.browse_bucket_tiles(cursor=first['next_cursor'], limit=1)
+        assert sort_key.call_count == 1 and tile.call_count == 2   # cursor check only
+
+    bts.mark_bucket_dirty(2)
+    with patch.object(bts, '_sort_key', side_effect=bts._sort_key) as sort_key:
+        assert _ids(bts.browse_bucket_tiles(limit=5)['tiles']) == [2, 1, 3]
+        assert sort_key.call_count == 3
+
+
+def test_bt7_buy_page_builds_first_page(db):
+    from app import app as flask_app
+    import core.blueprints.buy.buy_page as buy_page
+
+    flask_app.config.update({'TESTING': True, 'SECRET_KEY': 'test-buy-page'})
+    rendered = {}
+
+    def render(template, **context):
+        rendered.update(context)
+        return 'page'
+
+    real_tile = bts._tile
+    with patch.object(buy_page, 'render_template', side_effect=render), \
+         patch.object(buy_page, 'BROWSE_PAGE_SIZE', 1), \
+         patch.object(buy_page, 'get_ticker', return_value=[]), \
+         patch.object(bts, '_tile', side_effect=real_tile) as tile:
+        assert flask_app.test_client().get('/buy').status_code == 200
+
+    assert _ids(rendered['standard_buckets']) == [2] and rendered['standard_total'] == 3
+    assert rendered['standard_next_cursor'] and _ids(rendered['hero_buckets']) == [2]
+    assert _ids(rendered['one_of_a_kind_buckets']) == [4] and _ids(rendered['set_buckets']) == [6]
+    assert tile.call_count == 3   # one standard tile and the two isolated ones
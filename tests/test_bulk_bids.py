@@ -0,0 +1,179 @@
+"""
+Bulk bid placement tests.
+
+BB1: Mixed batch — valid bids inserted, invalid/unknown/own-only entries reported per bid.
+BB2: Premium-to-spot bids report the effective price (spot + premium, capped at ceiling).
+BB3: Bulk placement never matches or charges (no auto_match imports).
+BB4: A rematch pass reads spot once and retrieves each payment method from Stripe once.
+"""
+
+import ast
+import os
+import sqlite3
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blueprints.bids.auto_match import check_all_pending_matches
+from core.blueprints.bids.bulk_place import place_bids_bulk
+
+
+SCHEMA_SQL = """
+CREATE TABLE users (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    username            TEXT,
+    first_name          TEXT,
+    last_name           TEXT,
+    stripe_customer_id  TEXT,
+    bid_payment_strikes INTEGER DEFAULT 0
+);
+
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_line TEXT,
+    product_type TEXT,
+    weight       TEXT,
+    year         TEXT,
+    spec_key     TEXT
+);
+
+CREATE TABLE listings (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    seller_id       INTEGER NOT NULL,
+    category_id     INTEGER NOT NULL,
+    price_per_coin  REAL    NOT NULL,
+    quantity        INTEGER DEFAULT 1,
+    active          INTEGER DEFAULT 1,
+    pricing_mode    TEXT    DEFAULT 'static',
+    spot_premium    REAL    DEFAULT 0,
+    floor_price     REAL    DEFAULT 0,
+    pricing_metal   TEXT,
+    grading_service TEXT
+);
+
+CREATE TABLE bids (
+    id                    INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id           INTEGER NOT NULL,
+    buyer_id              INTEGER NOT NULL,
+    quantity_requested    INTEGER NOT NULL,
+    price_per_coin        REAL    NOT NULL,
+    remaining_quantity    INTEGER NOT NULL,
+    active                INTEGER DEFAULT 1,
+    requires_grading      INTEGER DEFAULT 0,
+    delivery_address      TEXT,
+    status                TEXT    DEFAULT 'Open',
+    pricing_mode          TEXT    DEFAULT 'static',
+    spot_premium          REAL,
+    ceiling_price         REAL,
+    pricing_metal         TEXT,
+    recipient_first_name  TEXT,
+    recipient_last_name   TEXT,
+    random_year           INTEGER DEFAULT 0,
+    created_at            TEXT    DEFAULT (datetime('now')),
+    bid_payment_method_id TEXT,
+    bid_payment_status    TEXT    DEFAULT 'pending'
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TEXT
+);
+"""
+
+BUYER = 1
+SELLER = 2
+
+
+def make_db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+    conn.execute("INSERT INTO users (id, username, first_name, last_name) VALUES (1, 'buyer', 'Bea', 'Buyer')")
+    conn.execute("INSERT INTO users (id, username) VALUES (2, 'seller')")
+    for cat_id, year in ((1, '2023'), (2, '2024'), (3, '2025')):
+        conn.execute(
+            "INSERT INTO categories (id, bucket_id, metal, product_line, product_type, weight, year)"
+            " VALUES (?, ?, 'Gold', 'American Eagle', 'Coin', '1 oz', ?)",
+            (cat_id, cat_id * 10, year),
+        )
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', 2000, '2025-01-01')")
+    conn.execute("INSERT INTO listings (seller_id, category_id, price_per_coin, quantity) VALUES (?, 1, 2100, 5)", (SELLER,))
+    conn.execute("INSERT INTO listings (seller_id, category_id, price_per_coin, quantity) VALUES (?, 3, 2100, 5)", (BUYER,))
+    conn.commit()
+    return conn
+
+
+def test_bb1_mixed_batch_reports_per_bid():
+    conn = make_db()
+    specs = [
+        {'bucket_id': 10, 'quantity': 2, 'price': 2050, 'random_year': True},
+        {'bucket_id': 20, 'quantity': 0, 'price': 2050},
+        {'bucket_id': 99, 'quantity': 1, 'price': 2050},
+        {'bucket_id': 30, 'quantity': 1, 'price': 2050},
+        {'bucket_id': 20, 'quantity': 3, 'price': 1990, 'delivery_address': 'Other St'},
+    ]
+    summary = place_bids_bulk(conn, BUYER, specs, 'pm_bulk', delivery_address='1 Main St')
+    results = summary['results']
+
+    assert summary['placed'] == 2
+    assert [r['success'] for r in results] == [True, False, False, False, True]
+    assert 'quantity' in results[1]['errors']
+    assert results[2]['message'] == 'Item not found.'
+    assert 'only ones available' in results[3]['message']
+
+    bids = conn.execute('SELECT * FROM bids ORDER BY id').fetchall()
+    assert [b['id'] for b in bids] == [results[0]['bid_id'], results[4]['bid_id']]
+    assert (bids[0]['category_id'], bids[0]['random_year'], bids[0]['remaining_quantity']) == (1, 1, 2)
+    assert bids[0]['delivery_address'] == '1 Main St'
+    assert bids[1]['delivery_address'] == 'Other St'
+    assert all(b['bid_payment_method_id'] == 'pm_bulk' for b in bids)
+    assert all(b['recipient_first_name'] == 'Bea' for b in bids)
+    assert results[0]['item_description'] == 'Gold American Eagle 1 oz 2023'
+
+
+def test_bb2_premium_bid_effective_price():
+    conn = make_db()
+    specs = [
+        {'bucket_id': 10, 'quantity': 1, 'pricing_mode': 'premium_to_spot',
+         'spot_premium': 50, 'ceiling_price': 2100, 'pricing_metal': 'gold'},
+        {'bucket_id': 20, 'quantity': 1, 'pricing_mode': 'variable',
+         'spot_premium': 500, 'ceiling_price': 2100, 'pricing_metal': 'gold'},
+        {'bucket_id': 20, 'quantity': 1, 'pricing_mode': 'premium_to_spot',
+         'spot_premium': 10, 'ceiling_price': 0, 'pricing_metal': 'gold'},
+    ]
+    results = place_bids_bulk(conn, BUYER, specs, 'pm_bulk', delivery_address='1 Main St')['results']
+
+    assert results[0]['effective_price'] == 2050.0
+    assert results[1]['effective_price'] == 2100.0
+    assert results[1]['pricing_mode'] == 'premium_to_spot'
+    assert 'ceiling_price' in results[2]['errors']
+
+
+def test_bb3_bulk_placement_never_matches():
+    path = os.path.join(os.path.dirname(__file__), '..', 'core', 'blueprints', 'bids', 'bulk_place.py')
+    with open(os.path.abspath(path)) as f:
+        tree = ast.parse(f.read())
+    imported = {alias.name for node in ast.walk(tree)
+                if isinstance(node, ast.ImportFrom) for alias in node.names}
+    assert not imported & {'auto_match_bid_to_listings', 'check_all_pending_matches',
+                           '_charge_bid_payment'}
+
+
+def test_bb4_rematch_retrieves_each_payment_method_once():
+    conn = make_db()
+    place_bids_bulk(conn, BUYER, [
+        {'bucket_id': 10, 'quantity': 1, 'price': 2000},
+        {'bucket_id': 10, 'quantity': 2, 'price': 2010},
+        {'bucket_id': 10, 'quantity': 3, 'price': 2020},
+    ], 'pm_shared', delivery_address='1 Main St')
+
+    with patch('stripe.PaymentMethod.retrieve', return_value=MagicMock(type='card')) as retrieve:
+        result = check_all_pending_matches(conn)
+
+    assert result['total_filled'] == 0
+    assert retrieve.call_count == 1
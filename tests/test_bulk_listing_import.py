@@ -0,0 +1,264 @@
+"""
+Bulk listing import tests.
+
+BI1: CSV import — categories resolved in memory, one transaction, one price update per bucket.
+BI2: Invalid rows (bad spec, missing photo, rejected photo) are reported and skipped.
+BI3: CategorySpecIndex resolves to the same categories/buckets as get_or_create_category.
+BI4: Manifest/archive parsing — JSON wrapper, CSV header, non-image archive entries skipped.
+BI5: CategorySpecIndex keeps the SQL NULL semantics: a NULL `=` field never matches.
+BI6: A rolled-back import removes the photo files it saved.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import sys
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blueprints.sell import bulk_import
+from core.blueprints.sell.bulk_import import (
+    ManifestError,
+    import_listings,
+    parse_manifest,
+    read_photo_archive,
+)
+from utils.category_manager import CategorySpecIndex, get_or_create_category
+
+
+SCHEMA_SQL = """
+CREATE TABLE categories (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id          INTEGER,
+    name               TEXT,
+    metal              TEXT,
+    product_line       TEXT,
+    product_type       TEXT,
+    weight             TEXT,
+    purity             TEXT,
+    mint               TEXT,
+    year               TEXT,
+    finish             TEXT,
+    grade              TEXT,
+    condition_category TEXT,
+    series_variant     TEXT,
+    is_isolated        INTEGER NOT NULL DEFAULT 0,
+    spec_key           TEXT
+);
+
+CREATE TABLE listings (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id     INTEGER,
+    seller_id       INTEGER,
+    quantity        INTEGER,
+    price_per_coin  REAL,
+    pricing_mode    TEXT,
+    spot_premium    REAL,
+    floor_price     REAL,
+    pricing_metal   TEXT,
+    is_isolated     INTEGER,
+    isolated_type   TEXT,
+    name            TEXT,
+    description     TEXT,
+    packaging_type  TEXT,
+    packaging_notes TEXT,
+    cert_number     TEXT,
+    condition_notes TEXT,
+    active          INTEGER
+);
+
+CREATE TABLE listing_photos (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing_id  INTEGER,
+    uploader_id INTEGER,
+    file_path   TEXT
+);
+"""
+
+OPTIONS = {
+    'metals': ['Gold', 'Silver'],
+    'product_lines': ['American Eagle'],
+    'product_types': ['Coin'],
+    'weights': ['1 oz'],
+    'purities': ['.9999'],
+    'mints': ['US Mint'],
+    'years': ['2023', '2024'],
+    'finishes': ['Bullion', 'Proof'],
+}
+
+SPEC = {'metal': 'Gold', 'product_line': 'American Eagle', 'product_type': 'Coin',
+        'weight': '1 oz', 'purity': '.9999', 'mint': 'US Mint', 'year': '2023',
+        'finish': 'Bullion', 'grade': 'Ungraded'}
+
+CSV_HEADER = ('metal,product_line,product_type,weight,purity,mint,year,finish,grade,'
+              'quantity,pricing_mode,price_per_coin,spot_premium,floor_price,photos\n')
+
+
+def make_db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+def _fake_upload(file, **kwargs):
+    if file.filename.startswith('bad'):
+        return {'success': False, 'error': 'Invalid image file', 'path': None}
+    return {'success': True, 'error': None, 'path': f'uploads/listings/saved_{file.filename}'}
+
+
+def _run_import(conn, rows, photos):
+    with patch.object(bulk_import, 'get_dropdown_options', return_value=OPTIONS), \
+         patch.object(bulk_import, 'save_secure_upload', side_effect=_fake_upload) as upload, \
+         patch.object(bulk_import, 'update_bucket_price') as update_price:
+        summary = import_listings(conn, 7, rows, photos)
+    return summary, upload, update_price
+
+
+def test_bi1_csv_import_batches_categories_and_price_updates():
+    conn = make_db()
+    existing_id = get_or_create_category(conn, SPEC)
+    conn.commit()
+
+    manifest = CSV_HEADER + (
+        'Gold,American Eagle,Coin,1 oz,.9999,US Mint,2023,Bullion,Ungraded,5,static,2100,,,a.jpg;b.jpg\n'
+        'Gold,American Eagle,Coin,1 oz,.9999,US Mint,2023,Bullion,Ungraded,2,static,2110,,,a.jpg\n'
+        'Gold,American Eagle,Coin,1 oz,.9999,US Mint,2024,Bullion,Ungraded,1,premium_to_spot,,40,2000,c.jpg\n'
+        'Gold,American Eagle,Coin,1 oz,.9999,US Mint,2024,Proof,Ungraded,1,static,2500,,,c.jpg\n'
+    )
+    rows = parse_manifest(manifest.encode(), 'dealer.csv')
+    photos = {'a.jpg': b'a', 'b.jpg': b'b', 'c.jpg': b'c'}
+    summary, upload, update_price = _run_import(conn, rows, photos)
+
+    assert summary['created'] == 4
+    assert summary['categories_created'] == 2
+    assert upload.call_count == 3  # each archive photo saved once
+
+    listings = conn.execute('SELECT * FROM listings ORDER BY id').fetchall()
+    assert [l['category_id'] for l in listings][:2] == [existing_id, existing_id]
+    assert listings[2]['pricing_mode'] == 'premium_to_spot'
+    assert listings[2]['price_per_coin'] == 2000
+    assert listings[2]['pricing_metal'] == 'Gold'
+
+    cats = {r['id']: r for r in conn.execute('SELECT * FROM categories')}
+    # 2024 Bullion and 2024 Proof share a bucket (buckets ignore finish)
+    assert cats[listings[2]['category_id']]['bucket_id'] == cats[listings[3]['category_id']]['bucket_id']
+    assert cats[listings[2]['category_id']]['bucket_id'] != cats[existing_id]['bucket_id']
+
+    photo_rows = conn.execute('SELECT listing_id, file_path FROM listing_photos ORDER BY id').fetchall()
+    assert [(p['listing_id'], p['file_path']) for p in photo_rows][:2] == [
+        (listings[0]['id'], 'uploads/listings/saved_a.jpg'),
+        (listings[0]['id'], 'uploads/listings/saved_b.jpg'),
+    ]
+
+    assert update_price.call_count == summary['buckets_updated'] == 2
+
+
+def test_bi2_invalid_rows_reported_and_skipped():
+    conn = make_db()
+    rows = [
+        dict(SPEC, quantity='1', price_per_coin='2100', photos='a.jpg'),
+        dict(SPEC, metal='Platinum', quantity='1', price_per_coin='2100', photos='a.jpg'),
+        dict(SPEC, quantity='1', price_per_coin='2100', photos='missing.jpg'),
+        dict(SPEC, quantity='1', price_per_coin='2100', photos='bad.jpg'),
+        dict(SPEC, quantity='0', price_per_coin='2100', photos='a.jpg'),
+        dict(SPEC, quantity='1', price_per_coin='2100'),
+    ]
+    summary, _, update_price = _run_import(conn, rows, {'a.jpg': b'a', 'bad.jpg': b'x'})
+    results = summary['results']
+
+    assert [r['success'] for r in results] == [True, False, False, False, False, False]
+    assert 'not a valid Metal' in results[1]['error']
+    assert results[2]['error'] == 'Photo not found in archive: missing.jpg'
+    assert results[3]['error'] == 'Photo rejected: Invalid image file'
+    assert results[4]['error'] == 'Quantity must be greater than zero.'
+    assert results[5]['error'] == 'Please upload a photo of your item.'
+    assert conn.execute('SELECT COUNT(*) FROM listings').fetchone()[0] == 1
+    assert update_price.call_count == 1
+
+
+def test_bi3_spec_index_matches_get_or_create_category():
+    specs = [
+        SPEC,
+        dict(SPEC, year='2024'),
+        dict(SPEC, finish='Proof'),
+        dict(SPEC, grade='MS70', condition_category='BU'),
+        SPEC,
+        dict(SPEC, metal='Silver'),
+    ]
+    direct = make_db()
+    expected = []
+    for spec in specs:
+        cat_id = get_or_create_category(direct, spec)
+        expected.append((cat_id, direct.execute(
+            'SELECT bucket_id FROM categories WHERE id = ?', (cat_id,)).fetchone()[0]))
+
+    batched = make_db()
+    index = CategorySpecIndex(batched)
+    assert [index.resolve(spec) for spec in specs] == expected
+    assert index.created == 5
+
+    key_cols = 'bucket_id, name, metal, year, finish, grade, condition_category, spec_key'
+    assert batched.execute(f'SELECT {key_cols} FROM categories').fetchall() == \
+        direct.execute(f'SELECT {key_cols} FROM categories').fetchall()
+
+
+def test_bi4_manifest_and_archive_parsing():
+    rows = parse_manifest(json.dumps({'listings': [{'metal': 'Gold'}]}).encode(), 'm.JSON')
+    assert rows == [{'metal': 'Gold'}]
+    assert parse_manifest(b'\xef\xbb\xbf metal ,year\nGold,2023\n', 'm.csv') == [
+        {'metal': 'Gold', 'year': '2023'}]
+    with pytest.raises(ManifestError):
+        parse_manifest(b'{"listings": 3}', 'm.json')
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr('photos/a.jpg', b'a')
+        zf.writestr('notes.txt', b'n')
+        zf.writestr('__MACOSX/._a.jpg', b'x')
+    assert read_photo_archive(buf.getvalue()) == {'a.jpg': b'a'}
+    with pytest.raises(ManifestError):
+        read_photo_archive(b'not a zip')
+
+
+def test_bi5_spec_index_null_fields_never_match():
+    specs = [dict(SPEC, mint=None), dict(SPEC, mint=None), dict(SPEC, mint=None, finish='Proof')]
+    direct = make_db()
+    expected = []
+    for spec in specs:
+        cat_id = get_or_create_category(direct, spec)
+        expected.append((cat_id, direct.execute(
+            'SELECT bucket_id FROM categories WHERE id = ?', (cat_id,)).fetchone()[0]))
+    assert len(set(expected)) == 3
+
+    batched = make_db()
+    index = CategorySpecIndex(batched)
+    assert [index.resolve(spec) for spec in specs] == expected
+    # Rows loaded from the table follow the same rule
+    assert CategorySpecIndex(batched).resolve(specs[0])[0] not in [cat_id for cat_id, _ in expected]
+
+
+def test_bi6_rollback_discards_saved_photos(tmp_path):
+    conn = make_db()
+    conn.execute('DROP TABLE listing_photos')
+
+    def upload(file, **kwargs):
+        full_path = tmp_path / f'saved_{file.filename}'
+        full_path.write_bytes(b'x')
+        return {'success': True, 'error': None, 'path': f'uploads/listings/saved_{file.filename}',
+                'full_path': str(full_path)}
+
+    rows = [dict(SPEC, quantity='1', price_per_coin='2100', photos='a.jpg;b.jpg')]
+    with patch.object(bulk_import, 'get_dropdown_options', return_value=OPTIONS), \
+         patch.object(bulk_import, 'save_secure_upload', side_effect=upload), \
+         patch.object(bulk_import, 'update_bucket_price'):
+        with pytest.raises(sqlite3.OperationalError):
+            import_listings(conn, 7, rows, {'a.jpg': b'a', 'b.jpg': b'b'})
+
+    assert list(tmp_path.iterdir()) == []
+    assert conn.execute('SELECT COUNT(*) FROM listings').fetchone()[0] == 0
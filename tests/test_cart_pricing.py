@@ -104,6 +104,12 @@ CREATE TABLE IF NOT EXISTS ratings (
     rating   REAL
 );
 
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id      INTEGER PRIMARY KEY,
+    rating_avg   REAL,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
+
 CREATE TABLE IF NOT EXISTS spot_price_snapshots (
     id         INTEGER   PRIMARY KEY AUTOINCREMENT,
     metal      TEXT      NOT NULL,
@@ -158,11 +164,8 @@ def cart_env():
 
     # cart.py (buy blueprint) and checkout use module-level bindings
     import core.blueprints.buy.cart as _cart_mod
-    import core.blueprints.buy.buy_page as _buy_page_mod
-    _orig_cart_db     = _cart_mod.get_db_connection
-    _orig_buy_page_db = _buy_page_mod.get_db_connection
-    _cart_mod.get_db_connection     = get_test_conn
-    _buy_page_mod.get_db_connection = get_test_conn
+    _orig_cart_db = _cart_mod.get_db_connection
+    _cart_mod.get_db_connection = get_test_conn
 
     flask_app.config.update({
         'TESTING': True,
@@ -183,9 +186,8 @@ def cart_env():
     yield flask_app, get_test_conn
 
     # Teardown: restore original bindings
-    database.get_db_connection        = original_get_db
-    _cart_mod.get_db_connection       = _orig_cart_db
-    _buy_page_mod.get_db_connection   = _orig_buy_page_db
+    database.get_db_connection  = original_get_db
+    _cart_mod.get_db_connection = _orig_cart_db
 
 
 # ---------------------------------------------------------------------------
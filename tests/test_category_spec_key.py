@@ -0,0 +1,92 @@
+"""
+categories.spec_key tests.
+
+K1: compute_spec_key ignores year and normalises case, whitespace and NULLs.
+K2: get_or_create_category stores spec_key; sibling buckets span years only.
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.category_manager import (
+    compute_spec_key,
+    get_or_create_category,
+    get_sibling_bucket_ids,
+)
+
+
+SCHEMA_SQL = """
+CREATE TABLE categories (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id          INTEGER,
+    name               TEXT,
+    metal              TEXT,
+    product_line       TEXT,
+    product_type       TEXT,
+    weight             TEXT,
+    purity             TEXT,
+    mint               TEXT,
+    year               TEXT,
+    finish             TEXT,
+    grade              TEXT,
+    condition_category TEXT,
+    series_variant     TEXT,
+    is_isolated        INTEGER NOT NULL DEFAULT 0,
+    spec_key           TEXT
+);
+CREATE INDEX idx_categories_spec_key ON categories(spec_key);
+"""
+
+
+def _spec(**overrides):
+    spec = {
+        'metal': 'Gold', 'product_line': 'American Eagle', 'product_type': 'Coin',
+        'weight': '1 oz', 'purity': '.9167', 'mint': 'US Mint', 'year': '2023',
+        'finish': 'Bullion', 'grade': 'Ungraded',
+        'condition_category': None, 'series_variant': None,
+    }
+    spec.update(overrides)
+    return spec
+
+
+def _make_db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+def test_k1_spec_key_ignores_year_and_normalises():
+    base = compute_spec_key(_spec())
+    assert base == compute_spec_key(_spec(year='1999'))
+    assert base == compute_spec_key(_spec(metal=' gold ', mint='US MINT'))
+    assert base == compute_spec_key(_spec(condition_category=''))
+    assert base != compute_spec_key(_spec(grade='MS70'))
+    assert base != compute_spec_key(_spec(series_variant='Privy'))
+
+
+def test_k2_sibling_buckets_span_years_only():
+    conn = _make_db()
+    c2023 = get_or_create_category(conn, _spec())
+    c2024 = get_or_create_category(conn, _spec(year='2024'))
+    c_ms70 = get_or_create_category(conn, _spec(grade='MS70'))
+    conn.execute(
+        'INSERT INTO categories (bucket_id, metal, year, is_isolated, spec_key) VALUES (99, ?, ?, 1, ?)',
+        ('Gold', '2022', compute_spec_key(_spec())),
+    )
+
+    rows = {r['id']: r for r in conn.execute('SELECT * FROM categories')}
+    assert rows[c2023]['spec_key'] == compute_spec_key(_spec())
+    assert rows[c2023]['spec_key'] == rows[c2024]['spec_key']
+
+    siblings = get_sibling_bucket_ids(conn, rows[c2023])
+    assert sorted(siblings) == sorted({rows[c2023]['bucket_id'], rows[c2024]['bucket_id']})
+    assert 99 not in siblings
+
+    # Same bucket as 2023 (buckets ignore grade) but a different equivalence class
+    assert rows[c_ms70]['spec_key'] != rows[c2023]['spec_key']
+    assert get_sibling_bucket_ids(conn, rows[c_ms70]) == [rows[c_ms70]['bucket_id']]
+
@@ -0,0 +1,273 @@
+"""
+Conditional GET tests for the polled bucket endpoints.
+
+CG1: reference_price_history — 304 on a matching ETag without rebuilding the series;
+     a new bid changes the ETag.
+CG2: ?since=<t> returns only later points; summary still covers the whole range.
+CG3: trade_price_history — 304 until a trade is added or cancelled.
+CG4: bucket_availability_json — 304 until the listing set changes; filters key the ETag.
+CG5: the window end keys both history ETags; ?since reads the points after it
+     before downsampling.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+SCHEMA = """
+CREATE TABLE users (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT
+);
+
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_type TEXT,
+    weight       TEXT,
+    is_isolated  INTEGER DEFAULT 0
+);
+
+CREATE TABLE listings (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    seller_id      INTEGER,
+    category_id    INTEGER,
+    quantity       INTEGER DEFAULT 1,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    floor_price    REAL,
+    pricing_metal  TEXT,
+    packaging_type TEXT
+);
+
+CREATE TABLE bids (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id    INTEGER,
+    buyer_id       INTEGER,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    ceiling_price  REAL,
+    pricing_metal  TEXT,
+    created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+
+CREATE TABLE bucket_price_history (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id      INTEGER,
+    best_ask_price REAL,
+    timestamp      TIMESTAMP
+);
+
+CREATE TABLE orders (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    buyer_id   INTEGER,
+    status     TEXT,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE order_items (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id   INTEGER,
+    listing_id INTEGER,
+    quantity   INTEGER,
+    price_each REAL
+);
+
+CREATE TABLE bucket_reference_series (
+    bucket_id INTEGER NOT NULL,
+    t         TEXT    NOT NULL,
+    price     REAL    NOT NULL,
+    PRIMARY KEY (bucket_id, t)
+);
+"""
+
+BUCKET = 4242
+NOW = datetime.now()
+
+
+@pytest.fixture(scope='module')
+def env():
+    import database
+    import core.blueprints.buy.bucket_view as bucket_view
+    from app import app as flask_app
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'conditional_get.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO users (id, username) VALUES (1, 'seller'), (2, 'buyer')")
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (1, ?, 'Gold', 'Coin', '1 oz')", (BUCKET,))
+    conn.execute("INSERT INTO listings (seller_id, category_id, quantity, price_per_coin, packaging_type) VALUES (1, 1, 3, 2100, 'Tube')")
+    conn.execute("INSERT INTO listings (seller_id, category_id, quantity, price_per_coin, packaging_type) VALUES (1, 1, 2, 2150, 'Capsule')")
+    conn.execute("INSERT INTO bids (category_id, buyer_id, price_per_coin, created_at) VALUES (1, 2, 2000, ?)",
+                 ((NOW - timedelta(hours=5)).isoformat(),))
+    for hours, price in ((4, 2080), (2, 2090)):
+        order_id = conn.execute("INSERT INTO orders (buyer_id, created_at) VALUES (2, ?)",
+                                ((NOW - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S'),)).lastrowid
+        conn.execute("INSERT INTO order_items (order_id, listing_id, quantity, price_each) VALUES (?, 1, 1, ?)",
+                     (order_id, price))
+    conn.commit()
+    conn.close()
+
+    flask_app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'SECRET_KEY': 'test-conditional-get'})
+    with patch.object(database, 'get_db_connection', get_test_conn), \
+         patch.object(bucket_view, 'get_db_connection', get_test_conn):
+        yield flask_app.test_client(), get_test_conn
+
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_cg1_reference_history_304_skips_rebuild(env):
+    client, get_conn = env
+    url = f'/api/buckets/{BUCKET}/reference_price_history?range=1d'
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    with patch('core.blueprints.api.bucket_reference.get_persisted_reference_history') as build:
+        again = client.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    build.assert_not_called()
+
+    conn = get_conn()
+    conn.execute("INSERT INTO bids (category_id, buyer_id, price_per_coin, created_at) VALUES (1, 2, 2050, ?)",
+                 (datetime.now().isoformat(),))
+    conn.commit()
+    conn.close()
+
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['primary_series'][-1]['price'] == (2050 + 2100) / 2
+
+
+def test_cg2_since_returns_only_later_points(env):
+    client, _ = env
+    url = f'/api/buckets/{BUCKET}/reference_price_history?range=1d'
+
+    full = client.get(url).get_json()
+    series = full['primary_series']
+    assert len(series) >= 3
+    since = series[1]['t']
+
+    delta = client.get(url + f'&since={since}').get_json()
+    assert delta['since'] == since
+    assert [p['t'] for p in delta['primary_series']] == [p['t'] for p in series[2:-1]] + [delta['primary_series'][-1]['t']]
+    assert delta['summary']['first_price'] == full['summary']['first_price']
+
+
+def test_cg3_trade_history_etag_tracks_trades(env):
+    client, get_conn = env
+    url = f'/api/buckets/{BUCKET}/trade_price_history?range=1d'
+
+    first = client.get(url)
+    etag = first.headers['ETag']
+    trades = first.get_json()['primary_series']
+    assert [p['price'] for p in trades] == [2080, 2090]
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    since = client.get(url + f"&since={trades[0]['t']}").get_json()
+    assert [p['price'] for p in since['primary_series']] == [2090]
+
+    conn = get_conn()
+    conn.execute("UPDATE orders SET status = 'Cancelled' WHERE id = 2")
+    conn.commit()
+    conn.close()
+
+    cancelled = client.get(url, headers={'If-None-Match': etag})
+    assert cancelled.status_code == 200
+    assert [p['price'] for p in cancelled.get_json()['primary_series']] == [2080]
+
+
+def test_cg4_availability_etag_tracks_listing_set(env):
+    client, get_conn = env
+    url = f'/bucket/{BUCKET}/availability_json'
+
+    first = client.get(url)
+    assert first.get_json() == {'lowest_price': 2100, 'total_available': 5}
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    filtered = client.get(url + '?packaging_styles=Capsule', headers={'If-None-Match': etag})
+    assert filtered.status_code == 200
+    assert filtered.get_json() == {'lowest_price': 2150, 'total_available': 2}
+
+    conn = get_conn()
+    conn.execute("UPDATE listings SET quantity = 1 WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['total_available'] == 3
+
+
+def _get(env, url, etag=None):
+    client, _ = env
+    return client.get(url, headers={'If-None-Match': etag} if etag else {})
+
+
+def test_cg5_window_end_in_etag_and_since_skips_downsampling(env):
+    import core.blueprints.api.bucket_reference as bucket_reference
+    from services.reference_price_service import get_persisted_reference_history
+
+    window = datetime.now().replace(second=0, microsecond=0)
+    for name in ('reference_price_history', 'trade_price_history'):
+        url = f'/api/buckets/{BUCKET}/{name}?range=1d'
+        with patch.object(bucket_reference, '_window_end', return_value=window):
+            etag = _get(env, url).headers['ETag']
+            assert _get(env, url, etag).status_code == 304
+        with patch.object(bucket_reference, '_window_end', return_value=window + timedelta(minutes=1)):
+            moved = _get(env, url, etag)
+        assert moved.status_code == 200
+        assert moved.headers['ETag'] != etag
+
+    # Low bids add event points without moving the price, so downsampling drops them
+    _, get_conn = env
+    conn = get_conn()
+    conn.executemany("INSERT INTO bids (category_id, buyer_id, price_per_coin, created_at) VALUES (1, 2, 1900, ?)",
+                     [((window - timedelta(minutes=10 + i)).isoformat(),) for i in range(30)])
+    conn.commit()
+    conn.close()
+
+    url = f'/api/buckets/{BUCKET}/reference_price_history?range=1d'
+    raw = get_persisted_reference_history(BUCKET, 1, now=window)['primary_series']
+    since = raw[-10]['t']
+    with patch.object(bucket_reference, '_window_end', return_value=window), \
+         patch.object(bucket_reference, 'target_points', return_value=1):
+        full = _get(env, url).get_json()['primary_series']
+        delta = _get(env, url + f'&since={since}').get_json()['primary_series']
+    assert len(full) < len(raw)
+    assert delta == raw[-9:]
+    assert delta[-1]['t'] == window.isoformat()
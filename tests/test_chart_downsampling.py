@@ -0,0 +1,107 @@
+"""
+Chart downsampling tests.
+
+DS1: Sparse series pass through unchanged.
+DS2: Dense 1y series is capped at the target; endpoints, extremes and the
+     largest step are kept.
+DS3: The pass streams — output starts before the input is exhausted.
+DS4: get_bucket_price_history downsamples stored rows when max_points is given.
+DS5: A busy bin with few price changes keeps every change and drops only the
+     repeats between them; the series' last point is kept.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_price_history_service
+from services.chart_downsampling import downsample_step_series, target_points
+
+
+START = datetime(2025, 1, 1)
+
+
+def _series(prices, step=timedelta(minutes=5)):
+    return [{'t': (START + step * i).isoformat(), 'price': p} for i, p in enumerate(prices)]
+
+
+def test_ds1_sparse_series_pass_through():
+    points = _series([100, 100, 101, 99, 99, 105], step=timedelta(days=10))
+    out = list(downsample_step_series(points, START, START + timedelta(days=365), target_points(365)))
+    assert out == points
+    assert out[0] is points[0]
+
+    assert list(downsample_step_series(points, START, START, None)) == points
+
+
+def test_ds2_dense_series_capped_keeping_extremes_and_steps():
+    rng = random.Random(7)
+    prices, price = [], 2000.0
+    for _ in range(365 * 288):  # one point per 5 minutes for a year
+        price = round(price + rng.uniform(-2, 2), 2)
+        prices.append(price)
+    prices[50_000] = prices[49_999] + 400  # one isolated spike
+    points = _series(prices)
+
+    target = target_points(365)
+    out = list(downsample_step_series(points, START, START + timedelta(days=365), target))
+
+    assert len(out) <= target
+    assert out[0] is points[0] and out[-1] is points[-1]
+    out_prices = [p['price'] for p in out]
+    assert max(prices) in out_prices and min(prices) in out_prices
+    assert points[50_000] in out and points[50_001] in out  # both edges of the spike
+    assert [p['t'] for p in out] == sorted(p['t'] for p in out)
+
+
+def test_ds3_streams_over_input():
+    consumed = []
+
+    def source():
+        for i, point in enumerate(_series(range(10_000))):
+            consumed.append(i)
+            yield point
+
+    out = downsample_step_series(source(), START, START + timedelta(days=365), 1000)
+    first = next(out)
+    assert first['price'] == 0
+    assert len(consumed) < 10_000
+
+
+def test_ds4_bucket_price_history_max_points():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE bucket_price_history '
+                 '(id INTEGER PRIMARY KEY, bucket_id INTEGER, best_ask_price REAL, timestamp TIMESTAMP)')
+    now = datetime.now()
+    conn.executemany(
+        'INSERT INTO bucket_price_history (bucket_id, best_ask_price, timestamp) VALUES (1, ?, ?)',
+        [(2000 + (i % 50), now - timedelta(minutes=10 * i)) for i in range(5000, 0, -1)]
+    )
+
+    class _Conn:
+        def __getattr__(self, name):
+            return getattr(conn, name)
+
+        def close(self):
+            pass
+
+    with patch.object(bucket_price_history_service, 'get_db_connection', return_value=_Conn()):
+        full = bucket_price_history_service.get_bucket_price_history(1, 90)
+        capped = bucket_price_history_service.get_bucket_price_history(1, 90, max_points=200)
+
+    assert len(full) == 5000
+    assert len(capped) <= 200
+    assert capped[0] == full[0] and capped[-1] == full[-1]
+    assert {p['price'] for p in capped} >= {2000, 2049}
+
+
+def test_ds5_busy_bin_keeps_every_step():
+    points = _series([10] * 10 + [12] * 10 + [11] * 10 + [10] * 10, step=timedelta(minutes=1))
+    out = list(downsample_step_series(points, START, START + timedelta(days=365), target_points(365)))
+    assert out == [points[0], points[10], points[20], points[30], points[39]]
@@ -199,6 +199,11 @@ CREATE TABLE IF NOT EXISTS ratings (
     comment   TEXT,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
 );
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id      INTEGER PRIMARY KEY,
+    rating_avg   REAL,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
 """
 
 BUCKET_ID  = 9901
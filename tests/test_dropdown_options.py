@@ -0,0 +1,184 @@
+"""
+Dropdown options cache tests.
+
+DD1: Options are built once and served without SQL between version checks;
+     a version bumped by another worker is seen at the next check, the stale
+     options are served while a background thread rebuilds them.
+DD2: New categories bump the shared version only when they carry a value the
+     options do not list yet.
+DD3: A failed bump inside the caller's transaction is rolled back to its
+     savepoint, so the caller's transaction stays usable (Postgres aborts a
+     transaction after any failed statement).
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes import category_options as cop
+from utils.category_manager import get_or_create_category
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id          INTEGER,
+    name               TEXT,
+    metal              TEXT,
+    product_line       TEXT,
+    product_type       TEXT,
+    weight             TEXT,
+    purity             TEXT,
+    mint               TEXT,
+    year               TEXT,
+    finish             TEXT,
+    grade              TEXT,
+    coin_series        TEXT,
+    condition_category TEXT,
+    series_variant     TEXT,
+    spec_key           TEXT,
+    is_isolated        INTEGER DEFAULT 0
+);
+
+CREATE TABLE listings (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id    INTEGER,
+    packaging_type TEXT
+);
+
+CREATE TABLE system_settings (
+    key        TEXT PRIMARY KEY,
+    value      TEXT,
+    updated_at TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'dropdowns.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO categories (bucket_id, metal, mint) VALUES (1, 'Gold', 'Old Mint')")
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _version(conn):
+    row = conn.execute('SELECT value FROM system_settings WHERE key = ?',
+                       (cop.DROPDOWN_VERSION_KEY,)).fetchone()
+    return row['value'] if row else None
+
+
+def _wait_for_rebuild():
+    thread = cop._rebuild_thread
+    if thread is not None:
+        thread.join(5)
+
+
+def test_dd1_versioned_rebuild(db):
+    import database
+
+    options = cop.get_dropdown_options()
+    assert 'Old Mint' in options['mints'] and 'Gold' in options['metals']
+    built_at = cop._checked_at
+
+    with patch.object(database, 'get_db_connection', side_effect=AssertionError('SQL between checks')):
+        assert cop.get_dropdown_options(now=built_at + timedelta(seconds=1)) is options
+
+    # Another worker adds a category and bumps the shared version
+    conn = db()
+    conn.execute("INSERT INTO categories (bucket_id, metal, mint) VALUES (2, 'Gold', 'New Mint')")
+    conn.execute("INSERT INTO system_settings (key, value) VALUES (?, '1')", (cop.DROPDOWN_VERSION_KEY,))
+    conn.commit()
+    conn.close()
+
+    check_at = built_at + cop.DROPDOWN_CHECK_INTERVAL
+    assert cop.get_dropdown_options(now=check_at) is options
+    _wait_for_rebuild()
+
+    rebuilt = cop.get_dropdown_options(now=check_at)
+    assert 'New Mint' in rebuilt['mints'] and cop._cache_version == '1'
+
+    # Unchanged version: the check does not rebuild
+    assert cop.get_dropdown_options(now=cop._checked_at + cop.DROPDOWN_CHECK_INTERVAL) is rebuilt
+    assert cop._rebuild_thread is None
+
+
+def test_dd2_new_values_bump_version(db):
+    options = cop.get_dropdown_options()
+    spec = {
+        'metal': 'Gold', 'product_line': options['product_lines'][0], 'product_type': 'Coin',
+        'weight': options['weights'][0], 'purity': options['purities'][0], 'mint': 'Old Mint',
+        'year': '2024', 'finish': options['finishes'][0], 'grade': options['grades'][0],
+        'condition_category': None, 'series_variant': None,
+    }
+
+    conn = db()
+    get_or_create_category(conn, spec)
+    conn.commit()
+    assert _version(conn) is None
+
+    get_or_create_category(conn, dict(spec, mint='Brand New Mint'))
+    conn.commit()
+    assert _version(conn) == '1'
+    conn.close()
+
+    cop.get_dropdown_options()
+    _wait_for_rebuild()
+    assert 'Brand New Mint' in cop.get_dropdown_options()['mints']
+
+
+class _AbortingConn:
+    """sqlite connection that refuses statements after a failure, like Postgres."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.aborted = False
+
+    def execute(self, sql, params=()):
+        if self.aborted and not sql.startswith('ROLLBACK TO SAVEPOINT'):
+            raise sqlite3.OperationalError('current transaction is aborted')
+        try:
+            cursor = self.conn.execute(sql, params)
+        except sqlite3.Error:
+            self.aborted = True
+            raise
+        self.aborted = False
+        return cursor
+
+
+def test_dd3_failed_bump_keeps_caller_transaction(db):
+    conn = db()
+    conn.execute('DROP TABLE system_settings')
+    conn.commit()
+
+    caller = _AbortingConn(conn)
+    caller.execute("INSERT INTO categories (bucket_id, metal) VALUES (2, 'Silver')")
+    cop.invalidate_dropdown_cache(caller)
+    caller.execute("INSERT INTO categories (bucket_id, metal) VALUES (3, 'Platinum')")
+    conn.commit()
+
+    assert conn.execute('SELECT COUNT(*) FROM categories').fetchone()[0] == 3
+    conn.close()
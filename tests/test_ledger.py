@@ -728,5 +728,151 @@ class TestCustomFeePerItem:
         conn.close()
 
 
+class TestBatchLedgerCreation:
+    """Test create_order_ledgers_batch (multi-order auto-match runs)"""
+
+    def _setup_bucket_listings(self, conn):
+        """Bucket 10 carries a 5% bucket fee; listing 3 lives in it."""
+        conn.execute('''
+            INSERT INTO categories (bucket_id, name, platform_fee_type, platform_fee_value)
+            VALUES (10, 'Gold Eagle', 'percent', 5.0)
+        ''')
+        category_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        conn.execute('''
+            INSERT INTO listings (seller_id, category_id, price_per_coin, quantity)
+            VALUES (2, ?, 150.00, 10)
+        ''', (category_id,))
+        return conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+    def _orders(self, conn, bucket_listing_id, count):
+        orders = []
+        for n in range(count):
+            cursor = conn.execute('''
+                INSERT INTO orders (buyer_id, total_price, status)
+                VALUES (1, 0, 'Pending')
+            ''')
+            orders.append({
+                'buyer_id': 1,
+                'order_id': cursor.lastrowid,
+                'items': [
+                    {'seller_id': 2, 'listing_id': bucket_listing_id, 'quantity': n + 1,
+                     'unit_price': 150.00, 'buyer_unit_price': 155.00},
+                    {'seller_id': 3, 'listing_id': 2, 'quantity': 1, 'unit_price': 200.00},
+                ],
+            })
+        conn.commit()
+        return orders
+
+    def _ledger_rows(self, conn, order_id):
+        ledger = conn.execute('''
+            SELECT gross_amount, platform_fee_amount, spread_capture_amount, order_status
+            FROM orders_ledger WHERE order_id = ?
+        ''', (order_id,)).fetchone()
+        items = conn.execute('''
+            SELECT seller_id, listing_id, quantity, unit_price, gross_amount, fee_type,
+                   fee_value, fee_amount, seller_net_amount, buyer_unit_price, spread_per_unit
+            FROM order_items_ledger WHERE order_id = ? ORDER BY id
+        ''', (order_id,)).fetchall()
+        payouts = conn.execute('''
+            SELECT seller_id, payout_status, seller_gross_amount, fee_amount,
+                   seller_net_amount, spread_capture_amount
+            FROM order_payouts WHERE order_id = ? ORDER BY seller_id
+        ''', (order_id,)).fetchall()
+        events = conn.execute('''
+            SELECT event_type FROM order_events WHERE order_id = ? ORDER BY id
+        ''', (order_id,)).fetchall()
+        return (tuple(ledger), [tuple(r) for r in items], [tuple(r) for r in payouts],
+                [r['event_type'] for r in events])
+
+    def test_batch_matches_per_order_creation(self, mock_get_db):
+        """Batch rows are identical to create_order_ledger_from_cart rows"""
+        from services.ledger_service import LedgerService
+
+        conn = mock_get_db()
+        listing_id = self._setup_bucket_listings(conn)
+        batch_orders = self._orders(conn, listing_id, 3)
+        single_orders = self._orders(conn, listing_id, 3)
+        conn.close()
+
+        ledger_ids = LedgerService.create_order_ledgers_batch(batch_orders)
+        for o in single_orders:
+            LedgerService.create_order_ledger_from_cart(
+                buyer_id=o['buyer_id'], cart_snapshot=o['items'], order_id=o['order_id']
+            )
+
+        assert set(ledger_ids) == {o['order_id'] for o in batch_orders}
+
+        conn = mock_get_db()
+        for batch_o, single_o in zip(batch_orders, single_orders):
+            assert self._ledger_rows(conn, batch_o['order_id']) == \
+                self._ledger_rows(conn, single_o['order_id'])
+
+        # Bucket fee (5%) applied to the bucket listing, global default (2.5%) to the other
+        items = self._ledger_rows(conn, batch_orders[0]['order_id'])[1]
+        assert items[0][5:8] == ('percent', 5.0, 7.50)
+        assert items[1][5:8] == ('percent', 2.5, 5.00)
+        conn.close()
+
+    def test_batch_keeps_invariants(self, mock_get_db):
+        """Every ledger created by the batch passes validate_order_invariants"""
+        from services.ledger_service import LedgerService
+
+        conn = mock_get_db()
+        listing_id = self._setup_bucket_listings(conn)
+        orders = self._orders(conn, listing_id, 4)
+        conn.close()
+
+        ledger_ids = LedgerService.create_order_ledgers_batch(orders)
+
+        assert len(ledger_ids) == 4
+        for ledger_id in ledger_ids.values():
+            assert LedgerService.validate_order_invariants(ledger_id) is True
+
+    def test_batch_skips_orders_with_existing_ledger(self, mock_get_db):
+        """Re-running the batch does not duplicate ledgers"""
+        from services.ledger_service import LedgerService
+
+        conn = mock_get_db()
+        listing_id = self._setup_bucket_listings(conn)
+        orders = self._orders(conn, listing_id, 2)
+        conn.close()
+
+        first = LedgerService.create_order_ledgers_batch(orders[:1])
+        second = LedgerService.create_order_ledgers_batch(orders)
+
+        assert list(first) == [orders[0]['order_id']]
+        assert list(second) == [orders[1]['order_id']]
+        conn = mock_get_db()
+        assert conn.execute('SELECT COUNT(*) FROM orders_ledger').fetchone()[0] == 2
+        conn.close()
+
+    def test_batch_isolates_bad_orders(self, mock_get_db, caplog):
+        """One unpriceable or failing order does not lose the rest of the batch"""
+        import logging
+        from services.ledger_service import LedgerService
+
+        conn = mock_get_db()
+        listing_id = self._setup_bucket_listings(conn)
+        orders = self._orders(conn, listing_id, 4)
+        conn.close()
+
+        LedgerService.create_order_ledgers_batch(orders[:1])
+        del orders[1]['items'][0]['unit_price']
+        # The same order twice: the bulk insert hits the UNIQUE order_id
+        batch = orders + [orders[3]]
+
+        with caplog.at_level(logging.INFO):
+            ledger_ids = LedgerService.create_order_ledgers_batch(batch)
+
+        assert set(ledger_ids) == {orders[2]['order_id'], orders[3]['order_id']}
+        for ledger_id in ledger_ids.values():
+            assert LedgerService.validate_order_invariants(ledger_id) is True
+        assert f"[{orders[0]['order_id']}] already have a ledger" in caplog.text
+        assert f"failed for order {orders[1]['order_id']}" in caplog.text
+        conn = mock_get_db()
+        assert conn.execute('SELECT COUNT(*) FROM orders_ledger').fetchone()[0] == 3
+        conn.close()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
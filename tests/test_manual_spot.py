@@ -118,6 +118,13 @@ CREATE TABLE IF NOT EXISTS bucket_price_history (
     timestamp TIMESTAMP,
     price     REAL
 );
+
+CREATE TABLE IF NOT EXISTS bucket_reference_series (
+    bucket_id INTEGER NOT NULL,
+    t         TEXT    NOT NULL,
+    price     REAL    NOT NULL,
+    PRIMARY KEY (bucket_id, t)
+);
 """
 
 # ─── Fixtures ─────────────────────────────────────────────────────────────────
@@ -0,0 +1,187 @@
+"""
+Market data export tests.
+
+ME1: bucket_daily OHLC carries the price across midnight; volume/count/notional
+     skip cancelled orders; spot_daily OHLC per metal and day.
+ME2: Runs append only new complete days; read_export filters and converts.
+ME3: export_if_due is a no-op once yesterday is exported.
+ME4: A run interrupted after the CSV append but before the manifest save does
+     not duplicate rows on the next run.
+ME5: A run skips while another process holds the export lock;
+     extend_bucket_series extends every bucket with a series or active listing.
+"""
+
+import gzip
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import market_export_service as mes
+
+
+SCHEMA = """
+CREATE TABLE categories (id INTEGER PRIMARY KEY, bucket_id INTEGER);
+CREATE TABLE listings (id INTEGER PRIMARY KEY, category_id INTEGER,
+                       active INTEGER DEFAULT 1, quantity INTEGER DEFAULT 1);
+CREATE TABLE orders (id INTEGER PRIMARY KEY, status TEXT, created_at TIMESTAMP);
+CREATE TABLE order_items (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER,
+                          listing_id INTEGER, quantity INTEGER, price_each REAL);
+CREATE TABLE spot_price_snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, metal TEXT,
+                                   price_usd REAL, as_of TIMESTAMP);
+CREATE TABLE bucket_reference_series (bucket_id INTEGER NOT NULL, t TEXT NOT NULL,
+                                      price REAL NOT NULL, PRIMARY KEY (bucket_id, t));
+"""
+
+TODAY = date(2026, 3, 10)
+D1, D2, D3 = (TODAY - timedelta(days=n) for n in (3, 2, 1))
+
+
+class _Conn:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    conn.execute('INSERT INTO categories VALUES (1, 10), (2, 20)')
+    conn.execute('INSERT INTO listings (id, category_id) VALUES (1, 1), (2, 2)')
+
+    def at(day, hh, mm=0):
+        return datetime(day.year, day.month, day.day, hh, mm).isoformat()
+
+    conn.executemany('INSERT INTO bucket_reference_series VALUES (?, ?, ?)', [
+        (10, at(D1 - timedelta(days=5), 12), 100.0),   # carried into D1
+        (10, at(D1, 9), 104.0),
+        (10, at(D1, 15), 98.0),
+        (10, at(D3, 11), 110.0),
+        (20, at(D2, 8), 50.0),
+    ])
+    conn.executemany('INSERT INTO orders VALUES (?, ?, ?)', [
+        (1, 'Complete', f'{D1} 10:00:00'),
+        (2, 'Cancelled', f'{D1} 11:00:00'),
+        (3, None, f'{D2} 23:59:59'),
+    ])
+    conn.executemany('INSERT INTO order_items (order_id, listing_id, quantity, price_each) VALUES (?, ?, ?, ?)', [
+        (1, 1, 2, 101.0), (1, 1, 1, 103.0), (2, 1, 5, 99.0), (3, 2, 4, 51.0),
+    ])
+    conn.executemany('INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES (?, ?, ?)', [
+        ('gold', 2000, at(D1, 1)), ('gold', 2030, f'{D1} 12:00:00'), ('gold', 1990, at(D1, 18)),
+        ('gold', 2010, at(D2, 2)), ('silver', 30, at(D2, 3)),
+    ])
+    conn.commit()
+
+    export_dir = str(tmp_path / 'exports')
+    with patch.object(mes._db_module, 'get_db_connection', return_value=_Conn(conn)), \
+         patch.object(mes, 'extend_reference_series') as extend, \
+         patch.object(mes, 'EXPORT_DIR', export_dir):
+        yield conn, export_dir, extend
+
+
+def test_me1_daily_rows(db):
+    conn, _, _ = db
+    bucket = mes.build_bucket_daily(conn, D1, TODAY)
+    assert bucket == [
+        (D1.isoformat(), 10, 100.0, 104.0, 98.0, 98.0, 3, 2, 305.0),
+        (D2.isoformat(), 10, 98.0, 98.0, 98.0, 98.0, 0, 0, 0.0),
+        (D2.isoformat(), 20, 50.0, 50.0, 50.0, 50.0, 4, 1, 204.0),
+        (D3.isoformat(), 10, 98.0, 110.0, 98.0, 110.0, 0, 0, 0.0),
+        (D3.isoformat(), 20, 50.0, 50.0, 50.0, 50.0, 0, 0, 0.0),
+    ]
+    spot = mes.build_spot_daily(conn, D1, TODAY)
+    assert spot == [
+        (D1.isoformat(), 'gold', 2000, 2030, 1990, 1990, 3),
+        (D2.isoformat(), 'gold', 2010, 2010, 2010, 2010, 1),
+        (D2.isoformat(), 'silver', 30, 30, 30, 30, 1),
+    ]
+
+
+def test_me2_append_only_runs_and_read_back(db):
+    conn, export_dir, extend = db
+    first = mes.run_market_export(today=D3)
+    assert (first['first_day'], first['last_day']) == ((D3 - timedelta(days=365)).isoformat(), D2.isoformat())
+    extend.assert_not_called()  # left to the cron script (extend_bucket_series)
+    assert 'bucket_daily.csv.gz' in first['files']
+
+    assert mes.run_market_export(today=D3)['last_day'] is None
+
+    second = mes.run_market_export(today=TODAY)
+    assert (second['first_day'], second['last_day']) == (D3.isoformat(), D3.isoformat())
+    assert second['bucket_rows'] == 2 and second['spot_rows'] == 0
+
+    with gzip.open(os.path.join(export_dir, 'bucket_daily.csv.gz'), 'rt') as f:
+        lines = f.read().splitlines()
+    assert lines[0] == ','.join(mes.BUCKET_DAILY_COLUMNS)
+    assert len(lines) == 1 + 5 + 5  # header, D1-5..D1-1 for bucket 10, D1..D3
+
+    rows = mes.read_export('bucket_daily', start=D1.isoformat(), key=10)
+    assert [r['date'] for r in rows] == [D1.isoformat(), D2.isoformat(), D3.isoformat()]
+    assert rows[0]['volume'] == 3 and rows[0]['close'] == 98.0
+    assert mes.read_export('spot_daily', start=D2.isoformat(), key='silver')[0]['samples'] == 1
+    assert mes.load_manifest()['last_day'] == D3.isoformat()
+
+    with pytest.raises(ValueError):
+        mes.read_export('orders')
+
+
+def test_me3_export_if_due(db):
+    with patch.object(mes, 'run_market_export', return_value={'last_day': None}) as run:
+        mes.export_if_due()
+        assert run.call_count == 1
+
+    os.makedirs(mes.EXPORT_DIR, exist_ok=True)
+    mes._save_manifest(mes.EXPORT_DIR, {'last_day': (date.today() - timedelta(days=1)).isoformat()})
+    with patch.object(mes, 'run_market_export') as run:
+        assert mes.export_if_due() is None
+        run.assert_not_called()
+
+
+def test_me4_interrupted_run_does_not_duplicate(db):
+    _, export_dir, _ = db
+    mes.run_market_export(today=D2)
+    manifest = mes.load_manifest()
+
+    with patch.object(mes, '_save_manifest', side_effect=OSError('disk full')):
+        with pytest.raises(OSError):
+            mes.run_market_export(today=TODAY)
+    assert mes.load_manifest() == manifest
+    assert not any(name.endswith('.tmp') for name in os.listdir(export_dir))
+
+    mes.run_market_export(today=TODAY)
+    dates = [r['date'] for r in mes.read_export('bucket_daily', start=D2.isoformat())]
+    assert dates == [D2.isoformat(), D2.isoformat(), D3.isoformat(), D3.isoformat()]
+    assert [r['date'] for r in mes.read_export('spot_daily', start=D2.isoformat())] == [D2.isoformat()] * 2
+
+
+def test_me5_export_lock_and_series_extend(db):
+    fcntl = pytest.importorskip('fcntl')
+    _, export_dir, extend = db
+    os.makedirs(export_dir, exist_ok=True)
+
+    # Another process's flock (a separate open file description conflicts too)
+    with open(os.path.join(export_dir, '.lock'), 'a') as held:
+        fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        summary = mes.run_market_export(today=D3)
+        assert summary['locked_out'] is True and summary['last_day'] is None
+        assert mes.export_if_due() == summary
+        assert mes.load_manifest() == {}
+
+    assert mes.run_market_export(today=D3)['last_day'] == D2.isoformat()
+
+    extend.return_value = 1
+    assert mes.extend_bucket_series() == 2  # buckets 10 and 20
+    assert sorted(c.args[1] for c in extend.call_args_list) == [10, 20]
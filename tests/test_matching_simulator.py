@@ -0,0 +1,132 @@
+"""
+Matching simulator / replay harness tests.
+
+S1: Hand-written stream — placement inserts only, rematch fills at the spread-model prices.
+S2: Self-trades are never filled.
+S3: Card decline closes the bid and is reported as a payment failure.
+S4: Synthetic streams are deterministic: two runs of the same seed diff clean.
+S5: diff_reports() flags a changed fill and a changed book row.
+S6: Report carries latency and query-count metrics per event type.
+S7: Synthetic edits are priced off the edited order's own metal.
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.matching_simulator import (
+    diff_reports,
+    generate_synthetic_events,
+    golden_view,
+    simulate,
+)
+
+
+_SETUP = [
+    {'type': 'category', 'id': 1, 'metal': 'Gold', 'product_line': 'American Eagle',
+     'product_type': 'Coin', 'weight': '1 oz', 'year': '2024'},
+    {'type': 'spot', 'metal': 'gold', 'price': 2000.0},
+]
+
+
+def test_rematch_fills_at_spread_prices():
+    events = [
+        {'type': 'listing', 'id': 1, 'seller_id': 1, 'category_id': 1,
+         'quantity': 5, 'price_per_coin': 2050.0},
+        {'type': 'bid', 'id': 1, 'buyer_id': 2, 'category_id': 1,
+         'quantity': 2, 'price_per_coin': 2040.0},
+        {'type': 'rematch'},
+        {'type': 'edit_bid', 'id': 1, 'price_per_coin': 2060.0},
+        {'type': 'rematch'},
+    ]
+    report = simulate(events, setup_events=_SETUP)
+
+    assert len(report['fills']) == 1
+    fill = report['fills'][0]
+    assert fill['event'] == 4
+    assert (fill['bid_id'], fill['listing_id'], fill['quantity']) == (1, 1, 2)
+    assert fill['buyer_price'] == 2060.0
+    assert fill['seller_price'] == 2050.0
+    assert fill['spread'] == 10.0
+    assert report['totals']['spread_total'] == 20.0
+    assert report['book']['bids']['1'][:3] == [0, 0, 'Filled']
+    assert report['book']['listings']['1'] == [3, 1]
+    assert report['totals']['ledger_orders'] == 1
+
+
+def test_self_trade_not_filled():
+    events = [
+        {'type': 'listing', 'id': 1, 'seller_id': 7, 'category_id': 1,
+         'quantity': 1, 'price_per_coin': 2000.0},
+        {'type': 'bid', 'id': 1, 'buyer_id': 7, 'category_id': 1,
+         'quantity': 1, 'price_per_coin': 2100.0},
+        {'type': 'rematch'},
+    ]
+    report = simulate(events, setup_events=_SETUP, match_on_place=True)
+    assert report['fills'] == []
+    assert report['book']['bids']['1'][0] == 1
+
+
+def test_card_decline_closes_bid():
+    events = [
+        {'type': 'listing', 'id': 1, 'seller_id': 1, 'category_id': 1,
+         'quantity': 1, 'price_per_coin': 2000.0},
+        {'type': 'bid', 'id': 1, 'buyer_id': 2, 'category_id': 1, 'quantity': 1,
+         'price_per_coin': 2100.0, 'bid_payment_method_id': 'pm_sim_decline'},
+        {'type': 'spot', 'metal': 'gold', 'price': 2001.0},
+    ]
+    report = simulate(events, setup_events=_SETUP)
+    assert report['fills'] == []
+    assert report['totals']['payment_failures'] == 1
+    assert report['book']['bids']['1'][2:] == ['Payment Failed', 'failed']
+    assert report['book']['listings']['1'] == [1, 1]
+
+
+def test_synthetic_stream_is_deterministic():
+    setup, events = generate_synthetic_events(200, open_bids=20, seed=11)
+    first = simulate(events, setup_events=setup)
+    second = simulate(events, setup_events=setup)
+    assert first['totals']['fills'] > 0
+    assert diff_reports(second, first) == []
+
+
+def test_diff_reports_flags_changes():
+    setup, events = generate_synthetic_events(150, seed=5)
+    report = simulate(events, setup_events=setup)
+    golden = copy.deepcopy(golden_view(report))
+    golden['fills'][0]['buyer_price'] += 1
+    first_bid = next(iter(golden['book']['bids']))
+    golden['book']['bids'][first_bid][0] += 1
+
+    diffs = diff_reports(report, golden)
+    assert any(d.startswith('fills[0]') for d in diffs)
+    assert any(d.startswith(f'book.bids[{first_bid}]') for d in diffs)
+
+
+def test_report_has_latency_and_query_metrics():
+    setup, events = generate_synthetic_events(100, seed=2)
+    perf = simulate(events, setup_events=setup)['performance']
+    assert perf['events_per_second'] > 0
+    assert perf['queries']['total'] > 0
+    assert perf['latency_ms']['max'] >= perf['latency_ms']['p50']
+    assert perf['by_type']['spot']['queries_per_event'] > perf['by_type']['bid']['queries_per_event']
+
+
+def test_synthetic_edits_use_own_metal():
+    setup, events = generate_synthetic_events(400, seed=3)
+    metal_of_category = {e['id']: e['metal'] for e in setup if e['type'] == 'category'}
+    metal_of = {}
+    edits = 0
+    for event in events:
+        if event['type'] in ('listing', 'bid'):
+            metal_of[event['type'], event['id']] = metal_of_category[event['category_id']]
+        elif event['type'] in ('edit_listing', 'edit_bid'):
+            kind = event['type'][len('edit_'):]
+            # Gold trades near 2000 and silver near 25: a price off the
+            # wrong metal is two orders of magnitude away
+            expected = 2000 if metal_of[kind, event['id']] == 'Gold' else 25
+            assert 0.8 * expected < event['price_per_coin'] < 1.2 * expected
+            edits += 1
+    assert edits > 0
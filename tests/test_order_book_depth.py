@@ -0,0 +1,258 @@
+"""
+Order book depth tests.
+
+OB1: Asks and bids aggregate into cumulative price levels at the snapshot spot;
+     own orders can be excluded; per-seller stats come from the same book.
+OB2: Books are cached until a bucket/category invalidation, a spot tick or
+     DEPTH_MAX_AGE; an invalidation during a build is not overwritten.
+OB3: GET /api/buckets/<id>/depth honours levels, hides the session user's own
+     orders and answers 404 for unknown buckets.
+OB4: Invalidations are published to bucket_events; events written by another
+     worker drop the named book (or every book) at the next sync, this
+     worker's own events do not.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_event_service as bes
+from services import order_book_service as obs
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_type TEXT,
+    weight       TEXT
+);
+
+CREATE TABLE listings (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    seller_id      INTEGER,
+    category_id    INTEGER,
+    quantity       INTEGER DEFAULT 1,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    floor_price    REAL,
+    pricing_metal  TEXT
+);
+
+CREATE TABLE bids (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id        INTEGER,
+    buyer_id           INTEGER,
+    quantity_requested INTEGER,
+    remaining_quantity INTEGER,
+    price_per_coin     REAL,
+    active             INTEGER DEFAULT 1,
+    pricing_mode       TEXT DEFAULT 'static',
+    spot_premium       REAL,
+    ceiling_price      REAL,
+    pricing_metal      TEXT
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+
+CREATE TABLE bucket_events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id  INTEGER,
+    created_at TEXT NOT NULL
+);
+"""
+
+BUCKET = 77
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'depth.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (1, ?, 'Gold', 'Coin', '1 oz')", (BUCKET,))
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (2, ?, 'Gold', 'Coin', '1 oz')", (BUCKET,))
+    conn.executemany("INSERT INTO listings (seller_id, category_id, quantity, price_per_coin, active, "
+                     "pricing_mode, spot_premium, floor_price, pricing_metal) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (1, 1, 3, 2100, 1, 'static', None, None, None),
+        (2, 2, 2, 2100, 1, 'static', None, None, None),
+        (1, 1, 1, 0, 1, 'premium_to_spot', 50, 1000, 'gold'),     # 2000 + 50
+        (3, 1, 4, 2200, 1, 'static', None, None, None),
+        (3, 1, 9, 1900, 0, 'static', None, None, None),           # inactive
+        (3, 1, 0, 1950, 1, 'static', None, None, None),           # sold out
+    ])
+    conn.executemany("INSERT INTO bids (category_id, buyer_id, quantity_requested, remaining_quantity, "
+                     "price_per_coin, active, pricing_mode, spot_premium, ceiling_price, pricing_metal) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (1, 4, 5, 2, 2000, 1, 'static', None, None, None),
+        (2, 5, 1, None, 2000, 1, 'static', None, None, None),
+        (1, 1, 3, 3, 0, 1, 'premium_to_spot', -20, 1990, 'gold'),  # min(1980, 1990)
+        (1, 4, 6, 0, 2030, 1, 'static', None, None, None),         # filled
+        (1, 5, 6, 6, 2040, 0, 'static', None, None, None),         # cancelled
+    ])
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', 2000, ?)",
+                 (datetime.now().isoformat(),))
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        obs.clear_depth_cache()
+        yield get_test_conn
+        obs.clear_depth_cache()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_ob1_levels_and_exclusions(db):
+    depth = obs.get_bucket_depth(BUCKET)
+
+    assert depth['asks'] == [
+        {'price': 2050.0, 'quantity': 1, 'orders': 1, 'cumulative': 1},
+        {'price': 2100.0, 'quantity': 5, 'orders': 2, 'cumulative': 6},
+        {'price': 2200.0, 'quantity': 4, 'orders': 1, 'cumulative': 10},
+    ]
+    assert depth['bids'] == [
+        {'price': 2000.0, 'quantity': 3, 'orders': 2, 'cumulative': 3},
+        {'price': 1980.0, 'quantity': 3, 'orders': 1, 'cumulative': 6},
+    ]
+    assert (depth['best_ask'], depth['best_bid'], depth['spread']) == (2050.0, 2000.0, 50.0)
+    assert (depth['total_ask_quantity'], depth['total_bid_quantity']) == (10, 6)
+
+    mine = obs.get_bucket_depth(BUCKET, levels=1, exclude_user_id=1)
+    assert mine['asks'] == [{'price': 2100.0, 'quantity': 2, 'orders': 1, 'cumulative': 2}]
+    assert mine['bids'] == [{'price': 2000.0, 'quantity': 3, 'orders': 2, 'cumulative': 3}]
+    assert mine['total_ask_quantity'] == 6 and mine['total_bid_quantity'] == 3
+
+    stats = obs.get_bucket_seller_stats(BUCKET)
+    assert stats == {
+        1: {'lowest_price': 2050.0, 'avg_price': 2075.0, 'total_qty': 4},
+        2: {'lowest_price': 2100.0, 'avg_price': 2100.0, 'total_qty': 2},
+        3: {'lowest_price': 2200.0, 'avg_price': 2200.0, 'total_qty': 4},
+    }
+    assert obs.get_bucket_depth(BUCKET + 1) is None
+
+
+def test_ob2_cache_and_invalidation(db):
+    real_build = obs._build_book
+    with patch.object(obs, '_build_book', side_effect=real_build) as build:
+        obs.get_bucket_depth(BUCKET)
+        obs.get_bucket_seller_stats(BUCKET)
+        assert build.call_count == 1
+
+        obs.invalidate_bucket_depth(BUCKET)
+        obs.get_bucket_depth(BUCKET)
+        obs.invalidate_category_depth(2)
+        obs.get_bucket_depth(BUCKET)
+        obs.invalidate_category_depth(99)   # other bucket: book survives
+        obs.get_bucket_depth(BUCKET)
+        assert build.call_count == 3
+
+        obs.clear_depth_cache()
+        obs.get_bucket_depth(BUCKET)
+        obs._books[BUCKET].built_at = datetime.now() - obs.DEPTH_MAX_AGE - obs.DEPTH_MAX_AGE
+        obs.get_bucket_depth(BUCKET)
+        assert build.call_count == 5
+
+    def racing_build(conn, bucket_id, now):
+        book = real_build(conn, bucket_id, now)
+        obs.invalidate_bucket_depth(bucket_id)   # listing event lands mid-build
+        return book
+
+    obs.clear_depth_cache()
+    with patch.object(obs, '_build_book', side_effect=racing_build):
+        obs.get_bucket_depth(BUCKET)
+    assert BUCKET not in obs._books
+
+    from services import spot_snapshot_service
+    obs.get_bucket_depth(BUCKET)
+    spot_snapshot_service._trigger_depth_refresh()
+    assert obs._books == {}
+
+
+def test_ob3_depth_endpoint(db):
+    from app import app as flask_app
+
+    flask_app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'SECRET_KEY': 'test-depth'})
+    client = flask_app.test_client()
+
+    body = client.get(f'/api/buckets/{BUCKET}/depth?levels=2').get_json()
+    assert body['success'] is True
+    assert [l['price'] for l in body['asks']] == [2050.0, 2100.0]
+    assert [l['price'] for l in body['bids']] == [2000.0, 1980.0]
+    assert body['total_ask_quantity'] == 10
+
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    body = client.get(f'/api/buckets/{BUCKET}/depth').get_json()
+    assert body['best_ask'] == 2100.0 and body['total_ask_quantity'] == 6
+    assert body['spread'] == 100.0
+
+    assert client.get(f'/api/buckets/{BUCKET + 1}/depth').status_code == 404
+
+
+def _events(conn):
+    return [r['bucket_id'] for r in conn.execute('SELECT bucket_id FROM bucket_events ORDER BY id')]
+
+
+def test_ob4_cross_worker_invalidation(db):
+    conn = db()
+    conn.execute('DELETE FROM bucket_events')
+    conn.commit()
+
+    real_build = obs._build_book
+    with patch.object(bes, 'BUCKET_EVENT_CHECK_INTERVAL', timedelta(0)), \
+         patch.object(obs, '_build_book', side_effect=real_build) as build:
+        obs.get_bucket_depth(BUCKET)
+        obs.invalidate_bucket_depth(BUCKET)
+        obs.invalidate_category_depth(2)
+        assert _events(conn) == [BUCKET, BUCKET]
+
+        obs.get_bucket_depth(BUCKET)
+        obs.get_bucket_depth(BUCKET)     # own events are not applied again
+        assert build.call_count == 2
+
+        # Another worker changes this bucket, then an unrelated one
+        stamp = obs.get_bucket_version(BUCKET)
+        conn.execute('INSERT INTO bucket_events (bucket_id, created_at) VALUES (?, ?)',
+                     (BUCKET + 1, datetime.now().isoformat()))
+        conn.commit()
+        obs.get_bucket_depth(BUCKET)
+        assert build.call_count == 2 and obs.get_bucket_version(BUCKET) == stamp
+
+        conn.execute('INSERT INTO bucket_events (bucket_id, created_at) VALUES (?, ?)',
+                     (BUCKET, datetime.now().isoformat()))
+        conn.commit()
+        obs.get_bucket_depth(BUCKET)
+        assert build.call_count == 3 and obs.get_bucket_version(BUCKET) != stamp
+
+        # A spot tick on another worker drops every book
+        conn.execute('INSERT INTO bucket_events (bucket_id, created_at) VALUES (NULL, ?)',
+                     (datetime.now().isoformat(),))
+        conn.commit()
+        obs.get_bucket_depth(BUCKET)
+        assert build.call_count == 4
+    conn.close()
@@ -0,0 +1,142 @@
+"""
+Anonymous page cache tests.
+
+PC1: Keys normalise the query args; entries are dropped when their stamp
+     moves or they age out; the byte budget evicts least recently used
+     pages first; hits and misses feed the hit ratio.
+PC2: Anonymous GET /buy is rendered once and then served from the cache
+     with each visitor's own CSRF token; order book events invalidate it and
+     logged-in visitors bypass it.
+PC3: Random Year bucket pages move with their sibling buckets; clearing the
+     cache (maintenance toggle) drops the pages of the other workers too.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_event_service as bes
+from services import page_cache_service as pcs
+from services.order_book_service import invalidate_bucket_depth
+
+
+def test_pc1_store_lookup_and_eviction():
+    key = pcs.page_key('buy.buy', '/buy', [('metal', 'Gold'), ('search', ' '), ('filter', 'new')])
+    assert key == pcs.page_key('buy.buy', '/buy', [('filter', 'new'), ('metal', 'Gold')])
+    assert key != pcs.page_key('buy.buy', '/buy', [('metal', 'Silver')])
+
+    now = datetime.now()
+    assert pcs.get_page(key, 1, now=now) is None
+    pcs.store_page(key, 1, 200, [('Content-Type', 'text/html')], b'page', now=now)
+    assert pcs.get_page(key, 1, now=now)['body'] == b'page'
+    assert pcs.get_page(key, 2, now=now) is None
+    assert pcs.get_page(key, 1, now=now + pcs.PAGE_CACHE_MAX_AGE + timedelta(seconds=1)) is None
+
+    stats = pcs.get_page_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (1, 3, 0.25)
+    assert (stats['entries'], stats['bytes']) == (1, 4)
+
+    pcs.reset_page_cache()
+    with patch.object(pcs, 'PAGE_CACHE_MAX_BYTES', 10):
+        for name in ('a', 'b', 'c'):
+            pcs.store_page(name, 0, 200, [], b'xxxx', now=now)
+        assert pcs.get_page('a', 0, now=now) is None
+        assert pcs.get_page('b', 0, now=now) is not None    # b is now most recent
+        pcs.store_page('d', 0, 200, [], b'xxxx', now=now)
+        assert pcs.get_page('c', 0, now=now) is None
+        assert pcs.get_page('b', 0, now=now) is not None
+    stats = pcs.get_page_cache_stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (2, 8, 2)
+
+    pcs.store_page('huge', 0, 200, [], b'x' * (pcs.PAGE_CACHE_MAX_ENTRY_BYTES + 1), now=now)
+    assert pcs.get_page('huge', 0, now=now) is None
+
+
+def test_pc2_anonymous_buy_page():
+    from flask_wtf.csrf import generate_csrf
+    from app import app as flask_app
+    import core.blueprints.buy.buy_page as buy_page
+
+    flask_app.config.update({'TESTING': True, 'SECRET_KEY': 'test-page-cache'})
+    renders = []
+
+    def render(template, **context):
+        renders.append(template)
+        return f'<meta content="{generate_csrf()}"> page {len(renders)}'
+
+    empty = {'one_of_a_kind': [], 'sets': []}
+    no_page = {'tiles': [], 'next_cursor': None, 'total': 0}
+    with patch.object(buy_page, 'render_template', side_effect=render), \
+            patch.object(buy_page, 'get_buy_page_buckets', return_value=empty), \
+            patch.object(buy_page, 'browse_bucket_tiles', return_value=no_page), \
+            patch.object(buy_page, 'get_ticker', return_value=[]):
+        first = flask_app.test_client()
+        miss = first.get('/buy?metal=Gold&search=')
+        assert miss.headers['X-Page-Cache'] == 'MISS' and len(renders) == 1
+
+        hit = first.get('/buy?search=&metal=Gold')
+        assert hit.headers['X-Page-Cache'] == 'HIT' and len(renders) == 1
+        assert hit.data == miss.data
+
+        # Another visitor gets the cached page with their own token
+        other = flask_app.test_client().get('/buy?metal=Gold')
+        assert other.headers['X-Page-Cache'] == 'HIT' and len(renders) == 1
+        assert b'page 1' in other.data and b'__page_cache_csrf_token__' not in other.data
+        assert other.data != miss.data
+
+        invalidate_bucket_depth(10)
+        assert first.get('/buy?metal=Gold').headers['X-Page-Cache'] == 'MISS'
+        assert len(renders) == 2
+
+        with first.session_transaction() as sess:
+            sess['user_id'] = 1
+        logged_in = first.get('/buy?metal=Gold')
+        assert 'X-Page-Cache' not in logged_in.headers and len(renders) == 3
+
+    stats = pcs.get_page_cache_stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+
+def test_pc3_sibling_and_cross_worker_stamps():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'page_cache.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    bes.create_bucket_events_table(conn)
+    conn.commit()
+    conn.close()
+
+    snapshot = {'sibling_bucket_ids': [1, 2]}
+    random_year = {'random_year': '1'}
+    try:
+        with patch.object(database, 'get_db_connection', get_test_conn), \
+                patch.object(bes, 'BUCKET_EVENT_CHECK_INTERVAL', timedelta(0)), \
+                patch.object(pcs, 'get_bucket_snapshot', return_value=snapshot):
+            plain = pcs.page_stamp('buy.view_bucket', {'bucket_id': 1}, {})
+            mixed = pcs.page_stamp('buy.view_bucket', {'bucket_id': 1}, random_year)
+            invalidate_bucket_depth(2, publish=False)
+            assert pcs.page_stamp('buy.view_bucket', {'bucket_id': 1}, {}) == plain
+            assert pcs.page_stamp('buy.view_bucket', {'bucket_id': 1}, random_year) != mixed
+
+            key = pcs.page_key('buy.buy', '/buy', [])
+            stamp = pcs.page_stamp('buy.buy', {})
+            pcs.clear_page_cache()
+            # As seen by another worker, which still holds the page
+            bes._own.clear()
+            pcs.store_page(key, stamp, 200, [], b'page')
+            assert pcs.get_page(key, pcs.page_stamp('buy.buy', {})) is None
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
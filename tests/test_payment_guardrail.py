@@ -255,6 +255,11 @@ CREATE TABLE IF NOT EXISTS ratings (
     comment    TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id      INTEGER PRIMARY KEY,
+    rating_avg   REAL,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
 """
 
 _TEST_USER_ID   = 9901
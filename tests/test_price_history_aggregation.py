@@ -0,0 +1,129 @@
+"""
+SQL-side bucket_price_history aggregation tests.
+
+PA1: hour / day / week periods match a Python last-value-per-period
+     aggregation (weeks start on Monday); each point is stamped with the
+     time of the change it carries, not the period start.
+PA2: Sibling buckets are read in one IN query and come back merged in order.
+PA3: The Postgres period query picks each period's last row by its change
+     time, not by the `timestamp` output column (the period).
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_price_history_service as bph
+
+
+class _Conn:
+    """Shared in-memory connection that survives the service's close()."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.queries = 0
+
+    def execute(self, *args):
+        self.queries += 1
+        return self._conn.execute(*args)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE bucket_price_history '
+                 '(id INTEGER PRIMARY KEY AUTOINCREMENT, bucket_id INTEGER, '
+                 'best_ask_price REAL, timestamp TIMESTAMP)')
+    rng = random.Random(3)
+    now = datetime.now()
+    rows = []
+    for bucket_id in (1, 2, 3):
+        t = now - timedelta(days=60)
+        while t < now:
+            rows.append((bucket_id, round(rng.uniform(1900, 2100), 2), t))
+            t += timedelta(minutes=rng.randint(1, 400))
+    conn.executemany('INSERT INTO bucket_price_history (bucket_id, best_ask_price, timestamp) '
+                     'VALUES (?, ?, ?)', rows)
+    wrapped = _Conn(conn)
+    with patch.object(bph, 'get_db_connection', return_value=wrapped):
+        yield wrapped, rows
+
+
+def _python_last_per_period(rows, truncate):
+    periods = {}
+    for _, price, ts in sorted(rows, key=lambda r: r[2]):
+        periods[truncate(ts)] = {'timestamp': ts.replace(microsecond=0).isoformat(), 'price': price}
+    return [periods[k] for k in sorted(periods)]
+
+
+def _week_start(ts):
+    return (ts - timedelta(days=ts.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.mark.parametrize('granularity, truncate', [
+    ('hour', lambda ts: ts.replace(minute=0, second=0, microsecond=0)),
+    ('day', lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)),
+    ('week', _week_start),
+])
+def test_pa1_sql_periods_match_python_aggregation(db, granularity, truncate):
+    _, rows = db
+    bucket_rows = [r for r in rows if r[0] == 2]
+    expected = _python_last_per_period(bucket_rows, truncate)
+    assert bph.get_bucket_price_history(2, 90, granularity=granularity) == expected
+
+    with pytest.raises(ValueError):
+        bph.get_bucket_price_history(2, 90, granularity='minute')
+
+
+def test_pa2_siblings_merged_in_one_query(db):
+    conn, rows = db
+    conn.queries = 0
+    merged = bph.get_buckets_price_history([1, 3], 90)
+    assert conn.queries == 1
+
+    expected = sorted((r for r in rows if r[0] in (1, 3)), key=lambda r: r[2])
+    assert [p['price'] for p in merged] == [r[1] for r in expected]
+
+    daily = bph.get_buckets_price_history([1, 3], 90, granularity='day')
+    assert daily == _python_last_per_period(
+        [r for r in rows if r[0] in (1, 3)],
+        lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0))
+    assert bph.get_buckets_price_history([], 90) == []
+
+
+def test_pa3_postgres_last_row_per_period_by_change_time():
+    queries = []
+
+    class _Recorder:
+        def execute(self, sql, params):
+            queries.append(' '.join(sql.split()))
+            return []
+
+        def close(self):
+            pass
+
+    with patch.object(bph, 'IS_POSTGRES', True), \
+         patch.object(bph, 'get_db_connection', return_value=_Recorder()):
+        assert bph.get_buckets_price_history([1, 2], 30, granularity='day') == []
+
+    sql = queries[0]
+    outer_columns = sql[:sql.index(' FROM (')]
+    order_by = sql[sql.rindex('ORDER BY ') + len('ORDER BY '):].split(', ')
+    # Postgres resolves ORDER BY names to output columns first: apart from the
+    # DISTINCT ON key, none may name one
+    output_names = {'timestamp', 'best_ask_price', 'period'}
+    assert order_by[0] == 'period ASC'
+    assert all(term.split()[0] not in output_names for term in order_by[1:])
+    assert order_by[1] == 'changed_at DESC' and 'timestamp AS changed_at' in sql
+    assert outer_columns.endswith('TO_CHAR(changed_at, \'YYYY-MM-DD"T"HH24:MI:SS\') AS timestamp, best_ask_price')
@@ -126,6 +126,13 @@ CREATE TABLE IF NOT EXISTS bucket_price_history (
     timestamp  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE IF NOT EXISTS bucket_reference_series (
+    bucket_id INTEGER NOT NULL,
+    t         TEXT    NOT NULL,
+    price     REAL    NOT NULL,
+    PRIMARY KEY (bucket_id, t)
+);
+
 CREATE TABLE IF NOT EXISTS orders (
     id          INTEGER   PRIMARY KEY AUTOINCREMENT,
     buyer_id    INTEGER,
@@ -232,15 +239,12 @@ def test_env():
 
     database.get_db_connection = get_test_conn
 
-    # bucket_view.py and buy_page.py use `from database import get_db_connection`
-    # at module level, creating fixed bindings that bypass the database-module patch.
-    # Patch them directly so all buy-related routes use the test DB.
+    # bucket_view.py uses `from database import get_db_connection` at module
+    # level, creating a fixed binding that bypasses the database-module patch.
+    # Patch it directly so all buy-related routes use the test DB.
     import core.blueprints.buy.bucket_view as _bucket_view_mod
-    import core.blueprints.buy.buy_page as _buy_page_mod
     _orig_bucket_view_db = _bucket_view_mod.get_db_connection
-    _orig_buy_page_db    = _buy_page_mod.get_db_connection
     _bucket_view_mod.get_db_connection = get_test_conn
-    _buy_page_mod.get_db_connection    = get_test_conn
 
     flask_app.config.update({
         'TESTING': True,
@@ -404,7 +408,6 @@ def test_env():
 
     database.get_db_connection = original_get_db
     _bucket_view_mod.get_db_connection = _orig_bucket_view_db
-    _buy_page_mod.get_db_connection    = _orig_buy_page_db
     shutil.rmtree(tmpdir, ignore_errors=True)
 
 
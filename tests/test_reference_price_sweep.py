@@ -0,0 +1,341 @@
+"""
+Sweep-line reference price history tests.
+
+RS1: Golden output — the sweep matches the per-timestamp helpers point for point
+     on a synthetic bucket (static + variable asks and bids, mixed timestamp
+     formats, spot/trade ties, bids created between events, seeds before range).
+RS2: get_reference_price_history output is unchanged and its query count does
+     not grow with the number of events.
+RS3: Persisted series — reads never write: a cold read sweeps the same series as
+     the live builder in memory, warm reads add events since the last stored
+     point, and the backfill and spot-tick hooks do the writing.
+RS4: invalidate_reference_series drops a bucket; only the backfill builds.
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.reference_price_service as ref_svc
+from services.reference_price_service import (
+    compute_reference_price,
+    get_best_ask_at_time,
+    get_best_bid_at_time,
+    get_last_cleared_price_at_time,
+)
+
+
+SCHEMA_SQL = """
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_type TEXT,
+    weight       TEXT
+);
+
+CREATE TABLE listings (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id    INTEGER,
+    quantity       INTEGER DEFAULT 1,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    floor_price    REAL,
+    pricing_metal  TEXT
+);
+
+CREATE TABLE bids (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id    INTEGER,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    ceiling_price  REAL,
+    pricing_metal  TEXT,
+    created_at     TIMESTAMP
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+
+CREATE TABLE bucket_price_history (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id INTEGER,
+    price     REAL,
+    timestamp TIMESTAMP
+);
+
+CREATE TABLE orders (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE order_items (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id   INTEGER,
+    listing_id INTEGER,
+    price_each REAL
+);
+
+CREATE TABLE bucket_reference_series (
+    bucket_id INTEGER NOT NULL,
+    t         TEXT    NOT NULL,
+    price     REAL    NOT NULL,
+    PRIMARY KEY (bucket_id, t)
+);
+"""
+
+BUCKET = 7
+BASE = datetime.now().replace(microsecond=0) - timedelta(days=10)
+
+
+def _space(hours):
+    return (BASE + timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _iso(hours):
+    return (BASE + timedelta(hours=hours)).isoformat()
+
+
+class CountingConn:
+    """Wraps a sqlite3 connection, counting execute() calls; close() is a no-op."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.queries = 0
+
+    def execute(self, *args):
+        self.queries += 1
+        return self._conn.execute(*args)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        pass
+
+
+def make_db(extra_events=0):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (1, ?, 'Gold', 'Coin', '1 oz')", (BUCKET,))
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (2, ?, 'Gold', 'Bar', '1/2 oz')", (BUCKET,))
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (3, 99, 'Gold', 'Coin', '1 oz')")
+
+    listings = [
+        (1, 2150, 'static', None, None, None),
+        (1, None, 'premium_to_spot', 60, 1900, None),
+        (2, 0, 'premium_to_spot', 30, 0, 'gold'),
+        (1, 10, 'premium_to_spot', 5, 0, 'silver'),
+    ]
+    for cat, price, mode, premium, floor, metal in listings:
+        conn.execute(
+            "INSERT INTO listings (category_id, price_per_coin, pricing_mode, spot_premium, floor_price, pricing_metal)"
+            " VALUES (?, ?, ?, ?, ?, ?)", (cat, price, mode, premium, floor, metal))
+    conn.execute("INSERT INTO listings (category_id, price_per_coin, quantity) VALUES (1, 1500, 0)")
+    conn.execute("INSERT INTO listings (category_id, price_per_coin) VALUES (3, 1000)")
+
+    spots = [
+        ('gold', 1950, _space(-100)),   # seed before range
+        ('gold', 2000, _iso(2)),
+        ('gold', 2010, _space(5)),
+        ('gold', 2020, _iso(5)),        # same instant as previous, other format
+        ('gold', 2040, _iso(9)),
+        ('gold', 2060, _iso(9)),        # exact tie: lowest id wins
+        ('gold', 2040, _iso(12)),
+        ('silver', 25, _iso(3)),
+        ('silver', 26, _space(11)),
+    ]
+    spots += [('gold', 2000 + i, _iso(30 + i)) for i in range(extra_events)]
+    conn.executemany("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES (?, ?, ?)", spots)
+
+    bids = [
+        (1, 1980, 'static', None, None, None, _space(-50), 1),
+        (1, 0, 'premium_to_spot', 20, 2035, None, _iso(1), 1),          # before first spot in range
+        (2, 2100, 'static', None, None, None, _space(4), 0),            # inactive
+        (1, 1990, 'static', None, None, None, _space(6) + '.5', 1),     # between events
+        (2, 0, 'premium_to_spot', -5, 0, 'gold', _iso(8), 1),
+        (1, 2500, 'static', None, None, None, _iso(500), 1),            # in the future
+        (3, 3000, 'static', None, None, None, _iso(7), 1),              # other bucket
+        (1, 2001, 'static', None, None, None, None, 1),                 # no timestamp
+    ]
+    conn.executemany(
+        "INSERT INTO bids (category_id, price_per_coin, pricing_mode, spot_premium, ceiling_price,"
+        " pricing_metal, created_at, active) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", bids)
+
+    orders = [
+        (_space(-20), [(1, 1960), (2, 1970)]),
+        (_iso(4), [(1, 2005), (2, 2007)]),              # multi-item order: lowest item id wins
+        (_space(10), [(1, 2030)]),
+        (_space(10), [(1, 2031)]),                       # tie across orders
+        (_iso(11), [(6, 5000)]),                         # other bucket
+    ]
+    for created_at, items in orders:
+        order_id = conn.execute("INSERT INTO orders (created_at) VALUES (?)", (created_at,)).lastrowid
+        for listing_id, price in items:
+            conn.execute("INSERT INTO order_items (order_id, listing_id, price_each) VALUES (?, ?, ?)",
+                         (order_id, listing_id, price))
+
+    conn.executemany("INSERT INTO bucket_price_history (bucket_id, price, timestamp) VALUES (?, ?, ?)",
+                     [(BUCKET, 2100, _space(7)), (BUCKET, 2110, _iso(13))])
+    conn.commit()
+    return conn
+
+
+def _active_listings(conn):
+    return [dict(r) for r in conn.execute(
+        "SELECT l.price_per_coin, l.pricing_mode, l.spot_premium, l.floor_price, l.pricing_metal,"
+        " c.metal, c.weight, c.product_type FROM listings l JOIN categories c ON l.category_id = c.id"
+        " WHERE c.bucket_id = ? AND l.active = 1 AND l.quantity > 0", (BUCKET,))]
+
+
+def legacy_series(conn, listings, times):
+    """The per-timestamp loop the sweep replaced."""
+    series = []
+    for t_str in times:
+        ref = compute_reference_price(
+            get_best_ask_at_time(conn, BUCKET, listings, t_str),
+            get_best_bid_at_time(conn, BUCKET, t_str),
+            get_last_cleared_price_at_time(conn, BUCKET, t_str),
+        )
+        if ref is not None:
+            series.append({'t': t_str, 'price': round(ref, 4)})
+    return series
+
+
+def test_rs1_sweep_matches_per_timestamp_helpers():
+    conn = make_db()
+    listings = _active_listings(conn)
+    hours = [-1, 0, 1, 2, 2.5, 3, 4, 5, 6, 6.25, 7, 8, 9, 10, 11, 12, 13, 14, 200]
+    times = sorted({_iso(h) for h in hours} | {_space(5).replace(' ', 'T'), _iso(5)[:10] + 'T00:00:00'})
+
+    with patch('services.pricing_service.get_current_spot_prices', return_value={}):
+        expected = legacy_series(conn, listings, times)
+        actual = ref_svc._sweep_reference_series(conn, BUCKET, listings, times)
+
+    assert len(expected) == len(times)
+    assert actual == expected
+    assert len({p['price'] for p in actual}) >= 5
+
+
+def test_rs2_history_unchanged_and_query_count_flat():
+    counts = []
+    for extra in (0, 200):
+        conn = CountingConn(make_db(extra_events=extra))
+        captured = {}
+        real_sweep = ref_svc._sweep_reference_series
+
+        def recording_sweep(c, bucket_id, listings, times):
+            captured['args'] = (listings, list(times))
+            return real_sweep(c, bucket_id, listings, times)
+
+        with patch.object(ref_svc, '_get_conn', return_value=conn), \
+             patch.object(ref_svc, '_sweep_reference_series', side_effect=recording_sweep), \
+             patch('services.pricing_service.get_current_spot_prices', return_value={}):
+            result = ref_svc.get_reference_price_history(BUCKET, days=30)
+            queries = conn.queries
+            listings, times = captured['args']
+            expected = legacy_series(conn._conn, listings, times)
+
+        assert result['primary_series'] == expected
+        assert len(times) > 10 + extra
+        counts.append(queries)
+
+    assert counts[0] == counts[1]
+    assert counts[0] < 20
+
+
+def _stored(conn):
+    return [tuple(r) for r in conn.execute(
+        'SELECT t, price FROM bucket_reference_series WHERE bucket_id = ? ORDER BY t', (BUCKET,))]
+
+
+def test_rs3_persisted_series_reads_without_writing():
+    raw = make_db()
+    conn = CountingConn(raw)
+
+    with patch.object(ref_svc, '_get_conn', return_value=conn), \
+         patch('services.pricing_service.get_current_spot_prices', return_value={}):
+        live = ref_svc.get_reference_price_history(BUCKET, days=30)
+
+        # Cold read: swept in memory, nothing written
+        cold = ref_svc.get_persisted_reference_history(BUCKET, days=30)
+        assert _stored(raw) == []
+
+        # Future-dated events (the bid at +500h) are not included
+        now_iso = cold['primary_series'][-1]['t']
+        live_series = [p for p in live['primary_series'] if p['t'] <= now_iso]
+        assert cold['primary_series'][:-1] == live_series[:-1]
+        assert cold['primary_series'][-1]['price'] == live_series[-1]['price']
+        for key in ('latest_spot_as_of', 'latest_bid_as_of', 'latest_clear_as_of'):
+            assert cold[key] == live[key]
+
+        # The backfill builds it (and the other bucket); warm reads serve the
+        # same points and write nothing
+        assert ref_svc.backfill_reference_series() == 2
+        stored = _stored(raw)
+        assert stored
+        before = raw.total_changes
+        warm = ref_svc.get_persisted_reference_history(BUCKET, days=30)
+        assert warm['primary_series'][:-1] == cold['primary_series'][:-1]
+        assert raw.total_changes == before
+
+        # A new spot tick shows up on the next read before any hook has run
+        tick = datetime.now().replace(microsecond=0).isoformat()
+        raw.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('silver', 30, ?)", (tick,))
+        raw.commit()
+        fresh = ref_svc.get_persisted_reference_history(BUCKET, days=30)
+        assert raw.total_changes == before + 1
+        assert fresh['primary_series'][-2]['t'] == tick
+
+        # The spot-tick hook appends it and leaves older points alone
+        assert ref_svc.refresh_all_reference_series() == 1
+        after = _stored(raw)
+        assert after[:-1] == stored and after[-1][0] == tick
+        assert after[-1][1] != stored[-1][1]
+        assert ref_svc.get_persisted_reference_history(BUCKET, days=30)['primary_series'][:-1] == \
+            fresh['primary_series'][:-1]
+
+        # The short 1d range is a range read over the stored points
+        short = ref_svc.get_persisted_reference_history(BUCKET, days=1)
+        assert [p['t'] for p in short['primary_series'][:-1]] == [tick]
+
+
+def test_rs4_invalidate_and_only_backfill_builds():
+    raw = make_db()
+    conn = CountingConn(raw)
+
+    with patch.object(ref_svc, '_get_conn', return_value=conn), \
+         patch('services.pricing_service.get_current_spot_prices', return_value={}):
+        ref_svc.refresh_reference_series(BUCKET)
+        assert ref_svc.refresh_all_reference_series() == 0
+        ref_svc.get_persisted_reference_history(BUCKET, days=30)
+        assert _stored(raw) == []
+
+        assert ref_svc.backfill_reference_series(limit=1) == 1
+        assert _stored(raw)
+        assert ref_svc.backfill_reference_series() == 1
+        assert ref_svc.backfill_reference_series() == 0
+
+        ref_svc.invalidate_reference_series(raw, BUCKET)
+        raw.commit()
+        assert _stored(raw) == []
+        ref_svc.refresh_reference_series(BUCKET)
+        assert _stored(raw) == []
+        assert ref_svc.backfill_reference_series() == 1
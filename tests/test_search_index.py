@@ -0,0 +1,130 @@
+"""
+Bucket full-text search index tests.
+
+SI1: Documents cover category specs and active listing titles; every term is
+     a word prefix, best match first, with a substring fallback for infixes.
+SI2: Reindexing a bucket follows listing changes; dissolved buckets drop out.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import search_index_service as sis
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_line TEXT,
+    coin_series  TEXT,
+    product_type TEXT,
+    mint         TEXT,
+    year         TEXT,
+    finish       TEXT,
+    grade        TEXT,
+    weight       TEXT,
+    purity       TEXT
+);
+
+CREATE TABLE listings (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id   INTEGER,
+    listing_title TEXT,
+    name          TEXT,
+    quantity      INTEGER DEFAULT 1,
+    active        INTEGER DEFAULT 1
+);
+"""
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'search.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO categories (id, bucket_id, metal, product_line, product_type, mint, year, weight) "
+                     "VALUES (?, ?, ?, ?, 'Coin', ?, ?, ?)", [
+        (1, 10, 'Gold', 'American Eagle', 'US Mint', '2024', '1 oz'),
+        (2, 10, 'Gold', 'American Eagle', 'US Mint', '2023', '1 oz'),
+        (3, 20, 'Silver', 'Maple Leaf', 'Royal Canadian Mint', '2024', '1 oz'),
+        (4, 30, 'Gold', 'Maple Leaf', 'Royal Canadian Mint', '2024', '1/10 oz'),
+        (5, None, 'Platinum', 'Orphan', None, None, None),
+    ])
+    conn.executemany("INSERT INTO listings (category_id, listing_title, name, active) VALUES (?, ?, ?, ?)", [
+        (1, 'Eagle in capsule', None, 1),
+        (3, None, 'Bullion stack', 1),
+        (3, 'Withdrawn lot', None, 0),
+    ])
+    sis.create_search_index(conn)
+    sis.rebuild_search_index(conn)
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_si1_prefix_ranking_and_fallback(db):
+    assert sorted(sis.search_bucket_ids('gold')) == [10, 30]
+    assert sis.search_bucket_ids('gold eag') == [10]
+    assert sorted(sis.search_bucket_ids('Maple')) == [20, 30]
+    assert sis.search_bucket_ids('maple silver') == [20]
+    assert sis.search_bucket_ids('capsule') == [10]          # listing title
+    assert sis.search_bucket_ids('bullion st') == [20]       # listing name
+    assert sis.search_bucket_ids('withdrawn') == []          # inactive listing
+    assert sis.search_bucket_ids('orphan') == []             # no bucket
+    assert sis.search_bucket_ids('agle') == [10]             # infix fallback
+    assert sis.search_bucket_ids('1/10') == [30]
+    assert sis.search_bucket_ids('  ') == []
+    assert len(sis.search_bucket_ids('mint', limit=2)) == 2
+
+    # Denser matches rank first
+    conn = db()
+    conn.execute("INSERT INTO categories (bucket_id, metal, product_line, year) VALUES (40, 'Gold', 'Gold Gold', '2024')")
+    sis.reindex_buckets(conn, [40])
+    conn.commit()
+    conn.close()
+    assert sis.search_bucket_ids('gold')[0] == 40
+
+
+def test_si2_reindex(db):
+    conn = db()
+    conn.execute("INSERT INTO listings (category_id, listing_title) VALUES (4, 'Tiny maple fractional')")
+    conn.execute("UPDATE listings SET active = 0 WHERE name = 'Bullion stack'")
+    conn.commit()
+    conn.close()
+    assert sis.search_bucket_ids('fractional') == []
+
+    sis.reindex_bucket(30)
+    sis.reindex_bucket(20)
+    assert sis.search_bucket_ids('fractional') == [30]
+    assert sis.search_bucket_ids('bullion') == []
+    assert sorted(sis.search_bucket_ids('maple')) == [20, 30]
+
+    conn = db()
+    conn.execute("UPDATE categories SET bucket_id = NULL WHERE bucket_id = 20")
+    sis.reindex_buckets(conn, [20])
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM bucket_search").fetchone()[0] == 2
+    conn.close()
+    assert sis.search_bucket_ids('maple') == [30]
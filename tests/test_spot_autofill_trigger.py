@@ -2,7 +2,8 @@
 Spot-price-change → bid-autofill trigger pipeline tests.
 
 T1: Fixed-price bid NOT marketable at high spot becomes marketable after spot drops.
-    check_all_pending_matches() must fill it using the new snapshot price.
+    check_all_pending_matches() must fill it using the new snapshot price,
+    and refresh the user stats of the new order after committing it.
 
 T2: Floor price takes precedence (floor > spot+premium).
     Bid fills only when bid_price >= floor_price.
@@ -246,7 +247,8 @@ class TestT1SpotDropMakesBidMarketable:
         _set_spot(self.conn, "gold", 950.0)  # ask = 1050
 
         # Second pass: should fill
-        result = check_all_pending_matches(self.conn)
+        with patch("core.blueprints.bids.auto_match.refresh_order_user_stats") as refresh:
+            result = check_all_pending_matches(self.conn)
         assert result["total_filled"] == 1, "Expected bid to fill after spot drop"
         assert result["bids_matched"] == 1
         assert result["orders_created"] == 1
@@ -262,6 +264,7 @@ class TestT1SpotDropMakesBidMarketable:
             "SELECT * FROM orders WHERE buyer_id=?", (2,)
         ).fetchall()
         assert len(orders) == 1
+        refresh.assert_called_once_with(orders[0]["id"])
 
         items = self.conn.execute(
             "SELECT * FROM order_items WHERE order_id=?", (orders[0]["id"],)
@@ -0,0 +1,184 @@
+"""
+Spot-driven best-ask recording tests.
+
+SP1: record_spot_driven_prices records every spot-priced bucket in one batch,
+     skips static-only buckets and unchanged prices, applies the isolated midpoint.
+SP2: GET /bucket/<id>/price-history is read-only.
+SP3: Spot snapshot ticks (scheduler and manual) trigger the batch recording.
+SP4: get_current_best_ask prices off the same snapshots as the recorded points.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bucket_price_history_service as bph
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_type TEXT,
+    weight       TEXT,
+    is_isolated  INTEGER DEFAULT 0
+);
+
+CREATE TABLE listings (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    seller_id      INTEGER,
+    category_id    INTEGER,
+    quantity       INTEGER DEFAULT 1,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    floor_price    REAL,
+    pricing_metal  TEXT,
+    packaging_type TEXT
+);
+
+CREATE TABLE bids (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id    INTEGER,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP,
+    source    TEXT
+);
+
+CREATE TABLE bucket_price_history (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id      INTEGER,
+    best_ask_price REAL,
+    timestamp      TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def db():
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'spot_driven.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    # Bucket 1: spot-priced gold + a dearer static listing
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (1, 1, 'Gold', 'Coin', '1 oz')")
+    conn.execute("INSERT INTO listings (category_id, quantity, price_per_coin, pricing_mode, spot_premium, floor_price, pricing_metal) "
+                 "VALUES (1, 2, 0, 'premium_to_spot', 50, 1000, 'gold')")
+    conn.execute("INSERT INTO listings (category_id, quantity, price_per_coin) VALUES (1, 1, 5000)")
+    # Bucket 2: static only — never touched by the spot job
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight) VALUES (2, 2, 'Gold', 'Bar', '1 oz')")
+    conn.execute("INSERT INTO listings (category_id, quantity, price_per_coin) VALUES (2, 1, 2500)")
+    # Bucket 3: isolated spot-priced silver with a bid
+    conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight, is_isolated) VALUES (3, 3, 'Silver', 'Coin', '1 oz', 1)")
+    conn.execute("INSERT INTO listings (category_id, quantity, price_per_coin, pricing_mode, spot_premium, floor_price, pricing_metal) "
+                 "VALUES (3, 1, 0, 'premium_to_spot', 10, 1, 'silver')")
+    conn.execute("INSERT INTO bids (category_id, price_per_coin) VALUES (3, 30)")
+    conn.execute("INSERT INTO bucket_price_history (bucket_id, best_ask_price, timestamp) VALUES (1, 2050, ?)",
+                 (datetime.now() - timedelta(days=1),))
+    conn.commit()
+    conn.close()
+
+    with patch.object(bph, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _tick(get_conn, metal, price):
+    conn = get_conn()
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of, source) VALUES (?, ?, ?, 'test')",
+                 (metal, price, datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def _history(get_conn):
+    conn = get_conn()
+    rows = conn.execute('SELECT bucket_id, best_ask_price FROM bucket_price_history ORDER BY id').fetchall()
+    conn.close()
+    return [(r['bucket_id'], r['best_ask_price']) for r in rows]
+
+
+def test_sp1_batch_records_changed_spot_buckets(db):
+    _tick(db, 'gold', 2000)   # bucket 1 stays at 2050 -> unchanged
+    _tick(db, 'silver', 30)
+
+    assert bph.record_spot_driven_prices() == 1
+    # Isolated bucket 3: midpoint of (30 + 10) and the 30 bid
+    assert _history(db) == [(1, 2050), (3, 35)]
+
+    assert bph.record_spot_driven_prices() == 0
+
+    _tick(db, 'gold', 2100)
+    assert bph.record_spot_driven_prices() == 1
+    assert _history(db)[-1] == (1, 2150)
+    assert all(bucket_id != 2 for bucket_id, _ in _history(db))
+
+
+def test_sp2_price_history_get_is_read_only(db):
+    import database
+    from app import app as flask_app
+
+    _tick(db, 'gold', 2300)
+    flask_app.config.update({'TESTING': True})
+    with patch.object(database, 'get_db_connection', db), \
+         patch.object(bph, 'record_price_change') as record, \
+         patch.object(bph, 'refresh_reference_series') as refresh:
+        resp = flask_app.test_client().get('/bucket/1/price-history?range=1m')
+
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['summary']['current_price'] == 2350
+    assert [p['price'] for p in data['history']] == [2050]
+    record.assert_not_called()
+    refresh.assert_not_called()
+    assert _history(db) == [(1, 2050)]
+
+
+def test_sp3_spot_ticks_trigger_batch_recording(db):
+    from services import manual_spot_service
+
+    conn = db()
+    with patch('services.manual_spot_service._trigger_bid_rematch'), \
+         patch('services.manual_spot_service._trigger_reference_series_refresh'):
+        manual_spot_service.insert_manual_spot_snapshot(conn, 'gold', 2200)
+    conn.close()
+
+    assert (1, 2250) in _history(db)
+
+    from services import spot_snapshot_service
+    with patch.object(bph, 'record_spot_driven_prices') as record:
+        spot_snapshot_service._trigger_bucket_price_record()
+    record.assert_called_once_with()
+
+
+def test_sp4_best_ask_uses_snapshot_spot(db):
+    import services.spot_price_service as sps
+
+    _tick(db, 'gold', 2200)
+    with patch.object(sps, 'get_current_spot_prices', side_effect=AssertionError('API/cache spot')):
+        bph.record_spot_driven_prices()
+        assert bph.get_current_best_ask(1) == dict(_history(db))[1] == 2250
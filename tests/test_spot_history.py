@@ -0,0 +1,201 @@
+"""
+Spot price history (compact encoding) tests.
+
+SH1: Interval ranges decode to bin closes carried forward over empty bins;
+     the 1d range round-trips raw snapshots with delta timestamps.
+SH2: The in-memory index only reads snapshots above its id watermark.
+SH3: /api/spot/history — 400 on bad input, ETag/304 for the live window,
+     immutable caching for closed windows, payload ~10x smaller than objects.
+SH4: Windows ending inside SPOT_HISTORY_SETTLE or starting before the index
+     retention are not closed; the index query runs outside the lock.
+"""
+
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import spot_history_service as shs
+
+
+SCHEMA = """
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+"""
+
+NOW = datetime(2026, 3, 10, 12, 30)
+
+
+def _decode(payload):
+    t0 = datetime.fromisoformat(payload['t0'])
+    if payload['encoding'] == 'interval':
+        offsets = [payload['interval'] * i for i in range(payload['n'])]
+    else:
+        offsets = [0]
+        for dt in payload['dt']:
+            offsets.append(offsets[-1] + dt)
+    cents = [payload['p0']]
+    for dp in payload['dp']:
+        cents.append(cents[-1] + dp)
+    return [(t0 + timedelta(seconds=o), c / 100) for o, c in zip(offsets, cents)]
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'spot_history.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES (?, ?, ?)", [
+        ('gold', 2000.00, (NOW - timedelta(days=2)).isoformat()),
+        ('gold', 2010.25, (NOW - timedelta(hours=5, minutes=50)).strftime('%Y-%m-%d %H:%M:%S')),
+        ('silver', 30.10, (NOW - timedelta(hours=5)).isoformat()),
+        ('gold', 2005.50, (NOW - timedelta(hours=2, minutes=10)).isoformat()),
+        ('gold', 2007.75, (NOW - timedelta(minutes=5)).isoformat()),
+    ])
+    conn.commit()
+    conn.close()
+
+    shs.reset_spot_index()
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    shs.reset_spot_index()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_sh1_interval_and_delta_encodings(db):
+    month = shs.get_spot_history('Gold', '1m', now=NOW)
+    assert month['encoding'] == 'interval' and month['interval'] == 3600
+    points = _decode(month)
+    assert points[0] == (datetime(2026, 3, 8, 12), 2000.0)
+    assert points[-1] == (datetime(2026, 3, 10, 12), 2007.75)
+    by_time = dict(points)
+    assert by_time[datetime(2026, 3, 10, 5)] == 2000.0
+    assert by_time[datetime(2026, 3, 10, 6)] == 2010.25      # 06:40 snapshot closes the 06:00 bin
+    assert by_time[datetime(2026, 3, 10, 7)] == 2010.25      # carried forward
+    assert by_time[datetime(2026, 3, 10, 9)] == 2010.25
+    assert by_time[datetime(2026, 3, 10, 10)] == 2005.5
+    assert len(points) == 49 and month['closed'] is False
+
+    day = shs.get_spot_history('gold', '1d', now=NOW)
+    assert day['encoding'] == 'delta'
+    assert _decode(day) == [
+        (NOW - timedelta(days=1), 2000.0),
+        (NOW - timedelta(hours=5, minutes=50), 2010.25),
+        (NOW - timedelta(hours=2, minutes=10), 2005.5),
+        (NOW - timedelta(minutes=5), 2007.75),
+    ]
+
+    closed = shs.get_spot_history('gold', '1m', until=datetime(2026, 3, 10, 9, 45), now=NOW)
+    assert closed['closed'] is True and closed['end'] == '2026-03-10T09:00:00'
+    assert _decode(closed)[-1] == (datetime(2026, 3, 10, 8), 2010.25)
+
+    with pytest.raises(ValueError):
+        shs.get_spot_history('copper', '1d', now=NOW)
+    with pytest.raises(ValueError):
+        shs.get_spot_history('gold', '5y', now=NOW)
+
+
+def test_sh2_incremental_index(db):
+    shs.get_spot_history('gold', '1d', now=NOW)
+    assert shs._last_id == 5
+
+    conn = db()
+    conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', 2012.0, ?)",
+                 ((NOW - timedelta(minutes=1)).isoformat(),))
+    conn.commit()
+    conn.close()
+
+    real_read = shs._read_new_rows
+    watermarks = []
+
+    def spy(conn, after_id, now):
+        watermarks.append(after_id)
+        return real_read(conn, after_id, now)
+
+    with patch.object(shs, '_read_new_rows', side_effect=spy):
+        day = shs.get_spot_history('gold', '1d', now=NOW)
+    assert watermarks == [5]
+    assert day['last_id'] == 6 and _decode(day)[-1] == (NOW - timedelta(minutes=1), 2012.0)
+    assert len(shs._times['gold']) == 5
+
+
+def test_sh3_endpoint(db):
+    from app import app as flask_app
+
+    flask_app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'SECRET_KEY': 'test-spot-history'})
+    client = flask_app.test_client()
+
+    assert client.get('/api/spot/history?metal=copper').status_code == 400
+    assert client.get('/api/spot/history?metal=gold&range=10y').status_code == 400
+    assert client.get('/api/spot/history?metal=gold&until=yesterday').status_code == 400
+
+    live = client.get('/api/spot/history?metal=gold&range=1w')
+    body = live.get_json()
+    assert body['success'] is True and body['encoding'] == 'interval'
+    assert live.headers['Cache-Control'] == 'no-cache'
+    assert client.get('/api/spot/history?metal=gold&range=1w',
+                      headers={'If-None-Match': live.headers['ETag']}).status_code == 304
+
+    until = (datetime.now() - timedelta(days=1)).isoformat()
+    closed = client.get(f'/api/spot/history?metal=gold&range=1w&until={until}')
+    assert closed.get_json()['closed'] is True
+    assert closed.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_sh4_unsettled_and_truncated_windows(db):
+    recent = shs.get_spot_history('gold', '1w', until=NOW - timedelta(minutes=20), now=NOW)
+    assert recent['closed'] is False and recent['end'] == '2026-03-10T12:00:00'
+
+    settled = NOW - shs.SPOT_HISTORY_SETTLE
+    assert shs.get_spot_history('gold', '1d', until=settled, now=NOW)['closed'] is True
+    assert shs.get_spot_history('gold', '1y', until=settled, now=NOW)['closed'] is True
+    assert shs.get_spot_history('gold', '1y', until=NOW - timedelta(days=2), now=NOW)['closed'] is False
+
+    def locked_read(conn, after_id, now):
+        assert not shs._lock.locked()
+        return []
+
+    with patch.object(shs, '_read_new_rows', side_effect=locked_read) as read:
+        shs.get_spot_history('gold', '1d', now=NOW)
+    assert read.call_count == 1
+
+
+def test_sh3_payload_is_compact(db):
+    rng = random.Random(7)
+    conn = db()
+    price = 2000.0
+    rows = []
+    for i in range(30 * 24 * 12):   # 5-minute snapshots over 30 days
+        price = round(price + rng.uniform(-3, 3), 2)
+        rows.append(('gold', price, (NOW - timedelta(minutes=5 * i)).isoformat()))
+    conn.executemany("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+    payload = shs.get_spot_history('gold', '1m', now=NOW)
+    objects = [{'t': t.isoformat(), 'price': p} for t, p in _decode(payload)]
+    compact = json.dumps(payload, separators=(',', ':'))
+    verbose = json.dumps(objects, separators=(',', ':'))
+    assert len(compact) * 9 < len(verbose)
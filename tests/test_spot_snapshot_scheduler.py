@@ -124,6 +124,13 @@ CREATE TABLE IF NOT EXISTS bucket_price_history (
     price      REAL,
     timestamp  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+CREATE TABLE IF NOT EXISTS bucket_reference_series (
+    bucket_id INTEGER NOT NULL,
+    t         TEXT    NOT NULL,
+    price     REAL    NOT NULL,
+    PRIMARY KEY (bucket_id, t)
+);
 """
 
 FAKE_METAL = "xsstest"
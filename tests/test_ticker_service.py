@@ -0,0 +1,187 @@
+"""
+Buy page ticker service tests.
+
+TK1: Ticker prices and 24h changes match the per-bucket legacy computation
+     (get_best_ask_at_time with historical spot, current snapshot spot).
+TK2: Popularity is maintained incrementally; unlisted buckets are skipped.
+TK3: get_ticker serves the cache until it is stale; spot ticks refresh it.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ticker_service
+from services.pricing_service import get_effective_price
+from services.reference_price_service import get_best_ask_at_time, get_current_spots_from_snapshots
+
+
+SCHEMA = """
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    metal        TEXT,
+    product_type TEXT,
+    weight       TEXT,
+    mint         TEXT,
+    product_line TEXT,
+    coin_series  TEXT
+);
+
+CREATE TABLE listings (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id    INTEGER,
+    name           TEXT,
+    quantity       INTEGER DEFAULT 1,
+    price_per_coin REAL,
+    active         INTEGER DEFAULT 1,
+    pricing_mode   TEXT DEFAULT 'static',
+    spot_premium   REAL,
+    floor_price    REAL,
+    pricing_metal  TEXT
+);
+
+CREATE TABLE order_items (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id   INTEGER,
+    listing_id INTEGER,
+    quantity   INTEGER,
+    price_each REAL
+);
+
+CREATE TABLE spot_price_snapshots (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    metal     TEXT,
+    price_usd REAL,
+    as_of     TIMESTAMP
+);
+"""
+
+NOW = datetime.now()
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'ticker.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    for bucket_id, metal in ((1, 'Gold'), (2, 'Silver'), (3, 'Gold'), (4, 'Gold')):
+        conn.execute("INSERT INTO categories (id, bucket_id, metal, product_type, weight, mint, product_line) "
+                     "VALUES (?, ?, ?, 'Coin', '1 oz', 'US Mint', 'Eagle')", (bucket_id, bucket_id, metal))
+    listings = [
+        (1, 'Gold Eagle', 1, 0, 'premium_to_spot', 60, 1500, 'gold'),
+        (1, None, 1, 2600, 'static', None, None, None),
+        (2, None, 1, 0, 'premium_to_spot', 4, 20, 'silver'),
+        (3, 'Static gold', 1, 2400, 'static', None, None, None),
+        (4, 'Sold out', 0, 2300, 'static', None, None, None),
+    ]
+    conn.executemany("INSERT INTO listings (category_id, name, quantity, price_per_coin, pricing_mode, "
+                     "spot_premium, floor_price, pricing_metal) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", listings)
+    # Popularity: bucket 4 (no stock) > 2 > 1 > 3
+    for listing_id, n in ((5, 9), (3, 5), (1, 3), (4, 1)):
+        conn.executemany("INSERT INTO order_items (order_id, listing_id, quantity, price_each) VALUES (1, ?, 1, 1)",
+                         [(listing_id,)] * n)
+    # Spot history over the last 48h, with legacy space-separated rows mixed in
+    for hours, gold, silver in ((47, 2300, 28), (30, 2350, 29), (23, 2400, 30), (2, 2450, 31)):
+        as_of = NOW - timedelta(hours=hours)
+        gold_ts = as_of.strftime('%Y-%m-%d %H:%M:%S') if hours == 30 else as_of.isoformat()
+        conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('gold', ?, ?)", (gold, gold_ts))
+        conn.execute("INSERT INTO spot_price_snapshots (metal, price_usd, as_of) VALUES ('silver', ?, ?)",
+                     (silver, as_of.isoformat()))
+    conn.commit()
+    conn.close()
+
+    ticker_service.reset_ticker()
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    ticker_service.reset_ticker()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _legacy_item(conn, bucket_id):
+    rows = [dict(r) for r in conn.execute(
+        "SELECT l.*, c.metal, c.weight, c.product_type FROM listings l "
+        "JOIN categories c ON l.category_id = c.id "
+        "WHERE c.bucket_id = ? AND l.active = 1 AND l.quantity > 0", (bucket_id,))]
+    spots = get_current_spots_from_snapshots(conn)
+    current = round(min(get_effective_price(r, spots) for r in rows), 2)
+    past = get_best_ask_at_time(conn, bucket_id, rows, (NOW - timedelta(hours=24)).isoformat())
+    return current, round((current - past) / past * 100, 2)
+
+
+def test_tk1_prices_match_legacy_computation(db):
+    items = ticker_service.refresh_ticker(now=NOW)
+
+    assert [i['bucket_id'] for i in items] == [2, 1, 3]
+    conn = db()
+    for item in items:
+        assert (item['price'], item['change_pct']) == _legacy_item(conn, item['bucket_id'])
+    conn.close()
+
+    by_id = {i['bucket_id']: i for i in items}
+    assert by_id[1]['name'] == 'Gold Eagle'
+    assert by_id[2]['name'] == 'US Mint Eagle'
+    assert by_id[1]['price'] == 2450 + 60 and by_id[1]['change_pct'] == round(100 / 2410 * 100, 2)
+    assert by_id[3]['change_pct'] == 0.0
+
+
+def test_tk2_popularity_is_incremental(db):
+    ticker_service.refresh_ticker(now=NOW)
+    assert ticker_service._last_order_item_id == 18
+
+    conn = db()
+    conn.executemany("INSERT INTO order_items (order_id, listing_id, quantity, price_each) VALUES (2, 4, 1, 1)",
+                     [()] * 6)
+    conn.execute("UPDATE listings SET quantity = 3 WHERE id = 5")
+    conn.commit()
+    conn.close()
+
+    queries = []
+    real_build = ticker_service._update_popularity
+
+    def spy(c):
+        queries.append(ticker_service._last_order_item_id)
+        return real_build(c)
+
+    with patch.object(ticker_service, '_update_popularity', side_effect=spy):
+        items = ticker_service.refresh_ticker(now=NOW)
+
+    assert queries == [18]
+    assert ticker_service._order_counts == {4: 9, 2: 5, 1: 3, 3: 7}
+    assert [i['bucket_id'] for i in items] == [4, 3, 2, 1]
+
+
+def test_tk3_cache_and_spot_tick_refresh(db):
+    first = ticker_service.get_ticker()
+    assert len(first) == 3
+
+    with patch.object(ticker_service, '_build_ticker') as build:
+        assert ticker_service.get_ticker() == first
+        build.assert_not_called()
+
+        ticker_service._built_at = datetime.now() - ticker_service.TICKER_MAX_AGE - timedelta(seconds=1)
+        build.return_value = []
+        assert ticker_service.get_ticker() == []
+        build.assert_called_once()
+
+    from services import spot_snapshot_service
+    with patch.object(ticker_service, 'refresh_ticker') as refresh:
+        spot_snapshot_service._trigger_ticker_refresh()
+    refresh.assert_called_once_with()
@@ -93,6 +93,11 @@ CREATE TABLE IF NOT EXISTS ratings (
     ratee_id INTEGER,
     rating   REAL
 );
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id      INTEGER PRIMARY KEY,
+    rating_avg   REAL,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
 CREATE TABLE IF NOT EXISTS spot_price_snapshots (
     id         INTEGER   PRIMARY KEY AUTOINCREMENT,
     metal      TEXT      NOT NULL,
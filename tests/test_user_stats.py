@@ -0,0 +1,263 @@
+"""
+User stats tests.
+
+US1: rebuild_user_stats computes ratings, seller and buyer transaction
+     counts, repeat counterparties and top product lines; refresh_user_stats
+     recomputes only the given users; get_user_stats defaults missing rows.
+US2: The bucket seller modal reads the precomputed row per seller.
+US3: An approved cancellation refreshes the sellers' fulfilled counts.
+US4: Tracking forfeiture refreshes the sellers' fulfilled counts.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import user_stats_service as uss
+
+
+SCHEMA = """
+CREATE TABLE users (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    username            TEXT,
+    first_name          TEXT,
+    last_name           TEXT,
+    created_at          TIMESTAMP,
+    is_metex_guaranteed INTEGER DEFAULT 0
+);
+
+CREATE TABLE ratings (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    ratee_id INTEGER,
+    rating   INTEGER
+);
+
+CREATE TABLE categories (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_id    INTEGER,
+    product_line TEXT
+);
+
+CREATE TABLE listings (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id INTEGER,
+    seller_id   INTEGER,
+    quantity    INTEGER DEFAULT 0,
+    active      INTEGER DEFAULT 1
+);
+
+CREATE TABLE orders (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    buyer_id            INTEGER,
+    status              TEXT,
+    canceled_at         TIMESTAMP,
+    total_price         REAL,
+    cancellation_reason TEXT,
+    source_bid_id       INTEGER,
+    created_at          TIMESTAMP
+);
+
+CREATE TABLE order_items (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id   INTEGER,
+    listing_id INTEGER,
+    quantity   INTEGER DEFAULT 1
+);
+
+CREATE TABLE cancellation_requests (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id    INTEGER,
+    status      TEXT,
+    reason      TEXT,
+    resolved_at TIMESTAMP
+);
+
+CREATE TABLE cancellation_seller_responses (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id   INTEGER,
+    seller_id    INTEGER,
+    response     TEXT,
+    responded_at TIMESTAMP
+);
+
+CREATE TABLE seller_order_tracking (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id        INTEGER,
+    seller_id       INTEGER,
+    tracking_number TEXT
+);
+
+CREATE TABLE addresses (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    city    TEXT,
+    state   TEXT
+);
+
+CREATE TABLE messages (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id    INTEGER,
+    sender_id   INTEGER,
+    receiver_id INTEGER,
+    timestamp   TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def flask_app():
+    # Imported before the database is patched so app startup runs against
+    # the regular test database
+    from app import app
+    app.config.update({'TESTING': True, 'SECRET_KEY': 'test-user-stats', 'WTF_CSRF_ENABLED': False})
+    return app
+
+
+@pytest.fixture
+def db():
+    import database
+
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, 'user_stats.db')
+
+    def get_test_conn():
+        c = sqlite3.connect(db_path, timeout=30)
+        c.row_factory = sqlite3.Row
+        return c
+
+    conn = get_test_conn()
+    conn.executescript(SCHEMA)
+    uss.create_user_stats_table(conn)
+    conn.execute("INSERT INTO users (id, username, first_name, last_name, created_at) VALUES "
+                 "(1, 'alice', 'Alice', 'Smith', '2024-01-15'), (2, 'bob', NULL, NULL, NULL), "
+                 "(3, 'carol', NULL, NULL, NULL)")
+    conn.execute("INSERT INTO ratings (ratee_id, rating) VALUES (1, 5), (1, 4), (2, 3)")
+    conn.executemany("INSERT INTO categories (id, bucket_id, product_line) VALUES (?, ?, ?)",
+                     [(1, 10, 'Eagle'), (2, 11, 'Maple'), (3, 12, 'Buffalo'), (4, 13, 'Kookaburra')])
+    conn.executemany("INSERT INTO listings (id, category_id, seller_id) VALUES (?, ?, 1)",
+                     [(1, 1), (2, 2), (3, 3), (4, 4)])
+    # bob buys from alice twice (one delivered, one canceled), carol once
+    conn.executemany("INSERT INTO orders (id, buyer_id, status, canceled_at) VALUES (?, ?, ?, ?)", [
+        (1, 2, 'Delivered', None),
+        (2, 2, 'Canceled', '2025-01-01'),
+        (3, 3, 'Complete', None),
+    ])
+    conn.executemany("INSERT INTO order_items (order_id, listing_id) VALUES (?, ?)",
+                     [(1, 1), (1, 2), (2, 1), (3, 2), (3, 3), (3, 4)])
+    conn.commit()
+    conn.close()
+
+    with patch.object(database, 'get_db_connection', get_test_conn):
+        yield get_test_conn
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_us1_rebuild_and_refresh(db):
+    conn = db()
+    assert uss.rebuild_user_stats(conn) == 3
+    conn.commit()
+
+    stats = uss.get_user_stats(conn, [1, 2, 3, 99])
+    alice, bob, carol = stats[1], stats[2], stats[3]
+    assert (alice['rating_avg'], alice['rating_count']) == (4.5, 2)
+    assert (alice['seller_transaction_count'], alice['seller_order_count'],
+            alice['seller_fulfilled_count']) == (2, 3, 2)
+    assert (alice['seller_buyer_count'], alice['seller_repeat_buyer_count']) == (2, 1)
+    # Eagle and Maple sold twice, Buffalo and Kookaburra once; ties go by name
+    assert alice['top_product_lines'] == ['Eagle', 'Maple', 'Buffalo']
+    assert (bob['buyer_transaction_count'], bob['buyer_seller_count'],
+            bob['buyer_repeat_seller_count']) == (1, 1, 1)
+    assert (carol['buyer_transaction_count'], carol['buyer_repeat_seller_count']) == (1, 0)
+    assert stats[99]['rating_avg'] is None and stats[99]['rating_count'] == 0
+    assert uss.repeat_pct(bob['buyer_repeat_seller_count'], bob['buyer_seller_count']) == 100
+
+    conn.execute("INSERT INTO ratings (ratee_id, rating) VALUES (1, 3), (2, 5)")
+    conn.commit()
+    uss.refresh_user_stats_for([1])
+    stats = uss.get_user_stats(conn, [1, 2])
+    assert (stats[1]['rating_avg'], stats[1]['rating_count']) == (4.0, 3)
+    assert stats[2]['rating_count'] == 1
+
+    conn.execute("INSERT INTO orders (id, buyer_id, status) VALUES (4, 3, 'Delivered')")
+    conn.execute("INSERT INTO order_items (order_id, listing_id) VALUES (4, 2)")
+    conn.commit()
+    uss.refresh_order_user_stats(4)
+    stats = uss.get_user_stats(conn, [1, 3])
+    assert stats[1]['seller_repeat_buyer_count'] == 2 and stats[1]['top_product_lines'][0] == 'Maple'
+    assert (stats[3]['buyer_transaction_count'], stats[3]['buyer_repeat_seller_count']) == (2, 1)
+    conn.close()
+
+
+def test_us2_bucket_sellers_read_stats(flask_app, db):
+    import core.blueprints.buy.sellers_api as sellers_api
+
+    conn = db()
+    uss.rebuild_user_stats(conn)
+    conn.commit()
+    conn.close()
+
+    seller_stats = {1: {'lowest_price': 2000.0, 'avg_price': 2050.0, 'total_qty': 3}}
+    with patch.object(sellers_api, 'get_db_connection', db), \
+            patch.object(sellers_api, 'get_bucket_seller_stats', return_value=seller_stats):
+        sellers = flask_app.test_client().get('/api/bucket/10/sellers').get_json()
+
+    assert len(sellers) == 1
+    alice = sellers[0]
+    assert (alice['display_name'], alice['member_since']) == ('Alice Smith', 'Jan 2024')
+    assert (alice['rating'], alice['num_reviews'], alice['transaction_count']) == (4.5, 2, 2)
+    assert alice['repeat_buyers_pct'] == 50 and alice['specializations'] == ['Eagle', 'Maple', 'Buffalo']
+    assert alice['is_metex_guaranteed'] is False and alice['lowest_price'] == 2000.0
+
+
+def test_us3_cancellation_refreshes_stats(flask_app, db):
+    import routes.cancellation_routes as cancellation_routes
+
+    conn = db()
+    conn.execute("INSERT INTO orders (id, buyer_id, status, total_price) VALUES (4, 3, 'Pending', 100)")
+    conn.execute("INSERT INTO order_items (order_id, listing_id, quantity) VALUES (4, 3, 1)")
+    conn.execute("INSERT INTO cancellation_requests (id, order_id, status, reason) VALUES (1, 4, 'pending', 'oops')")
+    conn.execute("INSERT INTO cancellation_seller_responses (request_id, seller_id) VALUES (1, 1)")
+    uss.rebuild_user_stats(conn)
+    conn.commit()
+    assert uss.get_user_stats(conn, [1])[1]['seller_fulfilled_count'] == 3
+
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    with patch.object(cancellation_routes, 'get_db_connection', db), \
+            patch.object(cancellation_routes, 'create_notification'):
+        resp = client.post('/api/orders/4/cancel/respond', json={'response': 'approved'})
+
+    assert resp.get_json()['final_status'] == 'approved'
+    stats = uss.get_user_stats(conn, [1])[1]
+    assert (stats['seller_order_count'], stats['seller_fulfilled_count']) == (4, 2)
+    conn.close()
+
+
+def test_us4_forfeiture_refreshes_stats(db):
+    from services import tracking_forfeiture_service as tfs
+
+    conn = db()
+    conn.execute("INSERT INTO orders (id, buyer_id, status, created_at) VALUES (4, 3, 'Pending', '2020-01-01 00:00:00')")
+    conn.execute("INSERT INTO order_items (order_id, listing_id) VALUES (4, 3)")
+    uss.rebuild_user_stats(conn)
+    conn.commit()
+    assert uss.get_user_stats(conn, [1])[1]['seller_fulfilled_count'] == 3
+
+    with patch('services.system_settings_service.get_tracking_forfeit_window', return_value=3600), \
+            patch.object(tfs, '_apply_forfeiture_consequences'), \
+            patch.object(tfs, 'refresh_order_user_stats', side_effect=uss.refresh_order_user_stats) as refresh:
+        assert tfs.check_and_forfeit_expired_orders(conn) == [4]
+
+    refresh.assert_called_once_with(4)
+    # Forfeited orders are not fulfilled
+    stats = uss.get_user_stats(conn, [1])[1]
+    assert (stats['seller_order_count'], stats['seller_fulfilled_count']) == (4, 2)
+    conn.close()
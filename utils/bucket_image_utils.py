@@ -22,14 +22,15 @@ def get_bucket_cover_url(category_bucket_id: Optional[int]) -> Optional[str]:
     Returns a URL path relative to the site root (e.g.
     "/static/uploads/bucket_images/web/abc123_web.jpg") or None.
 
-    Designed to be called from Jinja templates as a global function.
+    Designed to be called from Jinja templates as a global function; served
+    from the in-process cover cache, so a page of tiles costs at most one query.
     Safe — never raises; returns None on any error.
     """
     if not category_bucket_id:
         return None
     try:
-        from services.bucket_image_service import get_active_image_url_by_category_bucket_id
-        web_path = get_active_image_url_by_category_bucket_id(category_bucket_id)
+        from services.bucket_image_service import get_cached_cover_path
+        web_path = get_cached_cover_path(int(category_bucket_id))
         if not web_path:
             return None
         # web_path is relative to static/ e.g. "uploads/bucket_images/web/abc_web.jpg"
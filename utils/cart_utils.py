@@ -192,19 +192,13 @@ def get_cart_items(conn):
                 categories.purity,
                 categories.series_variant,
                 categories.coin_series,
-                (
-                    SELECT ROUND(AVG(rating), 2)
-                    FROM ratings
-                    WHERE ratee_id = users.id
-                ) AS seller_rating,
-                (
-                    SELECT COUNT(*) FROM ratings
-                    WHERE ratee_id = users.id
-                ) AS seller_rating_count
+                ROUND(us.rating_avg, 2) AS seller_rating,
+                COALESCE(us.rating_count, 0) AS seller_rating_count
             FROM cart
             JOIN listings   ON cart.listing_id = listings.id
             JOIN categories ON listings.category_id = categories.id
             JOIN users      ON listings.seller_id = users.id
+            LEFT JOIN user_stats us ON us.user_id = users.id
             WHERE cart.user_id = ?
               AND listings.active = 1
               AND listings.quantity > 0
@@ -257,18 +251,12 @@ def get_cart_items(conn):
                 categories.purity,
                 categories.series_variant,
                 categories.coin_series,
-                (
-                    SELECT ROUND(AVG(rating), 2)
-                    FROM ratings
-                    WHERE ratee_id = users.id
-                ) AS seller_rating,
-                (
-                    SELECT COUNT(*) FROM ratings
-                    WHERE ratee_id = users.id
-                ) AS seller_rating_count
+                ROUND(us.rating_avg, 2) AS seller_rating,
+                COALESCE(us.rating_count, 0) AS seller_rating_count
             FROM listings
             JOIN categories ON listings.category_id = categories.id
             JOIN users      ON listings.seller_id = users.id
+            LEFT JOIN user_stats us ON us.user_id = users.id
             WHERE listings.id IN ({placeholders})
               AND listings.active = 1
               AND listings.quantity > 0
@@ -317,17 +305,14 @@ def get_cart_data(conn):
                 categories.year,
                 categories.finish,
                 categories.grade,
-                (
-                    SELECT ROUND(AVG(rating), 2)
-                    FROM ratings
-                    WHERE ratee_id = users.id
-                ) AS seller_rating,
+                ROUND(us.rating_avg, 2) AS seller_rating,
                 listings.is_isolated,
                 (SELECT file_path FROM listing_photos WHERE listing_id = listings.id LIMIT 1) AS photo_path
             FROM cart
             JOIN listings ON cart.listing_id = listings.id
             JOIN categories ON listings.category_id = categories.id
             JOIN users ON listings.seller_id = users.id
+            LEFT JOIN user_stats us ON us.user_id = users.id
             WHERE cart.user_id = ?
               AND listings.active = 1
               AND listings.quantity > 0
@@ -367,16 +352,13 @@ def get_cart_data(conn):
                 categories.year,
                 categories.finish,
                 categories.grade,
-                (
-                    SELECT ROUND(AVG(rating), 2)
-                    FROM ratings
-                    WHERE ratee_id = users.id
-                ) AS seller_rating,
+                ROUND(us.rating_avg, 2) AS seller_rating,
                 listings.is_isolated,
                 (SELECT file_path FROM listing_photos WHERE listing_id = listings.id LIMIT 1) AS photo_path
             FROM listings
             JOIN categories ON listings.category_id = categories.id
             JOIN users ON listings.seller_id = users.id
+            LEFT JOIN user_stats us ON us.user_id = users.id
             WHERE listings.id IN ({placeholders})
               AND listings.active = 1
               AND listings.quantity > 0
@@ -3,6 +3,59 @@ Unified Category Management Module
 Handles category lookup, creation, and bucket assignment for both Sell and Edit flows
 """
 
+import hashlib
+
+from routes.category_options import note_category_values
+
+# Every category spec except year.  Categories sharing a spec_key are the same
+# product in different years — the equivalence class used by Random Year
+# matching and the "all years" bucket views.
+SPEC_KEY_FIELDS = (
+    'metal', 'product_line', 'product_type', 'weight', 'purity', 'mint',
+    'finish', 'grade', 'condition_category', 'series_variant',
+)
+
+
+def _spec_value(spec, field):
+    try:
+        value = spec[field]
+    except (KeyError, IndexError):
+        return ''
+    if value is None:
+        return ''
+    return str(value).strip().lower()
+
+
+def compute_spec_key(spec):
+    """
+    Return the normalised spec_key for a category spec (dict or DB row).
+
+    Values are stripped and lower-cased and NULL/missing fields count as empty,
+    so the key is stable across casing and whitespace differences in the
+    dropdown data.
+    """
+    raw = '\x1f'.join(_spec_value(spec, f) for f in SPEC_KEY_FIELDS)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def get_sibling_bucket_ids(conn, category_row):
+    """
+    Return the bucket_ids of all non-isolated categories sharing category_row's
+    spec_key (same specs, any year).  Falls back to the row's own bucket_id.
+    """
+    try:
+        spec_key = category_row['spec_key']
+    except (KeyError, IndexError):
+        spec_key = None
+    spec_key = spec_key or compute_spec_key(category_row)
+
+    rows = conn.execute(
+        'SELECT DISTINCT bucket_id FROM categories WHERE spec_key = ? AND is_isolated = 0',
+        (spec_key,)
+    ).fetchall()
+    return [row['bucket_id'] for row in rows] or [category_row['bucket_id']]
+
+
 def get_or_create_category(conn, category_spec):
     """
     Find existing category or create new one with proper bucket_id assignment.
@@ -78,6 +131,20 @@ def get_or_create_category(conn, category_spec):
         bucket_id = new_bucket['new_bucket_id']
 
     # 4. Insert new category with proper bucket_id
+    category_id = _insert_category(cursor, bucket_id, category_spec)
+    note_category_values(conn, category_spec)
+    return category_id
+
+
+def _insert_category(cursor, bucket_id, category_spec):
+    """Insert a non-isolated category row and return its id."""
+    metal = category_spec['metal']
+    product_type = category_spec['product_type']
+    weight = category_spec['weight']
+    purity = category_spec['purity']
+    year = category_spec['year']
+    grade = category_spec['grade']
+
     # Build human-readable name
     parts = [year, metal, product_type, weight, purity, grade]
     category_name = " ".join([p for p in parts if p and p != "None"])
@@ -97,29 +164,109 @@ def get_or_create_category(conn, category_spec):
             finish,
             grade,
             condition_category,
-            series_variant
+            series_variant,
+            spec_key
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''',
         (
             bucket_id,
             category_name,
             metal,
-            product_line,
+            category_spec['product_line'],
             product_type,
             weight,
             purity,
-            mint,
+            category_spec['mint'],
             year,
-            finish,
+            category_spec['finish'],
             grade,
-            condition_category,
-            series_variant
+            category_spec.get('condition_category'),
+            category_spec.get('series_variant'),
+            compute_spec_key(category_spec)
         )
     )
 
-    category_id = cursor.lastrowid
-    return category_id
+    return cursor.lastrowid
+
+
+# Exact-match and bucket-match keys used by get_or_create_category
+_CATEGORY_KEY_FIELDS = (
+    'metal', 'product_line', 'product_type', 'weight', 'purity', 'mint',
+    'year', 'finish', 'grade', 'condition_category', 'series_variant',
+)
+_BUCKET_KEY_FIELDS = (
+    'metal', 'product_line', 'product_type', 'weight', 'purity', 'mint',
+    'year', 'condition_category', 'series_variant',
+)
+# Compared with IS NOT DISTINCT FROM there; every other key field uses `=`,
+# which never matches NULL
+_NULL_SAFE_KEY_FIELDS = ('condition_category', 'series_variant')
+
+
+class CategorySpecIndex:
+    """
+    In-memory equivalent of get_or_create_category for batch callers.
+
+    Loads every non-isolated category once, then resolves specs with dict
+    lookups.  Misses are inserted with the same bucket assignment rules and
+    added to the index, so a batch never issues more than one lookup query.
+    Like the SQL lookups, a key with a NULL field outside condition_category
+    and series_variant never matches, so such specs always get a new row.
+    Not safe to share across connections or requests.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.categories = {}
+        self.buckets = {}
+        self.created = 0
+        rows = self.cursor.execute(
+            'SELECT * FROM categories WHERE is_isolated = 0 ORDER BY id'
+        ).fetchall()
+        for row in rows:
+            category_key = self._key(row, _CATEGORY_KEY_FIELDS)
+            if category_key is not None:
+                self.categories.setdefault(category_key, (row['id'], row['bucket_id']))
+            bucket_key = self._key(row, _BUCKET_KEY_FIELDS)
+            if bucket_key is not None:
+                self.buckets.setdefault(bucket_key, row['bucket_id'])
+        max_row = self.cursor.execute(
+            'SELECT COALESCE(MAX(bucket_id), 0) AS max_bucket_id FROM categories'
+        ).fetchone()
+        self.next_bucket_id = max_row['max_bucket_id'] + 1
+
+    @staticmethod
+    def _key(spec, fields):
+        """Lookup key, or None when it can never match (see class docstring)."""
+        if any(spec[f] is None for f in fields if f not in _NULL_SAFE_KEY_FIELDS):
+            return None
+        return tuple(spec[f] for f in fields)
+
+    def resolve(self, category_spec):
+        """Return (category_id, bucket_id) for the spec, creating the category if needed."""
+        spec = dict(category_spec)
+        spec.setdefault('condition_category', None)
+        spec.setdefault('series_variant', None)
+        category_key = self._key(spec, _CATEGORY_KEY_FIELDS)
+        if category_key is not None and category_key in self.categories:
+            return self.categories[category_key]
+
+        bucket_key = self._key(spec, _BUCKET_KEY_FIELDS)
+        bucket_id = self.buckets.get(bucket_key) if bucket_key is not None else None
+        if bucket_id is None:
+            bucket_id = self.next_bucket_id
+            self.next_bucket_id += 1
+            if bucket_key is not None:
+                self.buckets[bucket_key] = bucket_id
+
+        category_id = _insert_category(self.cursor, bucket_id, spec)
+        note_category_values(self.conn, spec)
+        if category_key is not None:
+            self.categories[category_key] = (category_id, bucket_id)
+        self.created += 1
+        return category_id, bucket_id
 
 
 def validate_category_specification(category_spec, valid_options):
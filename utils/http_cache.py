@@ -0,0 +1,58 @@
+"""
+Conditional GET helpers for polled JSON endpoints.
+
+Endpoints compute a cheap ETag from change markers (watermarks) before doing
+any heavy work, answer 304 when the client already has that version, and
+otherwise attach the ETag to the full response.
+
+Usage:
+    from utils.http_cache import compute_etag, etag_matches, not_modified, with_etag
+
+    etag = compute_etag('bucket_reference', bucket_id, time_range, *watermarks)
+    if etag_matches(etag):
+        return not_modified(etag)
+    ...
+    return with_etag(jsonify(payload), etag)
+
+Responses carry "Cache-Control: no-cache" so browsers revalidate every poll;
+fetch() then sees the cached body on a 304 without any client-side changes.
+Responses that can never change (closed history windows) use with_max_age()
+instead and are cached without revalidation.
+"""
+
+import hashlib
+
+from flask import make_response, request
+
+
+def compute_etag(*parts):
+    """Stable ETag for a sequence of watermark values (None-safe)."""
+    raw = '\x1f'.join('' if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def etag_matches(etag):
+    """True when the request's If-None-Match already names `etag`."""
+    return etag in request.if_none_match
+
+
+def _cache_headers(response, etag, private):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return response
+
+
+def not_modified(etag, private=False):
+    """Empty 304 response for `etag`."""
+    return _cache_headers(make_response('', 304), etag, private)
+
+
+def with_etag(response, etag, private=False):
+    """Attach `etag` and revalidation headers to a full response."""
+    return _cache_headers(response, etag, private)
+
+
+def with_max_age(response, max_age, immutable=False):
+    """Mark a response as publicly cacheable for `max_age` seconds."""
+    response.headers['Cache-Control'] = f"public, max-age={int(max_age)}" + (', immutable' if immutable else '')
+    return response